@@ -0,0 +1,37 @@
+"""create hourly digital content play counts table
+
+Revision ID: 3c4d1e9a7b2f
+Revises: ab56e2d974a6
+Create Date: 2022-07-28 10:12:41.307215
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3c4d1e9a7b2f'
+down_revision = 'ab56e2d974a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "hourly_digital_content_play_counts",
+        sa.Column("digital_content_id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("hourly_timestamp", sa.DateTime(), primary_key=True, nullable=False),
+        sa.Column("play_count", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_hourly_digital_content_play_counts_hourly_timestamp",
+        "hourly_digital_content_play_counts",
+        ["hourly_timestamp"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_hourly_digital_content_play_counts_hourly_timestamp",
+        table_name="hourly_digital_content_play_counts",
+    )
+    op.drop_table("hourly_digital_content_play_counts")
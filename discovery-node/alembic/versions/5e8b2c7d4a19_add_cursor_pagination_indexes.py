@@ -0,0 +1,56 @@
+"""add cursor pagination indexes
+
+Revision ID: 5e8b2c7d4a19
+Revises: 3c4d1e9a7b2f
+Create Date: 2022-08-02 14:21:08.519274
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e8b2c7d4a19"
+down_revision = "3c4d1e9a7b2f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cursor pagination of a user's reposts and saves seeks on
+    # (created_at, item id) from the cursor, latest first.
+    # Built concurrently, which can't run in a transaction, so that indexing
+    # does not block on writes to the tables while the indexes are built
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "repost_user_id_created_at_idx",
+            "reposts",
+            ["user_id", sa.text("created_at DESC"), sa.text("repost_item_id DESC")],
+            postgresql_where=sa.text("is_current IS TRUE AND is_delete IS FALSE"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "save_user_id_created_at_idx",
+            "saves",
+            [
+                "user_id",
+                "save_type",
+                sa.text("created_at DESC"),
+                sa.text("save_item_id DESC"),
+            ],
+            postgresql_where=sa.text("is_current IS TRUE AND is_delete IS FALSE"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "save_user_id_created_at_idx",
+            table_name="saves",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "repost_user_id_created_at_idx",
+            table_name="reposts",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,31 @@
+"""index related landlord user id
+
+Revision ID: 7d2f9e4b1c6a
+Revises: 5e8b2c7d4a19
+Create Date: 2022-08-04 09:47:15.206318
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7d2f9e4b1c6a"
+down_revision = "5e8b2c7d4a19"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Related landlords are rescored by related_landlord_user_id as the
+    # followers of landlords change
+    op.create_index(
+        op.f("ix_related_landlords_related_landlord_user_id"),
+        "related_landlords",
+        ["related_landlord_user_id"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_related_landlords_related_landlord_user_id"),
+        table_name="related_landlords",
+    )
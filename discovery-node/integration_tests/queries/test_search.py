@@ -14,6 +14,7 @@ from src.queries.search_es import search_es_full
 from src.queries.search_queries import (
     content_list_search_query,
     digital_content_search_query,
+    perform_search_query,
     user_search_query,
 )
 from src.utils.db_session import get_db
@@ -612,3 +613,40 @@ def test_get_internal_albums(app_module):
     es_res = search_es_full(search_args)
     assert len(es_res["albums"]) == 1
     assert len(es_res["saved_albums"]) == 1
+
+
+def test_perform_search_query(app_module):
+    """Tests that all search types are found on one session, with their owners"""
+    with app_module.app_context():
+        db = get_db()
+
+    search_args = {
+        "search_str": "the digital_content",
+        "limit": 10,
+        "offset": 0,
+        "is_auto_complete": False,
+        "current_user_id": 1,
+        "only_downloadable": False,
+    }
+    res = perform_search_query(db, ["digitalContents", "users"], search_args)
+    with db.scoped_session() as session:
+        digital_contents = digital_content_search_query(
+            session, "the digital_content", 10, 0, False, 1, False
+        )
+    assert [
+        digital_content["digital_content_id"]
+        for digital_content in res["digitalContents"]["all"]
+    ] == [
+        digital_content["digital_content_id"]
+        for digital_content in digital_contents["all"]
+    ]
+    assert len(res["digitalContents"]["saved"]) == 1
+    for digital_content in res["digitalContents"]["all"]:
+        assert digital_content["user"]["user_id"] == digital_content["owner_id"]
+
+    search_args["search_str"] = "album"
+    res = perform_search_query(db, ["content_lists", "albums"], search_args)
+    assert len(res["albums"]["all"]) == 1
+    assert len(res["albums"]["saved"]) == 1
+    album = res["albums"]["all"][0]
+    assert album["user"]["user_id"] == album["content_list_owner_id"]
@@ -2,9 +2,15 @@ from datetime import datetime, timedelta
 
 from src.models.indexing.block import Block
 from src.models.social.aggregate_plays import AggregatePlay
+from src.models.social.hourly_digital_content_play_counts import (
+    HourlyDigitalContentPlayCount,
+)
 from src.models.social.play import Play
 from src.models.digitalContents.digital_content import DigitalContent
 from src.tasks.generate_trending import get_listen_counts
+from src.tasks.index_hourly_play_counts import (
+    _index_hourly_digital_content_play_counts,
+)
 
 
 # Setup trending from simplified metadata
@@ -85,7 +91,9 @@ def setup_trending(db, date):
                 aggregate_plays[item_id] = 1
 
             play = Play(
-                id=i, play_item_id=item_id, created_at=play_meta.get("created_at", date)
+                id=i + 1,
+                play_item_id=item_id,
+                created_at=play_meta.get("created_at", date),
             )
             session.add(play)
         for i, count in aggregate_plays.items():
@@ -172,3 +180,40 @@ def test_get_listen_counts_all_time(postgres_mock_db):
         {"digital_content_id": 2, "listens": 3, "created_at": date},
     ]
     validate_results(res, expected)
+
+
+def test_get_listen_counts_from_hourly_buckets(postgres_mock_db):
+    """Test that windowed listens summed from the hourly buckets and the plays not
+    yet bucketed match the plays in the window"""
+    # setup
+    date = datetime.now()
+    setup_trending(postgres_mock_db, date)
+    with postgres_mock_db.scoped_session() as session:
+        _index_hourly_digital_content_play_counts(session)
+        # plays added after the buckets were last updated
+        session.add(Play(id=20, play_item_id=0, created_at=date))
+        session.add(Play(id=21, play_item_id=2, created_at=date - timedelta(weeks=2)))
+
+    # run
+    with postgres_mock_db.scoped_session() as session:
+        assert session.query(HourlyDigitalContentPlayCount).count() > 0
+        week_res = get_listen_counts(session, "week", None, 10, 0)
+        year_res = get_listen_counts(session, "year", None, 10, 0)
+
+    # validate
+    validate_results(
+        week_res,
+        [
+            {"digital_content_id": 0, "listens": 3, "created_at": date},
+            {"digital_content_id": 1, "listens": 2, "created_at": date},
+            {"digital_content_id": 2, "listens": 1, "created_at": date},
+        ],
+    )
+    validate_results(
+        year_res,
+        [
+            {"digital_content_id": 0, "listens": 3, "created_at": date},
+            {"digital_content_id": 1, "listens": 2, "created_at": date},
+            {"digital_content_id": 2, "listens": 4, "created_at": date},
+        ],
+    )
@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from integration_tests.challenges.index_helpers import AttrDict
+from integration_tests.utils import populate_mock_db
+from sqlalchemy import event
+from src.challenges.challenge_event_bus import ChallengeEventBus
+from src.database_task import DatabaseTask
+from src.models.content_lists.content_list import ContentList
+from src.models.indexing.block import Block
+from src.models.users.user import User
+from src.tasks.content_lists import content_list_state_update
+from src.tasks.users import user_state_update
+from src.utils.content_list_event_constants import (
+    content_list_event_types_arr,
+    content_list_event_types_lookup,
+)
+from src.utils.db_session import get_db
+from src.utils.user_event_constants import user_event_types_arr, user_event_types_lookup
+from web3 import Web3
+
+NUM_ENTITIES = 100
+block_hash = b"0x8f19da326900d171642af08e6770eedd83509c6c44f6855c98e6a752844e2521"
+
+
+class TestTransaction:
+    def __init__(self, i):
+        self.transactionHash = Web3.toBytes(i)
+
+
+def add_heavy_block(session):
+    session.add(
+        Block(
+            blockhash=Web3.toHex(block_hash),
+            parenthash=Web3.toHex(block_hash),
+            number=NUM_ENTITIES + 1,
+            is_current=False,
+        )
+    )
+    session.flush()
+
+
+@contextmanager
+def count_selects(db, table_name):
+    """Counts the row selects made against table_name"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if f"FROM {table_name}" in statement and "count(" not in statement:
+            statements.append(statement)
+
+    event.listen(db._engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db._engine, "before_cursor_execute", before_cursor_execute)
+
+
+def get_heavy_block_events(event_types_arr, event_type, events_args):
+    """Returns the events of a block with one tx per event, in the order they are
+    decoded per tx and event type"""
+    events = []
+    for event_args in events_args:
+        for tx_event_type in event_types_arr:
+            events.append(
+                [AttrDict({"blockHash": block_hash, "args": AttrDict(event_args)})]
+                if tx_event_type == event_type
+                else []
+            )
+    return events
+
+
+@mock.patch("src.challenges.challenge_event_bus.ChallengeEventBus", autospec=True)
+def test_user_state_update_loads_users_once(bus_mock: mock.MagicMock, app, mocker):
+    """Tests that a block updating many users looks them up in a single query"""
+    with app.app_context():
+        db = get_db()
+    populate_mock_db(
+        db, {"users": [{"user_id": i} for i in range(1, NUM_ENTITIES + 1)]}
+    )
+    update_task = DatabaseTask(web3=Web3(), challenge_event_bus=bus_mock)
+
+    mocker.patch(
+        "src.tasks.users.get_user_events_tx",
+        side_effect=get_heavy_block_events(
+            user_event_types_arr,
+            user_event_types_lookup["update_bio"],
+            [{"_userId": i, "_bio": f"bio {i}"} for i in range(1, NUM_ENTITIES + 1)],
+        ),
+        autospec=True,
+    )
+
+    with db.scoped_session() as session, count_selects(db, "users") as selects:
+        add_heavy_block(session)
+        total_changes, user_ids = user_state_update(
+            update_task,
+            update_task,
+            session,
+            [TestTransaction(i) for i in range(NUM_ENTITIES)],
+            NUM_ENTITIES + 1,
+            1,
+            block_hash,
+            {},
+        )
+        assert total_changes == NUM_ENTITIES
+        assert len(user_ids) == NUM_ENTITIES
+        assert len(selects) == 1
+
+    with db.scoped_session() as session:
+        user = session.query(User).filter_by(user_id=1, is_current=True).one()
+        assert user.bio == "bio 1"
+
+
+def test_content_list_state_update_loads_content_lists_once(app, mocker):
+    """Tests that a block updating many contentLists looks them up in a single query"""
+    with app.app_context():
+        db = get_db()
+    populate_mock_db(
+        db,
+        {
+            "users": [{"user_id": i} for i in range(1, NUM_ENTITIES + 1)],
+            "content_lists": [
+                {"content_list_id": i} for i in range(1, NUM_ENTITIES + 1)
+            ],
+        },
+    )
+    update_task = DatabaseTask(
+        web3=Web3(), challenge_event_bus=mocker.create_autospec(ChallengeEventBus)
+    )
+
+    mocker.patch(
+        "src.tasks.content_lists.get_content_list_events_tx",
+        side_effect=get_heavy_block_events(
+            content_list_event_types_arr,
+            content_list_event_types_lookup["content_list_name_updated"],
+            [
+                {"_contentListId": i, "_updatedContentListName": f"name {i}"}
+                for i in range(1, NUM_ENTITIES + 1)
+            ],
+        ),
+        autospec=True,
+    )
+
+    with db.scoped_session() as session, count_selects(db, "content_lists") as selects:
+        add_heavy_block(session)
+        total_changes, content_list_ids = content_list_state_update(
+            update_task,
+            update_task,
+            session,
+            [TestTransaction(i) for i in range(NUM_ENTITIES)],
+            NUM_ENTITIES + 1,
+            1,
+            block_hash,
+            {},
+        )
+        assert total_changes == NUM_ENTITIES
+        assert len(content_list_ids) == NUM_ENTITIES
+        assert len(selects) == 1
+
+    with db.scoped_session() as session:
+        content_list = (
+            session.query(ContentList)
+            .filter_by(content_list_id=1, is_current=True)
+            .one()
+        )
+        assert content_list.content_list_name == "name 1"
@@ -5,9 +5,13 @@ from typing import List
 from integration_tests.utils import populate_mock_db
 from sqlalchemy.sql.expression import desc
 from src.models.users.related_landlord import RelatedLandlord
-from src.queries.get_related_landlords_minhash import update_related_landlord_minhash
+from src.queries.get_related_landlords_minhash import (
+    checkpoint_key,
+    update_related_landlord_minhash,
+)
 from src.utils.config import shared_config
 from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
 
 REDIS_URL = shared_config["redis"]["url"]
 
@@ -17,6 +21,8 @@ logger = logging.getLogger(__name__)
 def test_index_related_landlords(app):
     with app.app_context():
         db = get_db()
+        redis = get_redis()
+    redis.delete(checkpoint_key)
 
     entities = {
         "users": [{}] * 7,
@@ -42,7 +48,7 @@ def test_index_related_landlords(app):
     populate_mock_db(db, entities)
 
     with db.scoped_session() as session:
-        update_related_landlord_minhash(session)
+        update_related_landlord_minhash(session, redis)
 
         results: List[RelatedLandlord] = list(
             session.query(RelatedLandlord)
@@ -72,7 +78,7 @@ def test_index_related_landlords(app):
     )
 
     with db.scoped_session() as session:
-        update_related_landlord_minhash(session)
+        update_related_landlord_minhash(session, redis)
 
         results: List[RelatedLandlord] = (
             session.query(RelatedLandlord)
@@ -0,0 +1,82 @@
+from src.models.indexing.block import Block
+from src.tasks.index import get_revert_blocks, is_block_hash_indexed
+from src.utils.db_session import get_db
+
+
+class TestBlock:
+    def __init__(self, block_hash, parent_hash):
+        self.hash = block_hash
+        self.parentHash = parent_hash
+
+
+def populate_block_chain(db, num_blocks):
+    with db.scoped_session() as session:
+        parent_hash = "0x0"
+        for i in range(1, num_blocks + 1):
+            session.add(
+                Block(
+                    blockhash=hex(i),
+                    number=i,
+                    parenthash=parent_hash,
+                    is_current=(i == num_blocks),
+                )
+            )
+            parent_hash = hex(i)
+
+
+def test_get_revert_blocks(app):
+    """Tests that revert blocks are found in one traversal from the current block"""
+    with app.app_context():
+        db = get_db()
+
+    populate_block_chain(db, 10)
+
+    with db.scoped_session() as session:
+        current_block = session.query(Block).filter(Block.is_current == True).one()
+
+        revert_blocks = get_revert_blocks(session, current_block, hex(6))
+        assert [block.blockhash for block in revert_blocks] == [
+            hex(10),
+            hex(9),
+            hex(8),
+            hex(7),
+        ]
+
+        # Nothing to revert when the current block is the intersection
+        assert get_revert_blocks(session, current_block, hex(10)) == []
+
+        # Traversal stops at the first block whose parent is not indexed
+        revert_blocks = get_revert_blocks(session, current_block, "0xmissing")
+        assert len(revert_blocks) == 10
+        assert revert_blocks[-1].blockhash == hex(1)
+
+
+def test_is_block_hash_indexed(app, mocker):
+    """Tests that prefetched ancestors are checked in the same query"""
+    with app.app_context():
+        db = get_db()
+
+    populate_block_chain(db, 3)
+    update_task = mocker.patch("src.tasks.index.update_task")
+    update_task.web3.toHex.side_effect = lambda block_hash: block_hash
+
+    prefetched_blocks = {
+        hex(4): TestBlock(hex(4), hex(3)),
+        "0xfork": TestBlock("0xfork", hex(2)),
+    }
+    indexed_block_hashes = {}
+
+    with db.scoped_session() as session:
+        assert not is_block_hash_indexed(
+            session, hex(5), prefetched_blocks, indexed_block_hashes
+        )
+        assert indexed_block_hashes == {
+            hex(2): True,
+            hex(3): True,
+            hex(4): False,
+            hex(5): False,
+            "0xfork": False,
+        }
+        assert is_block_hash_indexed(
+            session, hex(3), prefetched_blocks, indexed_block_hashes
+        )
@@ -1,84 +1,34 @@
-import json
+from datetime import datetime
 
-from src.solana.solana_transaction_types import ConfirmedSignatureForAddressResult
-from src.tasks.index_solana_plays import (
-    REDIS_TX_CACHE_QUEUE_PREFIX,
-    cache_traversed_tx,
-    fetch_traversed_tx_from_cache,
-)
-from src.utils.redis_connection import get_redis
+from src.models.social.play import Play
+from src.tasks.index_solana_plays import PlayColumns, write_plays
+from src.utils.db_session import get_db
 
-mock_tx_result_1: ConfirmedSignatureForAddressResult = {
-    "signature": "4NyCD5Ef5bsheuqXKFASJXPsiiss8ESqPg61bF5QNLBMYGshGbKTCfTAFjrxZYAH1JxZdY14kSeQG2b66Cis7vxj",
-    "slot": 111753419,
-    "blockTime": 1640126543,
-    "confirmationStatus": "finalized",
-    "err": None,
-    "memo": None,
-}
 
-mock_tx_result_2: ConfirmedSignatureForAddressResult = {
-    "signature": "5211pasG9iDECHnNm4GCWH9xETWJYRk4cxWVcJQyqTJCFGbmmvki2oHyvHJL8MgppztYjXsXPyG4RXcMXuQRpBia",
-    "slot": mock_tx_result_1["slot"] + 100,
-    "blockTime": 1640126543,
-    "confirmationStatus": "finalized",
-    "err": None,
-    "memo": None,
-}
-
-
-# Confirm expected length of cache array
-def assert_cache_array_length(redis, expected_length: int):
-    cached_val_array = redis.lrange(REDIS_TX_CACHE_QUEUE_PREFIX, 0, 100)
-    cached_val_length = len(cached_val_array)
-    assert cached_val_length == expected_length
-
-
-# Validate caching behavior
-
-
-def test_cache_traversed_tx(app):
+def test_write_plays(app):
     with app.app_context():
-        redis = get_redis()
-
-    cache_traversed_tx(redis, mock_tx_result_1)
-    assert_cache_array_length(redis, 1)
-    cached_val_array = redis.lrange(REDIS_TX_CACHE_QUEUE_PREFIX, 0, 100)
-    cached_first_entry = json.loads(cached_val_array[0])
-    assert cached_first_entry == mock_tx_result_1
-
-
-def test_fetch_traversed_tx_from_cache(app):
-    with app.app_context():
-        redis = get_redis()
-
-    tx_slot = 111753419
-    first_mock_tx: ConfirmedSignatureForAddressResult = {
-        "signature": "4NyCD5Ef5bsheuqXKFASJXPsiiss8ESqPg61bF5QNLBMYGshGbKTCfTAFjrxZYAH1JxZdY14kSeQG2b66Cis7vxj",
-        "slot": tx_slot,
-        "blockTime": 1640126543,
-        "confirmationStatus": "finalized",
-        "err": None,
-        "memo": None,
-    }
-
-    cache_traversed_tx(redis, first_mock_tx)
-    # Confirm that if the latest db slot is greater than the cached value, it is removed from redis
-    latest_db_slot = tx_slot + 10
-    fetched_tx = fetch_traversed_tx_from_cache(redis, latest_db_slot)
-    assert fetched_tx == None
-
-    # Confirm the values have been removed from redis queue
-    assert_cache_array_length(redis, 0)
-
-    # Now, populate 2 entries into redis
-    cache_traversed_tx(redis, first_mock_tx)
-    cache_traversed_tx(redis, mock_tx_result_2)
-
-    assert_cache_array_length(redis, 2)
-
-    fetched_tx = fetch_traversed_tx_from_cache(redis, latest_db_slot)
-    assert fetched_tx == mock_tx_result_2["signature"]
-
-    # Confirm the values have been removed from redis queue
-    assert_cache_array_length(redis, 0)
+        db = get_db()
+
+    created_at = datetime(2022, 1, 1)
+    plays = PlayColumns()
+    plays.append(
+        1, 10, created_at, created_at, "tab\tsource", "City", None, "US", 5, "sig1"
+    )
+    plays.append(None, 11, created_at, created_at, None, None, None, None, 6, "sig2")
+    # Duplicate signatures in a batch are written once
+    plays.append(None, 11, created_at, created_at, None, None, None, None, 6, "sig2")
+
+    with db.scoped_session() as session:
+        assert write_plays(session, plays) == 2
+
+    with db.scoped_session() as session:
+        # Signatures already written are skipped
+        assert write_plays(session, plays) == 0
+        rows = session.query(Play).order_by(Play.signature).all()
+        assert [(row.signature, row.user_id, row.source) for row in rows] == [
+            ("sig1", 1, "tab\tsource"),
+            ("sig2", None, None),
+        ]
+        assert rows[0].city == "City"
+        assert rows[0].region is None
+        assert rows[0].created_at == created_at
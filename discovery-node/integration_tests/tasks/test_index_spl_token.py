@@ -293,7 +293,9 @@ def test_fetch_and_parse_sol_rewards_transfer_instruction(app):  # pylint: disab
         redis = get_redis()
 
     solana_client_manager_mock = create_autospec(SolanaClientManager)
-    solana_client_manager_mock.get_sol_tx_info.return_value = mock_tx_info
+    solana_client_manager_mock.get_sol_tx_infos.side_effect = lambda tx_sigs: [
+        mock_tx_info for _ in tx_sigs
+    ]
 
     test_entries = {
         "users": [
@@ -4,9 +4,15 @@ from typing import List
 
 from sqlalchemy import desc
 from src.models.indexing.indexing_checkpoints import IndexingCheckpoint
+from src.models.social.hourly_digital_content_play_counts import (
+    HourlyDigitalContentPlayCount,
+)
 from src.models.social.hourly_play_counts import HourlyPlayCount
+from src.models.social.play import Play
 from src.tasks.index_hourly_play_counts import (
+    HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_TABLE_NAME,
     HOURLY_PLAY_COUNTS_TABLE_NAME,
+    _index_hourly_digital_content_play_counts,
     _index_hourly_play_counts,
 )
 from src.utils.config import shared_config
@@ -339,3 +345,54 @@ def test_index_hourly_play_counts_empty_plays(app):
     # run
     with db.scoped_session() as session:
         _index_hourly_play_counts(session)
+
+
+def test_index_hourly_digital_content_play_counts(app):
+    """Test that per digital_content hourly play counts update incrementally"""
+
+    # setup
+    with app.app_context():
+        db = get_db()
+
+    entities = {
+        "digitalContents": [
+            {"digital_content_id": 1, "title": "digital_content 1"},
+            {"digital_content_id": 2, "title": "digital_content 2"},
+        ],
+        "plays": [
+            {"item_id": 1, "created_at": TIMESTAMP - timedelta(hours=1)},
+            {"item_id": 1, "created_at": TIMESTAMP - timedelta(hours=1)},
+            {"item_id": 2, "created_at": TIMESTAMP - timedelta(hours=1)},
+            {"item_id": 1, "created_at": TIMESTAMP},
+        ],
+    }
+
+    populate_mock_db(db, entities)
+
+    # run
+    with db.scoped_session() as session:
+        _index_hourly_digital_content_play_counts(session)
+        session.add(Play(id=5, play_item_id=1, created_at=TIMESTAMP))
+        session.flush()
+        _index_hourly_digital_content_play_counts(session)
+        _index_hourly_digital_content_play_counts(session)
+
+        results = {
+            (result.digital_content_id, result.hourly_timestamp): result.play_count
+            for result in session.query(HourlyDigitalContentPlayCount).all()
+        }
+        assert results == {
+            (1, TIMESTAMP - timedelta(hours=1)): 2,
+            (2, TIMESTAMP - timedelta(hours=1)): 1,
+            (1, TIMESTAMP): 2,
+        }
+
+        new_checkpoint = (
+            session.query(IndexingCheckpoint.last_checkpoint)
+            .filter(
+                IndexingCheckpoint.tablename
+                == HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_TABLE_NAME
+            )
+            .scalar()
+        )
+        assert new_checkpoint == 5
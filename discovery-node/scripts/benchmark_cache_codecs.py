@@ -0,0 +1,85 @@
+"""
+Microbenchmark of the redis cache codecs and API response encoding over
+populate_user_metadata outputs of the configured database
+
+Usage: PYTHONPATH=. python scripts/benchmark_cache_codecs.py [num_users]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+
+from dateutil import parser
+from src.models.users.user import User
+from src.queries.query_helpers import populate_user_metadata
+from src.utils import helpers
+from src.utils.config import shared_config
+from src.utils.fast_json import FastJSONEncoder
+from src.utils.redis_codec import codecs, decode_cache_value, encode_cache_value
+from src.utils.session_manager import SessionManager
+
+REPEAT = 5
+
+user_datetime_fields = [
+    column.name for column in User.__table__.c if column.type.python_type == datetime
+]
+
+
+def get_users(num_users):
+    db = SessionManager(shared_config["db"]["url_read_replica"], {})
+    with db.scoped_session() as session:
+        users = (
+            session.query(User)
+            .filter(User.is_current == True)
+            .order_by(User.user_id)
+            .limit(num_users)
+            .all()
+        )
+        users = helpers.query_result_to_list(users)
+        user_ids = [user["user_id"] for user in users]
+        return populate_user_metadata(session, user_ids, users, None)
+
+
+def json_dateutil_round_trip(users):
+    """The cache format before the codecs, datetimes parsed back with dateutil"""
+    values = [json.dumps(user, default=str) for user in users]
+    decoded_users = [json.loads(value) for value in values]
+    for user in decoded_users:
+        for field in user_datetime_fields:
+            if user.get(field):
+                user[field] = parser.parse(user[field])
+    return decoded_users
+
+
+def codec_round_trip(users, codec):
+    values = [encode_cache_value(user, codec) for user in users]
+    return [decode_cache_value(value) for value in values]
+
+
+def time(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    users = get_users(num_users)
+    print(f"{len(users)} users")
+
+    print(f"json + dateutil: {time(lambda: json_dateutil_round_trip(users)):.4f}s")
+    for name, codec in codecs.items():
+        size = sum(len(encode_cache_value(user, codec)) for user in users)
+        print(
+            f"{name} codec: {time(lambda: codec_round_trip(users, codec)):.4f}s, {size} bytes"
+        )
+
+    response = {"data": users}
+    print(
+        f"JSONEncoder response: {time(lambda: json.dumps(response, default=str)):.4f}s"
+    )
+    print(
+        f"FastJSONEncoder response: {time(lambda: json.dumps(response, cls=FastJSONEncoder, default=str)):.4f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
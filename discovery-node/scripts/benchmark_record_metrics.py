@@ -0,0 +1,69 @@
+"""
+Load test of request metrics recording on a cached endpoint
+
+Serves a route decorated with record_metrics, which returns a canned response
+as a cache hit would, and compares request latencies with metrics recorded on
+the request path to metrics buffered and flushed to redis in the background.
+Requires the redis of the config.
+
+Usage: PYTHONPATH=. python scripts/benchmark_record_metrics.py [concurrency]
+"""
+import concurrent.futures
+import sys
+import time
+
+from flask import Flask, jsonify
+from src.utils.config import shared_config
+from src.utils.redis_metrics import get_metrics_buffer, record_metrics
+
+REQUESTS = 5000
+
+app = Flask(__name__)
+
+
+@app.route("/v1/users/<user_id>")
+@record_metrics
+def get_user(user_id):
+    return jsonify({"data": {"id": user_id}})
+
+
+def benchmark(name, concurrency):
+    latencies = []
+
+    def timed_request(i):
+        with app.test_client() as client:
+            start = time.perf_counter()
+            client.get(
+                f"/v1/users/{i % 100}?app_name=benchmark",
+                headers={"X-Forwarded-For": f"10.0.{i % 250}.{i % 100}"},
+            )
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as clients:
+        list(clients.map(timed_request, range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"    {name:<24}p50 {p50 * 1000:8.2f} ms    p99 {p99 * 1000:8.2f} ms"
+        f"    {len(latencies) / elapsed:8.1f} requests/s"
+    )
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    print(f"{REQUESTS} requests, concurrency {concurrency}")
+
+    shared_config["discprov"]["metrics_buffer_enabled"] = "false"
+    benchmark("recorded on request", concurrency)
+
+    shared_config["discprov"]["metrics_buffer_enabled"] = "true"
+    benchmark("buffered", concurrency)
+    get_metrics_buffer().flush()
+
+
+if __name__ == "__main__":
+    main()
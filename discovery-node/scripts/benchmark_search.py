@@ -0,0 +1,124 @@
+"""
+Latency benchmark of sql search over the search_quality.py queries
+
+Compares searching each search type on its own session from a thread pool per
+search, with a separate round trip for owners, to perform_search_query on the
+shared search executor, with `concurrency` searches in flight.
+
+Usage: PYTHONPATH=. python scripts/benchmark_search.py [concurrency]
+"""
+import concurrent.futures
+import sys
+import time
+
+from scripts.search_quality import search_quality_queries
+from src.queries.query_helpers import get_users_by_id, get_users_ids
+from src.queries.search_queries import (
+    content_list_search_query,
+    digital_content_search_query,
+    get_search_executor,
+    perform_search_query,
+    user_search_query,
+)
+from src.utils.config import shared_config
+from src.utils.session_manager import SessionManager
+
+REPEAT = 5
+search_types = ["digitalContents", "users", "content_lists", "albums"]
+
+
+def get_search_args(query):
+    return {
+        "search_str": query["query"].replace("&", "and"),
+        "limit": query["limit"],
+        "offset": 0,
+        "is_auto_complete": query.get("is_auto_complete", False),
+        "current_user_id": query.get("current_user_id"),
+        "only_downloadable": False,
+    }
+
+
+def search_per_type(db, search_args):
+    def search_type(search_type):
+        query_args = [
+            search_args["search_str"],
+            search_args["limit"],
+            search_args["offset"],
+        ]
+        is_auto_complete = search_args["is_auto_complete"]
+        current_user_id = search_args["current_user_id"]
+        with db.scoped_session() as session:
+            if search_type == "digitalContents":
+                return digital_content_search_query(
+                    session, *query_args, is_auto_complete, current_user_id, False
+                )
+            if search_type == "users":
+                return user_search_query(
+                    session, *query_args, is_auto_complete, current_user_id
+                )
+            return content_list_search_query(
+                session,
+                *query_args,
+                search_type == "albums",
+                is_auto_complete,
+                current_user_id,
+            )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(search_type, search_types))
+    user_ids = set()
+    for result in results:
+        user_ids.update(get_users_ids(result["all"]))
+    with db.scoped_session() as session:
+        get_users_by_id(
+            session,
+            list(user_ids),
+            search_args["current_user_id"],
+            use_request_context=False,
+        )
+
+
+def search_combined(db, search_args):
+    get_search_executor().submit(
+        perform_search_query, db, search_types, search_args
+    ).result()
+
+
+def benchmark(name, search_fn, db, concurrency):
+    latencies = []
+
+    def timed_search(query):
+        start = time.perf_counter()
+        search_fn(db, get_search_args(query))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as clients:
+        list(clients.map(timed_search, search_quality_queries * REPEAT))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(
+        f"    {name:<24}p50 {p50 * 1000:8.2f} ms    p95 {p95 * 1000:8.2f} ms"
+        f"    {len(latencies) / elapsed:8.1f} searches/s"
+    )
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    db = SessionManager(shared_config["db"]["url_read_replica"], {})
+    # Warm up connections and the lexeme dictionaries
+    for query in search_quality_queries:
+        search_combined(db, get_search_args(query))
+
+    print(
+        f"{len(search_quality_queries)} queries x {REPEAT}, concurrency {concurrency}"
+    )
+    benchmark("session per search type", search_per_type, db, concurrency)
+    benchmark("combined on executor", search_combined, db, concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Microbenchmark of per-row vs batch trending scoring
+
+Usage: PYTHONPATH=. python scripts/benchmark_trending_scores.py [num_digital_contents]
+"""
+import sys
+import timeit
+
+from src.trending_strategies.base_trending_strategy import get_score_columns
+from src.trending_strategies.base_trending_strategy_unit_test import (
+    make_scorable_digital_contents,
+)
+from src.trending_strategies.EJ57D_trending_content_lists_strategy import (
+    TrendingContentListsStrategyEJ57D,
+)
+from src.trending_strategies.EJ57D_underground_trending_digital_contents_strategy import (
+    UndergroundTrendingDigitalContentsStrategyEJ57D,
+)
+
+REPEAT = 5
+
+
+def benchmark(strategy, time_range, digital_contents):
+    def score_rows():
+        return sorted(
+            [
+                strategy.get_digital_content_score(time_range, digital_content)
+                for digital_content in digital_contents
+            ],
+            key=lambda k: k["score"],
+            reverse=True,
+        )
+
+    def score_columns():
+        return strategy.get_digital_content_scores(
+            time_range, get_score_columns(digital_contents)
+        )
+
+    def rank():
+        return strategy.rank_digital_contents(time_range, digital_contents)
+
+    print(f"{type(strategy).__name__} ({time_range}, {len(digital_contents)} rows)")
+    for name, fn in [
+        ("per row score + sort", score_rows),
+        ("batch score", score_columns),
+        ("batch score + rank", rank),
+    ]:
+        seconds = min(timeit.repeat(fn, number=1, repeat=REPEAT))
+        print(f"    {name:<24}{seconds * 1000:10.2f} ms")
+
+
+def main():
+    num_digital_contents = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    digital_contents = make_scorable_digital_contents(num_digital_contents)
+    benchmark(
+        UndergroundTrendingDigitalContentsStrategyEJ57D(), "week", digital_contents
+    )
+    benchmark(TrendingContentListsStrategyEJ57D(), "month", digital_contents)
+
+
+if __name__ == "__main__":
+    main()
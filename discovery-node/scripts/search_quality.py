@@ -53,122 +53,88 @@ def test_search(args):
         print_entity("saved_albums", found["saved_albums"])
 
 
-test_search({"query": "space fm lido", "limit": 3, "kind": "digitalContents"})
-
-test_search({"query": "issac solo", "limit": 3, "kind": "users"})  # misspell
-
-
-test_search(
+search_quality_queries = [
+    {"query": "space fm lido", "limit": 3, "kind": "digitalContents"},
+    {"query": "issac solo", "limit": 3, "kind": "users"},  # misspell
     {
         "query": "the cycle of change",
         "limit": 4,
         "is_auto_complete": True,
-    }
-)
-
-
-test_search(
+    },
     {
         "query": "isaac pho",
         "limit": 4,
         "is_auto_complete": True,
-    }
-)
-
-test_search(
+    },
     {
         "query": "RAC wat",
         "limit": 4,
         "current_user_id": 1,
         "is_auto_complete": True,
-    }
-)
-test_search(
+    },
     {
         "query": "RAC water",
         "limit": 4,
         "current_user_id": 1,
         "is_auto_complete": False,
-    }
-)
-
-test_search(
+    },
     {
         "query": "deadmau",
         "limit": 4,
         "current_user_id": 1,
         "is_auto_complete": False,
-    }
-)
-
-# should have disclosure at the top
-test_search(
+    },
+    # should have disclosure at the top
     {
         "query": "waterfal",
         "limit": 10,
         "current_user_id": 1,
         "is_auto_complete": True,
-    }
-)
-
-test_search(
+    },
     {
         "query": "closer 2 u ray",
         "limit": 4,
         "current_user_id": 1,
         "is_auto_complete": True,
-    }
-)
-test_search(
+    },
     {
         "query": "raymont",
         "limit": 4,
         "current_user_id": 1,
         "is_auto_complete": True,
-    }
-)
-
-test_search(
+    },
     {
         "query": "low",
         "limit": 4,
         "current_user_id": 14,
         "is_auto_complete": True,
-    }
-)
-
-test_search(
+    },
     {
         "query": "stereosteve guitar",
         "limit": 4,
         "current_user_id": 1,
         "is_auto_complete": True,
-    }
-)
-
-test_search(
+    },
     {
         "query": "skrillex",
         "limit": 4,
         "current_user_id": 1,
         "is_auto_complete": True,
-    }
-)
-
-test_search(
+    },
     {
         "query": "camo",
         "limit": 4,
         "is_auto_complete": True,
-    }
-)
-
-test_search(
+    },
     {
         "query": "zouai",
         "limit": 4,
         "is_auto_complete": True,
-    }
-)
+    },
+]
+
 
-print("\n\n")
+if __name__ == "__main__":
+    for search_args in search_quality_queries:
+        test_search(search_args)
+    print("\n\n")
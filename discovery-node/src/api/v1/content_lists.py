@@ -2,10 +2,13 @@ import logging
 
 from flask.globals import request
 from flask_restx import Namespace, Resource, fields
+from src import exceptions
 from src.api.v1.helpers import (
     abort_bad_path_param,
     abort_bad_request_param,
     current_user_parser,
+    cursor_pagination_with_current_user_parser,
+    cursor_success_response,
     decode_with_abort,
     extend_content_list,
     extend_digital_content,
@@ -13,10 +16,10 @@ from src.api.v1.helpers import (
     full_trending_parser,
     get_current_user_id,
     get_default_max,
+    make_full_cursor_response,
     make_full_response,
     make_response,
     pagination_parser,
-    pagination_with_current_user_parser,
     search_parser,
     success_response,
     trending_parser,
@@ -34,6 +37,10 @@ from src.queries.get_trending_content_lists import (
     get_full_trending_content_lists,
     get_trending_content_lists,
 )
+from src.queries.query_helpers import (
+    get_next_pagination_cursor,
+    get_user_follower_count_sort_key,
+)
 from src.queries.search_queries import SearchKind, search
 from src.trending_strategies.trending_strategy_factory import (
     DEFAULT_TRENDING_VERSIONS,
@@ -41,6 +48,11 @@ from src.trending_strategies.trending_strategy_factory import (
 )
 from src.trending_strategies.trending_type_and_version import TrendingType
 from src.utils.db_session import get_db_read_replica
+from src.utils.cache_invalidation import (
+    CONTENT_LIST_CACHE_TAG,
+    entity_response_ttl_sec,
+    get_response_cache_tags,
+)
 from src.utils.redis_cache import cache
 from src.utils.redis_metrics import record_metrics
 
@@ -53,6 +65,8 @@ trending_strategy_factory = TrendingStrategyFactory()
 ns = Namespace("content_lists", description="ContentList related operations")
 full_ns = Namespace("content_lists", description="Full contentList related operations")
 
+content_list_response_tags = get_response_cache_tags(CONTENT_LIST_CACHE_TAG)
+
 content_lists_response = make_response(
     "content_list_response", ns, fields.List(fields.Nested(content_list_model))
 )
@@ -113,7 +127,7 @@ class ContentList(Resource):
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
     @ns.marshal_with(content_lists_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=entity_response_ttl_sec, tags=content_list_response_tags)
     def get(self, content_list_id):
         content_list_id = decode_with_abort(content_list_id, ns)
         contentList = get_content_list(content_list_id, None)
@@ -135,7 +149,7 @@ class FullContentList(Resource):
     )
     @ns.expect(current_user_parser)
     @ns.marshal_with(full_content_lists_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=entity_response_ttl_sec, tags=content_list_response_tags)
     def get(self, content_list_id):
         content_list_id = decode_with_abort(content_list_id, full_ns)
         args = current_user_parser.parse_args()
@@ -239,8 +253,8 @@ class Top(Resource):
         return success_response(contentLists)
 
 
-content_list_favorites_response = make_full_response(
-    "following_response", full_ns, fields.List(fields.Nested(user_model_full))
+content_list_favorites_response = make_full_cursor_response(
+    "content_list_favorites_response_full", full_ns, fields.List(fields.Nested(user_model_full))
 )
 
 
@@ -252,11 +266,11 @@ class FullDigitalContentFavorites(Resource):
         params={"content_list_id": "A ContentList ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_with_current_user_parser)
     @full_ns.marshal_with(content_list_favorites_response)
     @cache(ttl_sec=5)
     def get(self, content_list_id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
         decoded_id = decode_with_abort(content_list_id, full_ns)
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
@@ -266,15 +280,22 @@ class FullDigitalContentFavorites(Resource):
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": args.get("cursor"),
         }
-        users = get_savers_for_content_list(args)
+        try:
+            users = get_savers_for_content_list(args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        next_cursor = get_next_pagination_cursor(
+            users, limit, get_user_follower_count_sort_key
+        )
         users = list(map(extend_user, users))
 
-        return success_response(users)
+        return cursor_success_response(users, next_cursor)
 
 
-content_list_reposts_response = make_full_response(
-    "following_response", full_ns, fields.List(fields.Nested(user_model_full))
+content_list_reposts_response = make_full_cursor_response(
+    "content_list_reposts_response_full", full_ns, fields.List(fields.Nested(user_model_full))
 )
 
 
@@ -286,11 +307,11 @@ class FullContentListReposts(Resource):
         params={"content_list_id": "A ContentList ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_with_current_user_parser)
     @full_ns.marshal_with(content_list_reposts_response)
     @cache(ttl_sec=5)
     def get(self, content_list_id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
         decoded_id = decode_with_abort(content_list_id, full_ns)
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
@@ -300,10 +321,17 @@ class FullContentListReposts(Resource):
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": args.get("cursor"),
         }
-        users = get_reposters_for_content_list(args)
+        try:
+            users = get_reposters_for_content_list(args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        next_cursor = get_next_pagination_cursor(
+            users, limit, get_user_follower_count_sort_key
+        )
         users = list(map(extend_user, users))
-        return success_response(users)
+        return cursor_success_response(users, next_cursor)
 
 
 trending_response = make_response(
@@ -5,11 +5,14 @@ from urllib.parse import urljoin
 from flask import redirect
 from flask.globals import request
 from flask_restx import Namespace, Resource, fields, inputs, marshal_with
+from src import exceptions
 from src.api.v1.helpers import (
     abort_bad_path_param,
     abort_bad_request_param,
     abort_not_found,
     current_user_parser,
+    cursor_pagination_with_current_user_parser,
+    cursor_success_response,
     decode_ids_array,
     decode_with_abort,
     extend_digital_content,
@@ -20,6 +23,7 @@ from src.api.v1.helpers import (
     get_current_user_id,
     get_default_max,
     get_encoded_digital_content_id,
+    make_full_cursor_response,
     make_full_response,
     make_response,
     pagination_with_current_user_parser,
@@ -30,7 +34,7 @@ from src.api.v1.helpers import (
     trending_parser_paginated,
 )
 from src.api.v1.models.users import user_model_full
-from src.queries.get_feed import get_feed
+from src.queries.get_feed import get_feed, get_feed_sort_key
 from src.queries.get_max_id import get_max_id
 from src.queries.get_recommended_digital_contents import (
     DEFAULT_RECOMMENDED_LIMIT,
@@ -52,12 +56,22 @@ from src.queries.get_trending import get_full_trending, get_trending
 from src.queries.get_trending_ids import get_trending_ids
 from src.queries.get_trending_digital_contents import TRENDING_LIMIT, TRENDING_TTL_SEC
 from src.queries.get_underground_trending import get_underground_trending
+from src.queries.query_helpers import (
+    get_next_pagination_cursor,
+    get_pagination_vars,
+    get_user_follower_count_sort_key,
+)
 from src.queries.search_queries import SearchKind, search
 from src.trending_strategies.trending_strategy_factory import (
     DEFAULT_TRENDING_VERSIONS,
     TrendingStrategyFactory,
 )
 from src.trending_strategies.trending_type_and_version import TrendingType
+from src.utils.cache_invalidation import (
+    DIGITAL_CONTENT_CACHE_TAG,
+    entity_response_ttl_sec,
+    get_response_cache_tags,
+)
 from src.utils.redis_cache import cache
 from src.utils.redis_metrics import record_metrics
 
@@ -73,6 +87,8 @@ trending_strategy_factory = TrendingStrategyFactory()
 ns = Namespace("digitalContents", description="DigitalContent related operations")
 full_ns = Namespace("digitalContents", description="Full digital_content operations")
 
+digital_content_response_tags = get_response_cache_tags(DIGITAL_CONTENT_CACHE_TAG)
+
 digital_content_response = make_response("digital_content_response", ns, fields.Nested(digital_content))
 full_digital_content_response = make_full_response(
     "full_digital_content_response", full_ns, fields.Nested(digital_content_full)
@@ -136,7 +152,7 @@ class DigitalContent(Resource):
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
     @ns.marshal_with(digital_content_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=entity_response_ttl_sec, tags=digital_content_response_tags)
     def get(self, digital_content_id):
         decoded_id = decode_with_abort(digital_content_id, ns)
         return get_single_digital_content(decoded_id, None, ns)
@@ -168,7 +184,7 @@ class FullDigitalContent(Resource):
     )
     @full_ns.expect(full_digital_content_parser)
     @full_ns.marshal_with(full_digital_content_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=entity_response_ttl_sec, tags=digital_content_response_tags)
     def get(self, digital_content_id: str):
         args = full_digital_content_parser.parse_args()
         decoded_id = decode_with_abort(digital_content_id, full_ns)
@@ -227,7 +243,7 @@ class BulkDigitalContents(Resource):
     @marshal_with(
         digital_content_response
     )  # Don't document using the marshaller - required for backwards compat supporting non-list responses
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=entity_response_ttl_sec, tags=digital_content_response_tags)
     def get(self):
         args = digital_content_slug_parser.parse_args()
         slug, handle = (args.get("slug"), args.get("handle"))
@@ -279,7 +295,7 @@ class FullBulkDigitalContents(Resource):
     )
     @full_ns.expect(full_digital_content_route_parser)
     @full_ns.marshal_with(full_digital_content_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=entity_response_ttl_sec, tags=digital_content_response_tags)
     def get(self):
         args = full_digital_content_route_parser.parse_args()
         slug, handle = args.get("slug"), args.get("handle")
@@ -742,7 +758,7 @@ class FullTrendingIds(Resource):
         return success_response(res)
 
 
-digital_content_favorites_response = make_full_response(
+digital_content_favorites_response = make_full_cursor_response(
     "digital_content_favorites_response_full",
     full_ns,
     fields.List(fields.Nested(user_model_full)),
@@ -757,11 +773,11 @@ class FullDigitalContentFavorites(Resource):
         params={"digital_content_id": "A DigitalContent ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_with_current_user_parser)
     @full_ns.marshal_with(digital_content_favorites_response)
     @cache(ttl_sec=5)
     def get(self, digital_content_id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
         decoded_id = decode_with_abort(digital_content_id, full_ns)
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
@@ -772,14 +788,21 @@ class FullDigitalContentFavorites(Resource):
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": args.get("cursor"),
         }
-        users = get_savers_for_digital_content(args)
+        try:
+            users = get_savers_for_digital_content(args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        next_cursor = get_next_pagination_cursor(
+            users, limit, get_user_follower_count_sort_key
+        )
         users = list(map(extend_user, users))
 
-        return success_response(users)
+        return cursor_success_response(users, next_cursor)
 
 
-digital_content_reposts_response = make_full_response(
+digital_content_reposts_response = make_full_cursor_response(
     "digital_content_reposts_response_full", full_ns, fields.List(fields.Nested(user_model_full))
 )
 
@@ -792,11 +815,11 @@ class FullDigitalContentReposts(Resource):
         params={"digital_content_id": "A DigitalContent ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_with_current_user_parser)
     @full_ns.marshal_with(digital_content_reposts_response)
     @cache(ttl_sec=5)
     def get(self, digital_content_id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
         decoded_id = decode_with_abort(digital_content_id, full_ns)
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
@@ -807,10 +830,17 @@ class FullDigitalContentReposts(Resource):
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": args.get("cursor"),
         }
-        users = get_reposters_for_digital_content(args)
+        try:
+            users = get_reposters_for_digital_content(args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        next_cursor = get_next_pagination_cursor(
+            users, limit, get_user_follower_count_sort_key
+        )
         users = list(map(extend_user, users))
-        return success_response(users)
+        return cursor_success_response(users, next_cursor)
 
 
 digital_content_stems_response = make_full_response(
@@ -998,7 +1028,7 @@ This is generated in the following manner:
   - Sort combined results by 'timestamp' field and return
 """
 
-under_the_radar_parser = pagination_with_current_user_parser.copy()
+under_the_radar_parser = cursor_pagination_with_current_user_parser.copy()
 under_the_radar_parser.add_argument(
     "filter",
     required=False,
@@ -1021,6 +1051,13 @@ under_the_radar_parser.add_argument(
 )
 
 
+under_the_radar_response = make_full_cursor_response(
+    "under_the_radar_response",
+    full_ns,
+    fields.List(fields.Nested(digital_content_full)),
+)
+
+
 @full_ns.route("/under_the_radar")
 class UnderTheRadar(Resource):
     @record_metrics
@@ -1029,7 +1066,7 @@ class UnderTheRadar(Resource):
         description="""Gets the digitalContents found on the \"Under the Radar\" smart content list""",
     )
     @full_ns.expect(under_the_radar_parser)
-    @full_ns.marshal_with(full_digital_contents_response)
+    @full_ns.marshal_with(under_the_radar_response)
     @cache(ttl_sec=10)
     def get(self):
         request_args = under_the_radar_parser.parse_args()
@@ -1038,12 +1075,21 @@ class UnderTheRadar(Resource):
             "with_users": request_args.get("with_users"),
             "limit": format_limit(request_args, 100, 25),
             "offset": format_offset(request_args),
+            "cursor": request_args.get("cursor"),
             "user_id": get_current_user_id(request_args),
             "filter": request_args.get("filter"),
         }
-        feed_results = get_feed(args)
+        try:
+            feed_results = get_feed(args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        # get_feed limits to the limit request arg
+        (limit, _) = get_pagination_vars()
+        next_cursor = get_next_pagination_cursor(
+            feed_results, limit, get_feed_sort_key
+        )
         feed_results = list(map(extend_digital_content, feed_results))
-        return success_response(feed_results)
+        return cursor_success_response(feed_results, next_cursor)
 
 
 most_loved_parser = current_user_parser.copy()
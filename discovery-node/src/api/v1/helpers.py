@@ -2,7 +2,7 @@ import logging
 from datetime import datetime
 from typing import Dict, cast
 
-from flask_restx import reqparse
+from flask_restx import fields, reqparse
 from src import api_helpers
 from src.models.rewards.challenge import ChallengeType
 from src.queries.get_challenges import ChallengeResponse
@@ -377,6 +377,25 @@ def make_full_response(name, namespace, modelType):
     return namespace.clone(name, full_response, {"data": modelType})
 
 
+def make_cursor_response(name, namespace, modelType):
+    """Makes a response model with the cursor to the next page of data"""
+    return namespace.model(
+        name,
+        {
+            "data": modelType,
+            "next_cursor": fields.String(allow_null=True),
+        },
+    )
+
+
+def make_full_cursor_response(name, namespace, modelType):
+    return namespace.clone(
+        name,
+        full_response,
+        {"data": modelType, "next_cursor": fields.String(allow_null=True)},
+    )
+
+
 def to_dict(multi_dict):
     """Converts a multi dict into a dict where only list entries are not flat"""
     return {
@@ -484,6 +503,13 @@ pagination_with_current_user_parser.add_argument(
     "user_id", required=False, description="The user ID of the user making the request"
 )
 
+cursor_pagination_with_current_user_parser = pagination_with_current_user_parser.copy()
+cursor_pagination_with_current_user_parser.add_argument(
+    "cursor",
+    required=False,
+    description="The next_cursor of a page, to fetch the page after it instead of using an offset",
+)
+
 search_parser = reqparse.RequestParser(argument_class=DescriptiveArgument)
 search_parser.add_argument("query", required=True, description="The search query")
 
@@ -530,6 +556,12 @@ def success_response(entity):
     return api_helpers.success_response(entity, 200, False)
 
 
+def cursor_success_response(entity, next_cursor):
+    response, status = success_response(entity)
+    response["next_cursor"] = next_cursor
+    return response, status
+
+
 DEFAULT_LIMIT = 100
 MIN_LIMIT = 1
 MAX_LIMIT = 500
@@ -4,11 +4,14 @@ import logging
 
 from eth_account.messages import encode_defunct
 from flask_restx import Namespace, Resource, fields, reqparse
+from src import exceptions
 from src.api.v1.helpers import (
     DescriptiveArgument,
     abort_bad_request_param,
     abort_not_found,
     current_user_parser,
+    cursor_pagination_with_current_user_parser,
+    cursor_success_response,
     decode_with_abort,
     extend_activity,
     extend_challenge_response,
@@ -21,6 +24,8 @@ from src.api.v1.helpers import (
     format_offset,
     get_current_user_id,
     get_default_max,
+    make_cursor_response,
+    make_full_cursor_response,
     make_full_response,
     make_response,
     pagination_parser,
@@ -54,8 +59,14 @@ from src.queries.get_challenges import get_challenges
 from src.queries.get_followees_for_user import get_followees_for_user
 from src.queries.get_followers_for_user import get_followers_for_user
 from src.queries.get_related_landlords import get_related_landlords
-from src.queries.get_repost_feed_for_user import get_repost_feed_for_user
-from src.queries.get_save_digital_contents import get_save_digital_contents
+from src.queries.get_repost_feed_for_user import (
+    get_repost_feed_for_user,
+    get_repost_feed_sort_key,
+)
+from src.queries.get_save_digital_contents import (
+    get_save_digital_content_sort_key,
+    get_save_digital_contents,
+)
 from src.queries.get_saves import get_saves
 from src.queries.get_support_for_user import (
     get_support_received_by_user,
@@ -67,11 +78,13 @@ from src.queries.get_top_users import get_top_users
 from src.queries.get_digital_contents import get_digital_contents
 from src.queries.get_user_listening_history import (
     GetUserListeningHistoryArgs,
+    get_listening_history_sort_key,
     get_user_listening_history,
 )
 from src.queries.get_user_with_wallet import get_user_with_wallet
 from src.queries.get_users import get_users
 from src.queries.get_users_cnode import ReplicaType, get_users_cnode
+from src.queries.query_helpers import get_next_pagination_cursor
 from src.queries.search_queries import SearchKind, search
 from src.utils import web3_provider
 from src.utils.auth_middleware import auth_middleware
@@ -355,10 +368,10 @@ class HandleDigitalContentList(HandleFullDigitalContentList):
 
 USER_REPOSTS_ROUTE = "/<string:id>/reposts"
 
-reposts_response = make_response(
+reposts_response = make_cursor_response(
     "reposts", ns, fields.List(fields.Nested(activity_model))
 )
-full_reposts_response = make_full_response(
+full_reposts_response = make_full_cursor_response(
     "full_reposts", full_ns, fields.List(fields.Nested(activity_model_full))
 )
 
@@ -374,12 +387,12 @@ class RepostList(Resource):
         },
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @ns.expect(pagination_with_current_user_parser)
+    @ns.expect(cursor_pagination_with_current_user_parser)
     @ns.marshal_with(reposts_response)
     @cache(ttl_sec=5)
     def get(self, id):
         decoded_id = decode_with_abort(id, ns)
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
 
         current_user_id = get_current_user_id(args)
 
@@ -393,11 +406,18 @@ class RepostList(Resource):
             "filter_deleted": True,
             "limit": limit,
             "offset": offset,
+            "cursor": args.get("cursor"),
         }
-        reposts = get_repost_feed_for_user(decoded_id, args)
+        try:
+            reposts = get_repost_feed_for_user(decoded_id, args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", ns)
+        next_cursor = get_next_pagination_cursor(
+            reposts, limit, get_repost_feed_sort_key
+        )
         activities = list(map(extend_activity, reposts))
 
-        return success_response(activities)
+        return cursor_success_response(activities, next_cursor)
 
 
 @full_ns.route(USER_REPOSTS_ROUTE)
@@ -411,12 +431,12 @@ class FullRepostList(Resource):
         },
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_with_current_user_parser)
     @full_ns.marshal_with(full_reposts_response)
     @cache(ttl_sec=5)
     def get(self, id):
         decoded_id = decode_with_abort(id, ns)
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
 
         current_user_id = get_current_user_id(args)
 
@@ -429,8 +449,15 @@ class FullRepostList(Resource):
             "filter_deleted": True,
             "limit": limit,
             "offset": offset,
+            "cursor": args.get("cursor"),
         }
-        reposts = get_repost_feed_for_user(decoded_id, args)
+        try:
+            reposts = get_repost_feed_for_user(decoded_id, args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        next_cursor = get_next_pagination_cursor(
+            reposts, limit, get_repost_feed_sort_key
+        )
         for repost in reposts:
             if "content_list_id" in repost:
                 repost["digitalContents"] = get_digital_contents_for_content_list(
@@ -438,7 +465,7 @@ class FullRepostList(Resource):
                 )
         activities = list(map(extend_activity, reposts))
 
-        return success_response(activities)
+        return cursor_success_response(activities, next_cursor)
 
 
 REPOST_LIST_ROUTE = "/handle/<string:handle>/reposts"
@@ -449,7 +476,7 @@ class HandleFullRepostList(Resource):
     @record_metrics
     @cache(ttl_sec=5)
     def _get(self, handle):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
 
         current_user_id = get_current_user_id(args)
         offset = format_offset(args)
@@ -462,8 +489,15 @@ class HandleFullRepostList(Resource):
             "filter_deleted": True,
             "limit": limit,
             "offset": offset,
+            "cursor": args.get("cursor"),
         }
-        reposts = get_repost_feed_for_user(None, args)
+        try:
+            reposts = get_repost_feed_for_user(None, args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        next_cursor = get_next_pagination_cursor(
+            reposts, limit, get_repost_feed_sort_key
+        )
         for repost in reposts:
             if "content_list_id" in repost:
                 repost["digitalContents"] = get_digital_contents_for_content_list(
@@ -471,7 +505,7 @@ class HandleFullRepostList(Resource):
                 )
         activities = list(map(extend_activity, reposts))
 
-        return success_response(activities)
+        return cursor_success_response(activities, next_cursor)
 
     @full_ns.doc(
         id="""Get Reposts by Handle""",
@@ -481,7 +515,7 @@ class HandleFullRepostList(Resource):
         },
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_with_current_user_parser)
     @full_ns.marshal_with(full_reposts_response)
     def get(self, handle):
         return self._get(handle)
@@ -497,7 +531,7 @@ class HandleRepostList(HandleFullRepostList):
         },
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @ns.expect(pagination_with_current_user_parser)
+    @ns.expect(cursor_pagination_with_current_user_parser)
     @ns.marshal_with(reposts_response)
     def get(self, handle):
         return super()._get(handle)
@@ -532,7 +566,7 @@ class MostUsedTags(Resource):
 favorites_response = make_response(
     "favorites_response", ns, fields.List(fields.Nested(favorite))
 )
-favorites_full_response = make_full_response(
+favorites_full_response = make_full_cursor_response(
     "favorites_response_full", full_ns, fields.List(fields.Nested(activity_model_full))
 )
 
@@ -565,7 +599,7 @@ class UserFavoritedDigitalContentsFull(Resource):
     @cache(ttl_sec=5)
     def _get(self, id):
         """Fetch favorited digitalContents for a user."""
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
         decoded_id = decode_with_abort(id, ns)
         current_user_id = get_current_user_id(args)
 
@@ -577,11 +611,18 @@ class UserFavoritedDigitalContentsFull(Resource):
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": args.get("cursor"),
             "with_users": True,
         }
-        digital_content_saves = get_save_digital_contents(get_digital_contents_args)
+        try:
+            digital_content_saves = get_save_digital_contents(get_digital_contents_args)
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        next_cursor = get_next_pagination_cursor(
+            digital_content_saves, limit, get_save_digital_content_sort_key
+        )
         digitalContents = list(map(extend_activity, digital_content_saves))
-        return success_response(digitalContents)
+        return cursor_success_response(digitalContents, next_cursor)
 
     @full_ns.doc(
         id="""Get Favorites""",
@@ -589,16 +630,16 @@ class UserFavoritedDigitalContentsFull(Resource):
         params={"id": "A User ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_with_current_user_parser)
     @full_ns.marshal_with(favorites_full_response)
     def get(self, id):
         return self._get(id)
 
 
-history_response = make_full_response(
+history_response = make_full_cursor_response(
     "history_response", ns, fields.List(fields.Nested(activity_model))
 )
-history_response_full = make_full_response(
+history_response_full = make_full_cursor_response(
     "history_response_full", full_ns, fields.List(fields.Nested(activity_model_full))
 )
 
@@ -610,7 +651,7 @@ class DigitalContentHistoryFull(Resource):
     @record_metrics
     @cache(ttl_sec=5)
     def _get(self, id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_with_current_user_parser.parse_args()
         decoded_id = decode_with_abort(id, ns)
         current_user_id = get_current_user_id(args)
         offset = format_offset(args)
@@ -620,10 +661,19 @@ class DigitalContentHistoryFull(Resource):
             current_user_id=current_user_id,
             limit=limit,
             offset=offset,
+            cursor=args.get("cursor"),
+        )
+        try:
+            digital_content_history = get_user_listening_history(
+                get_digital_contents_args
+            )
+        except exceptions.ArgumentError:
+            abort_bad_request_param("cursor", full_ns)
+        next_cursor = get_next_pagination_cursor(
+            digital_content_history, limit, get_listening_history_sort_key
         )
-        digital_content_history = get_user_listening_history(get_digital_contents_args)
         digitalContents = list(map(extend_activity, digital_content_history))
-        return success_response(digitalContents)
+        return cursor_success_response(digitalContents, next_cursor)
 
     @full_ns.doc(
         id="""Get User's DigitalContent History""",
@@ -631,7 +681,7 @@ class DigitalContentHistoryFull(Resource):
         params={"id": "A User ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_with_current_user_parser)
     @full_ns.marshal_with(history_response_full)
     def get(self, id):
         return self._get(id)
@@ -645,7 +695,7 @@ class DigitalContentHistory(DigitalContentHistoryFull):
         params={"id": "A User ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @ns.expect(pagination_with_current_user_parser)
+    @ns.expect(cursor_pagination_with_current_user_parser)
     @ns.marshal_with(history_response)
     def get(self, id):
         return super()._get(id)
@@ -36,11 +36,13 @@ from src.queries import (
 from src.solana.anchor_program_indexer import AnchorProgramIndexer
 from src.solana.solana_client_manager import SolanaClientManager
 from src.tasks import celery_app
+from src.tasks.index_feeds import INDEX_FEEDS_LOCK
 from src.tasks.index_reactions import INDEX_REACTIONS_LOCK
 from src.tasks.update_digital_content_is_available import UPDATE_DIGITAL_CONTENT_IS_AVAILABLE_LOCK
 from src.utils import helpers
 from src.utils.cid_metadata_client import CIDMetadataClient
 from src.utils.config import ConfigIni, config_files, shared_config
+from src.utils.fast_json import FastJSONEncoder
 from src.utils.multi_provider import MultiProvider
 from src.utils.redis_metrics import METRICS_INTERVAL, SYNCHRONIZE_METRICS_INTERVAL
 from src.utils.session_manager import SessionManager
@@ -258,7 +260,7 @@ def configure_flask(test_config, app, mode="app"):
         app.iniconfig.read(config_files)
 
     # custom JSON serializer for timestamps
-    class TimestampJSONEncoder(JSONEncoder):
+    class TimestampJSONEncoder(FastJSONEncoder, JSONEncoder):
         # pylint: disable=E0202
         def default(self, o):
             if isinstance(o, datetime.datetime):
@@ -267,6 +269,8 @@ def configure_flask(test_config, app, mode="app"):
             return JSONEncoder.default(self, o)
 
     app.json_encoder = TimestampJSONEncoder
+    # flask-restx serializes responses with the RESTX_JSON settings
+    app.config["RESTX_JSON"] = {"cls": TimestampJSONEncoder}
 
     database_url = app.config["db"]["url"]
     if test_config is not None:
@@ -367,20 +371,18 @@ def configure_celery(celery, test_config=None):
             "src.tasks.cache_user_balance",
             "src.monitors.monitoring_queue",
             "src.tasks.cache_trending_content_lists",
-            "src.tasks.index_solana_plays",
+            "src.tasks.index_solana_programs",
             "src.tasks.index_challenges",
-            "src.tasks.index_user_bank",
             "src.tasks.index_eth",
             "src.tasks.index_oracles",
-            "src.tasks.index_rewards_manager",
             "src.tasks.index_related_landlords",
             "src.tasks.calculate_trending_challenges",
             "src.tasks.user_listening_history.index_user_listening_history",
             "src.tasks.prune_plays",
-            "src.tasks.index_spl_token",
             "src.tasks.index_solana_user_data",
             "src.tasks.index_aggregate_tips",
             "src.tasks.index_reactions",
+            "src.tasks.index_feeds",
             "src.tasks.update_digital_content_is_available",
         ],
         beat_schedule={
@@ -432,12 +434,8 @@ def configure_celery(celery, test_config=None):
                 "task": "cache_trending_content_lists",
                 "schedule": timedelta(minutes=30),
             },
-            "index_solana_plays": {
-                "task": "index_solana_plays",
-                "schedule": timedelta(seconds=5),
-            },
-            "index_user_bank": {
-                "task": "index_user_bank",
+            "index_solana_programs": {
+                "task": "index_solana_programs",
                 "schedule": timedelta(seconds=5),
             },
             "index_challenges": {
@@ -452,13 +450,9 @@ def configure_celery(celery, test_config=None):
                 "task": "index_oracles",
                 "schedule": timedelta(minutes=5),
             },
-            "index_rewards_manager": {
-                "task": "index_rewards_manager",
-                "schedule": timedelta(seconds=5),
-            },
             "index_related_landlords": {
                 "task": "index_related_landlords",
-                "schedule": timedelta(hours=12),
+                "schedule": timedelta(minutes=5),
             },
             "index_user_listening_history": {
                 "task": "index_user_listening_history",
@@ -475,10 +469,6 @@ def configure_celery(celery, test_config=None):
                     hour="14, 15",
                 ),  # 8x a day during non peak hours
             },
-            "index_spl_token": {
-                "task": "index_spl_token",
-                "schedule": timedelta(seconds=5),
-            },
             "index_aggregate_tips": {
                 "task": "index_aggregate_tips",
                 "schedule": timedelta(seconds=5),
@@ -487,6 +477,10 @@ def configure_celery(celery, test_config=None):
                 "task": "index_reactions",
                 "schedule": timedelta(seconds=5),
             },
+            "index_feeds": {
+                "task": "index_feeds",
+                "schedule": timedelta(seconds=5),
+            },
             "update_digital_content_is_available": {
                 "task": "update_digital_content_is_available",
                 "schedule": timedelta(hours=12),  # run every 12 hours
@@ -547,17 +541,16 @@ def configure_celery(celery, test_config=None):
     redis_inst.delete("update_discovery_lock")
     redis_inst.delete("aggregate_metrics_lock")
     redis_inst.delete("synchronize_metrics_lock")
-    redis_inst.delete("solana_plays_lock")
+    redis_inst.delete("solana_programs_lock")
     redis_inst.delete("index_challenges_lock")
-    redis_inst.delete("user_bank_lock")
     redis_inst.delete("index_eth_lock")
     redis_inst.delete("index_oracles_lock")
-    redis_inst.delete("solana_rewards_manager_lock")
     redis_inst.delete("calculate_trending_challenges_lock")
     redis_inst.delete("index_user_listening_history_lock")
     redis_inst.delete("prune_plays_lock")
     redis_inst.delete("update_aggregate_table:aggregate_user_tips")
     redis_inst.delete(INDEX_REACTIONS_LOCK)
+    redis_inst.delete(INDEX_FEEDS_LOCK)
     redis_inst.delete(UPDATE_DIGITAL_CONTENT_IS_AVAILABLE_LOCK)
 
     logger.info("Redis instance initialized!")
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, Integer
+from src.models.base import Base
+from src.models.model_utils import RepresentableMixin
+
+
+class HourlyDigitalContentPlayCount(Base, RepresentableMixin):
+    __tablename__ = "hourly_digital_content_play_counts"
+
+    digital_content_id = Column(Integer, primary_key=True)
+    hourly_timestamp = Column(DateTime, primary_key=True, index=True)
+    play_count = Column(Integer, nullable=False)
@@ -0,0 +1,592 @@
+"""
+In memory prefix index for search autocomplete
+
+Each web process keeps, per search type, a sorted array of the words of the
+names of every searchable entity, with a weight per entity: follower count for
+users, play count for digital contents and reposts plus saves for contentLists
+and albums. An autocomplete query is answered by binary searching the range of
+words starting with each query word and ranking the entities by weight, so it
+does not touch Postgres.
+
+The index is built in a background thread on first use, then refreshed every
+refresh_interval_sec from the entities, follows, reposts, saves and plays
+indexed since the last refresh, reloading the digital contents and contentLists
+of users whose names changed. Reverted blocks are only reflected by the full
+rebuild every rebuild_interval_sec, which is spread out so that the worker
+processes do not all scan the entity tables at once.
+"""
+
+import bisect
+import heapq
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from src.models.content_lists.aggregate_content_list import AggregateContentList
+from src.models.content_lists.content_list import ContentList
+from src.models.digitalContents.digital_content import DigitalContent
+from src.models.indexing.block import Block
+from src.models.social.aggregate_plays import AggregatePlay
+from src.models.social.follow import Follow
+from src.models.social.play import Play
+from src.models.social.repost import Repost, RepostType
+from src.models.social.save import Save, SaveType
+from src.models.users.aggregate_user import AggregateUser
+from src.models.users.user import User
+from src.utils.config import shared_config
+
+logger = logging.getLogger(__name__)
+
+DIGITAL_CONTENTS = "digitalContents"
+USERS = "users"
+CONTENT_LISTS = "content_lists"
+ALBUMS = "albums"
+
+# Entities cached in the top results of a prefix
+prefix_cache_size = 500
+# The top results of prefixes matching more words than this are cached
+scan_max_words = 1000
+# Candidates matched against the other words of a query, per result
+candidates_per_result = 10
+
+refresh_interval_sec = 5
+rebuild_interval_sec = 24 * 60 * 60
+# Rows fetched at a time while building the index
+load_batch_size = 10000
+
+_non_word_re = re.compile(r"\W+")
+
+
+def is_autocomplete_index_enabled():
+    return shared_config["discprov"].getboolean(
+        "autocomplete_index_enabled", fallback=False
+    )
+
+
+def get_words(text: Optional[str]) -> List[str]:
+    """Returns the lower case words of text, with & spelled out as in the
+    search lexeme dictionaries"""
+    if not text:
+        return []
+    return [
+        word for word in _non_word_re.split(text.lower().replace("&", "and")) if word
+    ]
+
+
+def _get_unique_words(words: Iterable[str]) -> Tuple[str, ...]:
+    # Interned so that each word is stored once however many entities share it
+    return tuple(sorted({sys.intern(word) for word in words}))
+
+
+class PrefixIndex:
+    """
+    Sorted array of the distinct words of entities, with the entities of each
+    word and their weights and owners. The array only changes when an entity
+    adds the first or removes the last use of a word. The top entities of short
+    prefixes, which match too many words to rank on every query, are cached and
+    kept up to date as entities change. With distinct_owners, searches return
+    one entity per owner, as the sql digital content search does.
+    """
+
+    def __init__(self, distinct_owners=False):
+        self.distinct_owners = distinct_owners
+        self.words: List[str] = []
+        self.word_entities: Dict[str, Set[int]] = {}
+        self.entity_words: Dict[int, Tuple[str, ...]] = {}
+        self.weights: Dict[int, float] = {}
+        self.owners: Dict[int, int] = {}
+        self.prefix_cache: Dict[str, List[int]] = {}
+        self._lock = threading.RLock()
+
+    def load(self, entities: Iterable[Tuple[int, List[str], float, int]]):
+        """Adds entities of (entity_id, words, weight, owner_id) to an empty
+        index"""
+        with self._lock:
+            for entity_id, words, weight, owner_id in entities:
+                unique_words = _get_unique_words(words)
+                if not unique_words:
+                    continue
+                self.entity_words[entity_id] = unique_words
+                self.weights[entity_id] = weight
+                self.owners[entity_id] = owner_id
+                for word in unique_words:
+                    self.word_entities.setdefault(word, set()).add(entity_id)
+            self.words = sorted(self.word_entities)
+
+    def __len__(self):
+        return len(self.entity_words)
+
+    def _get_range(self, prefix: str) -> Tuple[int, int]:
+        return (
+            bisect.bisect_left(self.words, prefix),
+            bisect.bisect_left(self.words, prefix + "\U0010ffff"),
+        )
+
+    def _get_entities(self, lo: int, hi: int) -> Set[int]:
+        return set().union(*(self.word_entities[word] for word in self.words[lo:hi]))
+
+    def _get_prefixes(self, words: Iterable[str]) -> Set[str]:
+        return {word[:i] for word in words for i in range(1, len(word) + 1)}
+
+    def _rank(self, entity_ids: Iterable[int], num: int) -> List[int]:
+        return heapq.nlargest(
+            num, entity_ids, key=lambda entity_id: (self.weights[entity_id], -entity_id)
+        )
+
+    def _add_word(self, word: str, entity_id: int):
+        entity_ids = self.word_entities.get(word)
+        if entity_ids is None:
+            bisect.insort(self.words, word)
+            entity_ids = self.word_entities[word] = set()
+        entity_ids.add(entity_id)
+
+    def _remove_word(self, word: str, entity_id: int):
+        entity_ids = self.word_entities.get(word)
+        if entity_ids is None:
+            return
+        entity_ids.discard(entity_id)
+        if not entity_ids:
+            del self.word_entities[word]
+            del self.words[bisect.bisect_left(self.words, word)]
+
+    def remove(self, entity_id: int):
+        with self._lock:
+            words = self.entity_words.pop(entity_id, ())
+            self.weights.pop(entity_id, None)
+            self.owners.pop(entity_id, None)
+            for word in words:
+                self._remove_word(word, entity_id)
+            # Drop the cached results the entity was in, to be ranked again
+            for prefix in self._get_prefixes(words):
+                if entity_id in self.prefix_cache.get(prefix, ()):
+                    del self.prefix_cache[prefix]
+
+    def update(self, entity_id: int, words: List[str], weight: float, owner_id: int):
+        """Adds or replaces the words, weight and owner of entity_id"""
+        with self._lock:
+            old_weight = self.weights.get(entity_id)
+            unique_words = _get_unique_words(words)
+            if self.entity_words.get(entity_id) != unique_words:
+                self.remove(entity_id)
+                if not unique_words:
+                    return
+                self.entity_words[entity_id] = unique_words
+                for word in unique_words:
+                    self._add_word(word, entity_id)
+                old_weight = None
+            self.weights[entity_id] = weight
+            self.owners[entity_id] = owner_id
+
+            for prefix in self._get_prefixes(unique_words):
+                top = self.prefix_cache.get(prefix)
+                if top is None:
+                    continue
+                if entity_id in top:
+                    top.remove(entity_id)
+                    if old_weight is not None and weight < old_weight:
+                        # Entities ranked below the cached ones may now rank higher
+                        del self.prefix_cache[prefix]
+                        continue
+                top.append(entity_id)
+                self.prefix_cache[prefix] = self._rank(top, prefix_cache_size)
+
+    def search_prefix(self, prefix: str, num: int) -> List[int]:
+        """Returns up to num entities with a word starting with prefix, heaviest
+        first"""
+        with self._lock:
+            lo, hi = self._get_range(prefix)
+            if hi - lo <= scan_max_words or num > prefix_cache_size:
+                return self._rank(self._get_entities(lo, hi), num)
+            top = self.prefix_cache.get(prefix)
+            if top is None:
+                top = self._rank(self._get_entities(lo, hi), prefix_cache_size)
+                self.prefix_cache[prefix] = top
+            return top[:num]
+
+    def search(self, query: str, limit: int, offset: int) -> List[int]:
+        """Returns the entities with words starting with each word of query,
+        heaviest first"""
+        query_words = get_words(query)
+        if not query_words:
+            return []
+        num = limit + offset
+        # The longest query word matches the fewest entities
+        lead_word = max(query_words, key=len)
+        other_words = [word for word in query_words if word != lead_word]
+        if not other_words and not self.distinct_owners:
+            return self.search_prefix(lead_word, num)[offset:]
+
+        entity_ids = []
+        owner_ids = set()
+        with self._lock:
+            for entity_id in self.search_prefix(lead_word, num * candidates_per_result):
+                words = self.entity_words[entity_id]
+                if not all(
+                    any(word.startswith(query_word) for word in words)
+                    for query_word in other_words
+                ):
+                    continue
+                if self.distinct_owners:
+                    owner_id = self.owners[entity_id]
+                    if owner_id in owner_ids:
+                        continue
+                    owner_ids.add(owner_id)
+                entity_ids.append(entity_id)
+                if len(entity_ids) == num:
+                    break
+        return entity_ids[offset:]
+
+
+# ####### LOADERS ####### #
+# Each loader yields (entity_id, words, weight, owner_id) of searchable entities,
+# and (entity_id, None, None, None) for entities of entity_ids that are not
+# searchable.
+
+
+def load_users(session, user_ids: Optional[List[int]] = None) -> Iterator:
+    query = (
+        session.query(
+            User.user_id,
+            User.handle,
+            User.name,
+            User.is_deactivated,
+            func.coalesce(AggregateUser.follower_count, 0),
+        )
+        .outerjoin(AggregateUser, AggregateUser.user_id == User.user_id)
+        .filter(User.is_current == True)
+    )
+    if user_ids is not None:
+        query = query.filter(User.user_id.in_(user_ids))
+    for user_id, handle, name, is_deactivated, follower_count in query.yield_per(
+        load_batch_size
+    ):
+        if handle is None or is_deactivated:
+            yield user_id, None, None, None
+        else:
+            words = get_words(handle) + get_words(name)
+            yield user_id, words, follower_count, user_id
+
+
+def load_digital_contents(
+    session, digital_content_ids: Optional[List[int]] = None
+) -> Iterator:
+    query = (
+        session.query(
+            DigitalContent.digital_content_id,
+            DigitalContent.title,
+            DigitalContent.is_delete,
+            DigitalContent.is_unlisted,
+            DigitalContent.stem_of,
+            DigitalContent.owner_id,
+            User.handle,
+            User.name,
+            func.coalesce(AggregatePlay.count, 0),
+        )
+        .join(User, User.user_id == DigitalContent.owner_id)
+        .outerjoin(
+            AggregatePlay,
+            AggregatePlay.play_item_id == DigitalContent.digital_content_id,
+        )
+        .filter(DigitalContent.is_current == True, User.is_current == True)
+    )
+    if digital_content_ids is not None:
+        query = query.filter(DigitalContent.digital_content_id.in_(digital_content_ids))
+    for (
+        digital_content_id,
+        title,
+        is_delete,
+        is_unlisted,
+        stem_of,
+        owner_id,
+        handle,
+        name,
+        play_count,
+    ) in query.yield_per(load_batch_size):
+        if is_delete or is_unlisted or stem_of is not None:
+            yield digital_content_id, None, None, None
+        else:
+            words = get_words(title) + get_words(handle) + get_words(name)
+            yield digital_content_id, words, play_count, owner_id
+
+
+def load_content_lists(
+    session, is_album: bool, content_list_ids: Optional[List[int]] = None
+) -> Iterator:
+    query = (
+        session.query(
+            ContentList.content_list_id,
+            ContentList.content_list_name,
+            ContentList.is_delete,
+            ContentList.is_private,
+            ContentList.content_list_owner_id,
+            User.handle,
+            User.name,
+            func.coalesce(AggregateContentList.repost_count, 0)
+            + func.coalesce(AggregateContentList.save_count, 0),
+        )
+        .join(User, User.user_id == ContentList.content_list_owner_id)
+        .outerjoin(
+            AggregateContentList,
+            AggregateContentList.content_list_id == ContentList.content_list_id,
+        )
+        .filter(
+            ContentList.is_current == True,
+            ContentList.is_album == is_album,
+            User.is_current == True,
+        )
+    )
+    if content_list_ids is not None:
+        query = query.filter(ContentList.content_list_id.in_(content_list_ids))
+    for (
+        content_list_id,
+        content_list_name,
+        is_delete,
+        is_private,
+        owner_id,
+        handle,
+        name,
+        weight,
+    ) in query.yield_per(load_batch_size):
+        if is_delete or is_private:
+            yield content_list_id, None, None, None
+        else:
+            words = get_words(content_list_name) + get_words(handle) + get_words(name)
+            yield content_list_id, words, weight, owner_id
+
+
+def load_entities(session, search_type: str, entity_ids=None) -> Iterator:
+    if search_type == USERS:
+        return load_users(session, entity_ids)
+    if search_type == DIGITAL_CONTENTS:
+        return load_digital_contents(session, entity_ids)
+    return load_content_lists(session, search_type == ALBUMS, entity_ids)
+
+
+def get_changed_entity_ids(
+    session, prev_block: int, current_block: int, prev_play_id: int, play_id: int
+):
+    """Returns the ids of the entities of each search type whose names or weights
+    changed in the blocks after prev_block or the plays after prev_play_id"""
+
+    def in_blocks(model):
+        return (
+            model.is_current == True,
+            model.blocknumber > prev_block,
+            model.blocknumber <= current_block,
+        )
+
+    named_user_ids = [
+        user_id for (user_id,) in session.query(User.user_id).filter(*in_blocks(User))
+    ]
+    user_ids = set(named_user_ids)
+    # Follower counts
+    user_ids.update(
+        followee_user_id
+        for (followee_user_id,) in session.query(Follow.followee_user_id).filter(
+            *in_blocks(Follow)
+        )
+    )
+    digital_content_ids = {
+        digital_content_id
+        for (digital_content_id,) in session.query(
+            DigitalContent.digital_content_id
+        ).filter(*in_blocks(DigitalContent))
+    }
+    # Play counts, which aggregate_plays is updated with as plays are inserted
+    digital_content_ids.update(
+        play_item_id
+        for (play_item_id,) in session.query(Play.play_item_id)
+        .filter(Play.id > prev_play_id, Play.id <= play_id)
+        .distinct()
+    )
+    content_list_ids = {
+        content_list_id
+        for (content_list_id,) in session.query(ContentList.content_list_id).filter(
+            *in_blocks(ContentList)
+        )
+    }
+    # Repost and save counts
+    content_list_ids.update(
+        repost_item_id
+        for (repost_item_id,) in session.query(Repost.repost_item_id).filter(
+            *in_blocks(Repost),
+            Repost.repost_type.in_([RepostType.contentList, RepostType.album]),
+        )
+    )
+    content_list_ids.update(
+        save_item_id
+        for (save_item_id,) in session.query(Save.save_item_id).filter(
+            *in_blocks(Save),
+            Save.save_type.in_([SaveType.contentList, SaveType.album]),
+        )
+    )
+    # Owner names
+    if named_user_ids:
+        digital_content_ids.update(
+            digital_content_id
+            for (digital_content_id,) in session.query(
+                DigitalContent.digital_content_id
+            ).filter(
+                DigitalContent.is_current == True,
+                DigitalContent.owner_id.in_(named_user_ids),
+            )
+        )
+        content_list_ids.update(
+            content_list_id
+            for (content_list_id,) in session.query(ContentList.content_list_id).filter(
+                ContentList.is_current == True,
+                ContentList.content_list_owner_id.in_(named_user_ids),
+            )
+        )
+    return {
+        USERS: list(user_ids),
+        DIGITAL_CONTENTS: list(digital_content_ids),
+        # Loaders skip the ids of the other type
+        CONTENT_LISTS: list(content_list_ids),
+        ALBUMS: list(content_list_ids),
+    }
+
+
+def get_latest_block(session) -> Optional[int]:
+    return session.query(Block.number).filter(Block.is_current == True).scalar()
+
+
+def get_latest_play_id(session) -> int:
+    return session.query(func.max(Play.id)).scalar() or 0
+
+
+class AutocompleteIndex:
+    """The prefix indexes of each search type, built and refreshed from a daemon
+    thread of the current process"""
+
+    def __init__(self, db):
+        self.db = db
+        self.indexes: Dict[str, PrefixIndex] = {}
+        self.block_number: Optional[int] = None
+        self.play_id = 0
+        self.rebuild_at = 0.0
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self):
+        return self.block_number is not None
+
+    def start(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.block_number = None
+            self.rebuild_at = 0.0
+            thread = threading.Thread(
+                target=self._run, name="autocomplete-index", daemon=True
+            )
+            thread.start()
+
+    def search(self, search_type: str, query: str, limit: int, offset: int):
+        return self.indexes[search_type].search(query, limit, offset)
+
+    def remove(self, search_type: str, entity_ids: Iterable[int]):
+        """Removes entities found not to be searchable before the next refresh"""
+        index = self.indexes[search_type]
+        for entity_id in entity_ids:
+            index.remove(entity_id)
+
+    def rebuild(self, session):
+        start_time = time.time()
+        block_number = get_latest_block(session)
+        if block_number is None:
+            return
+        play_id = get_latest_play_id(session)
+        indexes = {}
+        for search_type in [USERS, DIGITAL_CONTENTS, CONTENT_LISTS, ALBUMS]:
+            # Users are their own owners
+            index = PrefixIndex(distinct_owners=search_type != USERS)
+            index.load(
+                entity
+                for entity in load_entities(session, search_type)
+                if entity[1] is not None
+            )
+            indexes[search_type] = index
+        self.indexes = indexes
+        self.block_number = block_number
+        self.play_id = play_id
+        built_at = time.time()
+        self.rebuild_at = built_at + rebuild_interval_sec * random.uniform(1, 1.5)
+        sizes = ", ".join(
+            f"{len(index)} {search_type}" for search_type, index in indexes.items()
+        )
+        logger.info(
+            f"autocomplete_index.py | rebuild | Built at block {block_number} in {built_at - start_time:.2f}s with {sizes}"
+        )
+
+    def refresh(self, session):
+        block_number = get_latest_block(session)
+        if self.block_number is None or block_number is None:
+            return
+        if block_number < self.block_number:
+            # Blocks were reverted, the rows they replaced are current again
+            self.rebuild_at = 0.0
+            return
+        play_id = get_latest_play_id(session)
+        if block_number == self.block_number and play_id <= self.play_id:
+            return
+        changed_entity_ids = get_changed_entity_ids(
+            session, self.block_number, block_number, self.play_id, play_id
+        )
+        for search_type, entity_ids in changed_entity_ids.items():
+            if not entity_ids:
+                continue
+            index = self.indexes[search_type]
+            found = set()
+            for entity_id, words, weight, owner_id in load_entities(
+                session, search_type, entity_ids
+            ):
+                found.add(entity_id)
+                if words is None:
+                    index.remove(entity_id)
+                else:
+                    index.update(entity_id, words, weight, owner_id)
+            # ContentLists of the other type, or entities no longer current
+            for entity_id in set(entity_ids) - found:
+                index.remove(entity_id)
+        self.block_number = block_number
+        self.play_id = play_id
+
+    def _run(self):
+        while True:
+            try:
+                with self.db.scoped_session() as session:
+                    if time.time() > self.rebuild_at:
+                        self.rebuild(session)
+                    else:
+                        self.refresh(session)
+            except Exception as e:
+                logger.error(
+                    f"autocomplete_index.py | Autocomplete index refresh failed: {e}"
+                )
+            time.sleep(refresh_interval_sec)
+
+
+autocomplete_index: Optional[AutocompleteIndex] = None
+
+
+def get_autocomplete_index(db) -> AutocompleteIndex:
+    """Returns the autocomplete index of the current process, started on first
+    use"""
+    # pylint: disable=W0603
+    global autocomplete_index
+    if autocomplete_index is None:
+        autocomplete_index = AutocompleteIndex(db)
+    autocomplete_index.start()
+    return autocomplete_index
@@ -0,0 +1,115 @@
+from unittest.mock import MagicMock, patch
+
+from src.queries import autocomplete_index
+from src.queries.autocomplete_index import AutocompleteIndex, PrefixIndex, get_words
+
+
+def test_get_words():
+    assert get_words("Drum & Bass: Vol.2") == ["drum", "and", "bass", "vol", "2"]
+    assert get_words(None) == []
+
+
+def test_prefix_index_search():
+    index = PrefixIndex()
+    index.load(
+        [
+            (1, get_words("Night Drive") + ["djone"], 10, 1),
+            (2, get_words("Nightcall") + ["djtwo"], 50, 2),
+            (3, get_words("Morning Drive") + ["djone"], 30, 1),
+            (4, [], 100, 4),
+        ]
+    )
+    assert len(index) == 3
+
+    # Ranked by weight
+    assert index.search("nig", 10, 0) == [2, 1]
+    assert index.search("drive", 10, 0) == [3, 1]
+    assert index.search("drive", 1, 1) == [1]
+    # Every query word prefixes a word of the entity
+    assert index.search("night dri", 10, 0) == [1]
+    assert index.search("dri dj", 10, 0) == [3, 1]
+    assert index.search("nomatch", 10, 0) == []
+    assert index.search("  ", 10, 0) == []
+
+    index.update(1, get_words("Night Drive") + ["djone"], 40, 1)
+    assert index.search("drive", 10, 0) == [1, 3]
+    index.update(2, get_words("Daycall"), 50, 2)
+    assert index.search("nig", 10, 0) == [1]
+    assert index.search("day", 10, 0) == [2]
+    index.remove(1)
+    assert index.search("drive", 10, 0) == [3]
+    assert 1 not in index.owners
+    # Words are dropped with their last entity
+    assert "night" not in index.word_entities
+    assert index.words == sorted(index.word_entities)
+
+
+def test_prefix_index_distinct_owners():
+    index = PrefixIndex(distinct_owners=True)
+    index.load([(1, ["song"], 10, 1), (2, ["song"], 20, 1), (3, ["song"], 5, 2)])
+    assert index.search("so", 10, 0) == [2, 3]
+    assert index.search("so", 10, 1) == [3]
+
+
+def test_prefix_index_cache(monkeypatch):
+    monkeypatch.setattr(autocomplete_index, "scan_max_words", 2)
+    monkeypatch.setattr(autocomplete_index, "prefix_cache_size", 3)
+    index = PrefixIndex()
+    index.load([(i, [f"word{i}"], i, i) for i in range(10)])
+
+    assert index.search("wo", 2, 0) == [9, 8]
+    assert index.prefix_cache["wo"] == [9, 8, 7]
+
+    # Increases and additions are ranked into cached results
+    index.update(0, ["word0"], 100, 0)
+    index.update(20, ["wonder"], 8.5, 20)
+    assert index.prefix_cache["wo"] == [0, 9, 20]
+    assert index.search("wo", 3, 0) == [0, 9, 20]
+
+    # Decreases and removals drop cached results, to be ranked again
+    index.update(0, ["word0"], 0, 0)
+    assert "wo" not in index.prefix_cache
+    assert index.search("wo", 3, 0) == [9, 20, 8]
+    index.remove(9)
+    assert "wo" not in index.prefix_cache
+    assert index.search("wo", 3, 0) == [20, 8, 7]
+
+
+def test_autocomplete_index_refresh():
+    """Tests that plays refresh weights, and that reverts trigger a rebuild"""
+    index = AutocompleteIndex(None)
+    index.indexes = {
+        search_type: PrefixIndex()
+        for search_type in ["users", "digitalContents", "content_lists", "albums"]
+    }
+    index.indexes["digitalContents"].load([(1, ["song"], 10, 1)])
+    index.block_number = 100
+    index.play_id = 50
+    index.rebuild_at = float("inf")
+    changed_entity_ids = {
+        "users": [],
+        "digitalContents": [1],
+        "content_lists": [],
+        "albums": [],
+    }
+    with patch.object(
+        autocomplete_index, "get_latest_block", return_value=100
+    ), patch.object(
+        autocomplete_index, "get_latest_play_id", return_value=60
+    ), patch.object(
+        autocomplete_index, "get_changed_entity_ids", return_value=changed_entity_ids
+    ) as get_changed_entity_ids, patch.object(
+        autocomplete_index,
+        "load_entities",
+        return_value=[(1, ["song"], 20, 1)],
+    ):
+        index.refresh(MagicMock())
+    get_changed_entity_ids.assert_called_once()
+    assert get_changed_entity_ids.call_args[0][1:] == (100, 100, 50, 60)
+    assert index.indexes["digitalContents"].weights[1] == 20
+    assert index.play_id == 60
+
+    with patch.object(autocomplete_index, "get_latest_block", return_value=99):
+        index.refresh(MagicMock())
+    assert index.rebuild_at == 0.0
+    assert index.block_number == 100
@@ -1,4 +1,5 @@
 import datetime
+import logging
 
 from flask import request
 from sqlalchemy import and_, desc, func, or_
@@ -9,18 +10,35 @@ from src.models.social.save import SaveType
 from src.models.digitalContents.digital_content import DigitalContent
 from src.queries import response_name_constants
 from src.queries.get_feed_es import get_feed_es
-from src.queries.get_unpopulated_digital_contents import get_unpopulated_digital_contents
+from src.queries.get_unpopulated_digital_contents import (
+    get_unpopulated_digital_contents,
+)
+from src.queries.materialized_feed import (
+    feed_max_items,
+    get_entity_feed_member,
+    get_feed_items,
+    get_high_follower_followee_user_ids,
+    hydrate_feed_items,
+    is_materialized_feed_enabled,
+    read_feed,
+    refresh_feed_ttl,
+    save_feed,
+)
 from src.queries.query_helpers import (
+    add_query_pagination,
+    decode_pagination_cursor,
     get_pagination_vars,
     get_users_by_id,
     get_users_ids,
-    paginate_query,
     populate_content_list_metadata,
     populate_digital_content_metadata,
 )
 from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 from src.utils.elasticdsl import es_url
+from src.utils.redis_connection import get_redis
+
+logger = logging.getLogger(__name__)
 
 digitalContentDedupeMaxMinutes = 10
 
@@ -28,7 +46,17 @@ digitalContentDedupeMaxMinutes = 10
 def get_feed(args):
     skip_es = request.args.get("es") == "0"
     use_es = es_url and not skip_es
-    if use_es:
+    if use_materialized_feed(args):
+        try:
+            return get_feed_materialized(args)
+        except Exception as e:
+            logger.error(
+                f"get_feed.py | get_feed | Materialized feed failed, querying it: {e}",
+                exc_info=True,
+            )
+            return get_feed_sql(args)
+    # The elasticsearch feed does not paginate by cursor
+    if use_es and args.get("cursor") is None:
         try:
             (limit, _) = get_pagination_vars()
             return get_feed_es(args, limit)
@@ -39,7 +67,6 @@ def get_feed(args):
 
 
 def get_feed_sql(args):
-    feed_results = []
     db = get_db_read_replica()
 
     feed_filter = args.get("filter")
@@ -53,255 +80,456 @@ def get_feed_sql(args):
     with db.scoped_session() as session:
         # Generate list of users followed by current user, i.e. 'followees'
         if not followee_user_ids:
-            followee_user_ids = (
-                session.query(Follow.followee_user_id)
-                .filter(
-                    Follow.follower_user_id == current_user_id,
-                    Follow.is_current == True,
-                    Follow.is_delete == False,
-                )
-                .all()
+            followee_user_ids = get_followee_user_ids(session, current_user_id)
+
+        (limit, _) = get_pagination_vars()
+        digitalContents, contentLists = get_feed_entities(
+            session,
+            followee_user_ids,
+            feed_filter,
+            digitalContents_only,
+            limit,
+            get_feed_cursor_timestamp(args),
+        )
+        return populate_feed(session, args, digitalContents, contentLists, limit)
+
+
+def get_feed_sort_key(entry):
+    """Returns the cursor sort key of an entry of get_feed"""
+    return [entry[response_name_constants.activity_timestamp]]
+
+
+def get_feed_cursor_timestamp(args):
+    """Returns the activity timestamp of the feed entries to return entries before"""
+    cursor = args.get("cursor")
+    if cursor is None:
+        return None
+    return decode_pagination_cursor(cursor, [datetime.datetime])[0]
+
+
+def use_materialized_feed(args):
+    """The materialized feed only holds the unfiltered feed of the current user"""
+    return (
+        is_materialized_feed_enabled()
+        and args.get("user_id") is not None
+        and args.get("filter") == "all"
+        and not args.get("digitalContents_only", False)
+        and not args.get("followee_user_ids")
+    )
+
+
+def get_feed_materialized(args):
+    db = get_db_read_replica()
+    redis = get_redis()
+    current_user_id = args.get("user_id")
+    with db.scoped_session() as session:
+        (limit, _) = get_pagination_vars()
+        digitalContents, contentLists = get_materialized_feed_entities(
+            session, redis, current_user_id, limit, get_feed_cursor_timestamp(args)
+        )
+        return populate_feed(session, args, digitalContents, contentLists, limit)
+
+
+def get_followee_user_ids(session, user_id):
+    followee_user_ids = (
+        session.query(Follow.followee_user_id)
+        .filter(
+            Follow.follower_user_id == user_id,
+            Follow.is_current == True,
+            Follow.is_delete == False,
+        )
+        .all()
+    )
+    return [f[0] for f in followee_user_ids]
+
+
+def get_same_action_digital_content_ids(
+    content_list_owner_id,
+    content_list_created_at,
+    content_list_contents,
+    digital_contents_dict,
+):
+    """
+    Returns the ids of the digital_contents of a contentList created by its owner in
+    the "same action" as the contentList, i.e. within digitalContentDedupeMaxMinutes
+    before its creation
+    """
+    digital_content_ids = set()
+    max_timedelta = datetime.timedelta(minutes=digitalContentDedupeMaxMinutes)
+    for digital_content_entry in content_list_contents["digital_content_ids"]:
+        digital_content = digital_contents_dict.get(
+            digital_content_entry["digital_content"]
+        )
+        if not digital_content:
+            continue
+        if (
+            (digital_content["owner_id"] == content_list_owner_id)
+            and (digital_content["created_at"] <= content_list_created_at)
+            and (
+                content_list_created_at - digital_content["created_at"] <= max_timedelta
             )
-            followee_user_ids = [f[0] for f in followee_user_ids]
-
-        # Fetch followee creations if requested
-        if feed_filter in ["original", "all"]:
-            if not digitalContents_only:
-                # Query contentLists posted by followees, sorted and paginated by created_at desc
-                created_content_lists_query = (
-                    session.query(ContentList)
-                    .filter(
-                        ContentList.is_current == True,
-                        ContentList.is_delete == False,
-                        ContentList.is_private == False,
-                        ContentList.content_list_owner_id.in_(followee_user_ids),
-                    )
-                    .order_by(desc(ContentList.created_at))
-                )
-                created_content_lists = paginate_query(created_content_lists_query, False).all()
-
-                # get digital_content ids for all digitalContents in contentLists
-                content_list_digital_content_ids = set()
-                for contentList in created_content_lists:
-                    for digital_content in contentList.content_list_contents["digital_content_ids"]:
-                        content_list_digital_content_ids.add(digital_content["digital_content"])
-
-                # get all digital_content objects for digital_content ids
-                content_list_digital_contents = get_unpopulated_digital_contents(session, content_list_digital_content_ids)
-                content_list_digital_contents_dict = {
-                    digital_content["digital_content_id"]: digital_content for digital_content in content_list_digital_contents
-                }
-
-                # get all digital_content ids that have same owner as contentList and created in "same action"
-                # "same action": digital_content created within [x time] before contentList creation
-                digitalContents_to_dedupe = set()
-                for contentList in created_content_lists:
-                    for digital_content_entry in contentList.content_list_contents["digital_content_ids"]:
-                        digital_content = content_list_digital_contents_dict.get(digital_content_entry["digital_content"])
-                        if not digital_content:
-                            continue
-                        max_timedelta = datetime.timedelta(
-                            minutes=digitalContentDedupeMaxMinutes
-                        )
-                        if (
-                            (digital_content["owner_id"] == contentList.content_list_owner_id)
-                            and (digital_content["created_at"] <= contentList.created_at)
-                            and (
-                                contentList.created_at - digital_content["created_at"]
-                                <= max_timedelta
-                            )
-                        ):
-                            digitalContents_to_dedupe.add(digital_content["digital_content_id"])
-                digitalContents_to_dedupe = list(digitalContents_to_dedupe)
-            else:
-                # No contentLists to consider
-                digitalContents_to_dedupe = []
-                created_content_lists = []
-
-            # Query digitalContents posted by followees, sorted & paginated by created_at desc
-            # exclude digitalContents that were posted in "same action" as contentList
-            created_digital_contents_query = (
-                session.query(DigitalContent)
+        ):
+            digital_content_ids.add(digital_content["digital_content_id"])
+    return digital_content_ids
+
+
+def get_feed_entities(
+    session, followee_user_ids, feed_filter, digitalContents_only, limit, before=None
+):
+    """
+    Returns the latest `limit` digitalContents and contentLists created or reposted by
+    followee_user_ids, each with its activity_timestamp: created_at if created by a
+    followee, else the timestamp of the oldest followee repost.
+    With before, only returns the entities with an earlier activity_timestamp.
+    """
+    # Fetch followee creations if requested
+    if feed_filter in ["original", "all"]:
+        if not digitalContents_only:
+            # Query contentLists posted by followees, sorted and paginated by created_at desc
+            created_content_lists_query = (
+                session.query(ContentList)
                 .filter(
-                    DigitalContent.is_current == True,
-                    DigitalContent.is_delete == False,
-                    DigitalContent.is_unlisted == False,
-                    DigitalContent.stem_of == None,
-                    DigitalContent.owner_id.in_(followee_user_ids),
-                    DigitalContent.digital_content_id.notin_(digitalContents_to_dedupe),
+                    ContentList.is_current == True,
+                    ContentList.is_delete == False,
+                    ContentList.is_private == False,
+                    ContentList.content_list_owner_id.in_(followee_user_ids),
                 )
-                .order_by(desc(DigitalContent.created_at))
+                .order_by(desc(ContentList.created_at))
             )
-            created_digital_contents = paginate_query(created_digital_contents_query, False).all()
+            if before is not None:
+                created_content_lists_query = created_content_lists_query.filter(
+                    ContentList.created_at < before
+                )
+            created_content_lists = add_query_pagination(
+                created_content_lists_query, limit, 0, False
+            ).all()
 
-            # extract created_digital_content_ids and created_content_list_ids
-            created_digital_content_ids = [digital_content.digital_content_id for digital_content in created_digital_contents]
-            created_content_list_ids = [
-                contentList.content_list_id for contentList in created_content_lists
-            ]
+            # get digital_content ids for all digitalContents in contentLists
+            content_list_digital_content_ids = set()
+            for contentList in created_content_lists:
+                for digital_content in contentList.content_list_contents[
+                    "digital_content_ids"
+                ]:
+                    content_list_digital_content_ids.add(
+                        digital_content["digital_content"]
+                    )
 
-        # Fetch followee reposts if requested
-        if feed_filter in ["repost", "all"]:
-            # query items reposted by followees, sorted by oldest followee repost of item;
-            # paginated by most recent repost timestamp
-            repost_subquery = session.query(Repost).filter(
-                Repost.is_current == True,
-                Repost.is_delete == False,
-                Repost.user_id.in_(followee_user_ids),
+            # get all digital_content objects for digital_content ids
+            content_list_digital_contents = get_unpopulated_digital_contents(
+                session, content_list_digital_content_ids
             )
-            # exclude items also created by followees to guarantee order determinism, in case of "all" filter
-            if feed_filter == "all":
-                repost_subquery = repost_subquery.filter(
-                    or_(
-                        and_(
-                            Repost.repost_type == RepostType.digital_content,
-                            Repost.repost_item_id.notin_(created_digital_content_ids),
-                        ),
-                        and_(
-                            Repost.repost_type != RepostType.digital_content,
-                            Repost.repost_item_id.notin_(created_content_list_ids),
-                        ),
+            content_list_digital_contents_dict = {
+                digital_content["digital_content_id"]: digital_content
+                for digital_content in content_list_digital_contents
+            }
+
+            # get all digital_content ids that have same owner as contentList and created in "same action"
+            # "same action": digital_content created within [x time] before contentList creation
+            digitalContents_to_dedupe = set()
+            for contentList in created_content_lists:
+                digitalContents_to_dedupe.update(
+                    get_same_action_digital_content_ids(
+                        contentList.content_list_owner_id,
+                        contentList.created_at,
+                        contentList.content_list_contents,
+                        content_list_digital_contents_dict,
                     )
                 )
-            repost_subquery = repost_subquery.subquery()
+            digitalContents_to_dedupe = list(digitalContents_to_dedupe)
+        else:
+            # No contentLists to consider
+            digitalContents_to_dedupe = []
+            created_content_lists = []
 
-            repost_query = (
-                session.query(
-                    repost_subquery.c.repost_item_id,
-                    repost_subquery.c.repost_type,
-                    func.min(repost_subquery.c.created_at).label("min_created_at"),
-                )
-                .group_by(
-                    repost_subquery.c.repost_item_id, repost_subquery.c.repost_type
-                )
-                .order_by(desc("min_created_at"))
-            )
-            followee_reposts = paginate_query(repost_query, False).all()
-
-            # build dict of digital_content_id / content_list_id -> oldest followee repost timestamp from followee_reposts above
-            digital_content_repost_timestamp_dict = {}
-            content_list_repost_timestamp_dict = {}
-            for (
-                repost_item_id,
-                repost_type,
-                oldest_followee_repost_timestamp,
-            ) in followee_reposts:
-                if repost_type == RepostType.digital_content:
-                    digital_content_repost_timestamp_dict[
-                        repost_item_id
-                    ] = oldest_followee_repost_timestamp
-                elif repost_type in (RepostType.contentList, RepostType.album):
-                    content_list_repost_timestamp_dict[
-                        repost_item_id
-                    ] = oldest_followee_repost_timestamp
-
-            # extract reposted_digital_content_ids and reposted_content_list_ids
-            reposted_digital_content_ids = list(digital_content_repost_timestamp_dict.keys())
-            reposted_content_list_ids = list(content_list_repost_timestamp_dict.keys())
-
-            # Query digitalContents reposted by followees
-            reposted_digital_contents = session.query(DigitalContent).filter(
+        # Query digitalContents posted by followees, sorted & paginated by created_at desc
+        # exclude digitalContents that were posted in "same action" as contentList
+        created_digital_contents_query = (
+            session.query(DigitalContent)
+            .filter(
                 DigitalContent.is_current == True,
                 DigitalContent.is_delete == False,
                 DigitalContent.is_unlisted == False,
                 DigitalContent.stem_of == None,
-                DigitalContent.digital_content_id.in_(reposted_digital_content_ids),
+                DigitalContent.owner_id.in_(followee_user_ids),
+                DigitalContent.digital_content_id.notin_(digitalContents_to_dedupe),
             )
-            # exclude digitalContents already fetched from above, in case of "all" filter
-            if feed_filter == "all":
-                reposted_digital_contents = reposted_digital_contents.filter(
-                    DigitalContent.digital_content_id.notin_(created_digital_content_ids)
+            .order_by(desc(DigitalContent.created_at))
+        )
+        if before is not None:
+            created_digital_contents_query = created_digital_contents_query.filter(
+                DigitalContent.created_at < before
+            )
+        created_digital_contents = add_query_pagination(
+            created_digital_contents_query, limit, 0, False
+        ).all()
+
+        # extract created_digital_content_ids and created_content_list_ids
+        created_digital_content_ids = [
+            digital_content.digital_content_id
+            for digital_content in created_digital_contents
+        ]
+        created_content_list_ids = [
+            contentList.content_list_id for contentList in created_content_lists
+        ]
+
+    # Fetch followee reposts if requested
+    if feed_filter in ["repost", "all"]:
+        # query items reposted by followees, sorted by oldest followee repost of item;
+        # paginated by most recent repost timestamp
+        repost_subquery = session.query(Repost).filter(
+            Repost.is_current == True,
+            Repost.is_delete == False,
+            Repost.user_id.in_(followee_user_ids),
+        )
+        # exclude items also created by followees to guarantee order determinism, in case of "all" filter
+        if feed_filter == "all":
+            repost_subquery = repost_subquery.filter(
+                or_(
+                    and_(
+                        Repost.repost_type == RepostType.digital_content,
+                        Repost.repost_item_id.notin_(created_digital_content_ids),
+                    ),
+                    and_(
+                        Repost.repost_type != RepostType.digital_content,
+                        Repost.repost_item_id.notin_(created_content_list_ids),
+                    ),
                 )
-            reposted_digital_contents = reposted_digital_contents.order_by(desc(DigitalContent.created_at)).all()
+            )
+        repost_subquery = repost_subquery.subquery()
 
-            if not digitalContents_only:
-                # Query contentLists reposted by followees, excluding contentLists already fetched from above
-                reposted_content_lists = session.query(ContentList).filter(
-                    ContentList.is_current == True,
-                    ContentList.is_delete == False,
-                    ContentList.is_private == False,
-                    ContentList.content_list_id.in_(reposted_content_list_ids),
+        repost_query = (
+            session.query(
+                repost_subquery.c.repost_item_id,
+                repost_subquery.c.repost_type,
+                func.min(repost_subquery.c.created_at).label("min_created_at"),
+            )
+            .group_by(repost_subquery.c.repost_item_id, repost_subquery.c.repost_type)
+            .order_by(desc("min_created_at"))
+        )
+        if before is not None:
+            repost_query = repost_query.having(
+                func.min(repost_subquery.c.created_at) < before
+            )
+        followee_reposts = add_query_pagination(repost_query, limit, 0, False).all()
+
+        # build dict of digital_content_id / content_list_id -> oldest followee repost timestamp from followee_reposts above
+        digital_content_repost_timestamp_dict = {}
+        content_list_repost_timestamp_dict = {}
+        for (
+            repost_item_id,
+            repost_type,
+            oldest_followee_repost_timestamp,
+        ) in followee_reposts:
+            if repost_type == RepostType.digital_content:
+                digital_content_repost_timestamp_dict[
+                    repost_item_id
+                ] = oldest_followee_repost_timestamp
+            elif repost_type in (RepostType.contentList, RepostType.album):
+                content_list_repost_timestamp_dict[
+                    repost_item_id
+                ] = oldest_followee_repost_timestamp
+
+        # extract reposted_digital_content_ids and reposted_content_list_ids
+        reposted_digital_content_ids = list(
+            digital_content_repost_timestamp_dict.keys()
+        )
+        reposted_content_list_ids = list(content_list_repost_timestamp_dict.keys())
+
+        # Query digitalContents reposted by followees
+        reposted_digital_contents = session.query(DigitalContent).filter(
+            DigitalContent.is_current == True,
+            DigitalContent.is_delete == False,
+            DigitalContent.is_unlisted == False,
+            DigitalContent.stem_of == None,
+            DigitalContent.digital_content_id.in_(reposted_digital_content_ids),
+        )
+        # exclude digitalContents already fetched from above, in case of "all" filter
+        if feed_filter == "all":
+            reposted_digital_contents = reposted_digital_contents.filter(
+                DigitalContent.digital_content_id.notin_(created_digital_content_ids)
+            )
+        reposted_digital_contents = reposted_digital_contents.order_by(
+            desc(DigitalContent.created_at)
+        ).all()
+
+        if not digitalContents_only:
+            # Query contentLists reposted by followees, excluding contentLists already fetched from above
+            reposted_content_lists = session.query(ContentList).filter(
+                ContentList.is_current == True,
+                ContentList.is_delete == False,
+                ContentList.is_private == False,
+                ContentList.content_list_id.in_(reposted_content_list_ids),
+            )
+            # exclude contentLists already fetched from above, in case of "all" filter
+            if feed_filter == "all":
+                reposted_content_lists = reposted_content_lists.filter(
+                    ContentList.content_list_id.notin_(created_content_list_ids)
                 )
-                # exclude contentLists already fetched from above, in case of "all" filter
-                if feed_filter == "all":
-                    reposted_content_lists = reposted_content_lists.filter(
-                        ContentList.content_list_id.notin_(created_content_list_ids)
-                    )
-                reposted_content_lists = reposted_content_lists.order_by(
-                    desc(ContentList.created_at)
-                ).all()
-            else:
-                reposted_content_lists = []
-
-        if feed_filter == "original":
-            digitalContents_to_process = created_digital_contents
-            content_lists_to_process = created_content_lists
-        elif feed_filter == "repost":
-            digitalContents_to_process = reposted_digital_contents
-            content_lists_to_process = reposted_content_lists
+            reposted_content_lists = reposted_content_lists.order_by(
+                desc(ContentList.created_at)
+            ).all()
         else:
-            digitalContents_to_process = created_digital_contents + reposted_digital_contents
-            content_lists_to_process = created_content_lists + reposted_content_lists
-
-        digitalContents = helpers.query_result_to_list(digitalContents_to_process)
-        contentLists = helpers.query_result_to_list(content_lists_to_process)
-
-        # define top level feed activity_timestamp to enable sorting
-        # activity_timestamp: created_at if item created by followee, else reposted_at
-        for digital_content in digitalContents:
-            if digital_content["owner_id"] in followee_user_ids:
-                digital_content[response_name_constants.activity_timestamp] = digital_content["created_at"]
-            else:
-                digital_content[
-                    response_name_constants.activity_timestamp
-                ] = digital_content_repost_timestamp_dict[digital_content["digital_content_id"]]
-        for contentList in contentLists:
-            if contentList["content_list_owner_id"] in followee_user_ids:
-                contentList[response_name_constants.activity_timestamp] = contentList[
-                    "created_at"
-                ]
-            else:
-                contentList[
-                    response_name_constants.activity_timestamp
-                ] = content_list_repost_timestamp_dict[contentList["content_list_id"]]
+            reposted_content_lists = []
 
-        # bundle peripheral info into digital_content and contentList objects
-        digital_content_ids = list(map(lambda digital_content: digital_content["digital_content_id"], digitalContents))
-        content_list_ids = list(map(lambda contentList: contentList["content_list_id"], contentLists))
-        digitalContents = populate_digital_content_metadata(session, digital_content_ids, digitalContents, current_user_id)
-        contentLists = populate_content_list_metadata(
-            session,
-            content_list_ids,
-            contentLists,
-            [RepostType.contentList, RepostType.album],
-            [SaveType.contentList, SaveType.album],
-            current_user_id,
+    if feed_filter == "original":
+        digitalContents_to_process = created_digital_contents
+        content_lists_to_process = created_content_lists
+    elif feed_filter == "repost":
+        digitalContents_to_process = reposted_digital_contents
+        content_lists_to_process = reposted_content_lists
+    else:
+        digitalContents_to_process = (
+            created_digital_contents + reposted_digital_contents
         )
+        content_lists_to_process = created_content_lists + reposted_content_lists
+
+    digitalContents = helpers.query_result_to_list(digitalContents_to_process)
+    contentLists = helpers.query_result_to_list(content_lists_to_process)
+
+    # define top level feed activity_timestamp to enable sorting
+    # activity_timestamp: created_at if item created by followee, else reposted_at
+    for digital_content in digitalContents:
+        if digital_content["owner_id"] in followee_user_ids:
+            digital_content[
+                response_name_constants.activity_timestamp
+            ] = digital_content["created_at"]
+        else:
+            digital_content[
+                response_name_constants.activity_timestamp
+            ] = digital_content_repost_timestamp_dict[
+                digital_content["digital_content_id"]
+            ]
+    for contentList in contentLists:
+        if contentList["content_list_owner_id"] in followee_user_ids:
+            contentList[response_name_constants.activity_timestamp] = contentList[
+                "created_at"
+            ]
+        else:
+            contentList[
+                response_name_constants.activity_timestamp
+            ] = content_list_repost_timestamp_dict[contentList["content_list_id"]]
+
+    return digitalContents, contentLists
 
-        # build combined feed of digitalContents and contentLists
-        unsorted_feed = digitalContents + contentLists
 
-        # sort feed based on activity_timestamp
-        sorted_feed = sorted(
-            unsorted_feed,
-            key=lambda entry: entry[response_name_constants.activity_timestamp],
-            reverse=True,
+def populate_feed(session, args, digitalContents, contentLists, limit):
+    """Populates feed entities with their metadata, and returns the latest `limit`
+    of them by activity_timestamp"""
+    current_user_id = args.get("user_id")
+    # bundle peripheral info into digital_content and contentList objects
+    digital_content_ids = list(
+        map(
+            lambda digital_content: digital_content["digital_content_id"],
+            digitalContents,
         )
+    )
+    content_list_ids = list(
+        map(lambda contentList: contentList["content_list_id"], contentLists)
+    )
+    digitalContents = populate_digital_content_metadata(
+        session, digital_content_ids, digitalContents, current_user_id
+    )
+    contentLists = populate_content_list_metadata(
+        session,
+        content_list_ids,
+        contentLists,
+        [RepostType.contentList, RepostType.album],
+        [SaveType.contentList, SaveType.album],
+        current_user_id,
+    )
 
-        # truncate feed to requested limit
-        (limit, _) = get_pagination_vars()
-        feed_results = sorted_feed[0:limit]
-        if "with_users" in args and args.get("with_users") != False:
-            user_id_list = get_users_ids(feed_results)
-            users = get_users_by_id(session, user_id_list)
-            for result in feed_results:
-                if "content_list_owner_id" in result:
-                    user = users[result["content_list_owner_id"]]
-                    if user:
-                        result["user"] = user
-                elif "owner_id" in result:
-                    user = users[result["owner_id"]]
-                    if user:
-                        result["user"] = user
+    # build combined feed of digitalContents and contentLists
+    unsorted_feed = digitalContents + contentLists
+
+    # sort feed based on activity_timestamp
+    sorted_feed = sorted(
+        unsorted_feed,
+        key=lambda entry: entry[response_name_constants.activity_timestamp],
+        reverse=True,
+    )
+
+    # truncate feed to requested limit
+    feed_results = sorted_feed[0:limit]
+    if "with_users" in args and args.get("with_users") != False:
+        user_id_list = get_users_ids(feed_results)
+        users = get_users_by_id(session, user_id_list)
+        for result in feed_results:
+            if "content_list_owner_id" in result:
+                user = users[result["content_list_owner_id"]]
+                if user:
+                    result["user"] = user
+            elif "owner_id" in result:
+                user = users[result["owner_id"]]
+                if user:
+                    result["user"] = user
 
     return feed_results
+
+
+def build_feed(session, redis, user_id, high_follower_followee_user_ids):
+    """Builds the materialized feed of user_id from the activity of the followees
+    whose activity is fanned out"""
+    high_follower_followee_user_ids = set(high_follower_followee_user_ids)
+    followee_user_ids = [
+        followee_user_id
+        for followee_user_id in get_followee_user_ids(session, user_id)
+        if followee_user_id not in high_follower_followee_user_ids
+    ]
+    digitalContents, contentLists = get_feed_entities(
+        session, followee_user_ids, "all", False, feed_max_items
+    )
+    save_feed(redis, user_id, get_feed_items(digitalContents, contentLists))
+
+
+def get_materialized_feed_entities(session, redis, user_id, limit, before=None):
+    """
+    Returns the latest `limit` digitalContents and contentLists of the materialized
+    feed of user_id, merged with the activity of followees that is not fanned out,
+    in the form of get_feed_entities
+    """
+    high_follower_followee_user_ids = get_high_follower_followee_user_ids(
+        session, user_id
+    )
+    if not refresh_feed_ttl(redis, user_id):
+        build_feed(session, redis, user_id, high_follower_followee_user_ids)
+
+    # Read past the items deleted since they were added, until limit items are found
+    entities_by_member = {}
+    start = 0
+    while len(entities_by_member) < limit:
+        feed_items = read_feed(redis, user_id, start, limit, before)
+        entities = hydrate_feed_items(session, redis, user_id, feed_items)
+        for entity in entities:
+            entities_by_member[get_entity_feed_member(entity)] = entity
+        if len(feed_items) < limit:
+            break
+        # Deleted items were removed from the feed
+        start += len(entities)
+
+    # Merge the activity of high follower followees, keeping the oldest activity
+    # timestamp of items also in the materialized feed
+    if high_follower_followee_user_ids:
+        digitalContents, contentLists = get_feed_entities(
+            session, high_follower_followee_user_ids, "all", False, limit, before
+        )
+        for entity in digitalContents + contentLists:
+            member = get_entity_feed_member(entity)
+            feed_entity = entities_by_member.get(member)
+            if feed_entity is None:
+                entities_by_member[member] = entity
+            elif (
+                entity[response_name_constants.activity_timestamp]
+                < feed_entity[response_name_constants.activity_timestamp]
+            ):
+                feed_entity[response_name_constants.activity_timestamp] = entity[
+                    response_name_constants.activity_timestamp
+                ]
+
+    digitalContents = []
+    contentLists = []
+    for entity in entities_by_member.values():
+        if "content_list_id" in entity:
+            contentLists.append(entity)
+        else:
+            digitalContents.append(entity)
+    return digitalContents, contentLists
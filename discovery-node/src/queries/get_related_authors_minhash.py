@@ -1,22 +1,226 @@
+"""
+Related landlords from MinHash signatures of follower sets
+
+The MinHash signature of the followers of each landlord is stored in redis,
+along with an LSH forest of the signatures, so that both are updated in place
+as follows are indexed rather than rebuilt from every follow edge.
+
+Incremental updates only replace the related landlords of landlords whose
+followers changed, so the related landlords of every landlord are rebuilt
+daily to pick up changed landlords as new neighbours of unchanged ones.
+Reverted blocks are logged by revert_blocks with the followees of their follows,
+whose signatures are recomputed before the blocks indexed in their place are
+processed again.
+
+Signatures are stored as the raw bytes of their uint64 hash values. The LSH
+forest mirrors datasketch's MinHashLSHForest: each of its num_trees prefix
+trees is a sorted set whose members are the hex prefix of a slice of a
+signature followed by the landlord's user id, so landlords sharing a prefix
+are found with a lexicographic range query.
+"""
+
 import datetime
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
 
-from datasketch import MinHash, MinHashLSHForest
+import numpy as np
+from datasketch import LeanMinHash, MinHash
 from psycopg2.extras import execute_values
+from redis import Redis
 from sqlalchemy.orm import Session
+from src.models.digitalContents.digital_content import DigitalContent
+from src.models.indexing.block import Block
+from src.models.social.follow import Follow
+from src.models.users.aggregate_user import AggregateUser
+from src.utils.reverted_blocks import clear_reverted_blocks, get_reverted_blocks
+
+logger = logging.getLogger(__name__)
 
 top_k = 100
 num_perm = 256
+minhash_seed = 1
+# Number of prefix trees of the LSH forest, as in MinHashLSHForest
+num_trees = 8
+# Hash values of each tree's slice of a signature that are indexed. Prefixes
+# longer than this are only shared by near identical follower sets.
+tree_depth = 8
 
 # was 200 before, but since mh.count() is aprox.
 # and we filter on >= 200 in get_related_landlords query
 # set to 150 here
 MIN_FOLLOWER_REQUIREMENT = 150
 
+minhash_key = "related_landlords:minhash"
+forest_key_prefix = "related_landlords:forest"
+# Last block whose follows are reflected in the store
+checkpoint_key = "related_landlords:checkpoint"
+# Set when the store is rebuilt, the store is rebuilt again once it expires
+rebuilt_key = "related_landlords:rebuilt"
+rebuild_interval_sec = 24 * 60 * 60
+# Log of the reverted blocks not yet processed
+reverted_follow_blocks_key = "related_landlords:reverts"
+
+# Number of signatures written to redis per pipeline
+store_batch_size = 1000
+
+# Permutations are generated from the seed, so they are shared by all signatures
+_permutations = MinHash(num_perm=num_perm, seed=minhash_seed).permutations
+
+
+def serialize_signature(hashvalues: np.ndarray) -> bytes:
+    return np.asarray(hashvalues, dtype=np.uint64).tobytes()
+
+
+def deserialize_signature(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint64)
+
+
+def compute_signature(
+    follower_ids: Iterable[int], hashvalues: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Returns the signature of follower_ids, merged into hashvalues if given"""
+    mh = MinHash(
+        num_perm=num_perm,
+        seed=minhash_seed,
+        hashvalues=hashvalues,
+        permutations=_permutations,
+    )
+    mh.update_batch([str(id).encode("utf8") for id in follower_ids])
+    return mh.hashvalues
+
+
+def estimate_count(hashvalues: np.ndarray) -> float:
+    return LeanMinHash(seed=minhash_seed, hashvalues=hashvalues).count()
+
+
+def get_related_score(hashvalues: np.ndarray, other_hashvalues: np.ndarray) -> float:
+    # default datasketch score would come from jaccard estimation
+    # score = mh.jaccard(mh2)
+
+    # this attempts to match previous formula
+    # https://github.com/dgc-network/coliving-protocol/blob/ddda462014ecdfd588f2834d07bf0a6066c56487/discovery-node/src/queries/get_related_landlords.py#L95-L98
+    count = estimate_count(hashvalues)
+    other_count = estimate_count(other_hashvalues)
+    union_count = estimate_count(np.minimum(hashvalues, other_hashvalues))
+    intersection_size = count + other_count - union_count
+    return intersection_size * intersection_size / other_count
+
+
+def get_forest_key(tree: int) -> str:
+    return f"{forest_key_prefix}:{tree}"
+
+
+def _get_tree_prefix(hashvalues: np.ndarray, tree: int, depth: int) -> str:
+    start = tree * (num_perm // num_trees)
+    # Big endian, like MinHashLSHForest, so prefixes sort by hash value
+    return hashvalues[start : start + depth].astype(">u8").tobytes().hex()
+
+
+def _get_forest_member(user_id: int, hashvalues: np.ndarray, tree: int) -> str:
+    return f"{_get_tree_prefix(hashvalues, tree, tree_depth)}:{user_id}"
+
+
+def _parse_forest_member(member) -> int:
+    if isinstance(member, bytes):
+        member = member.decode()
+    return int(member.rsplit(":", 1)[1])
+
+
+def store_signature(pipe, user_id: int, hashvalues: np.ndarray, old_hashvalues=None):
+    """Stores the signature of user_id, replacing old_hashvalues in the forest"""
+    if old_hashvalues is not None:
+        remove_from_forest(pipe, user_id, old_hashvalues)
+    pipe.hset(minhash_key, user_id, serialize_signature(hashvalues))
+    for tree in range(num_trees):
+        pipe.zadd(
+            get_forest_key(tree), {_get_forest_member(user_id, hashvalues, tree): 0}
+        )
+
+
+def remove_from_forest(pipe, user_id: int, hashvalues: np.ndarray):
+    for tree in range(num_trees):
+        pipe.zrem(get_forest_key(tree), _get_forest_member(user_id, hashvalues, tree))
+
+
+def delete_signature(pipe, user_id: int, hashvalues: np.ndarray):
+    remove_from_forest(pipe, user_id, hashvalues)
+    pipe.hdel(minhash_key, user_id)
+
+
+def get_signatures(redis: Redis, user_ids: List[int]) -> Dict[int, np.ndarray]:
+    if not user_ids:
+        return {}
+    return {
+        user_id: deserialize_signature(data)
+        for user_id, data in zip(user_ids, redis.hmget(minhash_key, user_ids))
+        if data is not None
+    }
+
+
+def query_forest(redis: Redis, hashvalues: np.ndarray, k: int) -> List[int]:
+    """
+    Returns up to k user ids whose signatures share the longest prefixes with
+    hashvalues, like MinHashLSHForest.query
+    """
+    results: Dict[int, None] = {}
+    for depth in range(tree_depth, 0, -1):
+        pipe = redis.pipeline()
+        for tree in range(num_trees):
+            prefix = _get_tree_prefix(hashvalues, tree, depth)
+            # Members are hex digits and a decimal user id, all sorted before "~"
+            pipe.zrangebylex(
+                get_forest_key(tree), f"[{prefix}", f"({prefix}~", start=0, num=k
+            )
+        for members in pipe.execute():
+            for member in members:
+                results[_parse_forest_member(member)] = None
+                if len(results) >= k:
+                    return list(results)
+    return list(results)
+
+
+def get_related_landlord_rows(
+    redis: Redis, user_id: int, hashvalues: np.ndarray, created_at
+):
+    if estimate_count(hashvalues) < MIN_FOLLOWER_REQUIREMENT:
+        return []
+
+    # overfetch with rescore to improve accuracy:
+    # http://ekzhu.com/datasketch/lshforest.html#tips-for-improving-accuracy
+    similar = [
+        other_id
+        for other_id in query_forest(redis, hashvalues, top_k * 5)
+        if other_id != user_id
+    ]
+    rows = [
+        (user_id, other_id, get_related_score(hashvalues, other_hashvalues), created_at)
+        for other_id, other_hashvalues in get_signatures(redis, similar).items()
+    ]
+    return sorted(rows, key=lambda x: x[2], reverse=True)[:top_k]
+
+
+def get_latest_block(session: Session) -> Optional[int]:
+    return session.query(Block.number).filter(Block.is_current == True).scalar()
+
+
+def delete_minhash_store(redis: Redis):
+    redis.delete(
+        checkpoint_key,
+        rebuilt_key,
+        minhash_key,
+        *[get_forest_key(tree) for tree in range(num_trees)],
+    )
+
+
+def build_minhash(session: Session, redis: Redis):
+    """Rebuilds the signatures and forest of every landlord"""
+    delete_minhash_store(redis)
 
-def build_minhash(session: Session):
     engine = session.get_bind()
     connection = engine.raw_connection()
-    cursor = connection.cursor()
+    # Server side cursor, so that follower sets are not all held in memory
+    cursor = connection.cursor("related_landlords_follows")
 
     try:
         cursor.execute(
@@ -32,69 +236,246 @@ def build_minhash(session: Session):
             """
         )
 
-        forest = MinHashLSHForest(num_perm=num_perm)
-
-        user_mh = {}
-        follower_counts = {}
-
+        pipe = redis.pipeline()
+        num_signatures = 0
         for (user_id, follower_ids) in cursor:
-            ids = [str(id).encode("utf8") for id in follower_ids]
-            mh = MinHash(num_perm=num_perm)
-            mh.update_batch(ids)
-
-            user_mh[user_id] = mh
-            follower_counts[user_id] = len(follower_ids)
-            forest.add(user_id, mh)
-        forest.index()
-        return (user_mh, forest)
+            store_signature(pipe, user_id, compute_signature(follower_ids))
+            num_signatures += 1
+            if num_signatures % store_batch_size == 0:
+                pipe.execute()
+        pipe.execute()
+        return num_signatures
 
     finally:
         connection.commit()
         connection.close()
 
 
-def update_related_landlord_minhash(session: Session):
-
-    (user_mh, forest) = build_minhash(session)
-
+def save_all_related_landlords(session: Session, redis: Redis):
     engine = session.get_bind()
     connection = engine.raw_connection()
     cursor = connection.cursor()
 
     try:
         cursor.execute("truncate table related_landlords;")
+        created_at = datetime.datetime.now()
+        for user_id, data in redis.hscan_iter(minhash_key, count=store_batch_size):
+            rows = get_related_landlord_rows(
+                redis, int(user_id), deserialize_signature(data), created_at
+            )
+            insert_query = "insert into related_landlords (user_id, related_landlord_user_id, score, created_at) values %s"
+            execute_values(cursor, insert_query, rows, template=None, page_size=100000)
 
-        for user_id, mh in user_mh.items():
-            if mh.count() < MIN_FOLLOWER_REQUIREMENT:
-                continue
+    finally:
+        connection.commit()
+        connection.close()
 
-            # overfetch with rescore to improve accuracy:
-            # http://ekzhu.com/datasketch/lshforest.html#tips-for-improving-accuracy
-            similar = forest.query(mh, top_k * 5)
-            created_at = datetime.datetime.now()
 
-            rows = []
-            for other_id in similar:
-                if other_id == user_id:
-                    continue
-                mh2 = user_mh[other_id]
+def get_changed_followers(session: Session, prev_block: int, current_block: int):
+    """
+    Returns the followers added to each followee since prev_block, and the
+    followees that lost followers
+    """
+    added_follower_ids: Dict[int, Set[int]] = defaultdict(set)
+    unfollowed_user_ids: Set[int] = set()
+    follows = session.query(
+        Follow.followee_user_id, Follow.follower_user_id, Follow.is_delete
+    ).filter(
+        Follow.is_current == True,
+        Follow.blocknumber > prev_block,
+        Follow.blocknumber <= current_block,
+    )
+    for followee_user_id, follower_user_id, is_delete in follows:
+        if is_delete:
+            unfollowed_user_ids.add(followee_user_id)
+        else:
+            added_follower_ids[followee_user_id].add(follower_user_id)
+    return added_follower_ids, unfollowed_user_ids
 
-                # default datasketch score would come from jaccard estimation
-                # score = mh.jaccard(mh2)
 
-                # this attempts to match previous formula
-                # https://github.com/dgc-network/coliving-protocol/blob/ddda462014ecdfd588f2834d07bf0a6066c56487/discovery-node/src/queries/get_related_landlords.py#L95-L98
-                union = MinHash.union(mh, mh2)
-                intersection_size = mh.count() + mh2.count() - union.count()
-                score = intersection_size * intersection_size / mh2.count()
+def get_follower_ids(session: Session, user_ids: List[int]) -> Dict[int, List[int]]:
+    follower_ids: Dict[int, List[int]] = {user_id: [] for user_id in user_ids}
+    if user_ids:
+        follows = session.query(
+            Follow.followee_user_id, Follow.follower_user_id
+        ).filter(
+            Follow.followee_user_id.in_(user_ids),
+            Follow.is_current == True,
+            Follow.is_delete == False,
+        )
+        for followee_user_id, follower_user_id in follows:
+            follower_ids[followee_user_id].append(follower_user_id)
+    return follower_ids
 
-                rows.append((user_id, other_id, score, created_at))
 
-            rows = sorted(rows, key=lambda x: x[2], reverse=True)[:top_k]
+def update_minhash(
+    session: Session,
+    redis: Redis,
+    prev_block: int,
+    current_block: int,
+    reverted_user_ids: Optional[Set[int]] = None,
+):
+    """
+    Updates the signatures of the landlords whose followers or digital contents
+    changed since prev_block, and of reverted_user_ids whose follows were reverted
 
-            insert_query = "insert into related_landlords (user_id, related_landlord_user_id, score, created_at) values %s"
-            execute_values(cursor, insert_query, rows, template=None, page_size=100000)
+    Returns:
+        Tuple of the updated signatures by user id and the removed user ids
+    """
+    added_follower_ids, unfollowed_user_ids = get_changed_followers(
+        session, prev_block, current_block
+    )
+    # Followers are only removed by recomputing signatures
+    unfollowed_user_ids |= reverted_user_ids or set()
+    # Users become landlords with their first digital content
+    owner_ids = {
+        owner_id
+        for (owner_id,) in session.query(DigitalContent.owner_id).filter(
+            DigitalContent.is_current == True,
+            DigitalContent.blocknumber > prev_block,
+            DigitalContent.blocknumber <= current_block,
+        )
+    }
+    user_ids = list(set(added_follower_ids) | unfollowed_user_ids | owner_ids)
+    if not user_ids:
+        return {}, set()
+
+    landlord_user_ids = {
+        user_id
+        for (user_id,) in session.query(AggregateUser.user_id).filter(
+            AggregateUser.user_id.in_(user_ids),
+            AggregateUser.digital_content_count > 0,
+        )
+    }
+    old_signatures = get_signatures(redis, user_ids)
+
+    signatures: Dict[int, np.ndarray] = {}
+    # Follows only add hash values, so those signatures are updated in place,
+    # the others are recomputed from their whole follower sets
+    recomputed_user_ids = []
+    for user_id in landlord_user_ids:
+        if user_id in old_signatures and user_id not in unfollowed_user_ids:
+            signatures[user_id] = compute_signature(
+                added_follower_ids.get(user_id, []), old_signatures[user_id]
+            )
+        else:
+            recomputed_user_ids.append(user_id)
+    for user_id, follower_ids in get_follower_ids(session, recomputed_user_ids).items():
+        if follower_ids:
+            signatures[user_id] = compute_signature(follower_ids)
+
+    removed_user_ids = set(old_signatures) - set(signatures)
+    pipe = redis.pipeline()
+    for user_id, hashvalues in signatures.items():
+        store_signature(pipe, user_id, hashvalues, old_signatures.get(user_id))
+    for user_id in removed_user_ids:
+        delete_signature(pipe, user_id, old_signatures[user_id])
+    pipe.execute()
+    return signatures, removed_user_ids
+
+
+def save_changed_related_landlords(
+    session: Session,
+    redis: Redis,
+    signatures: Dict[int, np.ndarray],
+    removed_user_ids: Set[int],
+):
+    """
+    Replaces the related landlords of the users of signatures and removed_user_ids,
+    and rescores them in the related landlords of other users
+    """
+    changed_user_ids = list(set(signatures) | removed_user_ids)
+    if not changed_user_ids:
+        return
+
+    engine = session.get_bind()
+    connection = engine.raw_connection()
+    cursor = connection.cursor()
+
+    try:
+        cursor.execute(
+            "delete from related_landlords where user_id = any(%s) or related_landlord_user_id = any(%s)",
+            (changed_user_ids, list(removed_user_ids)),
+        )
+
+        created_at = datetime.datetime.now()
+        rows = []
+        for user_id, hashvalues in signatures.items():
+            rows.extend(
+                get_related_landlord_rows(redis, user_id, hashvalues, created_at)
+            )
+        insert_query = "insert into related_landlords (user_id, related_landlord_user_id, score, created_at) values %s"
+        execute_values(cursor, insert_query, rows, template=None, page_size=100000)
+
+        # Other users keep their related landlords until the next rebuild, with
+        # the scores of the changed landlords updated
+        cursor.execute(
+            "select user_id, related_landlord_user_id from related_landlords where related_landlord_user_id = any(%s) and user_id <> all(%s)",
+            (list(signatures), changed_user_ids),
+        )
+        pairs = cursor.fetchall()
+        user_signatures = get_signatures(redis, list({pair[0] for pair in pairs}))
+        scores = [
+            (
+                user_id,
+                related_landlord_user_id,
+                get_related_score(
+                    user_signatures[user_id], signatures[related_landlord_user_id]
+                ),
+            )
+            for user_id, related_landlord_user_id in pairs
+            if user_id in user_signatures
+        ]
+        execute_values(
+            cursor,
+            """
+            update related_landlords set score = scores.score
+            from (values %s) as scores (user_id, related_landlord_user_id, score)
+            where related_landlords.user_id = scores.user_id
+            and related_landlords.related_landlord_user_id = scores.related_landlord_user_id
+            """,
+            scores,
+            page_size=100000,
+        )
 
     finally:
         connection.commit()
         connection.close()
+
+
+def update_related_landlord_minhash(session: Session, redis: Redis):
+    """
+    Updates the related landlords of the landlords whose followers changed since
+    the last update, or of every landlord if the store has no checkpoint or was
+    last rebuilt over rebuild_interval_sec ago
+    """
+    latest_block = get_latest_block(session)
+    if latest_block is None:
+        return
+    checkpoint = redis.get(checkpoint_key)
+    num_reverts, reverted_block, reverted_user_ids = get_reverted_blocks(
+        redis, reverted_follow_blocks_key
+    )
+    if checkpoint is None or not redis.exists(rebuilt_key):
+        num_signatures = build_minhash(session, redis)
+        save_all_related_landlords(session, redis)
+        redis.set(rebuilt_key, latest_block, ex=rebuild_interval_sec)
+        logger.info(
+            f"get_related_landlords_minhash.py | update_related_landlord_minhash | Rebuilt {num_signatures} signatures at block {latest_block}"
+        )
+    else:
+        prev_block = int(checkpoint)
+        if reverted_block is not None:
+            # Blocks indexed in place of the reverted ones are processed again
+            prev_block = min(prev_block, reverted_block - 1)
+        if latest_block <= prev_block and not reverted_user_ids:
+            return
+        signatures, removed_user_ids = update_minhash(
+            session, redis, prev_block, latest_block, reverted_user_ids
+        )
+        save_changed_related_landlords(session, redis, signatures, removed_user_ids)
+        logger.info(
+            f"get_related_landlords_minhash.py | update_related_landlord_minhash | Updated {len(signatures)} and removed {len(removed_user_ids)} signatures for blocks {prev_block + 1}-{latest_block}"
+        )
+    redis.set(checkpoint_key, latest_block)
+    clear_reverted_blocks(redis, reverted_follow_blocks_key, num_reverts)
@@ -0,0 +1,129 @@
+import math
+from unittest.mock import patch
+
+import numpy as np
+from src.queries import get_related_authors_minhash
+from src.queries.get_related_authors_minhash import (
+    checkpoint_key,
+    compute_signature,
+    delete_signature,
+    get_related_landlord_rows,
+    get_signatures,
+    query_forest,
+    rebuilt_key,
+    reverted_follow_blocks_key,
+    store_signature,
+    update_related_landlord_minhash,
+)
+from src.utils.reverted_blocks import add_reverted_block, get_reverted_blocks
+
+followers = {
+    0: range(1, 201),
+    1: range(151, 201),
+    2: range(151, 251),
+    3: range(181, 221),
+    5: range(151, 651),
+    6: range(141, 341),
+    7: range(1000, 1300),
+}
+
+
+def store_signatures(redis, signatures):
+    pipe = redis.pipeline()
+    for user_id, hashvalues in signatures.items():
+        store_signature(pipe, user_id, hashvalues)
+    pipe.execute()
+
+
+def get_scores(redis, user_id, hashvalues):
+    return [
+        (related_user_id, math.floor(score))
+        for _, related_user_id, score, _ in get_related_landlord_rows(
+            redis, user_id, hashvalues, None
+        )
+    ]
+
+
+def test_related_landlords(redis_mock):
+    """Tests that related landlords are found in the forest and scored"""
+    signatures = {
+        user_id: compute_signature(follower_ids)
+        for user_id, follower_ids in followers.items()
+    }
+    store_signatures(redis_mock, signatures)
+    # The followers of 7 are disjoint from the others
+    assert set(query_forest(redis_mock, signatures[0], 100)) == {0, 1, 2, 3, 5, 6}
+    assert query_forest(redis_mock, signatures[7], 1) == [7]
+    assert get_scores(redis_mock, 0, signatures[0])[:5] == [
+        (1, 49),
+        (2, 25),
+        (6, 18),
+        (3, 9),
+        (5, 1),
+    ]
+    # Too few followers
+    assert get_scores(redis_mock, 3, signatures[3]) == []
+
+
+def test_update_signatures(redis_mock):
+    """Tests that signatures updated with added followers match recomputed ones,
+    and that replaced signatures leave the forest"""
+    signatures = {user_id: compute_signature(followers[user_id]) for user_id in [0, 2]}
+    store_signatures(redis_mock, signatures)
+
+    stored = get_signatures(redis_mock, [0, 2, 3])[0]
+    updated = compute_signature(range(201, 251), stored)
+    assert np.array_equal(updated, compute_signature(range(1, 251)))
+
+    pipe = redis_mock.pipeline()
+    store_signature(pipe, 0, updated, stored)
+    pipe.execute()
+    assert np.array_equal(get_signatures(redis_mock, [0])[0], updated)
+    assert [
+        related_user_id
+        for _, related_user_id, _, _ in get_related_landlord_rows(
+            redis_mock, 0, updated, None
+        )
+    ] == [2]
+
+    pipe = redis_mock.pipeline()
+    delete_signature(pipe, 2, signatures[2])
+    pipe.execute()
+    assert get_signatures(redis_mock, [2]) == {}
+    assert query_forest(redis_mock, updated, 10) == [0]
+
+
+def test_update_related_landlord_minhash(redis_mock):
+    """Tests that the store is rebuilt daily, and that followees of reverted
+    follows are recomputed from before the revert"""
+    with patch.object(
+        get_related_authors_minhash, "get_latest_block", return_value=120
+    ), patch.object(
+        get_related_authors_minhash, "build_minhash", return_value=0
+    ) as build_minhash, patch.object(
+        get_related_authors_minhash, "save_all_related_landlords"
+    ), patch.object(
+        get_related_authors_minhash, "update_minhash", return_value=({}, set())
+    ) as update_minhash, patch.object(
+        get_related_authors_minhash, "save_changed_related_landlords"
+    ):
+        update_related_landlord_minhash(None, redis_mock)
+        assert build_minhash.call_count == 1
+        assert redis_mock.ttl(rebuilt_key) > 0
+
+        redis_mock.set(checkpoint_key, 100)
+        add_reverted_block(redis_mock, reverted_follow_blocks_key, 90, [7])
+        update_related_landlord_minhash(None, redis_mock)
+        assert build_minhash.call_count == 1
+        update_minhash.assert_called_once_with(None, redis_mock, 89, 120, {7})
+        assert int(redis_mock.get(checkpoint_key)) == 120
+        assert get_reverted_blocks(redis_mock, reverted_follow_blocks_key) == (
+            0,
+            None,
+            set(),
+        )
+
+        # The rebuild expired
+        redis_mock.delete(rebuilt_key)
+        update_related_landlord_minhash(None, redis_mock)
+        assert build_minhash.call_count == 2
@@ -10,6 +10,7 @@ from src.models.digitalContents.digital_content import DigitalContent
 from src.models.users.user import User
 from src.queries import response_name_constants
 from src.queries.query_helpers import (
+    add_query_cursor_pagination,
     add_query_pagination,
     get_users_by_id,
     get_users_ids,
@@ -23,11 +24,22 @@ from src.utils.db_session import get_db_read_replica
 class GetRepostFeedForUserArgs(TypedDict):
     offset: int
     limit: int
+    cursor: Optional[str]
     handle: Optional[str]
     current_user_id: Optional[int]
     with_suers: Optional[bool]
 
 
+def get_repost_feed_sort_key(entry):
+    """Returns the cursor sort key of an entry of get_repost_feed_for_user"""
+    item_id = (
+        entry["content_list_id"]
+        if "content_list_id" in entry
+        else entry["digital_content_id"]
+    )
+    return [entry[response_name_constants.activity_timestamp], item_id]
+
+
 def get_repost_feed_for_user(user_id: int, args: GetRepostFeedForUserArgs):
     """
     Gets the repost feed for a user (e.g. stalking a user)
@@ -52,6 +64,7 @@ def _get_repost_feed_for_user(
     current_user_id = args.get("current_user_id")
     limit = args.get("limit")
     offset = args.get("offset")
+    cursor = args.get("cursor")
     if "handle" in args:
         handle = args.get("handle") or ""
         user_id = cast(
@@ -102,7 +115,14 @@ def _get_repost_feed_for_user(
         )
     )
 
-    reposts = add_query_pagination(repost_query, limit, offset).all()
+    if cursor is not None:
+        # Reposts of a user at the same time of items with the same id are rare
+        # enough to leave repost_type out of the cursor
+        reposts = add_query_cursor_pagination(
+            repost_query, [Repost.created_at, Repost.repost_item_id], cursor, limit
+        ).all()
+    else:
+        reposts = add_query_pagination(repost_query, limit, offset).all()
     # get digital_content reposts from above
     digital_content_reposts = [r[0] for r in reposts if r[1] is not None]
     digital_content_reposts = helpers.query_result_to_list(digital_content_reposts)
@@ -154,12 +174,8 @@ def _get_repost_feed_for_user(
 
     unsorted_feed = digitalContents + contentLists
 
-    # sort feed by repost timestamp desc
-    feed_results = sorted(
-        unsorted_feed,
-        key=lambda entry: entry[response_name_constants.activity_timestamp],
-        reverse=True,
-    )
+    # sort feed by repost timestamp desc, in the order of the reposts query
+    feed_results = sorted(unsorted_feed, key=get_repost_feed_sort_key, reverse=True)
 
     if args.get("with_users", False):
         user_id_list = get_users_ids(feed_results)
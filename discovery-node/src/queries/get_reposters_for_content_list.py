@@ -5,7 +5,11 @@ from src.models.social.repost import Repost, RepostType
 from src.models.users.aggregate_user import AggregateUser
 from src.models.users.user import User
 from src.queries import response_name_constants
-from src.queries.query_helpers import add_query_pagination, populate_user_metadata
+from src.queries.query_helpers import (
+    add_query_cursor_pagination,
+    add_query_pagination,
+    populate_user_metadata,
+)
 from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 
@@ -16,6 +20,7 @@ def get_reposters_for_content_list(args):
     repost_content_list_id = args.get("repost_content_list_id")
     limit = args.get("limit")
     offset = args.get("offset")
+    cursor = args.get("cursor")
 
     db = get_db_read_replica()
     with db.scoped_session() as session:
@@ -32,14 +37,14 @@ def get_reposters_for_content_list(args):
                 "Resource not found for provided contentList id"
             )
 
+        # Replace null values from left outer join with 0 to ensure sort works correctly.
+        follower_count = func.coalesce(AggregateUser.follower_count, 0)
+
         # Get all Users that reposted ContentList, ordered by follower_count desc & paginated.
         query = (
             session.query(
                 User,
-                # Replace null values from left outer join with 0 to ensure sort works correctly.
-                (func.coalesce(AggregateUser.follower_count, 0)).label(
-                    response_name_constants.follower_count
-                ),
+                follower_count.label(response_name_constants.follower_count),
             )
             # Left outer join to associate users with their follower count.
             .outerjoin(AggregateUser, AggregateUser.user_id == User.user_id)
@@ -56,9 +61,14 @@ def get_reposters_for_content_list(args):
                     )
                 ),
             )
-            .order_by(desc(response_name_constants.follower_count))
+            .order_by(desc(response_name_constants.follower_count), desc(User.user_id))
         )
-        user_results = add_query_pagination(query, limit, offset).all()
+        if cursor is not None:
+            user_results = add_query_cursor_pagination(
+                query, [follower_count, User.user_id], cursor, limit
+            ).all()
+        else:
+            user_results = add_query_pagination(query, limit, offset).all()
 
         # Fix format to return only Users objects with follower_count field.
         if user_results:
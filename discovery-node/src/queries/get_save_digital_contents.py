@@ -2,6 +2,7 @@ from src.models.social.save import Save, SaveType
 from src.models.digitalContents.digital_content import DigitalContent
 from src.queries import response_name_constants
 from src.queries.query_helpers import (
+    add_query_cursor_pagination,
     add_query_pagination,
     get_users_by_id,
     get_users_ids,
@@ -11,11 +12,20 @@ from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 
 
+def get_save_digital_content_sort_key(digital_content):
+    """Returns the cursor sort key of a digital_content of get_save_digital_contents"""
+    return [
+        digital_content[response_name_constants.activity_timestamp],
+        digital_content["digital_content_id"],
+    ]
+
+
 def get_save_digital_contents(args):
     user_id = args.get("user_id")
     current_user_id = args.get("current_user_id")
     limit = args.get("limit")
     offset = args.get("offset")
+    cursor = args.get("cursor")
     filter_deleted = args.get("filter_deleted")
 
     db = get_db_read_replica()
@@ -38,7 +48,15 @@ def get_save_digital_contents(args):
 
         base_query = base_query.order_by(Save.created_at.desc(), DigitalContent.digital_content_id.desc())
 
-        query_results = add_query_pagination(base_query, limit, offset).all()
+        if cursor is not None:
+            query_results = add_query_cursor_pagination(
+                base_query,
+                [Save.created_at, DigitalContent.digital_content_id],
+                cursor,
+                limit,
+            ).all()
+        else:
+            query_results = add_query_pagination(base_query, limit, offset).all()
 
         if not query_results:
             return []
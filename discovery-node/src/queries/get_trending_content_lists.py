@@ -206,12 +206,8 @@ def make_get_unpopulated_content_lists(session, time_range, strategy):
         )
 
         # score the contentLists
-        scored_content_lists = [
-            strategy.get_digital_content_score(time_range, contentList)
-            for contentList in content_list_scoring_data
-        ]
-        sorted_content_lists = sorted(
-            scored_content_lists, key=lambda k: k["score"], reverse=True
+        sorted_content_lists = strategy.rank_digital_contents(
+            time_range, content_list_scoring_data
         )
 
         # Get the unpopulated contentList metadata
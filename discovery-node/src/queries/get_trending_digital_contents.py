@@ -40,14 +40,13 @@ def generate_unpopulated_trending(
 ):
     trending_digital_contents = generate_trending(session, time_range, genre, limit, 0, strategy)
 
-    digital_content_scores = [
-        strategy.get_digital_content_score(time_range, digital_content)
-        for digital_content in trending_digital_contents["listen_counts"]
-    ]
     # Re apply the limit just in case we did decide to include more digitalContents in the scoring than the limit
-    sorted_digital_content_scores = sorted(
-        digital_content_scores, key=lambda k: (k["score"], k["digital_content_id"]), reverse=True
-    )[:limit]
+    sorted_digital_content_scores = strategy.rank_digital_contents(
+        time_range,
+        trending_digital_contents["listen_counts"],
+        limit,
+        id_field="digital_content_id",
+    )
     digital_content_ids = [digital_content["digital_content_id"] for digital_content in sorted_digital_content_scores]
 
     digitalContents = get_unpopulated_digital_contents(session, digital_content_ids)
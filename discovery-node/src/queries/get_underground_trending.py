@@ -189,11 +189,9 @@ def make_get_unpopulated_digital_contents(session, redis_instance, strategy):
     def wrapped():
         # Score and sort
         digital_content_scoring_data = get_scorable_digital_content_data(session, redis_instance, strategy)
-        scored_digital_contents = [
-            strategy.get_digital_content_score("week", digital_content) for digital_content in digital_content_scoring_data
-        ]
-        sorted_digital_contents = sorted(scored_digital_contents, key=lambda k: k["score"], reverse=True)
-        sorted_digital_contents = sorted_digital_contents[:UNDERGROUND_TRENDING_LENGTH]
+        sorted_digital_contents = strategy.rank_digital_contents(
+            "week", digital_content_scoring_data, UNDERGROUND_TRENDING_LENGTH
+        )
 
         # Get unpopulated metadata
         digital_content_ids = [digital_content["digital_content_id"] for digital_content in sorted_digital_contents]
@@ -1,13 +1,11 @@
 import logging  # pylint: disable=C0302
-from datetime import datetime
 
-from dateutil import parser
 from src.models.content_lists.content_list import ContentList
 from src.utils import helpers, redis_connection
 from src.utils.redis_cache import (
-    get_all_json_cached_key,
+    get_all_cached_keys,
     get_content_list_id_cache_key,
-    set_json_cached_key,
+    set_cached_keys,
 )
 
 logger = logging.getLogger(__name__)
@@ -15,29 +13,20 @@ logger = logging.getLogger(__name__)
 # Cache unpopulated contentLists for 5 min
 ttl_sec = 5 * 60
 
-content_list_datetime_fields = []
-for column in ContentList.__table__.c:
-    if column.type.python_type == datetime:
-        content_list_datetime_fields.append(column.name)
-
 
 def get_cached_content_lists(content_list_ids):
     redis_content_list_id_keys = list(map(get_content_list_id_cache_key, content_list_ids))
     redis = redis_connection.get_redis()
-    contentLists = get_all_json_cached_key(redis, redis_content_list_id_keys)
-    for contentList in contentLists:
-        if contentList:
-            for field in content_list_datetime_fields:
-                if contentList[field]:
-                    contentList[field] = parser.parse(contentList[field])
+    contentLists = get_all_cached_keys(redis, redis_content_list_id_keys)
     return contentLists
 
 
 def set_content_lists_in_cache(contentLists):
     redis = redis_connection.get_redis()
-    for contentList in contentLists:
-        key = get_content_list_id_cache_key(contentList["content_list_id"])
-        set_json_cached_key(redis, key, contentList, ttl_sec)
+    contentLists_by_key = {
+        get_content_list_id_cache_key(contentList["content_list_id"]): contentList for contentList in contentLists
+    }
+    set_cached_keys(redis, contentLists_by_key, ttl_sec)
 
 
 def get_unpopulated_content_lists(session, content_list_ids, filter_deleted=False):
@@ -1,13 +1,11 @@
 import logging
-from datetime import datetime
 
-from dateutil import parser
 from src.models.digitalContents.digital_content import DigitalContent
 from src.utils import helpers, redis_connection
 from src.utils.redis_cache import (
-    get_all_json_cached_key,
+    get_all_cached_keys,
     get_digital_content_id_cache_key,
-    set_json_cached_key,
+    set_cached_keys,
 )
 
 logger = logging.getLogger(__name__)
@@ -15,29 +13,20 @@ logger = logging.getLogger(__name__)
 # Cache unpopulated digitalContents for 5 min
 ttl_sec = 5 * 60
 
-digital_content_datetime_fields = []
-for column in DigitalContent.__table__.c:
-    if column.type.python_type == datetime:
-        digital_content_datetime_fields.append(column.name)
-
 
 def get_cached_digital_contents(digital_content_ids):
     redis_digital_content_id_keys = list(map(get_digital_content_id_cache_key, digital_content_ids))
     redis = redis_connection.get_redis()
-    digitalContents = get_all_json_cached_key(redis, redis_digital_content_id_keys)
-    for digital_content in digitalContents:
-        if digital_content:
-            for field in digital_content_datetime_fields:
-                if digital_content[field]:
-                    digital_content[field] = parser.parse(digital_content[field])
+    digitalContents = get_all_cached_keys(redis, redis_digital_content_id_keys)
     return digitalContents
 
 
 def set_digital_contents_in_cache(digitalContents):
     redis = redis_connection.get_redis()
-    for digital_content in digitalContents:
-        key = get_digital_content_id_cache_key(digital_content["digital_content_id"])
-        set_json_cached_key(redis, key, digital_content, ttl_sec)
+    digital_contents_by_key = {
+        get_digital_content_id_cache_key(digital_content["digital_content_id"]): digital_content for digital_content in digitalContents
+    }
+    set_cached_keys(redis, digital_contents_by_key, ttl_sec)
 
 
 def get_unpopulated_digital_contents(
@@ -1,13 +1,11 @@
 import logging  # pylint: disable=C0302
-from datetime import datetime
 
-from dateutil import parser
 from src.models.users.user import User
 from src.utils import helpers, redis_connection
 from src.utils.redis_cache import (
-    get_all_json_cached_key,
+    get_all_cached_keys,
     get_user_id_cache_key,
-    set_json_cached_key,
+    set_cached_keys,
 )
 
 logger = logging.getLogger(__name__)
@@ -15,29 +13,18 @@ logger = logging.getLogger(__name__)
 # Cache unpopulated users for 5 min
 ttl_sec = 5 * 60
 
-user_datetime_fields = []
-for column in User.__table__.c:
-    if column.type.python_type == datetime:
-        user_datetime_fields.append(column.name)
-
 
 def get_cached_users(user_ids):
     redis_user_id_keys = list(map(get_user_id_cache_key, user_ids))
     redis = redis_connection.get_redis()
-    users = get_all_json_cached_key(redis, redis_user_id_keys)
-    for user in users:
-        if user:
-            for field in user_datetime_fields:
-                if user[field]:
-                    user[field] = parser.parse(user[field])
+    users = get_all_cached_keys(redis, redis_user_id_keys)
     return users
 
 
 def set_users_in_cache(users):
     redis = redis_connection.get_redis()
-    for user in users:
-        key = get_user_id_cache_key(user["user_id"])
-        set_json_cached_key(redis, key, user, ttl_sec)
+    users_by_key = {get_user_id_cache_key(user["user_id"]): user for user in users}
+    set_cached_keys(redis, users_by_key, ttl_sec)
 
 
 def get_unpopulated_users(session, user_ids):
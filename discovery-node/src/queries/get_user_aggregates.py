@@ -0,0 +1,267 @@
+import logging
+import time
+from typing import Dict, Iterable, List
+
+from redis.exceptions import WatchError
+from sqlalchemy import func
+from src.models.digitalContents.digital_content import DigitalContent
+from src.models.social.follow import Follow
+from src.models.users.aggregate_user import AggregateUser
+from src.models.users.user import User
+from src.models.users.user_bank import UserBankAccount
+from src.queries import response_name_constants
+from src.utils import redis_connection
+from src.utils.cache_invalidation import (
+    cache_invalidation_sequence_key,
+    get_cache_invalidation_sequence,
+)
+from src.utils.redis_cache import (
+    get_all_cached_keys,
+    get_user_aggregate_cache_key,
+    get_user_followee_follows_cache_key,
+    set_cached_keys,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cache user aggregate snapshots for 1 min, they are also removed when users are indexed
+aggregate_ttl_sec = 60
+# Cache followee follow counts of a user for 1 day, the counts changed by
+# indexed follows are removed by remove_changed_followee_follow_counts
+followee_follows_ttl_sec = 24 * 60 * 60
+# Current users with cached followee follow counts, scored by their expiry time
+followee_follows_current_users_key = "user:followee_follows:current_users"
+
+aggregate_count_columns = {
+    response_name_constants.digital_content_count: AggregateUser.digital_content_count,
+    response_name_constants.content_list_count: AggregateUser.content_list_count,
+    response_name_constants.album_count: AggregateUser.album_count,
+    response_name_constants.follower_count: AggregateUser.follower_count,
+    response_name_constants.followee_count: AggregateUser.following_count,
+    response_name_constants.repost_count: AggregateUser.repost_count,
+    response_name_constants.digital_content_save_count: AggregateUser.digital_content_save_count,
+    response_name_constants.supporter_count: AggregateUser.supporter_count,
+    response_name_constants.supporting_count: AggregateUser.supporting_count,
+}
+
+
+def get_empty_user_aggregate():
+    aggregate = {name: 0 for name in aggregate_count_columns}
+    aggregate[response_name_constants.digital_content_blocknumber] = -1
+    aggregate[response_name_constants.spl_wallet] = None
+    return aggregate
+
+
+def query_user_aggregates(session, user_ids: List[int]) -> Dict[int, Dict]:
+    """
+    Queries the aggregate counts, latest digital_content blocknumber and user bank
+    of each user in a single query
+
+    Returns:
+        Dict of user id to aggregate, with an empty aggregate for unknown users
+    """
+    digital_content_blocknumbers = (
+        session.query(
+            DigitalContent.owner_id.label("owner_id"),
+            func.max(DigitalContent.blocknumber).label("blocknumber"),
+        )
+        .filter(
+            DigitalContent.is_current == True,
+            DigitalContent.is_delete == False,
+            DigitalContent.owner_id.in_(user_ids),
+        )
+        .group_by(DigitalContent.owner_id)
+        .subquery()
+    )
+    rows = (
+        session.query(
+            User.user_id,
+            UserBankAccount.bank_account,
+            digital_content_blocknumbers.c.blocknumber,
+            *aggregate_count_columns.values(),
+        )
+        .outerjoin(AggregateUser, AggregateUser.user_id == User.user_id)
+        .outerjoin(UserBankAccount, UserBankAccount.ethereum_address == User.wallet)
+        .outerjoin(
+            digital_content_blocknumbers,
+            digital_content_blocknumbers.c.owner_id == User.user_id,
+        )
+        .filter(User.is_current == True, User.user_id.in_(user_ids))
+        .all()
+    )
+
+    aggregates = {user_id: get_empty_user_aggregate() for user_id in user_ids}
+    for user_id, bank_account, blocknumber, *counts in rows:
+        aggregate = aggregates[user_id]
+        for name, count in zip(aggregate_count_columns, counts):
+            aggregate[name] = count or 0
+        if blocknumber is not None:
+            aggregate[response_name_constants.digital_content_blocknumber] = blocknumber
+        aggregate[response_name_constants.spl_wallet] = bank_account
+    return aggregates
+
+
+def get_user_aggregates(session, user_ids: List[int]) -> Dict[int, Dict]:
+    """
+    Fetches the aggregate snapshot of users by checking the redis cache first
+    then going to DB for the missing users and caching them
+
+    Returns:
+        Dict of user id to aggregate snapshot
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    redis = redis_connection.get_redis()
+    cached_aggregates = get_all_cached_keys(
+        redis, list(map(get_user_aggregate_cache_key, user_ids))
+    )
+    aggregates = {
+        user_id: aggregate
+        for user_id, aggregate in zip(user_ids, cached_aggregates)
+        if aggregate is not None
+    }
+
+    user_ids_to_fetch = [user_id for user_id in user_ids if user_id not in aggregates]
+    if user_ids_to_fetch:
+        queried_aggregates = query_user_aggregates(session, user_ids_to_fetch)
+        set_cached_keys(
+            redis,
+            {
+                get_user_aggregate_cache_key(user_id): aggregate
+                for user_id, aggregate in queried_aggregates.items()
+            },
+            aggregate_ttl_sec,
+        )
+        aggregates.update(queried_aggregates)
+    return aggregates
+
+
+def query_followee_follow_counts(
+    session, current_user_id: int, user_ids: List[int]
+) -> Dict[int, int]:
+    current_user_followees = (
+        session.query(Follow.followee_user_id)
+        .filter(
+            Follow.is_current == True,
+            Follow.is_delete == False,
+            Follow.follower_user_id == current_user_id,
+        )
+        .subquery()
+    )
+    followee_follow_counts = (
+        session.query(Follow.followee_user_id, func.count(Follow.followee_user_id))
+        .filter(
+            Follow.is_current == True,
+            Follow.is_delete == False,
+            Follow.follower_user_id.in_(current_user_followees),
+            Follow.followee_user_id.in_(user_ids),
+        )
+        .group_by(Follow.followee_user_id)
+        .all()
+    )
+    counts = {user_id: 0 for user_id in user_ids}
+    counts.update(followee_follow_counts)
+    return counts
+
+
+def get_current_user_followee_follow_counts(
+    session, current_user_id: int, user_ids: List[int]
+) -> Dict[int, int]:
+    """
+    Fetches the number of followees of the current user following each user.
+
+    Counts are kept in a redis hash per current user, so users already counted
+    for the current user cost a lookup rather than a query over their followees.
+    Counts queried while the indexer invalidated entities are not cached, as
+    they may predate the invalidation.
+
+    Returns:
+        Dict of user id to followee follow count
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    redis = redis_connection.get_redis()
+    key = get_user_followee_follows_cache_key(current_user_id)
+    pipe = redis.pipeline()
+    pipe.hmget(key, user_ids)
+    pipe.ttl(key)
+    pipe.get(cache_invalidation_sequence_key)
+    cached_counts, ttl, invalidation_sequence = pipe.execute()
+
+    counts = {
+        user_id: int(count)
+        for user_id, count in zip(user_ids, cached_counts)
+        if count is not None
+    }
+    user_ids_to_fetch = [user_id for user_id in user_ids if user_id not in counts]
+    if user_ids_to_fetch:
+        queried_counts = query_followee_follow_counts(
+            session, current_user_id, user_ids_to_fetch
+        )
+        try:
+            with redis.pipeline() as pipe:
+                pipe.watch(cache_invalidation_sequence_key)
+                if get_cache_invalidation_sequence(pipe) == invalidation_sequence:
+                    pipe.multi()
+                    pipe.hset(key, mapping=queried_counts)
+                    # Counts expire together from when the hash was created
+                    if ttl is None or ttl < 0:
+                        pipe.expire(key, followee_follows_ttl_sec)
+                        pipe.zadd(
+                            followee_follows_current_users_key,
+                            {current_user_id: time.time() + followee_follows_ttl_sec},
+                        )
+                    pipe.execute()
+        except WatchError:
+            pass
+        counts.update(queried_counts)
+    return counts
+
+
+def remove_changed_followee_follow_counts(
+    session, redis, changed_user_ids: Iterable[int]
+):
+    """
+    Removes the followee follow counts of changed users from the cached counts of
+    the current users following a changed user.
+
+    A follow of a followee of the current user changes a count of the current user,
+    and both users of an indexed follow are changed users. Counts of current users
+    whose own follows changed are removed with the rest of their cache by
+    remove_cached_user_ids.
+    """
+    changed_user_ids = list(changed_user_ids)
+    if not changed_user_ids:
+        return
+    try:
+        pipe = redis.pipeline()
+        pipe.zremrangebyscore(followee_follows_current_users_key, "-inf", time.time())
+        pipe.zrange(followee_follows_current_users_key, 0, -1)
+        _, current_user_ids = pipe.execute()
+        if not current_user_ids:
+            return
+
+        following_user_ids = (
+            session.query(Follow.follower_user_id)
+            .filter(
+                Follow.is_current == True,
+                Follow.is_delete == False,
+                Follow.follower_user_id.in_(list(map(int, current_user_ids))),
+                Follow.followee_user_id.in_(changed_user_ids),
+            )
+            .distinct()
+            .all()
+        )
+        pipe = redis.pipeline()
+        for (current_user_id,) in following_user_ids:
+            pipe.hdel(
+                get_user_followee_follows_cache_key(current_user_id), *changed_user_ids
+            )
+        pipe.execute()
+    except Exception as e:
+        logger.error(
+            f"get_user_aggregates.py | remove_changed_followee_follow_counts | Unable to remove followee follow counts: {e}",
+            exc_info=True,
+        )
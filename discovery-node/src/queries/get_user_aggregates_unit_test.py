@@ -0,0 +1,102 @@
+from unittest.mock import MagicMock, patch
+
+from src.queries import get_user_aggregates as user_aggregates
+from src.queries import response_name_constants
+from src.queries.get_user_aggregates import (
+    get_current_user_followee_follow_counts,
+    get_empty_user_aggregate,
+    get_user_aggregates,
+    remove_changed_followee_follow_counts,
+)
+from src.utils.redis_cache import invalidate_cache_tags, remove_cached_user_ids
+
+
+def make_aggregates(session, user_ids):
+    aggregates = {user_id: get_empty_user_aggregate() for user_id in user_ids}
+    for user_id in user_ids:
+        aggregates[user_id][response_name_constants.follower_count] = user_id * 10
+    return aggregates
+
+
+def test_get_user_aggregates_caches_snapshots(redis_mock):
+    """Tests that only users without a cached snapshot are queried"""
+    with patch.object(
+        user_aggregates, "query_user_aggregates", side_effect=make_aggregates
+    ) as query_user_aggregates:
+        aggregates = get_user_aggregates(None, [1, 2])
+        assert aggregates[2][response_name_constants.follower_count] == 20
+        query_user_aggregates.assert_called_once_with(None, [1, 2])
+
+        aggregates = get_user_aggregates(None, [2, 3, 2])
+        assert aggregates == make_aggregates(None, [2, 3])
+        query_user_aggregates.assert_called_with(None, [3])
+
+        remove_cached_user_ids(redis_mock, [2])
+        get_user_aggregates(None, [1, 2, 3])
+        query_user_aggregates.assert_called_with(None, [2])
+        assert query_user_aggregates.call_count == 3
+
+
+def test_get_current_user_followee_follow_counts(redis_mock):
+    """Tests that followee follow counts are cached per current user"""
+    with patch.object(
+        user_aggregates,
+        "query_followee_follow_counts",
+        side_effect=lambda session, current_user_id, user_ids: {
+            user_id: (user_id + current_user_id) % 3 for user_id in user_ids
+        },
+    ) as query_followee_follow_counts:
+        assert get_current_user_followee_follow_counts(None, 1, [1, 2]) == {
+            1: 2,
+            2: 0,
+        }
+        assert get_current_user_followee_follow_counts(None, 1, [2, 3]) == {
+            2: 0,
+            3: 1,
+        }
+        query_followee_follow_counts.assert_called_with(None, 1, [3])
+        assert get_current_user_followee_follow_counts(None, 2, [2]) == {2: 1}
+        assert query_followee_follow_counts.call_count == 3
+
+    key = "user:followee_follows:1"
+    assert 0 < redis_mock.ttl(key) <= user_aggregates.followee_follows_ttl_sec
+    remove_cached_user_ids(redis_mock, [1])
+    assert not redis_mock.exists(key)
+
+
+def test_remove_changed_followee_follow_counts(redis_mock):
+    """Tests that counts of changed users are removed for the current users following them"""
+    with patch.object(
+        user_aggregates,
+        "query_followee_follow_counts",
+        side_effect=lambda session, current_user_id, user_ids: {
+            user_id: 1 for user_id in user_ids
+        },
+    ):
+        get_current_user_followee_follow_counts(None, 1, [2, 3])
+        get_current_user_followee_follow_counts(None, 4, [2, 3])
+
+    # Current user 1 follows a changed user
+    session = MagicMock()
+    session.query.return_value.filter.return_value.distinct.return_value.all.return_value = [
+        (1,)
+    ]
+    remove_changed_followee_follow_counts(session, redis_mock, [3, 5])
+    assert redis_mock.hgetall("user:followee_follows:1") == {b"2": b"1"}
+    assert redis_mock.hgetall("user:followee_follows:4") == {b"2": b"1", b"3": b"1"}
+
+
+def test_followee_follow_counts_not_cached_across_invalidation(redis_mock):
+    """Tests that counts queried while entities were invalidated are not cached"""
+
+    def query_followee_follow_counts(session, current_user_id, user_ids):
+        invalidate_cache_tags(redis_mock, 1, ["user:2"])
+        return {user_id: 1 for user_id in user_ids}
+
+    with patch.object(
+        user_aggregates,
+        "query_followee_follow_counts",
+        side_effect=query_followee_follow_counts,
+    ):
+        assert get_current_user_followee_follow_counts(None, 1, [2]) == {2: 1}
+    assert not redis_mock.exists("user:followee_follows:1")
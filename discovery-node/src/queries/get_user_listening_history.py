@@ -1,10 +1,14 @@
-from typing import TypedDict
+from typing import Optional, TypedDict
 
 from sqlalchemy.orm.session import Session
 from src.models.digitalContents.digital_content import DigitalContent
 from src.models.users.user_listening_history import UserListeningHistory
 from src.queries import response_name_constants
-from src.queries.query_helpers import add_users_to_digital_contents, populate_digital_content_metadata
+from src.queries.query_helpers import (
+    add_users_to_digital_contents,
+    decode_pagination_cursor,
+    populate_digital_content_metadata,
+)
 from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 
@@ -22,6 +26,17 @@ class GetUserListeningHistoryArgs(TypedDict):
     # The offset for the listen history
     offset: int
 
+    # Optional cursor of the last listen of the previous page, used over offset
+    cursor: Optional[str]
+
+
+def get_listening_history_sort_key(digital_content):
+    """Returns the cursor sort key of a digital_content of get_user_listening_history"""
+    return [
+        digital_content[response_name_constants.activity_timestamp],
+        digital_content["digital_content_id"],
+    ]
+
 
 def get_user_listening_history(args: GetUserListeningHistoryArgs):
     """
@@ -44,6 +59,7 @@ def _get_user_listening_history(session: Session, args: GetUserListeningHistoryA
     current_user_id = args["current_user_id"]
     limit = args["limit"]
     offset = args["offset"]
+    cursor = args.get("cursor")
 
     if user_id != current_user_id:
         return []
@@ -58,6 +74,8 @@ def _get_user_listening_history(session: Session, args: GetUserListeningHistoryA
         return []
 
     # add query pagination
+    if cursor is not None:
+        offset = _get_listen_after_cursor_index(listening_history_results, cursor)
     listening_history_results = listening_history_results[offset : offset + limit]
 
     digital_content_ids = []
@@ -88,3 +106,18 @@ def _get_user_listening_history(session: Session, args: GetUserListeningHistoryA
         digital_content[response_name_constants.activity_timestamp] = listen_dates[idx]
 
     return digitalContents
+
+
+def _get_listen_after_cursor_index(listening_history, cursor):
+    timestamp, digital_content_id = decode_pagination_cursor(cursor, [str, int])
+    for idx, listen in enumerate(listening_history):
+        if (
+            listen["timestamp"] == timestamp
+            and listen["digital_content_id"] == digital_content_id
+        ):
+            return idx + 1
+    # The listen was replaced by a more recent listen of its digital_content
+    for idx, listen in enumerate(listening_history):
+        if listen["timestamp"] < timestamp:
+            return idx
+    return len(listening_history)
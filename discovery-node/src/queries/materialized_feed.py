@@ -0,0 +1,265 @@
+"""
+Materialized home feeds
+
+The feed of a user is kept in a redis sorted set of the digitalContents and
+contentLists created or reposted by their followees, scored by activity
+timestamp. A feed is built by get_feed on first read, then kept up to
+date by the index_feeds task fanning out creations and reposts to the feeds of
+the followers of their users. Users with more than fan_out_max_followers
+followers are not fanned out, their activity is queried and merged on read.
+
+Reverted blocks are logged with the users whose activity they reverted, see
+src/utils/reverted_blocks.py, so that index_feeds drops the feeds fanned out
+from them and fans out the blocks again from the lowest reverted block.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.models.social.follow import Follow
+from src.models.users.aggregate_user import AggregateUser
+from src.queries import response_name_constants
+from src.queries.get_unpopulated_content_lists import get_unpopulated_content_lists
+from src.queries.get_unpopulated_digital_contents import (
+    get_unpopulated_digital_contents,
+)
+from src.utils.config import shared_config
+
+logger = logging.getLogger(__name__)
+
+# Number of items kept per feed
+feed_max_items = 500
+# Feeds that are not read for a week are dropped and rebuilt on the next read
+feed_ttl_sec = 7 * 24 * 60 * 60
+# Activity of users with more followers than this is merged into feeds on read
+fan_out_max_followers = 10000
+
+DIGITAL_CONTENT_FEED_ITEM = "digital_content"
+CONTENT_LIST_FEED_ITEM = "content_list"
+# Marks a feed as fully built, scored below every activity timestamp
+FEED_BUILT_MEMBER = "built"
+FEED_BUILT_SCORE = -1
+
+# Log of the reverted blocks not yet fanned out
+reverted_feed_blocks_key = "feed:reverts"
+
+
+def is_materialized_feed_enabled():
+    return shared_config["discprov"].getboolean(
+        "materialized_feed_enabled", fallback=False
+    )
+
+
+def get_feed_key(user_id: int) -> str:
+    return f"feed:{user_id}"
+
+
+def get_feed_member(item_type: str, item_id: int) -> str:
+    return f"{item_type}:{item_id}"
+
+
+def parse_feed_member(member) -> Tuple[str, int]:
+    if isinstance(member, bytes):
+        member = member.decode()
+    item_type, item_id = member.split(":")
+    return item_type, int(item_id)
+
+
+def datetime_to_score(timestamp: datetime) -> float:
+    # Timestamps are naive UTC
+    return timestamp.replace(tzinfo=timezone.utc).timestamp()
+
+
+def score_to_datetime(score: float) -> datetime:
+    return datetime.fromtimestamp(score, timezone.utc).replace(tzinfo=None)
+
+
+def get_feed_items(digitalContents: List[Dict], contentLists: List[Dict]):
+    """Returns the feed members and scores of feed entities"""
+    items = {}
+    for digital_content in digitalContents:
+        member = get_feed_member(
+            DIGITAL_CONTENT_FEED_ITEM, digital_content["digital_content_id"]
+        )
+        items[member] = datetime_to_score(
+            digital_content[response_name_constants.activity_timestamp]
+        )
+    for contentList in contentLists:
+        member = get_feed_member(CONTENT_LIST_FEED_ITEM, contentList["content_list_id"])
+        items[member] = datetime_to_score(
+            contentList[response_name_constants.activity_timestamp]
+        )
+    return items
+
+
+def _trim_feed(pipe, key):
+    # Keep the built member, ranked first, and the latest feed_max_items items
+    pipe.zremrangebyrank(key, 1, -(feed_max_items + 1))
+
+
+def save_feed(redis, user_id: int, items: Dict[str, float]):
+    """Replaces the feed of user_id with items"""
+    key = get_feed_key(user_id)
+    pipe = redis.pipeline()
+    pipe.delete(key)
+    pipe.zadd(key, {**items, FEED_BUILT_MEMBER: FEED_BUILT_SCORE})
+    _trim_feed(pipe, key)
+    pipe.expire(key, feed_ttl_sec)
+    pipe.execute()
+
+
+def refresh_feed_ttl(redis, user_id: int) -> bool:
+    """Extends the ttl of the feed of user_id, and returns whether it is built"""
+    key = get_feed_key(user_id)
+    pipe = redis.pipeline()
+    pipe.zscore(key, FEED_BUILT_MEMBER)
+    pipe.expire(key, feed_ttl_sec)
+    score, _ = pipe.execute()
+    return score is not None
+
+
+def add_feed_items(
+    redis, user_ids: Iterable[int], items: Dict[str, float], keep_oldest=False
+):
+    """
+    Adds items to the built feeds of user_ids. With keep_oldest, items already
+    in a feed keep their score, so that reposts keep the oldest repost timestamp.
+
+    Returns:
+        Number of feeds updated
+    """
+    if not items:
+        return 0
+    keys = [get_feed_key(user_id) for user_id in user_ids]
+    pipe = redis.pipeline()
+    for key in keys:
+        pipe.zscore(key, FEED_BUILT_MEMBER)
+    built_keys = [key for key, score in zip(keys, pipe.execute()) if score is not None]
+
+    pipe = redis.pipeline()
+    for key in built_keys:
+        pipe.zadd(key, items, nx=keep_oldest)
+        _trim_feed(pipe, key)
+    pipe.execute()
+    return len(built_keys)
+
+
+def remove_feed_items(redis, user_ids: Iterable[int], members: List[str]):
+    if not members:
+        return
+    pipe = redis.pipeline()
+    for user_id in user_ids:
+        pipe.zrem(get_feed_key(user_id), *members)
+    pipe.execute()
+
+
+def delete_feeds(redis, user_ids: Iterable[int]):
+    """Drops the feeds of user_ids, to be rebuilt on their next read"""
+    keys = [get_feed_key(user_id) for user_id in user_ids]
+    if keys:
+        redis.delete(*keys)
+
+
+def read_feed(
+    redis, user_id: int, start: int, num: int, before: Optional[datetime] = None
+) -> List[Tuple[str, float]]:
+    """Returns the feed members and scores of user_id, latest first, that are
+    before `before` if given"""
+    max_score = "+inf" if before is None else f"({datetime_to_score(before)}"
+    return [
+        (member.decode() if isinstance(member, bytes) else member, score)
+        for member, score in redis.zrevrangebyscore(
+            get_feed_key(user_id), max_score, 0, start=start, num=num, withscores=True
+        )
+    ]
+
+
+def get_high_follower_user_ids(session, user_ids: Iterable[int]) -> Set[int]:
+    """Returns the users of user_ids whose activity is not fanned out to feeds"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+    rows = session.query(AggregateUser.user_id).filter(
+        AggregateUser.user_id.in_(user_ids),
+        AggregateUser.follower_count > fan_out_max_followers,
+    )
+    return {row[0] for row in rows}
+
+
+def get_high_follower_followee_user_ids(session, user_id: int) -> List[int]:
+    rows = (
+        session.query(Follow.followee_user_id)
+        .join(AggregateUser, AggregateUser.user_id == Follow.followee_user_id)
+        .filter(
+            Follow.follower_user_id == user_id,
+            Follow.is_current == True,
+            Follow.is_delete == False,
+            AggregateUser.follower_count > fan_out_max_followers,
+        )
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
+def get_followers_by_user_id(session, user_ids: Iterable[int]) -> Dict[int, List[int]]:
+    followers_by_user_id: Dict[int, List[int]] = {user_id: [] for user_id in user_ids}
+    if followers_by_user_id:
+        rows = session.query(Follow.followee_user_id, Follow.follower_user_id).filter(
+            Follow.followee_user_id.in_(list(followers_by_user_id)),
+            Follow.is_current == True,
+            Follow.is_delete == False,
+        )
+        for followee_user_id, follower_user_id in rows:
+            followers_by_user_id[followee_user_id].append(follower_user_id)
+    return followers_by_user_id
+
+
+def get_entity_feed_member(entity: Dict) -> str:
+    if "content_list_id" in entity:
+        return get_feed_member(CONTENT_LIST_FEED_ITEM, entity["content_list_id"])
+    return get_feed_member(DIGITAL_CONTENT_FEED_ITEM, entity["digital_content_id"])
+
+
+def hydrate_feed_items(session, redis, user_id: int, feed_items):
+    """
+    Returns the unpopulated entities of feed_items with their activity_timestamp,
+    and removes the items deleted or hidden since they were added from the feed
+    """
+    digital_content_ids = []
+    content_list_ids = []
+    for member, _ in feed_items:
+        item_type, item_id = parse_feed_member(member)
+        if item_type == DIGITAL_CONTENT_FEED_ITEM:
+            digital_content_ids.append(item_id)
+        else:
+            content_list_ids.append(item_id)
+
+    digitalContents = [
+        digital_content
+        for digital_content in get_unpopulated_digital_contents(
+            session, digital_content_ids, filter_deleted=True
+        )
+        if digital_content.get("stem_of") is None
+    ]
+    contentLists = [
+        contentList
+        for contentList in get_unpopulated_content_lists(
+            session, content_list_ids, filter_deleted=True
+        )
+        if not contentList["is_private"]
+    ]
+
+    items = {
+        get_entity_feed_member(entity): entity
+        for entity in digitalContents + contentLists
+    }
+    removed_members = [member for member, _ in feed_items if member not in items]
+    remove_feed_items(redis, [user_id], removed_members)
+
+    for member, score in feed_items:
+        if member in items:
+            items[member][
+                response_name_constants.activity_timestamp
+            ] = score_to_datetime(score)
+    return [items[member] for member, _ in feed_items if member in items]
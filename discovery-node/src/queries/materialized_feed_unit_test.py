@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.queries import get_feed, materialized_feed, response_name_constants
+from src.queries.get_feed import get_materialized_feed_entities
+from src.queries.materialized_feed import (
+    add_feed_items,
+    datetime_to_score,
+    delete_feeds,
+    get_feed_key,
+    read_feed,
+    refresh_feed_ttl,
+    save_feed,
+    score_to_datetime,
+)
+
+now = datetime(2022, 5, 6, 7, 8, 9)
+
+
+def score(minutes_ago):
+    return datetime_to_score(now - timedelta(minutes=minutes_ago))
+
+
+def test_feed_store(redis_mock):
+    """Tests that items are only added to built feeds, latest first and capped"""
+    assert score_to_datetime(score(5)) == now - timedelta(minutes=5)
+    assert not refresh_feed_ttl(redis_mock, 1)
+    assert add_feed_items(redis_mock, [1, 2], {"digital_content:1": score(5)}) == 0
+    assert not redis_mock.exists(get_feed_key(1))
+
+    save_feed(
+        redis_mock, 1, {"digital_content:1": score(5), "content_list:1": score(3)}
+    )
+    assert refresh_feed_ttl(redis_mock, 1)
+    assert add_feed_items(redis_mock, [1, 2], {"digital_content:2": score(4)}) == 1
+    # Reposts keep the timestamp of items already in the feed
+    add_feed_items(
+        redis_mock,
+        [1],
+        {"content_list:1": score(1), "digital_content:3": score(2)},
+        keep_oldest=True,
+    )
+    assert read_feed(redis_mock, 1, 0, 3) == [
+        ("digital_content:3", score(2)),
+        ("content_list:1", score(3)),
+        ("digital_content:2", score(4)),
+    ]
+    assert read_feed(redis_mock, 1, 3, 3) == [("digital_content:1", score(5))]
+
+    with patch.object(materialized_feed, "feed_max_items", 2):
+        add_feed_items(redis_mock, [1], {"digital_content:4": score(0)})
+    assert [member for member, _ in read_feed(redis_mock, 1, 0, 10)] == [
+        "digital_content:4",
+        "digital_content:3",
+    ]
+    assert refresh_feed_ttl(redis_mock, 1)
+
+    delete_feeds(redis_mock, [1])
+    assert not refresh_feed_ttl(redis_mock, 1)
+
+
+def make_digital_content(digital_content_id, owner_id, minutes_ago, **kwargs):
+    return {
+        "digital_content_id": digital_content_id,
+        "owner_id": owner_id,
+        "is_delete": False,
+        "is_unlisted": False,
+        "stem_of": None,
+        response_name_constants.activity_timestamp: now
+        - timedelta(minutes=minutes_ago),
+        **kwargs,
+    }
+
+
+def test_get_materialized_feed_entities(redis_mock):
+    """Tests that feeds are built on read, deleted items are skipped and removed,
+    and the activity of high follower followees is merged"""
+    digital_contents = {
+        1: make_digital_content(1, 2, 10),
+        2: make_digital_content(2, 2, 8, is_delete=True),
+        3: make_digital_content(3, 2, 6),
+        4: make_digital_content(4, 3, 4),
+    }
+
+    def get_feed_entities(session, followee_user_ids, *args):
+        if followee_user_ids == [3]:
+            # High follower followee 3 created 4 and reposted 1 after user 2
+            return [digital_contents[4], make_digital_content(1, 2, 2)], []
+        assert followee_user_ids == [2]
+        return [digital_contents[1], digital_contents[2], digital_contents[3]], []
+
+    def get_unpopulated_digital_contents(session, ids, filter_deleted):
+        return [
+            dict(digital_contents[digital_content_id])
+            for digital_content_id in ids
+            if not digital_contents[digital_content_id]["is_delete"]
+        ]
+
+    with patch.object(
+        get_feed, "get_followee_user_ids", return_value=[2, 3]
+    ), patch.object(
+        get_feed, "get_high_follower_followee_user_ids", return_value=[3]
+    ), patch.object(
+        get_feed, "get_feed_entities", side_effect=get_feed_entities
+    ) as get_feed_entities_mock, patch.object(
+        materialized_feed,
+        "get_unpopulated_digital_contents",
+        side_effect=get_unpopulated_digital_contents,
+    ):
+        digitalContents, contentLists = get_materialized_feed_entities(
+            None, redis_mock, 1, 2
+        )
+        assert contentLists == []
+        assert {
+            digital_content["digital_content_id"]: digital_content[
+                response_name_constants.activity_timestamp
+            ]
+            for digital_content in digitalContents
+        } == {
+            1: now - timedelta(minutes=10),
+            3: now - timedelta(minutes=6),
+            4: now - timedelta(minutes=4),
+        }
+        assert [member for member, _ in read_feed(redis_mock, 1, 0, 10)] == [
+            "digital_content:3",
+            "digital_content:1",
+        ]
+
+        # The built feed is read rather than rebuilt
+        get_materialized_feed_entities(None, redis_mock, 1, 2)
+        assert get_feed_entities_mock.call_count == 3
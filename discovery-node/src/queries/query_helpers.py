@@ -1,9 +1,12 @@
 # pylint: disable=too-many-lines
+import base64
+import json
 import logging
+from datetime import datetime
 from typing import Tuple
 
 from flask import request
-from sqlalchemy import Integer, and_, bindparam, cast, desc, func, text
+from sqlalchemy import Integer, and_, bindparam, cast, desc, func, text, tuple_
 from sqlalchemy.orm.session import Session
 from sqlalchemy.sql.expression import or_
 from src import exceptions
@@ -18,10 +21,14 @@ from src.models.digitalContents.remix import Remix
 from src.models.digitalContents.digital_content import DigitalContent
 from src.models.users.aggregate_user import AggregateUser
 from src.models.users.user import User
-from src.models.users.user_bank import UserBankAccount
 from src.queries import response_name_constants
 from src.queries.get_balances import get_balances
 from src.queries.get_unpopulated_users import get_unpopulated_users, set_users_in_cache
+from src.queries.get_user_aggregates import (
+    get_current_user_followee_follow_counts,
+    get_empty_user_aggregate,
+    get_user_aggregates,
+)
 from src.trending_strategies.trending_type_and_version import TrendingVersion
 from src.utils import helpers, redis_connection
 
@@ -111,68 +118,8 @@ def parse_sort_param(base_query, model, whitelist_sort_params):
 def populate_user_metadata(
     session, user_ids, users, current_user_id, with_digital_content_save_count=False
 ):
-    aggregate_user = (
-        session.query(
-            AggregateUser.user_id,
-            AggregateUser.digital_content_count,
-            AggregateUser.content_list_count,
-            AggregateUser.album_count,
-            AggregateUser.follower_count,
-            AggregateUser.following_count,
-            AggregateUser.repost_count,
-            AggregateUser.digital_content_save_count,
-            AggregateUser.supporter_count,
-            AggregateUser.supporting_count,
-        )
-        .filter(AggregateUser.user_id.in_(user_ids))
-        .all()
-    )
-
-    # build a dict of user (eth) wallet -> user bank
-    user_banks = session.query(
-        UserBankAccount.ethereum_address, UserBankAccount.bank_account
-    ).filter(UserBankAccount.ethereum_address.in_(user["wallet"] for user in users))
-    user_banks_dict = dict(user_banks)
-
-    # build dict of user id --> digital_content/contentList/album/follower/followee/repost/digital_content save/supporting/supporter counts
-    count_dict = {
-        user_id: {
-            response_name_constants.digital_content_count: digital_content_count,
-            response_name_constants.content_list_count: content_list_count,
-            response_name_constants.album_count: album_count,
-            response_name_constants.follower_count: follower_count,
-            response_name_constants.followee_count: following_count,
-            response_name_constants.repost_count: repost_count,
-            response_name_constants.digital_content_save_count: digital_content_save_count,
-            response_name_constants.supporter_count: supporter_count,
-            response_name_constants.supporting_count: supporting_count,
-        }
-        for (
-            user_id,
-            digital_content_count,
-            content_list_count,
-            album_count,
-            follower_count,
-            following_count,
-            repost_count,
-            digital_content_save_count,
-            supporter_count,
-            supporting_count,
-        ) in aggregate_user
-    }
-
-    # build dict of user id --> digital_content blocknumber
-    digital_content_blocknumbers = (
-        session.query(DigitalContent.owner_id, func.max(DigitalContent.blocknumber))
-        .filter(
-            DigitalContent.is_current == True,
-            DigitalContent.is_delete == False,
-            DigitalContent.owner_id.in_(user_ids),
-        )
-        .group_by(DigitalContent.owner_id)
-        .all()
-    )
-    digital_content_blocknumber_dict = dict(digital_content_blocknumbers)
+    # build dict of user id --> aggregate snapshot of counts, digital_content blocknumber and user bank
+    aggregate_dict = get_user_aggregates(session, user_ids)
 
     follows_current_user_set = set()
     current_user_followed_user_ids = {}
@@ -204,29 +151,8 @@ def populate_user_metadata(
                 follows_current_user_set.add(follower_id)
 
         # build dict of user id --> followee follow count
-        current_user_followees = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                Follow.follower_user_id == current_user_id,
-            )
-            .subquery()
-        )
-
-        current_user_followee_follow_counts = (
-            session.query(Follow.followee_user_id, func.count(Follow.followee_user_id))
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                Follow.follower_user_id.in_(current_user_followees),
-                Follow.followee_user_id.in_(user_ids),
-            )
-            .group_by(Follow.followee_user_id)
-            .all()
-        )
-        current_user_followee_follow_count_dict = dict(
-            current_user_followee_follow_counts
+        current_user_followee_follow_count_dict = (
+            get_current_user_followee_follow_counts(session, current_user_id, user_ids)
         )
 
     balance_dict = get_balances(session, redis, user_ids)
@@ -234,37 +160,23 @@ def populate_user_metadata(
     for user in users:
         user_id = user["user_id"]
         user_balance = balance_dict.get(user_id, {})
-        user[response_name_constants.digital_content_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.digital_content_count, 0
-        )
-        user[response_name_constants.content_list_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.content_list_count, 0
-        )
-        user[response_name_constants.album_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.album_count, 0
-        )
-        user[response_name_constants.follower_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.follower_count, 0
-        )
-        user[response_name_constants.followee_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.followee_count, 0
-        )
-        user[response_name_constants.repost_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.repost_count, 0
-        )
-        user[response_name_constants.digital_content_blocknumber] = digital_content_blocknumber_dict.get(
-            user_id, -1
-        )
+        user_aggregate = aggregate_dict.get(user_id) or get_empty_user_aggregate()
+        for name in (
+            response_name_constants.digital_content_count,
+            response_name_constants.content_list_count,
+            response_name_constants.album_count,
+            response_name_constants.follower_count,
+            response_name_constants.followee_count,
+            response_name_constants.repost_count,
+            response_name_constants.digital_content_blocknumber,
+            response_name_constants.supporter_count,
+            response_name_constants.supporting_count,
+        ):
+            user[name] = user_aggregate[name]
         if with_digital_content_save_count:
-            user[response_name_constants.digital_content_save_count] = count_dict.get(
-                user_id, {}
-            ).get(response_name_constants.digital_content_save_count, 0)
-        user[response_name_constants.supporter_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.supporter_count, 0
-        )
-        user[response_name_constants.supporting_count] = count_dict.get(
-            user_id, {}
-        ).get(response_name_constants.supporting_count, 0)
+            user[response_name_constants.digital_content_save_count] = user_aggregate[
+                response_name_constants.digital_content_save_count
+            ]
         # current user specific
         user[
             response_name_constants.does_current_user_follow
@@ -287,9 +199,9 @@ def populate_user_metadata(
         user[response_name_constants.wei_digitalcoin_balance] = user_balance.get(
             "wei_digitalcoin_balance", "0"
         )
-        user[response_name_constants.spl_wallet] = user_banks_dict.get(
-            user["wallet"], None
-        )
+        user[response_name_constants.spl_wallet] = user_aggregate[
+            response_name_constants.spl_wallet
+        ]
         user[response_name_constants.does_follow_current_user] = (
             user_id in follows_current_user_set
         )
@@ -1045,6 +957,88 @@ def add_query_pagination(
     return modified_query
 
 
+def encode_pagination_cursor(sort_key):
+    """
+    Returns an opaque cursor to the rows after a row with the given sort key
+
+    Args:
+        sort_key: list of the values of the row for the columns the rows are
+            ordered by, of JSON types or datetimes
+    """
+    values = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in sort_key
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_pagination_cursor(cursor, types):
+    """
+    Decodes a cursor of encode_pagination_cursor into the sort key of its row
+
+    Args:
+        cursor: string cursor
+        types: list of the python types of the values of the sort key
+
+    Returns:
+        List of the values of the sort key
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong number of values")
+        return [
+            datetime.fromisoformat(value)
+            if value_type == datetime
+            else value_type(value)
+            for value, value_type in zip(values, types)
+        ]
+    except (TypeError, ValueError) as e:
+        raise exceptions.ArgumentError(f"Invalid cursor {cursor}: {e}")
+
+
+def add_query_cursor_pagination(query_obj, columns, cursor, limit):
+    """
+    Paginates a query ordered by columns descending to the `limit` rows after
+    cursor, so deep pages are read from an index rather than counted through
+    like offsets
+
+    Args:
+        query_obj: query ordered by columns descending
+        columns: list of columns identifying a row
+        cursor: optional cursor of encode_pagination_cursor, from the first row
+            if None
+        limit: number of rows
+    """
+    if cursor is not None:
+        values = decode_pagination_cursor(
+            cursor, [column.type.python_type for column in columns]
+        )
+        query_obj = query_obj.filter(tuple_(*columns) < tuple_(*values))
+    return query_obj.limit(limit)
+
+
+def get_next_pagination_cursor(results, limit, get_sort_key):
+    """
+    Returns the cursor to the results after a page of results, or None if the
+    page is the last one
+
+    Args:
+        results: list of results of a page
+        limit: number of results requested for the page
+        get_sort_key: function returning the sort key of a result
+    """
+    if not results or len(results) < limit:
+        return None
+    return encode_pagination_cursor(get_sort_key(results[-1]))
+
+
+def get_user_follower_count_sort_key(user):
+    """Returns the cursor sort key of a user of the users of an item ordered by
+    follower count, e.g. its reposters"""
+    return [user[response_name_constants.follower_count], user["user_id"]]
+
+
 def get_genre_list(genre):
     genre_list = []
     genre_list.append(genre)
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+from src import exceptions
+from src.queries.query_helpers import (
+    decode_pagination_cursor,
+    encode_pagination_cursor,
+    get_next_pagination_cursor,
+)
+
+
+def test_pagination_cursor():
+    """Tests that cursors round trip their sort key and invalid cursors are rejected"""
+    created_at = datetime(2022, 8, 2, 14, 21, 8, 519274)
+    cursor = encode_pagination_cursor([created_at, 5])
+    assert decode_pagination_cursor(cursor, [datetime, int]) == [created_at, 5]
+
+    for invalid_cursor in ["not a cursor", encode_pagination_cursor([5])]:
+        with pytest.raises(exceptions.ArgumentError):
+            decode_pagination_cursor(invalid_cursor, [datetime, int])
+    with pytest.raises(exceptions.ArgumentError):
+        decode_pagination_cursor(encode_pagination_cursor(["a", 5]), [datetime, int])
+
+
+def test_get_next_pagination_cursor():
+    """Tests that only full pages have a cursor, to their last result"""
+    results = [{"id": 3}, {"id": 2}]
+
+    def get_sort_key(result):
+        return [result["id"]]
+
+    assert get_next_pagination_cursor(results, 3, get_sort_key) is None
+    assert get_next_pagination_cursor([], 0, get_sort_key) is None
+    cursor = get_next_pagination_cursor(results, 2, get_sort_key)
+    assert decode_pagination_cursor(cursor, [int]) == [2]
@@ -1,8 +1,11 @@
 import concurrent.futures
 import logging  # pylint: disable=C0302
 import os
+import threading
+from collections import defaultdict
 from enum import Enum
 from functools import cmp_to_key
+from typing import Dict, List, Optional
 
 import sqlalchemy
 from flask import Blueprint, request
@@ -11,6 +14,11 @@ from src.api.v1.helpers import extend_search
 from src.models.social.follow import Follow
 from src.models.social.repost import RepostType
 from src.models.social.save import Save, SaveType
+from src.models.users.user_balance import UserBalance
+from src.queries.autocomplete_index import (
+    get_autocomplete_index,
+    is_autocomplete_index_enabled,
+)
 from src.queries import response_name_constants
 from src.queries.get_unpopulated_content_lists import get_unpopulated_content_lists
 from src.queries.get_unpopulated_digital_contents import get_unpopulated_digital_contents
@@ -40,6 +48,7 @@ from src.queries.search_config import (
 from src.queries.search_es import search_es_full, search_tags_es
 from src.queries.search_digital_content_tags import search_digital_content_tags
 from src.queries.search_user_tags import search_user_tags
+from src.utils.config import shared_config
 from src.utils.db_session import get_db_read_replica
 
 logger = logging.getLogger(__name__)
@@ -57,9 +66,32 @@ class SearchKind(Enum):
     albums = 5
 
 
+# Searches of a process run on a shared executor, which bounds the read replica
+# connections held by search across requests, see get_search_executor
+search_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+search_executor_pid: Optional[int] = None
+search_executor_lock = threading.Lock()
+
+
 # ####### UTILS ####### #
 
 
+def get_search_executor() -> concurrent.futures.ThreadPoolExecutor:
+    # pylint: disable=W0603
+    global search_executor, search_executor_pid
+    # Threads do not survive a fork, so each worker process creates its own
+    with search_executor_lock:
+        if search_executor is None or search_executor_pid != os.getpid():
+            max_workers = shared_config["discprov"].getint(
+                "search_max_workers", fallback=8
+            )
+            search_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(max_workers, 1), thread_name_prefix="search"
+            )
+            search_executor_pid = os.getpid()
+        return search_executor
+
+
 def compare_users(user1, user2):
     """Comparison util for ordering user search results."""
     # Any verified user is ranked higher
@@ -195,59 +227,229 @@ def add_users(session, results):
     return results
 
 
-def perform_search_query(db, search_type, args):
-    """Performs a search query of a given `search_type`. Handles it's own session. Used concurrently."""
+def get_search_sql(search_type, current_user_id, only_downloadable):
+    if search_type == "digitalContents":
+        return digital_content_search_sql(current_user_id, only_downloadable)
+    if search_type == "users":
+        return user_search_sql(current_user_id)
+    if search_type == "content_lists":
+        return content_list_search_sql(False, current_user_id)
+    return content_list_search_sql(True, current_user_id)
+
+
+def get_search_params(search_str, limit, offset, current_user_id):
+    return {
+        "query": search_str,
+        "limit": limit,
+        "offset": offset,
+        "title_weight": search_title_weight,
+        "repost_weight": search_repost_weight,
+        "similarity_weight": search_similarity_weight,
+        "current_user_id": current_user_id,
+        "user_name_weight": search_user_name_weight,
+        "title_match_boost": search_title_exact_match_boost,
+        "handle_match_boost": search_handle_exact_match_boost,
+        "user_name_match_boost": search_user_name_exact_match_boost,
+        "current_user_saved_match_boost": current_user_saved_match_boost,
+        "name_weight": user_name_weight,
+        "follower_weight": user_follower_weight,
+        "user_handle_match_boost": user_handle_exact_match_boost,
+    }
+
+
+def perform_search_query(db, search_types: List[str], args):
+    """Performs the searches of `search_types` on a single session. The results
+    of all search types are ranked by one statement, then populated along with
+    the users owning them. Used from the search executor."""
+    search_str = args.get("search_str")
+    limit = args.get("limit")
+    offset = args.get("offset")
+    is_auto_complete = args.get("is_auto_complete")
+    current_user_id = args.get("current_user_id")
+    only_downloadable = args.get("only_downloadable")
+
     with db.scoped_session() as session:
-        search_str = args.get("search_str")
-        limit = args.get("limit")
-        offset = args.get("offset")
-        is_auto_complete = args.get("is_auto_complete")
-        current_user_id = args.get("current_user_id")
-        only_downloadable = args.get("only_downloadable")
-
-        results = None
-        if search_type == "digitalContents":
-            results = digital_content_search_query(
-                session,
-                search_str,
-                limit,
-                offset,
-                is_auto_complete,
-                current_user_id,
-                only_downloadable,
+        # Each search type's ranked rows are tagged with it, and ordered by type
+        # then by score as in the search type's own query
+        search_sqls = [
+            (
+                search_type,
+                get_search_sql(search_type, current_user_id, only_downloadable),
             )
-        elif search_type == "users":
-            results = user_search_query(
-                session,
-                search_str,
-                limit,
-                offset,
-                is_auto_complete,
-                current_user_id,
+            for search_type in search_types
+        ]
+        res = sqlalchemy.text(
+            "\nunion all\n".join(
+                f"select '{search_type}' as search_type, r.* from ({search_sql}) as r"
+                for search_type, search_sql in search_sqls
             )
-        elif search_type == "content_lists":
-            results = content_list_search_query(
-                session,
-                search_str,
-                limit,
-                offset,
-                False,
-                is_auto_complete,
-                current_user_id,
-            )
-        elif search_type == "albums":
-            results = content_list_search_query(
-                session,
-                search_str,
-                limit,
-                offset,
-                True,
-                is_auto_complete,
-                current_user_id,
+            + "\norder by search_type, total_score desc, 2"
+        )
+        rows = session.execute(
+            res, get_search_params(search_str, limit, offset, current_user_id)
+        ).fetchall()
+        rows_by_search_type: Dict[str, List] = defaultdict(list)
+        for row in rows:
+            rows_by_search_type[row[0]].append(row[1:])
+
+        # Owners are added once for all search types below
+        results = {}
+        for search_type in search_types:
+            search_data = rows_by_search_type[search_type]
+            if search_type == "digitalContents":
+                results[search_type] = digital_content_search_results(
+                    session, search_data, is_auto_complete, current_user_id, False
+                )
+            elif search_type == "users":
+                results[search_type] = user_search_results(
+                    session, search_data, is_auto_complete, current_user_id
+                )
+            else:
+                results[search_type] = content_list_search_results(
+                    session,
+                    search_data,
+                    search_type == "albums",
+                    is_auto_complete,
+                    current_user_id,
+                    False,
+                )
+
+        add_search_results_owners(session, results, current_user_id)
+        return results
+
+
+def add_search_results_owners(session, results, current_user_id):
+    """Adds the populated users owning the digital contents and content lists of
+    the results of all search types, fetched together"""
+    user_ids = set()
+    for search_type, search_result in results.items():
+        if search_type != "users":
+            user_ids.update(get_users_ids(search_result["all"]))
+    users = get_users_by_id(
+        session, list(user_ids), current_user_id, use_request_context=False
+    )
+    for search_type, search_result in results.items():
+        if search_type == "users":
+            continue
+        for result in search_result["all"]:
+            user_id = result.get("content_list_owner_id", result.get("owner_id"))
+            if user_id is not None:
+                result["user"] = users[user_id]
+
+
+# Id field of the results of each search type
+autocomplete_id_fields = {
+    "digitalContents": "digital_content_id",
+    "users": "user_id",
+    "content_lists": "content_list_id",
+    "albums": "content_list_id",
+}
+
+
+def perform_autocomplete_query(db, search_types: List[str], args):
+    """Performs the autocomplete searches of `search_types` on the in memory
+    autocomplete index. Returns the results in the shape of perform_search_query,
+    or None if the index is disabled or not built yet."""
+    if not is_autocomplete_index_enabled():
+        return None
+    autocomplete_index = get_autocomplete_index(db)
+    if not autocomplete_index.is_ready:
+        return None
+
+    search_str = args.get("search_str")
+    limit = args.get("limit")
+    offset = args.get("offset")
+    current_user_id = args.get("current_user_id")
+
+    ids_by_search_type = {
+        search_type: autocomplete_index.search(search_type, search_str, limit, offset)
+        for search_type in search_types
+    }
+    user_ids = ids_by_search_type.get("users")
+
+    with db.scoped_session() as session:
+        # Balances of the users found, owners get theirs when populated below
+        balances = {}
+        if user_ids:
+            balances = {
+                user_id: (balance, associated_wallets_balance)
+                for user_id, balance, associated_wallets_balance in session.query(
+                    UserBalance.user_id,
+                    UserBalance.balance,
+                    UserBalance.associated_wallets_balance,
+                ).filter(UserBalance.user_id.in_(user_ids))
+            }
+
+        results = {}
+        for search_type, ids in ids_by_search_type.items():
+            flagged_ids = get_autocomplete_flagged_ids(
+                session, search_type, ids, current_user_id
             )
+            # Rows in the shape of the sql search rows
+            search_data = [
+                (
+                    item_id,
+                    *balances.get(item_id, (None, None)),
+                    item_id in flagged_ids,
+                )
+                for item_id in ids
+            ]
+            if search_type == "digitalContents":
+                results[search_type] = digital_content_search_results(
+                    session, search_data, True, current_user_id, False
+                )
+            elif search_type == "users":
+                results[search_type] = user_search_results(
+                    session, search_data, True, current_user_id
+                )
+            else:
+                results[search_type] = content_list_search_results(
+                    session,
+                    search_data,
+                    search_type == "albums",
+                    True,
+                    current_user_id,
+                    False,
+                )
+            # The index may be behind, drop the entities that are no longer
+            # searchable rather than wait for the next refresh
+            id_field = autocomplete_id_fields[search_type]
+            found_ids = {item[id_field] for item in results[search_type]["all"]}
+            stale_ids = set(ids) - found_ids
+            if stale_ids:
+                autocomplete_index.remove(search_type, stale_ids)
+
+        add_search_results_owners(session, results, current_user_id)
         return results
 
 
+def get_autocomplete_flagged_ids(session, search_type, ids, current_user_id):
+    """Returns the ids of ids saved, or for users followed, by current_user_id"""
+    if not current_user_id or not ids:
+        return set()
+    if search_type == "users":
+        rows = session.query(Follow.followee_user_id).filter(
+            Follow.follower_user_id == current_user_id,
+            Follow.followee_user_id.in_(ids),
+            Follow.is_current == True,
+            Follow.is_delete == False,
+        )
+    else:
+        save_type = {
+            "digitalContents": SaveType.digital_content,
+            "content_lists": SaveType.contentList,
+            "albums": SaveType.album,
+        }[search_type]
+        rows = session.query(Save.save_item_id).filter(
+            Save.user_id == current_user_id,
+            Save.save_item_id.in_(ids),
+            Save.save_type == save_type,
+            Save.is_current == True,
+            Save.is_delete == False,
+        )
+    return {row[0] for row in rows}
+
+
 # SEARCH QUERIES
 # We chose to use the raw SQL instead of SQLAlchemy because we're pushing SQLAlchemy to it's
 # limit to do this query by creating new wrappers for pg functions that do not exist like
@@ -296,9 +498,6 @@ def search(args):
 
     results = {}
 
-    # Accumulate user_ids for later
-    user_ids = set()
-
     # Create args for perform_search_query
     search_args = {
         "search_str": search_str,
@@ -311,70 +510,45 @@ def search(args):
 
     if search_str:
         db = get_db_read_replica()
+        search_types = []
+        if searchKind in [SearchKind.all, SearchKind.digitalContents]:
+            search_types.append("digitalContents")
+        if searchKind in [SearchKind.all, SearchKind.users]:
+            search_types.append("users")
+        if searchKind in [SearchKind.all, SearchKind.contentLists]:
+            search_types.append("content_lists")
+        if searchKind in [SearchKind.all, SearchKind.albums]:
+            search_types.append("albums")
+
         # Concurrency approach:
-        # Spin up a ThreadPoolExecutor for each request to perform_search_query
-        # to perform the different search types in parallel.
-        # After each future resolves, we then add users for each entity in a single
-        # db round trip.
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            # Keep a mapping of future -> search_type
-            futures_map = {}
-            futures = []
-
-            # Helper fn to submit a future and add it to bookkeeping data structures
-            def submit_and_add(search_type):
-                future = executor.submit(
-                    perform_search_query, db, search_type, search_args
-                )
-                futures.append(future)
-                futures_map[future] = search_type
-
-            if searchKind in [SearchKind.all, SearchKind.digitalContents]:
-                submit_and_add("digitalContents")
-
-            if searchKind in [SearchKind.all, SearchKind.users]:
-                submit_and_add("users")
-            if searchKind in [SearchKind.all, SearchKind.contentLists]:
-                submit_and_add("content_lists")
-
-            if searchKind in [SearchKind.all, SearchKind.albums]:
-                submit_and_add("albums")
-
-            for future in concurrent.futures.as_completed(futures):
-                search_result = future.result()
-                future_type = futures_map[future]
-
-                # Add to the final results
-                # Add to user_ids
-                if future_type == "digitalContents":
-                    results["digitalContents"] = search_result["all"]
-                    results["saved_digital_contents"] = search_result["saved"]
-                elif future_type == "users":
-                    results["users"] = search_result["all"]
-                    results["followed_users"] = search_result["followed"]
-                elif future_type == "content_lists":
-                    results["content_lists"] = search_result["all"]
-                    results["saved_content_lists"] = search_result["saved"]
-                elif future_type == "albums":
-                    results["albums"] = search_result["all"]
-                    results["saved_albums"] = search_result["saved"]
-                user_ids.update(get_users_ids(search_result["all"]))
-
-            with db.scoped_session() as session:
-                # Add users back
-                users = get_users_by_id(session, list(user_ids), current_user_id)
-
-                for (_, result_list) in results.items():
-                    for result in result_list:
-                        user_id = None
-                        if "content_list_owner_id" in result:
-                            user_id = result["content_list_owner_id"]
-                        elif "owner_id" in result:
-                            user_id = result["owner_id"]
-
-                        if user_id is not None:
-                            user = users[user_id]
-                            result["user"] = user
+        # All search types are performed on one session, on the process wide
+        # search executor rather than a thread pool per request, so that
+        # concurrent searches queue for its threads rather than each taking
+        # a db connection per search type.
+        search_results = None
+        if is_auto_complete:
+            # Autocomplete is served from memory once the index is built
+            search_results = perform_autocomplete_query(db, search_types, search_args)
+        if search_results is None:
+            search_results = (
+                get_search_executor()
+                .submit(perform_search_query, db, search_types, search_args)
+                .result()
+            )
+
+        for search_type, search_result in search_results.items():
+            if search_type == "digitalContents":
+                results["digitalContents"] = search_result["all"]
+                results["saved_digital_contents"] = search_result["saved"]
+            elif search_type == "users":
+                results["users"] = search_result["all"]
+                results["followed_users"] = search_result["followed"]
+            elif search_type == "content_lists":
+                results["content_lists"] = search_result["all"]
+                results["saved_content_lists"] = search_result["saved"]
+            elif search_type == "albums":
+                results["albums"] = search_result["all"]
+                results["saved_albums"] = search_result["saved"]
     return extend_search(results)
 
 
@@ -387,11 +561,21 @@ def digital_content_search_query(
     current_user_id,
     only_downloadable,
 ):
+    res = sqlalchemy.text(digital_content_search_sql(current_user_id, only_downloadable))
+    digital_content_data = session.execute(
+        res, get_search_params(search_str, limit, offset, current_user_id)
+    ).fetchall()
+    return digital_content_search_results(
+        session, digital_content_data, is_auto_complete, current_user_id
+    )
+
 
-    res = sqlalchemy.text(
-        # pylint: disable=C0301
-        f"""
-        select digital_content_id, b.balance, b.associated_wallets_balance, u.is_saved from (
+def digital_content_search_sql(current_user_id, only_downloadable):
+    """Returns the query of ranked digital_content search results, with rows of
+    digital_content_id, balance, associated_wallets_balance, is_saved and total_score"""
+    # pylint: disable=C0301
+    return f"""
+        select digital_content_id, b.balance, b.associated_wallets_balance, u.is_saved, u.total_score from (
             select distinct on (owner_id) digital_content_id, owner_id, is_saved, total_score
             from (
                 select digital_content_id, owner_id, is_saved,
@@ -446,67 +630,58 @@ def digital_content_search_query(
         ) as u left join user_balances b on u.owner_id = b.user_id
         order by total_score desc
         limit :limit
-        offset :offset;
+        offset :offset
         """
-    )
 
-    digital_content_result_proxy = session.execute(
-        res,
-        params={
-            "query": search_str,
-            "limit": limit,
-            "offset": offset,
-            "title_weight": search_title_weight,
-            "repost_weight": search_repost_weight,
-            "similarity_weight": search_similarity_weight,
-            "current_user_id": current_user_id,
-            "user_name_weight": search_user_name_weight,
-            "title_match_boost": search_title_exact_match_boost,
-            "handle_match_boost": search_handle_exact_match_boost,
-            "user_name_match_boost": search_user_name_exact_match_boost,
-            "current_user_saved_match_boost": current_user_saved_match_boost,
-        },
-    )
-
-    digital_content_data = digital_content_result_proxy.fetchall()
-    digital_content_cols = digital_content_result_proxy.keys()
 
+def digital_content_search_results(
+    session, digital_content_data, is_auto_complete, current_user_id, with_owners=True
+):
+    """Populates the rows of digital_content_search_sql. Digital contents are only
+    given their owners if with_owners."""
     # digital_content_ids is list of tuples - simplify to 1-D list
-    digital_content_ids = [digital_content[digital_content_cols.index("digital_content_id")] for digital_content in digital_content_data]
+    digital_content_ids = [digital_content[0] for digital_content in digital_content_data]
+    digital_content_rows = {digital_content[0]: digital_content for digital_content in digital_content_data}
     saved_digital_contents = {
-        digital_content[0] for digital_content in digital_content_data if digital_content[digital_content_cols.index("is_saved")]
+        digital_content[0] for digital_content in digital_content_data if digital_content[3]
     }
 
     digitalContents = get_unpopulated_digital_contents(session, digital_content_ids, True)
 
     # TODO: Populate digital_content metadata should be sped up to be able to be
     # used in search autocomplete as that'll give us better results.
-    if is_auto_complete:
+    if is_auto_complete and with_owners:
         # fetch users for digitalContents
         digital_content_owner_ids = list(map(lambda digital_content: digital_content["owner_id"], digitalContents))
         users = get_unpopulated_users(session, digital_content_owner_ids)
         users_dict = {user["user_id"]: user for user in users}
 
         # attach user objects to digital_content objects
-        for i, digital_content in enumerate(digitalContents):
+        for digital_content in digitalContents:
             user = users_dict[digital_content["owner_id"]]
             # Add user balance
-            balance = digital_content_data[i][1]
-            associated_balance = digital_content_data[i][2]
+            row = digital_content_rows[digital_content["digital_content_id"]]
+            balance = row[1]
+            associated_balance = row[2]
             user[response_name_constants.balance] = balance
             user[
                 response_name_constants.associated_wallets_balance
             ] = associated_balance
             digital_content["user"] = user
-    else:
+    elif not is_auto_complete:
         # bundle peripheral info into digital_content results
         digitalContents = populate_digital_content_metadata(session, digital_content_ids, digitalContents, current_user_id)
 
-    # Preserve order from digital_content_ids above
+    # Preserve order from digital_content_ids above, without the deleted and
+    # unlisted digital contents that were not populated
     digitalContents_map = {}
     for t in digitalContents:
         digitalContents_map[t["digital_content_id"]] = t
-    digitalContents = [digitalContents_map[digital_content_id] for digital_content_id in digital_content_ids]
+    digitalContents = [
+        digitalContents_map[digital_content_id]
+        for digital_content_id in digital_content_ids
+        if digital_content_id in digitalContents_map
+    ]
 
     digitalContents_response = {
         "all": digitalContents,
@@ -519,15 +694,23 @@ def digital_content_search_query(
 def user_search_query(
     session, search_str, limit, offset, is_auto_complete, current_user_id
 ):
-
-    res = sqlalchemy.text(
-        f"""
-        select u.user_id, b.balance, b.associated_wallets_balance, is_followed from (
-            select user_id, is_followed from (
+    res = sqlalchemy.text(user_search_sql(current_user_id))
+    user_info = session.execute(
+        res, get_search_params(search_str, limit, offset, current_user_id)
+    ).fetchall()
+    return user_search_results(session, user_info, is_auto_complete, current_user_id)
+
+
+def user_search_sql(current_user_id):
+    """Returns the query of ranked user search results, with rows of user_id,
+    balance, associated_wallets_balance, is_followed and total_score"""
+    return f"""
+        select u.user_id, b.balance, b.associated_wallets_balance, is_followed, u.total_score from (
+            select user_id, is_followed, total_score from (
                 select user_id, is_followed, (
                     sum(score) +
                     (:follower_weight * log(case when (follower_count = 0) then 1 else follower_count end)) +
-                    (case when (handle=query) then :handle_match_boost else 0 end) +
+                    (case when (handle=query) then :user_handle_match_boost else 0 end) +
                     (:name_weight * similarity(coalesce(name, ''), query))
                     {
                         "+ (case when (is_followed) " +
@@ -569,39 +752,26 @@ def user_search_query(
             limit :limit
             offset :offset
         ) as u left join user_balances b on u.user_id = b.user_id
+        order by u.total_score desc, u.user_id asc
         """
-    )
 
-    user_result_proxy = session.execute(
-        res,
-        {
-            "query": search_str,
-            "limit": limit,
-            "offset": offset,
-            "name_weight": user_name_weight,
-            "follower_weight": user_follower_weight,
-            "current_user_id": current_user_id,
-            "handle_match_boost": user_handle_exact_match_boost,
-            "current_user_saved_match_boost": current_user_saved_match_boost,
-        },
-    )
-    user_info = user_result_proxy.fetchall()
-    user_cols = user_result_proxy.keys()
 
+def user_search_results(session, user_info, is_auto_complete, current_user_id):
+    """Populates the rows of user_search_sql"""
     # user_ids is list of tuples - simplify to 1-D list
-    user_ids = [user[user_cols.index("user_id")] for user in user_info]
+    user_ids = [user[0] for user in user_info]
+    user_rows = {user[0]: user for user in user_info}
 
     # if user has a follower_user_id, the current user has followed that user
-    followed_users = {
-        user[0] for user in user_info if user[user_cols.index("is_followed")]
-    }
+    followed_users = {user[0] for user in user_info if user[3]}
 
     users = get_unpopulated_users(session, user_ids)
 
     if is_auto_complete:
-        for i, user in enumerate(users):
-            balance = user_info[i][1]
-            associated_wallets_balance = user_info[i][2]
+        for user in users:
+            row = user_rows[user["user_id"]]
+            balance = row[1]
+            associated_wallets_balance = row[2]
             user[response_name_constants.balance] = balance
             user[
                 response_name_constants.associated_wallets_balance
@@ -614,7 +784,7 @@ def user_search_query(
     user_map = {}
     for u in users:
         user_map[u["user_id"]] = u
-    users = [user_map[user_id] for user_id in user_ids]
+    users = [user_map[user_id] for user_id in user_ids if user_id in user_map]
 
     # Sort users by extra criteria for "best match"
     users.sort(key=cmp_to_key(compare_users))
@@ -636,18 +806,27 @@ def content_list_search_query(
     is_auto_complete,
     current_user_id,
 ):
+    res = sqlalchemy.text(content_list_search_sql(is_album, current_user_id))
+    content_list_data = session.execute(
+        res, get_search_params(search_str, limit, offset, current_user_id)
+    ).fetchall()
+    return content_list_search_results(
+        session, content_list_data, is_album, is_auto_complete, current_user_id
+    )
 
+
+def content_list_search_sql(is_album, current_user_id):
+    """Returns the query of ranked contentList or album search results, with rows
+    of content_list_id, balance, associated_wallets_balance, is_saved and total_score"""
     table_name = "album_lexeme_dict" if is_album else "content_list_lexeme_dict"
-    repost_type = RepostType.album if is_album else RepostType.contentList
     save_type = SaveType.album if is_album else SaveType.contentList
 
     # SQLAlchemy doesn't expose a way to escape a string with double-quotes instead of
     # single-quotes, so we have to use traditional string substitution. This is safe
     # because the value is not user-specified.
-    res = sqlalchemy.text(
-        # pylint: disable=C0301
-        f"""
-        select p.content_list_id, b.balance, b.associated_wallets_balance, is_saved from (
+    # pylint: disable=C0301
+    return f"""
+        select p.content_list_id, b.balance, b.associated_wallets_balance, is_saved, p.total_score from (
             select distinct on (owner_id) content_list_id, owner_id, is_saved, total_score from (
                 select content_list_id, owner_id, is_saved, (
                     (:similarity_weight * sum(score)) +
@@ -691,45 +870,35 @@ def content_list_search_query(
         ) as p left join user_balances b on p.owner_id = b.user_id
         order by total_score desc
         limit :limit
-        offset :offset;
+        offset :offset
         """
-    )
 
-    content_list_result_proxy = session.execute(
-        res,
-        {
-            "query": search_str,
-            "limit": limit,
-            "offset": offset,
-            "title_weight": search_title_weight,
-            "repost_weight": search_repost_weight,
-            "similarity_weight": search_similarity_weight,
-            "current_user_id": current_user_id,
-            "user_name_weight": search_user_name_weight,
-            "title_match_boost": search_title_exact_match_boost,
-            "handle_match_boost": search_handle_exact_match_boost,
-            "user_name_match_boost": search_user_name_exact_match_boost,
-            "current_user_saved_match_boost": current_user_saved_match_boost,
-        },
-    )
-    content_list_data = content_list_result_proxy.fetchall()
-    content_list_cols = content_list_result_proxy.keys()
+
+def content_list_search_results(
+    session,
+    content_list_data,
+    is_album,
+    is_auto_complete,
+    current_user_id,
+    with_owners=True,
+):
+    """Populates the rows of content_list_search_sql. ContentLists are only given
+    their owners if with_owners."""
+    repost_type = RepostType.album if is_album else RepostType.contentList
+    save_type = SaveType.album if is_album else SaveType.contentList
 
     # content_list_ids is list of tuples - simplify to 1-D list
-    content_list_ids = [
-        contentList[content_list_cols.index("content_list_id")] for contentList in content_list_data
-    ]
+    content_list_ids = [contentList[0] for contentList in content_list_data]
+    content_list_rows = {contentList[0]: contentList for contentList in content_list_data}
     saved_content_lists = {
-        contentList[0]
-        for contentList in content_list_data
-        if contentList[content_list_cols.index("is_saved")]
+        contentList[0] for contentList in content_list_data if contentList[3]
     }
 
     contentLists = get_unpopulated_content_lists(session, content_list_ids, True)
 
     # TODO: Populate contentList metadata should be sped up to be able to be
     # used in search autocomplete as that'll give us better results.
-    if is_auto_complete:
+    if is_auto_complete and with_owners:
         # fetch users for contentLists
         content_list_owner_ids = list(
             map(lambda contentList: contentList["content_list_owner_id"], contentLists)
@@ -738,18 +907,19 @@ def content_list_search_query(
         users_dict = {user["user_id"]: user for user in users}
 
         # attach user objects to contentList objects
-        for i, contentList in enumerate(contentLists):
+        for contentList in contentLists:
             user = users_dict[contentList["content_list_owner_id"]]
             # Add user balance
-            balance = content_list_data[i][1]
-            associated_balance = content_list_data[i][2]
+            row = content_list_rows[contentList["content_list_id"]]
+            balance = row[1]
+            associated_balance = row[2]
             user[response_name_constants.balance] = balance
             user[
                 response_name_constants.associated_wallets_balance
             ] = associated_balance
             contentList["user"] = user
 
-    else:
+    elif not is_auto_complete:
         # bundle peripheral info into contentList results
         contentLists = populate_content_list_metadata(
             session,
@@ -760,11 +930,16 @@ def content_list_search_query(
             current_user_id,
         )
 
-    # Preserve order from content_list_ids above
+    # Preserve order from content_list_ids above, without the deleted and
+    # private contentLists that were not populated
     content_lists_map = {}
     for p in contentLists:
         content_lists_map[p["content_list_id"]] = p
-    contentLists = [content_lists_map[content_list_id] for content_list_id in content_list_ids]
+    contentLists = [
+        content_lists_map[content_list_id]
+        for content_list_id in content_list_ids
+        if content_list_id in content_lists_map
+    ]
 
     content_lists_resp = {
         "all": contentLists,
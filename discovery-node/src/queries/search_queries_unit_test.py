@@ -0,0 +1,67 @@
+from unittest.mock import ANY, MagicMock, patch
+
+from src.queries import search_queries
+from src.queries.search_queries import (
+    digital_content_search_results,
+    perform_autocomplete_query,
+)
+
+
+def test_digital_content_search_results_skips_unpopulated():
+    """Tests that ids of digital contents that are not populated, such as deleted
+    ones, are skipped and that balances follow their digital contents"""
+    digital_contents = [
+        {"digital_content_id": 3, "owner_id": 30},
+        {"digital_content_id": 1, "owner_id": 10},
+    ]
+    users = [{"user_id": 10}, {"user_id": 30}]
+    with patch.object(
+        search_queries,
+        "get_unpopulated_digital_contents",
+        return_value=digital_contents,
+    ), patch.object(search_queries, "get_unpopulated_users", return_value=users):
+        results = digital_content_search_results(
+            None,
+            [(1, "1", "0", False), (2, "2", "0", True), (3, "3", "0", True)],
+            True,
+            None,
+        )
+
+    assert [
+        (digital_content["digital_content_id"], digital_content["user"]["balance"])
+        for digital_content in results["all"]
+    ] == [(1, "1"), (3, "3")]
+    assert [
+        digital_content["digital_content_id"] for digital_content in results["saved"]
+    ] == [3]
+
+
+def test_perform_autocomplete_query_populates_owners():
+    """Tests that autocomplete results get populated owners like sql searches"""
+    autocomplete_index = MagicMock(is_ready=True)
+    autocomplete_index.search.return_value = [1]
+    digital_contents = [{"digital_content_id": 1, "owner_id": 10}]
+    users = {10: {"user_id": 10, "balance": "5", "follower_count": 2}}
+    with patch.object(
+        search_queries, "is_autocomplete_index_enabled", return_value=True
+    ), patch.object(
+        search_queries, "get_autocomplete_index", return_value=autocomplete_index
+    ), patch.object(
+        search_queries, "get_autocomplete_flagged_ids", return_value=set()
+    ), patch.object(
+        search_queries,
+        "get_unpopulated_digital_contents",
+        return_value=digital_contents,
+    ), patch.object(
+        search_queries, "get_users_by_id", return_value=users
+    ) as get_users_by_id:
+        results = perform_autocomplete_query(
+            MagicMock(),
+            ["digitalContents"],
+            {"search_str": "a", "limit": 10, "offset": 0, "current_user_id": 3},
+        )
+
+    get_users_by_id.assert_called_once_with(ANY, [10], 3, use_request_context=False)
+    assert results["digitalContents"]["all"] == [
+        {"digital_content_id": 1, "owner_id": 10, "user": users[10]}
+    ]
@@ -1,17 +1,24 @@
+import itertools
+import json
 import logging
 import random
-import signal
+import threading
 import time
-from contextlib import contextmanager
-from typing import Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+import requests
+from requests.adapters import HTTPAdapter
+from solana.exceptions import SolanaRpcException, handle_exceptions
 from solana.keypair import Keypair
 from solana.publickey import PublicKey
 from solana.rpc.api import Client, Commitment
+from solana.rpc.providers.http import HTTPProvider
+from solana.rpc.types import RPCMethod, RPCResponse
 from src.solana.solana_transaction_types import (
     ConfirmedSignatureForAddressResponse,
     ConfirmedTransaction,
 )
+from src.utils.config import shared_config
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +27,213 @@ DEFAULT_MAX_RETRIES = 5
 # number of seconds to wait between calls to get_confirmed_transaction
 DELAY_SECONDS = 0.2
 
+# Weight of the latest request in the moving averages of an endpoint
+ENDPOINT_STATS_ALPHA = 0.2
+# Seconds of latency an endpoint that always errors is penalized with
+ENDPOINT_ERROR_PENALTY_SEC = 5
+# The error rate of an endpoint halves every ENDPOINT_ERROR_HALF_LIFE_SEC, so a
+# demoted endpoint is tried again once it had time to recover
+ENDPOINT_ERROR_HALF_LIFE_SEC = 60
+# Endpoints with scores within the same resolution keep their configured order
+ENDPOINT_SCORE_RESOLUTION_SEC = 0.25
+# Maximum number of accounts a getMultipleAccounts request may look up
+MAX_MULTIPLE_ACCOUNTS = 100
+
+
+def get_rpc_batch_size() -> int:
+    return max(shared_config["solana"].getint("rpc_batch_size", fallback=25), 1)
+
+
+class BatchRequestRejectedError(Exception):
+    """Raised when an endpoint does not accept JSON-RPC batches"""
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    HTTP provider that keeps the connections to its endpoint alive in a pool
+    shared by the threads of the process, and can send JSON-RPC batches.
+    Request bodies are built here rather than with the private helpers of the
+    solana-py provider, so only the public make_request interface is relied on.
+    """
+
+    def __init__(self, endpoint: str, timeout: float, max_connections: int):
+        super().__init__(endpoint, timeout=timeout)
+        self.request_ids = itertools.count(1)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def build_request(self, method: RPCMethod, params: Tuple[Any, ...]) -> Dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": next(self.request_ids),
+            "method": method,
+            "params": params,
+        }
+
+    def post(self, body: Union[Dict, List[Dict]]) -> Any:
+        raw_response = self.session.post(
+            self.endpoint_uri,
+            headers={"Content-Type": "application/json"},
+            data=json.dumps(body),
+            timeout=self.timeout,
+        )
+        raw_response.raise_for_status()
+        return raw_response.json()
+
+    @handle_exceptions(SolanaRpcException, requests.exceptions.RequestException)
+    def make_request(self, method: RPCMethod, *params: Any) -> RPCResponse:
+        return self.post(self.build_request(method, params))
+
+    def make_batch_request(
+        self, requests_params: List[Tuple[Any, ...]]
+    ) -> List[Optional[RPCResponse]]:
+        """
+        Sends the requests, each a tuple of the method and its params, in one
+        JSON-RPC batch. Returns the responses in the order of the requests,
+        None for a request the endpoint did not respond to.
+        """
+        body = [
+            self.build_request(method, tuple(params))
+            for method, *params in requests_params
+        ]
+        try:
+            responses = self.post(body)
+        except requests.exceptions.HTTPError as e:
+            # Rate limits are not rejections of the batch
+            status_code = e.response.status_code if e.response is not None else None
+            if status_code and 400 <= status_code < 500 and status_code != 429:
+                raise BatchRequestRejectedError(
+                    f"Batch request rejected, {status_code}"
+                ) from e
+            raise e
+        if not isinstance(responses, list):
+            # Endpoints that do not support batches respond with a single error
+            raise BatchRequestRejectedError(f"Batch request rejected, {responses}")
+        responses_by_id = {response.get("id"): response for response in responses}
+        return [responses_by_id.get(request["id"]) for request in body]
+
+
+class PooledClient(Client):
+    """Solana client on a PooledHTTPProvider"""
+
+    def __init__(self, endpoint: str, timeout: float, max_connections: int):
+        super().__init__(endpoint, timeout=timeout)
+        # Client has no public way to pass a provider. Its requests all go
+        # through self._provider, as of the pinned solana==0.23.1
+        self._provider = PooledHTTPProvider(endpoint, timeout, max_connections)
+        # Cleared once the endpoint rejects a batch
+        self.supports_batches = True
+
+    def get_transactions(
+        self, tx_sigs: List[str], encoding: str = "json"
+    ) -> List[Optional[RPCResponse]]:
+        """Fetches the transactions of tx_sigs in one JSON-RPC batch, or one
+        request per transaction if the endpoint does not accept batches"""
+        requests_params = [
+            (
+                RPCMethod("getTransaction"),
+                tx_sig,
+                {"encoding": encoding, "commitment": Commitment("finalized")},
+            )
+            for tx_sig in tx_sigs
+        ]
+        if len(requests_params) > 1 and self.supports_batches:
+            try:
+                return self._provider.make_batch_request(requests_params)
+            except BatchRequestRejectedError as e:
+                logger.warning(
+                    f"solana_client_manager.py | get_transactions | Sending single requests to {self._provider.endpoint_uri}, {e}"
+                )
+                self.supports_batches = False
+        return [self._provider.make_request(*params) for params in requests_params]
+
+
+class EndpointStats:
+    """Moving averages of the latency and error rate of requests to an endpoint"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.num_successes = 0
+        self.latency_sec = 0.0
+        self.error_rate = 0.0
+        self.updated_at = time.time()
+
+    def record(self, latency_sec: float, is_error: bool):
+        with self.lock:
+            # Errors, such as timeouts, only count towards the error rate, which
+            # decays, so the score of a demoted endpoint recovers
+            if not is_error:
+                if self.num_successes == 0:
+                    self.latency_sec = latency_sec
+                else:
+                    self.latency_sec += ENDPOINT_STATS_ALPHA * (
+                        latency_sec - self.latency_sec
+                    )
+                self.num_successes += 1
+            self.error_rate += ENDPOINT_STATS_ALPHA * (
+                float(is_error) - self.error_rate
+            )
+            self.updated_at = time.time()
+
+    def get_score(self, now: float) -> float:
+        """Expected seconds a request takes, lower is better"""
+        with self.lock:
+            decay = 0.5 ** ((now - self.updated_at) / ENDPOINT_ERROR_HALF_LIFE_SEC)
+            return (
+                self.latency_sec + ENDPOINT_ERROR_PENALTY_SEC * self.error_rate * decay
+            )
+
 
 class SolanaClientManager:
     def __init__(self, solana_endpoints) -> None:
         self.endpoints = solana_endpoints.split(",")
-        self.clients = [Client(endpoint) for endpoint in self.endpoints]
+        timeout = shared_config["solana"].getint("rpc_timeout_sec", fallback=10)
+        max_connections = shared_config["solana"].getint(
+            "rpc_max_connections", fallback=32
+        )
+        self.clients = [
+            PooledClient(endpoint, timeout, max_connections)
+            for endpoint in self.endpoints
+        ]
+        # Keyed by client rather than index so replaced clients start afresh
+        self.endpoint_stats: Dict[Any, EndpointStats] = {}
+        self.endpoint_stats_lock = threading.Lock()
+
+    def get_endpoint_stats(self, client: Client) -> EndpointStats:
+        with self.endpoint_stats_lock:
+            if client not in self.endpoint_stats:
+                self.endpoint_stats[client] = EndpointStats()
+            return self.endpoint_stats[client]
+
+    def get_ranked_clients(self) -> List[Tuple[int, Client]]:
+        """
+        Returns the clients with their index, best scored endpoint first.
+        Endpoints that score alike keep their configured order.
+        """
+        now = time.time()
+        return sorted(
+            enumerate(self.clients),
+            key=lambda item: (
+                int(
+                    self.get_endpoint_stats(item[1]).get_score(now)
+                    / ENDPOINT_SCORE_RESOLUTION_SEC
+                ),
+                item[0],
+            ),
+        )
+
+    def _request(self, client: Client, func: Callable[[], Any]):
+        """Calls func, a request to the endpoint of client, and scores it"""
+        start_time = time.time()
+        try:
+            result = func()
+        except Exception as e:
+            self.get_endpoint_stats(client).record(time.time() - start_time, True)
+            raise e
+        self.get_endpoint_stats(client).record(time.time() - start_time, False)
+        return result
 
     def get_client(self, randomize=False) -> Client:
         if not self.clients:
@@ -32,7 +241,7 @@ class SolanaClientManager:
                 "solana_client_manager.py | get_client | There are no solana clients"
             )
         if not randomize:
-            return self.clients[0]
+            return self.get_ranked_clients()[0][1]
         index = random.randrange(0, len(self.clients))
         return self.clients[index]
 
@@ -49,8 +258,8 @@ class SolanaClientManager:
                     logger.info(
                         f"solana_client_manager.py | get_sol_tx_info | Fetching tx {tx_sig} {endpoint}"
                     )
-                    tx_info: ConfirmedTransaction = client.get_transaction(
-                        tx_sig, encoding
+                    tx_info: ConfirmedTransaction = self._request(
+                        client, lambda: client.get_transaction(tx_sig, encoding)
                     )
                     logger.info(
                         f"solana_client_manager.py | get_sol_tx_info | Finished fetching tx {tx_sig} {endpoint}"
@@ -73,11 +282,99 @@ class SolanaClientManager:
             )
 
         return _try_all(
-            self.clients,
+            self.get_ranked_clients(),
             handle_get_sol_tx_info,
             f"solana_client_manager.py | get_sol_tx_info | All requests failed to fetch {tx_sig}",
         )
 
+    def get_sol_tx_infos(
+        self, tx_sigs: List[str], retries=DEFAULT_MAX_RETRIES, encoding="json"
+    ) -> List[ConfirmedTransaction]:
+        """
+        Fetches solana transactions by signature, in the order of tx_sigs, in
+        JSON-RPC batches of rpc_batch_size. Transactions an endpoint did not
+        return in a batch are fetched on their own with get_sol_tx_info.
+        """
+        batch_size = get_rpc_batch_size()
+        tx_infos: List[ConfirmedTransaction] = []
+        for i in range(0, len(tx_sigs), batch_size):
+            tx_sig_batch = tx_sigs[i : i + batch_size]
+
+            def handle_get_sol_tx_infos(
+                client: Client, index: int, tx_sig_batch=tx_sig_batch
+            ):
+                endpoint = self.endpoints[index]
+                logger.info(
+                    f"solana_client_manager.py | get_sol_tx_infos | Fetching {len(tx_sig_batch)} txs {endpoint}"
+                )
+                return self._request(
+                    client, lambda: client.get_transactions(tx_sig_batch, encoding)
+                )
+
+            batch_tx_infos = _try_all(
+                self.get_ranked_clients(),
+                handle_get_sol_tx_infos,
+                "solana_client_manager.py | get_sol_tx_infos | All requests failed",
+            )
+            for tx_sig, tx_info in zip(tx_sig_batch, batch_tx_infos):
+                if not tx_info or tx_info.get("result") is None:
+                    tx_info = self.get_sol_tx_info(tx_sig, retries, encoding)
+                tx_infos.append(tx_info)
+        return tx_infos
+
+    def get_multiple_accounts(
+        self,
+        accounts: List[Union[str, PublicKey]],
+        retries=DEFAULT_MAX_RETRIES,
+        encoding="jsonParsed",
+    ) -> List[Optional[Dict]]:
+        """
+        Fetches the info of accounts, in the order of accounts, with
+        getMultipleAccounts requests of up to MAX_MULTIPLE_ACCOUNTS accounts.
+        Accounts that do not exist are returned as None.
+        """
+        account_infos: List[Optional[Dict]] = []
+        for i in range(0, len(accounts), MAX_MULTIPLE_ACCOUNTS):
+            account_batch = accounts[i : i + MAX_MULTIPLE_ACCOUNTS]
+
+            def handle_get_multiple_accounts(
+                client: Client, index: int, account_batch=account_batch
+            ):
+                endpoint = self.endpoints[index]
+                num_retries = retries
+                while num_retries > 0:
+                    try:
+                        response = self._request(
+                            client,
+                            lambda: client.get_multiple_accounts(
+                                account_batch, Commitment("finalized"), encoding
+                            ),
+                        )
+                        return response["result"]["value"]
+                    except Exception as e:
+                        logger.error(
+                            f"solana_client_manager.py | get_multiple_accounts | \
+                                Error fetching {len(account_batch)} accounts from endpoint {endpoint}, {e}",
+                            exc_info=True,
+                        )
+                    num_retries -= 1
+                    time.sleep(DELAY_SECONDS)
+                    logger.error(
+                        f"solana_client_manager.py | get_multiple_accounts | Retrying with endpoint {endpoint}"
+                    )
+                raise Exception(
+                    f"solana_client_manager.py | get_multiple_accounts | Failed with endpoint {endpoint}"
+                )
+
+            account_infos.extend(
+                _try_all(
+                    self.get_ranked_clients(),
+                    handle_get_multiple_accounts,
+                    "solana_client_manager.py | get_multiple_accounts | All requests failed",
+                )
+            )
+        return account_infos
+
     def get_signatures_for_address(
         self,
         account: Union[str, Keypair, PublicKey],
@@ -96,10 +393,11 @@ class SolanaClientManager:
                     logger.info(
                         f"solana_client_manager.py | handle_get_signatures_for_address | Fetching {before} {endpoint}"
                     )
-                    transactions: ConfirmedSignatureForAddressResponse = (
-                        client.get_signatures_for_address(
+                    transactions: ConfirmedSignatureForAddressResponse = self._request(
+                        client,
+                        lambda: client.get_signatures_for_address(
                             account, before, until, limit, Commitment("finalized")
-                        )
+                        ),
                     )
                     logger.info(
                         f"solana_client_manager.py | handle_get_signatures_for_address | Finished fetching {before} {endpoint}"
@@ -120,8 +418,8 @@ class SolanaClientManager:
                 f"solana_client_manager.py | handle_get_signatures_for_address | Failed to fetch account {account} with endpoint {endpoint}"
             )
 
-        return _try_all_with_timeout(
-            self.clients,
+        return _try_all(
+            self.get_ranked_clients(),
             handle_get_signatures_for_address,
             "solana_client_manager.py | get_signatures_for_address | All requests failed",
         )
@@ -132,7 +430,9 @@ class SolanaClientManager:
             num_retries = retries
             while num_retries > 0:
                 try:
-                    response = client.get_slot(Commitment("finalized"))
+                    response = self._request(
+                        client, lambda: client.get_slot(Commitment("finalized"))
+                    )
                     return response["result"]
                 except Exception as e:
                     logger.error(
@@ -149,68 +449,24 @@ class SolanaClientManager:
             )
 
         return _try_all(
-            self.clients,
+            self.get_ranked_clients(),
             _get_slot,
             "solana_client_manager.py | get_slot | All requests failed to fetch",
         )
 
 
-@contextmanager
-def timeout(time):
-    # Register a function to raise a TimeoutError on the signal.
-    signal.signal(signal.SIGALRM, raise_timeout)
-    # Schedule the signal to be sent after ``time``.
-    signal.alarm(time)
-
-    try:
-        yield
-    except TimeoutError:  # pylint: disable=W0706
-        raise
-    finally:
-        # Unregister the signal so it won't be triggered
-        # if the timeout is not reached.
-        signal.signal(signal.SIGALRM, signal.SIG_IGN)
-
-
-def raise_timeout(signum, frame):
-    raise TimeoutError
-
-
-def _try_all(iterable, func, message, randomize=False):
-    """Executes a function with retries across the iterable.
-    If all executions fail, raise an exception."""
-    items = list(enumerate(iterable))
+def _try_all(items: List[Tuple[int, Any]], func, message, randomize=False):
+    """Executes a function with retries across the items, pairs of an index
+    and a value. If all executions fail, raise an exception."""
     items = items if not randomize else random.sample(items, k=len(items))
-    for index, value in items:
+    for attempt, (index, value) in enumerate(items):
         try:
             return func(value, index)
         except Exception:
             logger.error(
                 f"solana_client_manager.py | _try_all | Failed attempt at index {index} for function {func}"
             )
-            if index < len(items) - 1:
-                logger.info("solana_client_manager.py | _try_all | Retrying")
-            continue
-    raise Exception(message)
-
-
-def _try_all_with_timeout(iterable, func, message, randomize=False):
-    """Do not use this function with ThreadPoolExecutor,
-    doesn't play well with futures
-
-    Executes a function with retries across the iterable.
-    If all executions fail, raise an exception."""
-    items = list(enumerate(iterable))
-    items = items if not randomize else random.sample(items, k=len(items))
-    for index, value in items:
-        try:
-            with timeout(30):
-                return func(value, index)
-        except Exception:
-            logger.error(
-                f"solana_client_manager.py | _try_all | Failed attempt at index {index} for function {func}"
-            )
-            if index < len(items) - 1:
+            if attempt < len(items) - 1:
                 logger.info("solana_client_manager.py | _try_all | Retrying")
             continue
     raise Exception(message)
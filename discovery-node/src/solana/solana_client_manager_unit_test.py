@@ -1,7 +1,15 @@
+import json
 from unittest import mock
 
 import pytest
-from src.solana.solana_client_manager import SolanaClientManager
+from src.solana import solana_client_manager as solana_client_manager_module
+from src.solana.solana_client_manager import (
+    ENDPOINT_ERROR_HALF_LIFE_SEC,
+    EndpointStats,
+    PooledClient,
+    PooledHTTPProvider,
+    SolanaClientManager,
+)
 
 solana_client_manager = SolanaClientManager(
     "https://coliving.rpcpool.com,https://api.mainnet-beta.solana.com,https://solana-api.projectserum.com"
@@ -113,3 +121,134 @@ def test_get_signatures_for_address(_):
         solana_client_manager.get_signatures_for_address(
             "account", "before", "until", "limit"
         )
+
+
+@mock.patch("solana.rpc.api.Client")
+def test_endpoint_ranking(_):
+    client_mocks = [
+        mock.Mock(name="first"),
+        mock.Mock(name="second"),
+        mock.Mock(name="third"),
+    ]
+    solana_client_manager.clients = client_mocks
+
+    expected_response = {"result": 100}
+    client_mocks[0].get_slot.side_effect = Exception()
+    client_mocks[1].get_slot.return_value = expected_response
+    assert solana_client_manager.get_slot(1) == 100
+
+    # test that a failing endpoint is tried after the healthy ones
+    assert [client for _, client in solana_client_manager.get_ranked_clients()] == [
+        client_mocks[1],
+        client_mocks[2],
+        client_mocks[0],
+    ]
+    assert solana_client_manager.get_client() == client_mocks[1]
+    client_mocks[1].get_slot.reset_mock()
+    assert solana_client_manager.get_slot(1) == 100
+    assert client_mocks[0].get_slot.call_count == 1
+    assert client_mocks[1].get_slot.call_count == 1
+
+
+@mock.patch("solana.rpc.api.Client")
+def test_get_sol_tx_infos(_, monkeypatch):
+    monkeypatch.setattr(solana_client_manager_module, "get_rpc_batch_size", lambda: 2)
+    client_mocks = [mock.Mock(name="first"), mock.Mock(name="second")]
+    solana_client_manager.clients = client_mocks
+
+    # test that transactions missing from a batch are fetched on their own
+    client_mocks[0].get_transactions.side_effect = lambda tx_sigs, _: [
+        None if tx_sig == "missing" else {"result": tx_sig} for tx_sig in tx_sigs
+    ]
+    client_mocks[0].get_transaction.return_value = {"result": "missing"}
+    tx_sigs = ["a", "missing", "b"]
+    assert solana_client_manager.get_sol_tx_infos(tx_sigs) == [
+        {"result": tx_sig} for tx_sig in tx_sigs
+    ]
+    assert client_mocks[0].get_transactions.call_count == 2
+    assert client_mocks[0].get_transaction.call_count == 1
+
+    # test that it will try subsequent clients if a batch fails
+    client_mocks[0].get_transactions.side_effect = Exception()
+    client_mocks[1].get_transactions.return_value = [{"result": "a"}]
+    assert solana_client_manager.get_sol_tx_infos(["a"]) == [{"result": "a"}]
+
+
+@mock.patch("solana.rpc.api.Client")
+def test_get_multiple_accounts(_, monkeypatch):
+    monkeypatch.setattr(solana_client_manager_module, "MAX_MULTIPLE_ACCOUNTS", 2)
+    client_mocks = [mock.Mock(name="first")]
+    solana_client_manager.clients = client_mocks
+
+    # test that accounts are looked up in requests of MAX_MULTIPLE_ACCOUNTS
+    client_mocks[0].get_multiple_accounts.side_effect = lambda accounts, *_: {
+        "result": {"value": [None if a == "missing" else {"a": a} for a in accounts]}
+    }
+    assert solana_client_manager.get_multiple_accounts(["a", "missing", "b"]) == [
+        {"a": "a"},
+        None,
+        {"a": "b"},
+    ]
+    assert client_mocks[0].get_multiple_accounts.call_count == 2
+
+
+def test_make_batch_request():
+    provider = PooledHTTPProvider("http://localhost:8899", 10, 1)
+    response = mock.Mock(name="response")
+
+    def post(url, headers, data, timeout):
+        requests = json.loads(data)
+        # Responses of a batch may come in any order
+        response.json.return_value = [
+            {"jsonrpc": "2.0", "id": request["id"], "result": request["params"]}
+            for request in reversed(requests[1:])
+        ]
+        return response
+
+    provider.session.post = post
+    assert provider.make_batch_request(
+        [("getTransaction", "a"), ("getTransaction", "b"), ("getTransaction", "c")]
+    ) == [
+        None,
+        {"jsonrpc": "2.0", "id": 2, "result": ["b"]},
+        {"jsonrpc": "2.0", "id": 3, "result": ["c"]},
+    ]
+
+
+def test_endpoint_stats_recover():
+    """Tests that errors do not count towards latency, and that their penalty
+    decays"""
+    endpoint_stats = EndpointStats()
+    endpoint_stats.record(0.1, False)
+    endpoint_stats.record(10, True)
+    assert endpoint_stats.latency_sec == 0.1
+    now = endpoint_stats.updated_at
+    assert endpoint_stats.get_score(now) > 1
+    assert endpoint_stats.get_score(now + 10 * ENDPOINT_ERROR_HALF_LIFE_SEC) < 0.2
+
+
+def test_get_transactions_without_batches():
+    """Tests that endpoints rejecting batches are sent single requests, as are
+    single transactions"""
+    client = PooledClient("http://localhost:8899", 10, 1)
+    bodies = []
+
+    def post(url, headers, data, timeout):
+        body = json.loads(data)
+        bodies.append(body)
+        response = mock.Mock(name="response")
+        if isinstance(body, list):
+            response.json.return_value = {"error": "batch requests are not supported"}
+        else:
+            response.json.return_value = {"id": body["id"], "result": body["params"][0]}
+        return response
+
+    client._provider.session.post = post
+    assert [tx["result"] for tx in client.get_transactions(["a", "b"])] == ["a", "b"]
+    assert not client.supports_batches
+    assert [isinstance(body, list) for body in bodies] == [True, False, False]
+
+    bodies.clear()
+    client.supports_batches = True
+    assert [tx["result"] for tx in client.get_transactions(["c"])] == ["c"]
+    assert [isinstance(body, list) for body in bodies] == [False]
@@ -12,6 +12,7 @@ from src.solana.constants import (
     WRITE_TX_SIGNATURES_BATCH_SIZE,
 )
 from src.solana.solana_client_manager import SolanaClientManager
+from src.solana.solana_signature_crawler import iter_signature_pages
 from src.solana.solana_transaction_types import TransactionInfoResult
 from src.utils.session_manager import SessionManager
 
@@ -194,74 +195,44 @@ class SolanaProgramIndexer(IndexerBase):
         Calculate the delta between database and chain tail and return an array of arrays containing transaction batches
         """
         latest_processed_slot = self.get_latest_slot()
-        # The 'before' value from where we start querying transactions
-        # TODO: Add cache
-        last_tx_signature = None
-
-        # Loop exit condition
-        intersection_found = False
 
         # List of signatures to be processed
         unindexed_transactions = []
 
-        # Current batch
-        page_count = 0
-        while not intersection_found:
-            self.msg(
-                f"Requesting transactions before {last_tx_signature} - {self._program_id}"
-            )
-            transactions_history = (
-                self._solana_client_manager.get_signatures_for_address(
-                    self._program_id,
-                    before=last_tx_signature,
-                    limit=FETCH_TX_SIGNATURES_BATCH_SIZE,
-                )
-            )
-            transactions_array = transactions_history["result"]
-            self.msg(f"{transactions_array}")
-            if not transactions_array:
-                # This is considered an 'intersection' since there are no further transactions to process but
-                # really represents the end of known history for this ProgramId
-                intersection_found = True
-                self.msg(f"No transactions found before {last_tx_signature}")
-            else:
-                with self._db.scoped_session() as read_session:
-                    for tx in transactions_array:
-                        if tx["slot"] > latest_processed_slot:
-                            unindexed_transactions.append(tx)
-                        else:
-                            # Add any txs that haven't been indexed yet
-                            # Check the tx signature for any txs in the latest batch,
-                            # and if not present in DB, add to processing
-                            self.msg(
-                                f"Latest slot re-traversal\
-                                slot={tx['slot']}, sig={tx['signature']},\
-                                latest_processed_slot(db)={latest_processed_slot}"
-                            )
-                            exists = self.is_tx_in_db(read_session, tx["signature"])
-                            if exists:
-                                # Exit loop and set terminal condition since this tx has been found in DB
-                                # Transactions are returned with most recently committed first, so we can assume
-                                # subsequent transactions in this batch have already been processed
-                                intersection_found = True
-                                break
-                            # Otherwise, ensure this transaction is still processed
-                            unindexed_transactions.append(tx)
-                # Restart processing at the end of this transaction signature batch
-                if unindexed_transactions:
-                    last_tx = unindexed_transactions[-1]
-                    last_tx_signature = last_tx["signature"]
-
-                # TODO: Add Caching
-                # Append to recently seen cache
-                # cache_traversed_tx(redis, last_tx)
+        with self._db.scoped_session() as read_session:
+            for page_count, (before, transactions_array) in enumerate(
+                iter_signature_pages(self._solana_client_manager, self._program_id)
+            ):
+                self.msg(f"Retrieved transactions before {before} - {self._program_id}")
+                intersection_found = False
+                for tx in transactions_array:
+                    if tx["slot"] > latest_processed_slot:
+                        unindexed_transactions.append(tx)
+                    else:
+                        # Add any txs that haven't been indexed yet
+                        # Check the tx signature for any txs in the latest batch,
+                        # and if not present in DB, add to processing
+                        self.msg(
+                            f"Latest slot re-traversal\
+                            slot={tx['slot']}, sig={tx['signature']},\
+                            latest_processed_slot(db)={latest_processed_slot}"
+                        )
+                        exists = self.is_tx_in_db(read_session, tx["signature"])
+                        if exists:
+                            # Exit loop and set terminal condition since this tx has been found in DB
+                            # Transactions are returned with most recently committed first, so we can assume
+                            # subsequent transactions in this batch have already been processed
+                            intersection_found = True
+                            break
+                        # Otherwise, ensure this transaction is still processed
+                        unindexed_transactions.append(tx)
 
                 self.msg(
                     f"intersection_found={intersection_found},\
-                    last_tx_signature={last_tx_signature},\
                     page_count={page_count}"
                 )
-                page_count = page_count + 1
+                if intersection_found:
+                    break
 
         if len(unindexed_transactions) <= FETCH_TX_SIGNATURES_BATCH_SIZE:
             # Transaction batch is less than the max batch size so all slots are complete
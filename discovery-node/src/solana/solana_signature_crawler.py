@@ -0,0 +1,482 @@
+"""
+Crawler of the transactions of a set of solana programs
+
+Each program is indexed by a SignatureCrawlHandler. For every handler the
+crawler walks the signatures of the program back from the chain tail until an
+intersection with the transactions already processed, fetches each transaction
+once, in JSON-RPC batches on a shared executor with a bounded number of fetches
+in flight, even when it involves several of the programs, and dispatches the
+transactions to the handler in batches, oldest batch first.
+
+The progress of each program is persisted in a single checkpoint in redis, the
+latest transaction processed and the cursors to resume a backfill from. When the
+checkpoint is missing the intersection is found from the DB of the handler.
+"""
+
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from typing import Dict, Iterator, List, Optional, Tuple, TypedDict
+
+from redis import Redis
+from sqlalchemy.orm.session import Session
+from src.solana.constants import (
+    FETCH_TX_SIGNATURES_BATCH_SIZE,
+    TX_SIGNATURES_MAX_BATCHES,
+    TX_SIGNATURES_RESIZE_LENGTH,
+)
+from src.solana.solana_client_manager import SolanaClientManager, get_rpc_batch_size
+from src.solana.solana_transaction_types import (
+    ConfirmedSignatureForAddressResult,
+    ConfirmedTransaction,
+)
+from src.utils.cache_solana_program import (
+    cache_latest_sol_db_tx,
+    cache_latest_sol_play_program_tx,
+)
+from src.utils.config import shared_config
+from src.utils.helpers import split_list
+from src.utils.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+# Number of signatures that are dispatched to a handler at once
+TX_SIGNATURES_PROCESSING_SIZE = 100
+
+# Seconds to wait for a transaction fetch, and times a failed fetch is retried
+FETCH_TX_TIMEOUT_SEC = 45
+FETCH_TX_RETRIES = 10
+
+# Signature, transaction info and seconds it took to fetch
+FetchedTransaction = Tuple[str, ConfirmedTransaction, float]
+
+
+class CrawlCheckpoint(TypedDict):
+    # Latest transaction processed for the program
+    signature: Optional[str]
+    slot: Optional[int]
+    # Signatures to walk back from to process the newer pages of a backfill
+    # which did not fit in a crawl, oldest page first
+    cursors: List[str]
+
+
+class SignatureCrawlHandler(ABC):
+    """Indexes the transactions of a program for the SolanaSignatureCrawler"""
+
+    # Label of the handler in logs and in the redis key of its checkpoint
+    label: str
+    # Address of the program whose signatures are walked
+    program: str
+    # Redis keys of the latest transaction on chain and processed, for health checks
+    program_tx_key: str
+    db_tx_key: str
+    # Redis key of the latest slot processed, if tracked
+    slot_key: Optional[str] = None
+    # Transactions at or below this slot are not indexed
+    min_slot: Optional[int] = None
+
+    def is_enabled(self) -> bool:
+        """Returns whether the program is configured"""
+        return True
+
+    @abstractmethod
+    def get_latest_slot(self, session: Session) -> Optional[int]:
+        """
+        Returns the highest slot processed in the DB, or None to only process
+        the latest page of transactions when there is no checkpoint yet
+        """
+        raise Exception("Must be implemented in subclass")
+
+    @abstractmethod
+    def is_tx_in_db(self, session: Session, tx_sig: str) -> bool:
+        """Returns whether a transaction at or below the latest slot was processed"""
+        raise Exception("Must be implemented in subclass")
+
+    @abstractmethod
+    def process_batch(
+        self,
+        tx_sig_batch_records: List[ConfirmedSignatureForAddressResult],
+        fetched_txs: List[FetchedTransaction],
+    ):
+        """
+        Indexes a batch of transactions. The records and their fetched
+        transactions are in time DESC order, as returned from chain
+        """
+        raise Exception("Must be implemented in subclass")
+
+
+# Transaction fetches of a process run on a shared executor, see
+# get_tx_fetch_executor
+tx_fetch_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+tx_fetch_executor_pid: Optional[int] = None
+tx_fetch_executor_lock = threading.Lock()
+
+
+def get_max_in_flight_fetches() -> int:
+    return max(
+        shared_config["solana"].getint("max_in_flight_tx_fetches", fallback=32), 1
+    )
+
+
+def get_tx_fetch_executor() -> concurrent.futures.ThreadPoolExecutor:
+    # pylint: disable=W0603
+    global tx_fetch_executor, tx_fetch_executor_pid
+    # Threads do not survive a fork, so each worker process creates its own
+    with tx_fetch_executor_lock:
+        if tx_fetch_executor is None or tx_fetch_executor_pid != os.getpid():
+            tx_fetch_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=get_max_in_flight_fetches(),
+                thread_name_prefix="solana-tx-fetch",
+            )
+            tx_fetch_executor_pid = os.getpid()
+        return tx_fetch_executor
+
+
+def fetch_transaction_batch(
+    solana_client_manager: SolanaClientManager, tx_sigs: List[str]
+) -> Tuple[List[ConfirmedTransaction], float]:
+    """Returns the transaction infos of tx_sigs and the seconds it took to fetch"""
+    fetch_start_time = time.time()
+    tx_infos = solana_client_manager.get_sol_tx_infos(tx_sigs)
+    return tx_infos, time.time() - fetch_start_time
+
+
+def fetch_transactions(
+    solana_client_manager: SolanaClientManager, tx_sigs: List[str]
+) -> Iterator[FetchedTransaction]:
+    """
+    Yields the transaction info of tx_sigs and the seconds each took to fetch,
+    in the order of tx_sigs. Transactions are fetched in JSON-RPC batches of
+    rpc_batch_size that run ahead of the consumer on the shared executor, with
+    at most max_in_flight_tx_fetches transactions in flight, so the next batch
+    is fetched while the current one is written.
+    """
+    executor = get_tx_fetch_executor()
+    batch_size = get_rpc_batch_size()
+    max_in_flight_batches = max(get_max_in_flight_fetches() // batch_size, 1)
+    pending: deque = deque()
+    tx_sig_batches = iter(split_list(tx_sigs, batch_size))
+
+    def submit_next():
+        tx_sig_batch = next(tx_sig_batches, None)
+        if tx_sig_batch is not None:
+            pending.append(
+                (
+                    tx_sig_batch,
+                    executor.submit(
+                        fetch_transaction_batch, solana_client_manager, tx_sig_batch
+                    ),
+                )
+            )
+
+    try:
+        for _ in range(max_in_flight_batches):
+            submit_next()
+        while pending:
+            tx_sig_batch, future = pending.popleft()
+            retries = FETCH_TX_RETRIES
+            while True:
+                try:
+                    tx_infos, fetch_time = future.result(timeout=FETCH_TX_TIMEOUT_SEC)
+                    break
+                except Exception as e:
+                    if retries <= 0:
+                        raise e
+                    logger.warning(
+                        f"solana_signature_crawler.py | Retrying fetch of {tx_sig_batch}, {e}"
+                    )
+                    retries -= 1
+                    future = executor.submit(
+                        fetch_transaction_batch, solana_client_manager, tx_sig_batch
+                    )
+            submit_next()
+            for tx_sig, tx_info in zip(tx_sig_batch, tx_infos):
+                yield tx_sig, tx_info, fetch_time
+    finally:
+        # Fetches not yet started are dropped if the consumer stops or fails
+        for _, future in pending:
+            future.cancel()
+
+
+def iter_signature_pages(
+    solana_client_manager: SolanaClientManager,
+    program: str,
+    before: Optional[str] = None,
+) -> Iterator[Tuple[Optional[str], List[ConfirmedSignatureForAddressResult]]]:
+    """
+    Yields the pages of signatures of program walking back from before, or
+    from the chain tail, with the before signature each page was fetched with
+    """
+    while True:
+        transactions_history = solana_client_manager.get_signatures_for_address(
+            program, before=before, limit=FETCH_TX_SIGNATURES_BATCH_SIZE
+        )
+        transactions_array = transactions_history["result"]
+        if not transactions_array:
+            # End of known history for this program
+            return
+        yield before, transactions_array
+        before = transactions_array[-1]["signature"]
+
+
+def get_checkpoint_key(handler: SignatureCrawlHandler) -> str:
+    return f"solana_signature_crawler:checkpoint:{handler.label}"
+
+
+class SolanaSignatureCrawler:
+    """Walks, fetches and dispatches the transactions of the programs of handlers"""
+
+    def __init__(
+        self,
+        solana_client_manager: SolanaClientManager,
+        db: SessionManager,
+        redis: Redis,
+        handlers: List[SignatureCrawlHandler],
+    ):
+        self.solana_client_manager = solana_client_manager
+        self.db = db
+        self.redis = redis
+        self.handlers = handlers
+
+    def get_checkpoint(
+        self, handler: SignatureCrawlHandler
+    ) -> Optional[CrawlCheckpoint]:
+        checkpoint = self.redis.get(get_checkpoint_key(handler))
+        return json.loads(checkpoint) if checkpoint else None
+
+    def save_checkpoint(
+        self, handler: SignatureCrawlHandler, checkpoint: CrawlCheckpoint
+    ):
+        self.redis.set(get_checkpoint_key(handler), json.dumps(checkpoint))
+
+    def cache_latest_program_txs(self):
+        """Caches the latest transaction on chain of each program"""
+        for handler in self.handlers:
+            for _, transactions_array in iter_signature_pages(
+                self.solana_client_manager, handler.program
+            ):
+                cache_latest_sol_play_program_tx(
+                    self.redis,
+                    handler.program,
+                    handler.program_tx_key,
+                    transactions_array[0],
+                )
+                break
+
+    def walk_signatures(
+        self, handler: SignatureCrawlHandler, checkpoint: Optional[CrawlCheckpoint]
+    ) -> Tuple[List[List[ConfirmedSignatureForAddressResult]], List[str]]:
+        """
+        Walks the signatures of the program of handler back to the intersection
+        with the transactions already processed
+
+        Returns the pages of signatures to process, oldest page first and each
+        in time DESC order, and the cursors of the checkpoint. A walk keeps at
+        most TX_SIGNATURES_MAX_BATCHES pages. Past that, the oldest
+        TX_SIGNATURES_RESIZE_LENGTH pages are kept and the signatures the newer
+        pages were fetched before are saved as cursors, so the following crawls
+        resume the backfill from a cursor rather than from the chain tail.
+        """
+        cursors = list(checkpoint["cursors"]) if checkpoint else []
+        before = None
+        if cursors:
+            num_cursors = min(len(cursors), TX_SIGNATURES_RESIZE_LENGTH)
+            before = cursors[num_cursors - 1]
+            cursors = cursors[num_cursors:]
+        checkpoint_signature = checkpoint["signature"] if checkpoint else None
+        checkpoint_slot = checkpoint["slot"] if checkpoint else None
+
+        # Pages of signatures to process and the before each was fetched with,
+        # newest first
+        pages: List[List[ConfirmedSignatureForAddressResult]] = []
+        befores: List[Optional[str]] = []
+        with self.db.scoped_session() as session:
+            latest_processed_slot = handler.get_latest_slot(session)
+
+            def is_processed(tx: ConfirmedSignatureForAddressResult) -> bool:
+                if tx["signature"] == checkpoint_signature or (
+                    checkpoint_slot is not None and tx["slot"] < checkpoint_slot
+                ):
+                    return True
+                if handler.min_slot is not None and tx["slot"] <= handler.min_slot:
+                    return True
+                if latest_processed_slot is None or tx["slot"] > latest_processed_slot:
+                    return False
+                # Check the tx signature for any txs in the latest slot,
+                # and if not present in DB, add to processing
+                return handler.is_tx_in_db(session, tx["signature"])
+
+            for page_count, (page_before, transactions_array) in enumerate(
+                iter_signature_pages(
+                    self.solana_client_manager, handler.program, before
+                )
+            ):
+                if page_count == 0 and page_before is None:
+                    cache_latest_sol_play_program_tx(
+                        self.redis,
+                        handler.program,
+                        handler.program_tx_key,
+                        transactions_array[0],
+                    )
+                intersection_found = False
+                page = []
+                for tx in transactions_array:
+                    if is_processed(tx):
+                        # Transactions are returned with most recently committed first, so we can assume
+                        # subsequent transactions have already been processed
+                        intersection_found = True
+                        break
+                    page.append(tx)
+                if page:
+                    pages.append(page)
+                    befores.append(page_before)
+                if intersection_found:
+                    break
+                if latest_processed_slot is None and checkpoint_signature is None:
+                    # Nothing processed yet, start from the current tail
+                    break
+
+                # Ensure processing does not grow unbounded
+                if len(pages) > TX_SIGNATURES_MAX_BATCHES:
+                    num_dropped = len(pages) - TX_SIGNATURES_RESIZE_LENGTH
+                    logger.info(
+                        f"solana_signature_crawler.py | {handler.label} | Deferring {num_dropped} newer pages of {len(pages)}"
+                    )
+                    cursors = [
+                        page_before
+                        for page_before in reversed(befores[:num_dropped])
+                        if page_before is not None
+                    ] + cursors
+                    pages = pages[num_dropped:]
+                    befores = befores[num_dropped:]
+
+        pages.reverse()
+        return pages, cursors
+
+    def crawl(self):
+        """Processes the new transactions of the programs of all handlers"""
+        # Get the latest slot available globally before fetching txs to keep track of indexing progress
+        latest_global_slot = None
+        try:
+            latest_global_slot = self.solana_client_manager.get_slot()
+        except Exception:
+            logger.error("solana_signature_crawler.py | Failed to get slot")
+
+        walks = []
+        # Number of remaining handlers each transaction is dispatched to
+        tx_sig_uses: Counter = Counter()
+        for handler in self.handlers:
+            checkpoint = self.get_checkpoint(handler)
+            pages, cursors = self.walk_signatures(handler, checkpoint)
+            walks.append((handler, checkpoint, pages, cursors))
+            tx_sig_uses.update(tx["signature"] for page in pages for tx in page)
+            logger.info(
+                f"solana_signature_crawler.py | {handler.label} | {sum(len(page) for page in pages)} transactions to process in {len(pages)} pages"
+            )
+
+        # Transactions of several programs are fetched once and kept for the
+        # following handlers
+        fetched_txs: Dict[str, FetchedTransaction] = {}
+        handler_error = None
+        for handler, checkpoint, pages, cursors in walks:
+            try:
+                self.process_pages(
+                    handler,
+                    checkpoint,
+                    pages,
+                    cursors,
+                    fetched_txs,
+                    tx_sig_uses,
+                    latest_global_slot,
+                )
+            except Exception as e:
+                # A failing program does not hold back the others
+                logger.error(
+                    f"solana_signature_crawler.py | {handler.label} | Error processing transactions, {e}",
+                    exc_info=True,
+                )
+                handler_error = e
+            for page in pages:
+                for tx in page:
+                    tx_sig = tx["signature"]
+                    tx_sig_uses[tx_sig] -= 1
+                    if tx_sig_uses[tx_sig] <= 0:
+                        fetched_txs.pop(tx_sig, None)
+        if handler_error:
+            raise handler_error
+
+    def process_pages(
+        self,
+        handler: SignatureCrawlHandler,
+        checkpoint: Optional[CrawlCheckpoint],
+        pages: List[List[ConfirmedSignatureForAddressResult]],
+        cursors: List[str],
+        fetched_txs: Dict[str, FetchedTransaction],
+        tx_sig_uses: Counter,
+        latest_global_slot: Optional[int],
+    ):
+        # Batches of each page are in time DESC order too, so they are
+        # processed in reverse for the oldest to be processed first
+        batches = [
+            tx_sig_batch_records
+            for page in pages
+            for tx_sig_batch_records in reversed(
+                list(split_list(page, TX_SIGNATURES_PROCESSING_SIZE))
+            )
+        ]
+        new_checkpoint: CrawlCheckpoint = {
+            "signature": checkpoint["signature"] if checkpoint else None,
+            "slot": checkpoint["slot"] if checkpoint else None,
+            "cursors": cursors,
+        }
+        # Batches are processed in order, while the transactions of the
+        # following batches are fetched
+        fetched = fetch_transactions(
+            self.solana_client_manager,
+            [
+                tx["signature"]
+                for tx_sig_batch_records in batches
+                for tx in tx_sig_batch_records
+                if tx["signature"] not in fetched_txs
+            ],
+        )
+        try:
+            for tx_sig_batch_records in batches:
+                batch_txs = []
+                for tx in tx_sig_batch_records:
+                    fetched_tx = fetched_txs.get(tx["signature"])
+                    if fetched_tx is None:
+                        fetched_tx = next(fetched)
+                        if tx_sig_uses[tx["signature"]] > 1:
+                            fetched_txs[tx["signature"]] = fetched_tx
+                    batch_txs.append(fetched_tx)
+                handler.process_batch(tx_sig_batch_records, batch_txs)
+
+                latest_tx = tx_sig_batch_records[0]
+                new_checkpoint["signature"] = latest_tx["signature"]
+                new_checkpoint["slot"] = latest_tx["slot"]
+                self.save_checkpoint(handler, new_checkpoint)
+                cache_latest_sol_db_tx(
+                    self.redis,
+                    handler.db_tx_key,
+                    {
+                        "signature": latest_tx["signature"],
+                        "slot": latest_tx["slot"],
+                        "timestamp": latest_tx["blockTime"],
+                    },
+                )
+        finally:
+            fetched.close()
+
+        if not batches and cursors != (checkpoint["cursors"] if checkpoint else []):
+            self.save_checkpoint(handler, new_checkpoint)
+        if handler.slot_key:
+            if batches:
+                self.redis.set(handler.slot_key, batches[-1][0]["slot"])
+            elif latest_global_slot is not None:
+                self.redis.set(handler.slot_key, latest_global_slot)
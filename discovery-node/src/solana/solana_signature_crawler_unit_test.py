@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+
+import pytest
+from src.solana import solana_signature_crawler
+from src.solana.solana_signature_crawler import (
+    SignatureCrawlHandler,
+    SolanaSignatureCrawler,
+    fetch_transactions,
+)
+
+
+class MockSolanaClientManager:
+    """Serves the signatures of programs, newest first, and their transactions"""
+
+    def __init__(self, program_signatures, num_failures=0):
+        self.program_signatures = program_signatures
+        self.num_failures = num_failures
+        self.fetched = []
+
+    def get_slot(self):
+        return 1000
+
+    def get_signatures_for_address(self, program, before=None, limit=None):
+        signatures = self.program_signatures[program]
+        start = 0
+        if before is not None:
+            start = [tx["signature"] for tx in signatures].index(before) + 1
+        return {"result": signatures[start : start + limit]}
+
+    def get_sol_tx_info(self, tx_sig):
+        if tx_sig == "fails" and self.num_failures > 0:
+            self.num_failures -= 1
+            raise Exception("rpc error")
+        self.fetched.append(tx_sig)
+        return {"result": tx_sig}
+
+    def get_sol_tx_infos(self, tx_sigs):
+        return [self.get_sol_tx_info(tx_sig) for tx_sig in tx_sigs]
+
+
+class MockSessionManager:
+    @contextmanager
+    def scoped_session(self):
+        yield None
+
+
+class MockHandler(SignatureCrawlHandler):
+    def __init__(self, label, program, latest_slot, fails=False):
+        self.label = label
+        self.program = program
+        self.program_tx_key = f"{label}:chain"
+        self.db_tx_key = f"{label}:db"
+        self.latest_slot = latest_slot
+        self.fails = fails
+        self.batches = []
+
+    def get_latest_slot(self, session):
+        return self.latest_slot
+
+    def is_tx_in_db(self, session, tx_sig):
+        return True
+
+    def process_batch(self, tx_sig_batch_records, fetched_txs):
+        if self.fails:
+            raise Exception("handler error")
+        assert [tx["signature"] for tx in tx_sig_batch_records] == [
+            tx_sig for tx_sig, _, _ in fetched_txs
+        ]
+        self.batches.append([tx_sig for tx_sig, _, _ in fetched_txs])
+
+
+def make_signatures(prefix, slots):
+    return [
+        {"signature": f"{prefix}{slot}", "slot": slot, "blockTime": slot}
+        for slot in sorted(slots, reverse=True)
+    ]
+
+
+def test_fetch_transactions(monkeypatch):
+    monkeypatch.setattr(
+        solana_signature_crawler, "get_max_in_flight_fetches", lambda: 4
+    )
+    monkeypatch.setattr(solana_signature_crawler, "get_rpc_batch_size", lambda: 2)
+    tx_sigs = ["a", "b", "fails", "c", "d"]
+
+    fetched = list(fetch_transactions(MockSolanaClientManager({}, 2), tx_sigs))
+    # Yielded in order, with failed batches retried
+    assert [tx_sig for tx_sig, _, _ in fetched] == tx_sigs
+    assert [tx_info["result"] for _, tx_info, _ in fetched] == tx_sigs
+
+    monkeypatch.setattr(solana_signature_crawler, "FETCH_TX_RETRIES", 1)
+    fetched_txs = fetch_transactions(MockSolanaClientManager({}, 2), tx_sigs)
+    assert [next(fetched_txs)[0] for _ in range(2)] == ["a", "b"]
+    with pytest.raises(Exception, match="rpc error"):
+        next(fetched_txs)
+
+
+def test_crawl_checkpoints(redis_mock, monkeypatch):
+    monkeypatch.setattr(solana_signature_crawler, "FETCH_TX_SIGNATURES_BATCH_SIZE", 4)
+    monkeypatch.setattr(solana_signature_crawler, "TX_SIGNATURES_PROCESSING_SIZE", 2)
+    client = MockSolanaClientManager({"program": make_signatures("sig", range(1, 9))})
+    handler = MockHandler("handler", "program", 4)
+    crawler = SolanaSignatureCrawler(
+        client, MockSessionManager(), redis_mock, [handler]
+    )
+
+    # Without a checkpoint, the walk stops at the latest slot in the DB
+    crawler.crawl()
+    assert handler.batches == [["sig6", "sig5"], ["sig8", "sig7"]]
+    assert crawler.get_checkpoint(handler) == {
+        "signature": "sig8",
+        "slot": 8,
+        "cursors": [],
+    }
+    assert redis_mock.get("handler:chain") is not None
+
+    # The checkpoint is the intersection of the following walks
+    handler.batches = []
+    handler.latest_slot = 0
+    client.program_signatures["program"] = make_signatures("sig", range(1, 11))
+    crawler.crawl()
+    assert handler.batches == [["sig10", "sig9"]]
+    assert crawler.get_checkpoint(handler)["signature"] == "sig10"
+
+
+def test_crawl_resumes_backfill(redis_mock, monkeypatch):
+    monkeypatch.setattr(solana_signature_crawler, "FETCH_TX_SIGNATURES_BATCH_SIZE", 2)
+    monkeypatch.setattr(solana_signature_crawler, "TX_SIGNATURES_MAX_BATCHES", 2)
+    monkeypatch.setattr(solana_signature_crawler, "TX_SIGNATURES_RESIZE_LENGTH", 1)
+    client = MockSolanaClientManager({"program": make_signatures("sig", range(1, 9))})
+    handler = MockHandler("handler", "program", 0)
+    crawler = SolanaSignatureCrawler(
+        client, MockSessionManager(), redis_mock, [handler]
+    )
+
+    # The oldest pages are processed first, and the newer ones deferred to
+    # the following crawls, which walk back from a cursor
+    for _ in range(4):
+        crawler.crawl()
+    assert handler.batches == [
+        ["sig2", "sig1"],
+        ["sig4", "sig3"],
+        ["sig6", "sig5"],
+        ["sig8", "sig7"],
+    ]
+    assert crawler.get_checkpoint(handler)["cursors"] == []
+    assert len(client.fetched) == 8
+
+
+def test_crawl_fetches_transactions_once(redis_mock):
+    client = MockSolanaClientManager(
+        {
+            "program_a": make_signatures("sig", [1, 2, 3]),
+            "program_b": make_signatures("sig", [2, 3, 4]),
+        }
+    )
+    failing_handler = MockHandler("failing", "program_a", 0, fails=True)
+    handler_a = MockHandler("handler_a", "program_a", 0)
+    handler_b = MockHandler("handler_b", "program_b", 0)
+    crawler = SolanaSignatureCrawler(
+        client,
+        MockSessionManager(),
+        redis_mock,
+        [failing_handler, handler_a, handler_b],
+    )
+
+    # A failing handler does not hold back the others
+    with pytest.raises(Exception, match="handler error"):
+        crawler.crawl()
+    assert handler_a.batches == [["sig3", "sig2", "sig1"]]
+    assert handler_b.batches == [["sig4", "sig3", "sig2"]]
+    assert sorted(client.fetched) == ["sig1", "sig2", "sig3", "sig4"]
+    assert crawler.get_checkpoint(failing_handler) is None
@@ -3,10 +3,7 @@ import time
 from typing import Dict, List, Optional, Set, Tuple, TypedDict
 
 from redis import Redis
-from solana.keypair import Keypair
 from solana.publickey import PublicKey
-from solana.rpc.api import Client
-from spl.token.client import Token
 from sqlalchemy import and_
 from sqlalchemy.orm.session import Session
 from src.app import get_eth_abi_values
@@ -20,6 +17,7 @@ from src.queries.get_balances import (
     LAZY_REFRESH_REDIS_PREFIX,
     does_user_balance_need_refresh,
 )
+from src.solana.solana_client_manager import SolanaClientManager
 from src.solana.solana_helpers import ASSOCIATED_TOKEN_PROGRAM_ID_PK, SPL_TOKEN_ID_PK
 from src.tasks.celery_app import celery
 from src.utils.config import shared_config
@@ -27,6 +25,7 @@ from src.utils.prometheus_metric import save_duration_metric
 from src.utils.redis_constants import user_balances_refresh_last_completion_redis_key
 from src.utils.session_manager import SessionManager
 from src.utils.spl_digitalcoin import to_wei
+from src.utils.web3_batch_client import Web3BatchClient
 
 logger = logging.getLogger(__name__)
 coliving_token_registry_key = bytes("Token", "utf-8")
@@ -75,6 +74,160 @@ def get_immediate_refresh_user_ids(redis: Redis) -> List[int]:
     return [int(user_id.decode()) for user_id in redis_user_ids]
 
 
+def get_eth_balances(
+    eth_web3,
+    eth_batch_client: Web3BatchClient,
+    token_contract,
+    delegate_manager_contract,
+    staking_contract,
+    user_id_metadata: Dict[int, UserWalletMetadata],
+    block_number: int,
+) -> Dict[int, Tuple[int, int]]:
+    """
+    Returns the owner wallet balance and the associated eth wallets balance,
+    tokens delegated and staked included, of each user. All contract reads are
+    sent as eth_call batches at block_number.
+    """
+    contract_functions = []
+    # mapping of user_id => range of the user's reads in contract_functions
+    user_id_reads: Dict[int, Tuple[int, int]] = {}
+    for user_id, wallets in user_id_metadata.items():
+        try:
+            owner_wallet = eth_web3.toChecksumAddress(wallets["owner_wallet"])
+            associated_wallets = [
+                eth_web3.toChecksumAddress(wallet)
+                for wallet in wallets["associated_wallets"]["eth"]
+            ]
+        except Exception as e:
+            logger.error(
+                f"cache_user_balance.py | Error reading eth wallets for user {user_id}: {(e)}"
+            )
+            continue
+        start = len(contract_functions)
+        contract_functions.append(token_contract.functions.balanceOf(owner_wallet))
+        for wallet in associated_wallets:
+            contract_functions.extend(
+                [
+                    token_contract.functions.balanceOf(wallet),
+                    delegate_manager_contract.functions.getTotalDelegatorStake(wallet),
+                    staking_contract.functions.totalStakedFor(wallet),
+                ]
+            )
+        user_id_reads[user_id] = (start, len(contract_functions))
+
+    # Failed reads only skip their user, errors sending the batches fail the cycle
+    outputs = eth_batch_client.call_contract_functions(
+        contract_functions, block_number, return_exceptions=True
+    )
+    eth_balances: Dict[int, Tuple[int, int]] = {}
+    for user_id, (start, end) in user_id_reads.items():
+        errors = [
+            output for output in outputs[start:end] if isinstance(output, Exception)
+        ]
+        if errors:
+            logger.error(
+                f"cache_user_balance.py | Error reading eth balances for user {user_id}: {errors[0]}"
+            )
+            continue
+        eth_balances[user_id] = (outputs[start], sum(outputs[start + 1 : end]))
+    return eth_balances
+
+
+def get_token_account_amount(account_info: Optional[Dict]) -> str:
+    """Returns the amount held by a jsonParsed SPL token account"""
+    if account_info is None:
+        raise Exception("Token account does not exist")
+    return account_info["data"]["parsed"]["info"]["tokenAmount"]["amount"]
+
+
+def get_sol_balances(
+    solana_client_manager: SolanaClientManager,
+    user_id_metadata: Dict[int, UserWalletMetadata],
+) -> Dict[int, Tuple[Optional[str], int]]:
+    """
+    Returns the user bank balance, None if it could not be read, and the
+    associated sol wallets balance of each user with sol accounts. All token
+    accounts are looked up with getMultipleAccounts requests.
+    """
+    if WDGC_MINT_PUBKEY is None:
+        if any(wallets["bank_account"] for wallets in user_id_metadata.values()):
+            logger.error("cache_user_balance.py | Missing Required SPL Confirguration")
+        return {}
+
+    accounts: List[PublicKey] = []
+    # mapping of user_id => index of the bank account and associated accounts
+    user_id_accounts: Dict[int, Tuple[Optional[int], List[Tuple[str, int]]]] = {}
+    # users with a user bank that is not a valid account
+    invalid_bank_account_user_ids: Set[int] = set()
+    for user_id, wallets in user_id_metadata.items():
+        bank_account_index = None
+        if wallets["bank_account"] is not None:
+            try:
+                bank_account = PublicKey(wallets["bank_account"])
+                bank_account_index = len(accounts)
+                accounts.append(bank_account)
+            except Exception as e:
+                logger.error(
+                    f"cache_user_balance.py | Invalid user bank for user {user_id}: {(e)}"
+                )
+                invalid_bank_account_user_ids.add(user_id)
+        associated_accounts = []
+        for wallet in wallets["associated_wallets"]["sol"]:
+            try:
+                root_sol_account = PublicKey(wallet)
+                derived_account, _ = PublicKey.find_program_address(
+                    [
+                        bytes(root_sol_account),
+                        bytes(SPL_TOKEN_ID_PK),
+                        bytes(WDGC_MINT_PUBKEY),
+                    ],
+                    ASSOCIATED_TOKEN_PROGRAM_ID_PK,
+                )
+            except Exception as e:
+                logger.error(
+                    f"cache_user_balance.py | Error deriving token account for user {user_id}, wallet {wallet}: {(e)}"
+                )
+                continue
+            associated_accounts.append((wallet, len(accounts)))
+            accounts.append(derived_account)
+        if bank_account_index is not None or associated_accounts:
+            user_id_accounts[user_id] = (bank_account_index, associated_accounts)
+
+    sol_balances: Dict[int, Tuple[Optional[str], int]] = {
+        user_id: (None, 0) for user_id in invalid_bank_account_user_ids
+    }
+    if not accounts:
+        return sol_balances
+    account_infos = solana_client_manager.get_multiple_accounts(accounts)
+
+    for user_id, (bank_account_index, associated_accounts) in user_id_accounts.items():
+        wei_digitalcoin_balance: Optional[str] = "0"
+        if user_id in invalid_bank_account_user_ids:
+            wei_digitalcoin_balance = None
+        elif bank_account_index is not None:
+            try:
+                wei_digitalcoin_balance = get_token_account_amount(
+                    account_infos[bank_account_index]
+                )
+            except Exception as e:
+                logger.error(
+                    f"cache_user_balance.py | Error fetching user bank balance for user {user_id}: {(e)}"
+                )
+                wei_digitalcoin_balance = None
+        associated_sol_balance = 0
+        for wallet, index in associated_accounts:
+            try:
+                associated_sol_balance += int(
+                    get_token_account_amount(account_infos[index])
+                )
+            except Exception as e:
+                logger.error(
+                    f"cache_user_balance.py | Error fetching associated wallet balance for user {user_id}, wallet {wallet}: {(e)}"
+                )
+        sol_balances[user_id] = (wei_digitalcoin_balance, associated_sol_balance)
+    return sol_balances
+
+
 # *Explanation of user balance caching*
 # In an effort to minimize eth calls, we look up users embedded in digital content metadata once per user,
 # and current users (logged in dapp users, who might be changing their balance) on an interval.
@@ -107,7 +260,7 @@ def refresh_user_ids(
     delegate_manager_contract,
     staking_contract,
     eth_web3,
-    wei_digitalcoin_token,
+    solana_client_manager: SolanaClientManager,
 ):
     with db.scoped_session() as session:
         lazy_refresh_user_ids = get_lazy_refresh_user_ids(redis, session)[
@@ -209,78 +362,32 @@ def refresh_user_ids(
             f"cache_user_balance.py | fetching for {len(user_associated_wallet_query)} users: {user_ids}"
         )
 
+        # Fetch balances, with a handful of batched requests for all users
+        block_number = eth_web3.eth.block_number
+        eth_balances = get_eth_balances(
+            eth_web3,
+            Web3BatchClient(eth_web3.provider),
+            token_contract,
+            delegate_manager_contract,
+            staking_contract,
+            user_id_metadata,
+            block_number,
+        )
+        sol_balances = get_sol_balances(solana_client_manager, user_id_metadata)
+
         # mapping of user_id => balance change
         needs_balance_change_update: Dict[int, Dict] = {}
 
-        # Fetch balances
-        # pylint: disable=too-many-nested-blocks
-        for user_id, wallets in user_id_metadata.items():
+        for user_id in user_id_metadata:
             try:
-                owner_wallet = wallets["owner_wallet"]
-                owner_wallet = eth_web3.toChecksumAddress(owner_wallet)
-                owner_wallet_balance = token_contract.functions.balanceOf(
-                    owner_wallet
-                ).call()
-                associated_balance = 0
-                wei_digitalcoin_balance: str = "0"
-                associated_sol_balance = 0
-
-                if "associated_wallets" in wallets:
-                    for wallet in wallets["associated_wallets"]["eth"]:
-                        wallet = eth_web3.toChecksumAddress(wallet)
-                        balance = token_contract.functions.balanceOf(wallet).call()
-                        delegation_balance = (
-                            delegate_manager_contract.functions.getTotalDelegatorStake(
-                                wallet
-                            ).call()
-                        )
-                        stake_balance = staking_contract.functions.totalStakedFor(
-                            wallet
-                        ).call()
-                        associated_balance += (
-                            balance + delegation_balance + stake_balance
-                        )
-                    if wei_digitalcoin_token is not None:
-                        for wallet in wallets["associated_wallets"]["sol"]:
-                            try:
-                                root_sol_account = PublicKey(wallet)
-                                derived_account, _ = PublicKey.find_program_address(
-                                    [
-                                        bytes(root_sol_account),
-                                        bytes(SPL_TOKEN_ID_PK),
-                                        bytes(WDGC_MINT_PUBKEY),  # type: ignore
-                                    ],
-                                    ASSOCIATED_TOKEN_PROGRAM_ID_PK,
-                                )
-
-                                bal_info = wei_digitalcoin_token.get_balance(derived_account)
-                                associated_wei_digitalcoin_balance: str = bal_info["result"][
-                                    "value"
-                                ]["amount"]
-                                associated_sol_balance += int(associated_wei_digitalcoin_balance)
-                            except Exception as e:
-                                logger.error(
-                                    " ".join(
-                                        [
-                                            "cache_user_balance.py | Error fetching associated ",
-                                            "wallet balance for user %s, wallet %s: %s",
-                                        ]
-                                    ),
-                                    user_id,
-                                    wallet,
-                                    e,
-                                )
-
-                if wallets["bank_account"] is not None:
-                    if wei_digitalcoin_token is None:
-                        logger.error(
-                            "cache_user_balance.py | Missing Required SPL Confirguration"
-                        )
-                    else:
-                        bal_info = wei_digitalcoin_token.get_balance(
-                            PublicKey(wallets["bank_account"])
-                        )
-                        wei_digitalcoin_balance = bal_info["result"]["value"]["amount"]
+                if user_id not in eth_balances:
+                    raise Exception("Missing eth balances")
+                owner_wallet_balance, associated_balance = eth_balances[user_id]
+                wei_digitalcoin_balance, associated_sol_balance = sol_balances.get(
+                    user_id, ("0", 0)
+                )
+                if wei_digitalcoin_balance is None:
+                    raise Exception("Missing user bank balance")
 
                 # update the balance on the user model
                 user_balance = user_balances[user_id]
@@ -312,7 +419,7 @@ def refresh_user_ids(
                 # Write to user_balance_changes table
                 needs_balance_change_update[user_id] = {
                     "user_id": user_id,
-                    "blocknumber": eth_web3.eth.block_number,
+                    "blocknumber": block_number,
                     "current_balance": str(current_total_balance),
                     "previous_balance": str(prev_total_balance),
                 }
@@ -447,22 +554,6 @@ def get_staking_contract(eth_web3):
     return staking_instance
 
 
-SPL_TOKEN_PROGRAM_ID_PUBKEY = PublicKey("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
-
-
-def get_digitalcoin_token(solana_client: Client):
-    if WDGC_MINT_PUBKEY is None:
-        logger.error("cache_user_balance.py | Missing Required SPL Confirguration")
-        return None
-    wei_digitalcoin_token = Token(
-        conn=solana_client,
-        pubkey=WDGC_MINT_PUBKEY,
-        program_id=SPL_TOKEN_PROGRAM_ID_PUBKEY,
-        payer=Keypair.generate(),  # not making any txs so payer is not required
-    )
-    return wei_digitalcoin_token
-
-
 @celery.task(name="update_user_balances", bind=True)
 @save_duration_metric(metric_group="celery_task")
 def update_user_balances_task(self):
@@ -487,7 +578,6 @@ def update_user_balances_task(self):
             token_inst = get_token_contract(
                 eth_web3, update_user_balances_task.shared_config
             )
-            wei_digitalcoin_token = get_digitalcoin_token(solana_client_manager.get_client())
             refresh_user_ids(
                 redis,
                 db,
@@ -495,7 +585,7 @@ def update_user_balances_task(self):
                 delegate_manager_inst,
                 staking_inst,
                 eth_web3,
-                wei_digitalcoin_token,
+                solana_client_manager,
             )
 
             end_time = time.time()
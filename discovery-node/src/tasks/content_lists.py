@@ -8,6 +8,8 @@ from src.database_task import DatabaseTask
 from src.models.content_lists.content_list import ContentList
 from src.queries.skipped_transactions import add_node_level_skipped_transaction
 from src.utils import helpers
+from src.utils.block_write_buffer import add_record, invalidate_record
+from src.utils.event_log_decoder import get_contract_events
 from src.utils.indexing_errors import EntityMissingRequiredFieldError, IndexingError
 from src.utils.model_nullable_validator import all_required_fields_present
 from src.utils.content_list_event_constants import (
@@ -41,12 +43,31 @@ def content_list_state_update(
         return num_total_changes, content_list_ids
 
     content_list_events_lookup: Dict[int, Dict[str, Any]] = {}
-    for tx_receipt in content_list_factory_txs:
+
+    # Decode all events first so every contentList in the block is loaded in one query
+    events_by_tx = [
+        {
+            event_type: get_content_list_events_tx(update_task, event_type, tx_receipt)
+            for event_type in content_list_event_types_arr
+        }
+        for tx_receipt in content_list_factory_txs
+    ]
+    existing_content_list_records = helpers.get_current_records_by_id(
+        session,
+        ContentList,
+        ContentList.content_list_id,
+        [
+            helpers.get_tx_arg(entry, "_contentListId")
+            for tx_events in events_by_tx
+            for entries in tx_events.values()
+            for entry in entries
+        ],
+    )
+
+    for tx_receipt, tx_events in zip(content_list_factory_txs, events_by_tx):
         txhash = update_task.web3.toHex(tx_receipt.transactionHash)
         for event_type in content_list_event_types_arr:
-            content_list_events_tx = get_content_list_events_tx(
-                update_task, event_type, tx_receipt
-            )
+            content_list_events_tx = tx_events[event_type]
             processedEntries = 0  # if record does not get added, do not count towards num_total_changes
             for entry in content_list_events_tx:
                 existing_content_list_record = None
@@ -59,7 +80,12 @@ def content_list_state_update(
                         ]
                     else:
                         existing_content_list_record = lookup_content_list_record(
-                            update_task, session, entry, block_number, txhash
+                            update_task,
+                            session,
+                            entry,
+                            block_number,
+                            txhash,
+                            existing_content_list_records,
                         )
 
                     # parse contentList event to add metadata to record
@@ -106,10 +132,10 @@ def content_list_state_update(
     )
 
     for content_list_id, value_obj in content_list_events_lookup.items():
-        logger.info(f"index.py | contentLists.py | Adding {value_obj['contentList']})")
+        logger.info(f"index.py | contentLists.py | Adding {value_obj['content_list']})")
         if value_obj["events"]:
-            invalidate_old_content_list(session, content_list_id)
-            session.add(value_obj["content_list"])
+            invalidate_record(session, ContentList, content_list_id=content_list_id)
+            add_record(session, value_obj["content_list"])
             if (
                 content_list_event_types_lookup["content_list_digital_content_added"]
                 in value_obj["events"]
@@ -124,24 +150,30 @@ def content_list_state_update(
 
 
 def get_content_list_events_tx(update_task, event_type, tx_receipt):
-    return getattr(update_task.content_list_contract.events, event_type)().processReceipt(
-        tx_receipt
+    return get_contract_events(
+        update_task, update_task.content_list_contract, event_type, tx_receipt
     )
 
 
-def lookup_content_list_record(update_task, session, entry, block_number, txhash):
+def lookup_content_list_record(
+    update_task, session, entry, block_number, txhash, existing_content_list_records=None
+):
     event_blockhash = update_task.web3.toHex(entry.blockHash)
     event_args = entry["args"]
     content_list_id = event_args._contentListId
 
+    content_list_record = None
+    if (
+        existing_content_list_records is not None
+        and content_list_id in existing_content_list_records
+    ):
+        # Preloaded records are already expunged, each one is handed out once
+        content_list_record = existing_content_list_records.pop(content_list_id)
     # Check if contentList record is in the DB
-    content_list_exists = (
+    elif (
         session.query(ContentList).filter_by(content_list_id=event_args._contentListId).count()
         > 0
-    )
-
-    content_list_record = None
-    if content_list_exists:
+    ):
         content_list_record = (
             session.query(ContentList)
             .filter(ContentList.content_list_id == content_list_id, ContentList.is_current == True)
@@ -152,7 +184,8 @@ def lookup_content_list_record(update_task, session, entry, block_number, txhash
         # https://stackoverflow.com/questions/28871406/how-to-clone-a-sqlalchemy-db-object-with-new-primary-key
         session.expunge(content_list_record)
         make_transient(content_list_record)
-    else:
+
+    if not content_list_record:
         content_list_record = ContentList(
             content_list_id=content_list_id, is_current=True, is_delete=False
         )
@@ -165,24 +198,6 @@ def lookup_content_list_record(update_task, session, entry, block_number, txhash
     return content_list_record
 
 
-def invalidate_old_content_list(session, content_list_id):
-    # check if contentList id is in db
-    content_list_exists = (
-        session.query(ContentList).filter_by(content_list_id=content_list_id).count() > 0
-    )
-
-    if content_list_exists:
-        # Update existing record in db to is_current = False
-        num_invalidated_content_lists = (
-            session.query(ContentList)
-            .filter(ContentList.content_list_id == content_list_id, ContentList.is_current == True)
-            .update({"is_current": False})
-        )
-        assert (
-            num_invalidated_content_lists > 0
-        ), "Update operation requires a current contentList to be invalidated"
-
-
 def parse_content_list_event(
     self, update_task, entry, event_type, content_list_record, block_timestamp, session
 ):
@@ -15,6 +15,8 @@ from src.models.digitalContents.digital_content_route import DigitalContentRoute
 from src.models.users.user import User
 from src.queries.skipped_transactions import add_node_level_skipped_transaction
 from src.utils import helpers, multihash
+from src.utils.block_write_buffer import add_record, invalidate_record
+from src.utils.event_log_decoder import get_contract_events
 from src.utils.indexing_errors import EntityMissingRequiredFieldError, IndexingError
 from src.utils.model_nullable_validator import all_required_fields_present
 from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
@@ -51,19 +53,36 @@ def digital_content_state_update(
 
     pending_digital_content_routes: List[DigitalContentRoute] = []
     digital_content_events: Dict[int, Dict[str, Any]] = {}
-    for tx_receipt in digital_content_factory_txs:
+
+    # Decode all events first so every digital_content in the block is loaded in one query
+    events_by_tx = [
+        {
+            event_type: get_digital_content_events_tx(update_task, event_type, tx_receipt)
+            for event_type in digital_content_event_types_arr
+        }
+        for tx_receipt in digital_content_factory_txs
+    ]
+    existing_digital_content_records = helpers.get_current_records_by_id(
+        session,
+        DigitalContent,
+        DigitalContent.digital_content_id,
+        [
+            get_digital_content_event_id(entry)
+            for tx_events in events_by_tx
+            for entries in tx_events.values()
+            for entry in entries
+        ],
+    )
+
+    for tx_receipt, tx_events in zip(digital_content_factory_txs, events_by_tx):
         txhash = update_task.web3.toHex(tx_receipt.transactionHash)
         for event_type in digital_content_event_types_arr:
-            digital_content_events_tx = get_digital_content_events_tx(update_task, event_type, tx_receipt)
+            digital_content_events_tx = tx_events[event_type]
             processedEntries = 0  # if record does not get added, do not count towards num_total_changes
             for entry in digital_content_events_tx:
                 digital_content_event_start_time = time()
                 event_args = entry["args"]
-                digital_content_id = (
-                    helpers.get_tx_arg(entry, "_digitalContentId")
-                    if "_digitalContentId" in event_args
-                    else helpers.get_tx_arg(entry, "_id")
-                )
+                digital_content_id = get_digital_content_event_id(entry)
                 existing_digital_content_record = None
                 digital_content_metadata = None
                 try:
@@ -79,6 +98,7 @@ def digital_content_state_update(
                             block_number,
                             blockhash,
                             txhash,
+                            existing_digital_content_records,
                         )
                     # parse digital_content event to add metadata to record
                     if event_type in [
@@ -142,8 +162,8 @@ def digital_content_state_update(
     for digital_content_id, value_obj in digital_content_events.items():
         if value_obj["events"]:
             logger.info(f"index.py | digitalContents.py | Adding {value_obj['digital_content']}")
-            invalidate_old_digital_content(session, digital_content_id)
-            session.add(value_obj["digital_content"])
+            invalidate_record(session, DigitalContent, digital_content_id=digital_content_id)
+            add_record(session, value_obj["digital_content"])
 
     if num_total_changes:
         metric.save_time({"scope": "full"})
@@ -154,19 +174,38 @@ def digital_content_state_update(
 
 
 def get_digital_content_events_tx(update_task, event_type, tx_receipt):
-    return getattr(update_task.digital_content_contract.events, event_type)().processReceipt(
-        tx_receipt
+    return get_contract_events(
+        update_task, update_task.digital_content_contract, event_type, tx_receipt
+    )
+
+
+def get_digital_content_event_id(entry):
+    return (
+        helpers.get_tx_arg(entry, "_digitalContentId")
+        if "_digitalContentId" in entry["args"]
+        else helpers.get_tx_arg(entry, "_id")
     )
 
 
 def lookup_digital_content_record(
-    update_task, session, entry, event_digital_content_id, block_number, block_hash, txhash
+    update_task,
+    session,
+    entry,
+    event_digital_content_id,
+    block_number,
+    block_hash,
+    txhash,
+    existing_digital_content_records=None,
 ):
-    # Check if digital_content record exists
-    digital_content_exists = session.query(DigitalContent).filter_by(digital_content_id=event_digital_content_id).count() > 0
-
     digital_content_record = None
-    if digital_content_exists:
+    if (
+        existing_digital_content_records is not None
+        and event_digital_content_id in existing_digital_content_records
+    ):
+        # Preloaded records are already expunged, each one is handed out once
+        digital_content_record = existing_digital_content_records.pop(event_digital_content_id)
+    # Check if digital_content record exists
+    elif session.query(DigitalContent).filter_by(digital_content_id=event_digital_content_id).count() > 0:
         digital_content_record = (
             session.query(DigitalContent)
             .filter(DigitalContent.digital_content_id == event_digital_content_id, DigitalContent.is_current == True)
@@ -177,7 +216,8 @@ def lookup_digital_content_record(
         # https://stackoverflow.com/questions/28871406/how-to-clone-a-sqlalchemy-db-object-with-new-primary-key
         session.expunge(digital_content_record)
         make_transient(digital_content_record)
-    else:
+
+    if not digital_content_record:
         digital_content_record = DigitalContent(digital_content_id=event_digital_content_id, is_current=True, is_delete=False)
 
     # update block related fields regardless of type
@@ -187,27 +227,6 @@ def lookup_digital_content_record(
     return digital_content_record
 
 
-def invalidate_old_digital_content(session, digital_content_id):
-    digital_content_exists = session.query(DigitalContent).filter_by(digital_content_id=digital_content_id).count() > 0
-
-    if not digital_content_exists:
-        return
-
-    num_invalidated_digital_contents = (
-        session.query(DigitalContent)
-        .filter(DigitalContent.digital_content_id == digital_content_id, DigitalContent.is_current == True)
-        .update({"is_current": False})
-    )
-    assert (
-        num_invalidated_digital_contents > 0
-    ), "Update operation requires a current digital_content to be invalidated"
-
-
-def invalidate_old_digital_contents(session, digital_content_ids):
-    for digital_content_id in digital_content_ids:
-        invalidate_old_digital_content(session, digital_content_id)
-
-
 def update_stems_table(session, digital_content_record, digital_content_metadata):
     if ("stem_of" not in digital_content_metadata) or (
         not isinstance(digital_content_metadata["stem_of"], dict)
@@ -2,9 +2,12 @@ import logging  # pylint: disable=C0302
 from datetime import datetime, timedelta
 from urllib.parse import unquote
 
-from sqlalchemy import desc, func
+from sqlalchemy import Integer, cast, desc, func
 from src.models.social.aggregate_plays import AggregatePlay
 from src.models.social.follow import Follow
+from src.models.social.hourly_digital_content_play_counts import (
+    HourlyDigitalContentPlayCount,
+)
 from src.models.social.play import Play
 from src.models.social.repost import RepostType
 from src.models.social.save import SaveType
@@ -16,6 +19,7 @@ from src.queries.query_helpers import (
     get_repost_counts,
     get_save_counts,
 )
+from src.utils.update_indexing_checkpoints import get_last_indexed_checkpoint
 
 logger = logging.getLogger(__name__)
 
@@ -32,27 +36,54 @@ time_delta_map = {
 }
 
 
+def get_windowed_listen_counts_query(session, delta):
+    """Returns a (play_item_id, count) query of the plays created within delta.
+
+    Whole hours are summed from the hourly_digital_content_play_counts buckets.
+    Only the partial first hour of the window and the plays not yet added to the
+    buckets are counted from the plays table.
+    """
+    window_start = datetime.now() - delta
+    first_full_hour = window_start.replace(
+        minute=0, second=0, microsecond=0
+    ) + timedelta(hours=1)
+    checkpoint = get_last_indexed_checkpoint(
+        session, HourlyDigitalContentPlayCount.__tablename__
+    )
+    if not checkpoint:
+        # The buckets have not been populated yet
+        return (
+            session.query(Play.play_item_id, func.count(Play.id).label("count"))
+            .filter(Play.created_at > window_start)
+            .group_by(Play.play_item_id)
+        )
+
+    bucketed_counts = session.query(
+        HourlyDigitalContentPlayCount.digital_content_id.label("play_item_id"),
+        HourlyDigitalContentPlayCount.play_count.label("count"),
+    ).filter(HourlyDigitalContentPlayCount.hourly_timestamp >= first_full_hour)
+    first_hour_counts = (
+        session.query(Play.play_item_id, func.count(Play.id).label("count"))
+        .filter(
+            Play.id <= checkpoint,
+            Play.created_at > window_start,
+            Play.created_at < first_full_hour,
+        )
+        .group_by(Play.play_item_id)
+    )
+    unbucketed_counts = (
+        session.query(Play.play_item_id, func.count(Play.id).label("count"))
+        .filter(Play.id > checkpoint, Play.created_at > window_start)
+        .group_by(Play.play_item_id)
+    )
+    return bucketed_counts.union_all(first_hour_counts, unbucketed_counts)
+
+
 # Returns listens counts for digitalContents, subject to time and
 # genre restrictions.
 # Returns [{ digital_content_id: number, listens: number }]
 def get_listen_counts(session, time, genre, limit, offset, net_multiplier=1):
 
-    # Adds a created_at filter
-    # on the base query, if applicable.
-    #
-    # If no `time` param, that means
-    # no filter so we return base_query
-    # to get all time plays.
-    def with_time_filter(base_query, time):
-        delta = None
-        if not time:
-            return base_query
-        delta = time_delta_map.get(time)
-        if not delta:
-            logger.warning(f"Invalid time passed to get_listen_counts: {time}")
-            return base_query
-        return base_query.filter(Play.created_at > datetime.now() - delta)
-
     # Adds a genre filter
     # on the base query, if applicable.
     def with_genre_filter(base_query, genre):
@@ -68,12 +99,24 @@ def get_listen_counts(session, time, genre, limit, offset, net_multiplier=1):
         genre_list = get_genre_list(genre)
         return base_query.filter(DigitalContent.genre.in_(genre_list))
 
+    delta = time_delta_map.get(time) if time else None
+    if time and not delta:
+        logger.warning(f"Invalid time passed to get_listen_counts: {time}")
+
     # Construct base query
-    if time:
-        # If we want to query plays by time, use the plays table directly
-        base_query = session.query(
-            Play.play_item_id, func.count(Play.id).label("count"), DigitalContent.created_at
-        ).join(DigitalContent, DigitalContent.digital_content_id == Play.play_item_id)
+    if delta:
+        # If we want to query plays by time, sum the windowed play counts
+        windowed_counts = get_windowed_listen_counts_query(session, delta).subquery()
+        play_item_id = windowed_counts.c.play_item_id
+        base_query = (
+            session.query(
+                play_item_id,
+                cast(func.sum(windowed_counts.c.count), Integer).label("count"),
+                DigitalContent.created_at,
+            )
+            .join(DigitalContent, DigitalContent.digital_content_id == play_item_id)
+            .group_by(play_item_id, DigitalContent.created_at)
+        )
     else:
         # Otherwise, it's safe to just query over the aggregate plays table (all time)
         base_query = session.query(
@@ -89,11 +132,7 @@ def get_listen_counts(session, time, genre, limit, offset, net_multiplier=1):
         DigitalContent.stem_of == None,
     )
 
-    if time:
-        base_query = base_query.group_by(Play.play_item_id, DigitalContent.created_at)
-
     # Add filters to query
-    base_query = with_time_filter(base_query, time)
     base_query = with_genre_filter(base_query, genre)
 
     # Add limit + offset + sort
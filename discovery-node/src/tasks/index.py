@@ -5,8 +5,10 @@ import logging
 import time
 from datetime import datetime
 from operator import itemgetter, or_
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Set, Tuple
 
+from sqlalchemy import literal
+from sqlalchemy.orm import aliased
 from src.app import get_contract_addresses
 from src.challenges.challenge_event_bus import ChallengeEventBus
 from src.challenges.trending_challenge import should_trending_challenge_update
@@ -14,8 +16,8 @@ from src.models.indexing.block import Block
 from src.models.indexing.ursm_content_node import UrsmContentNode
 from src.models.content_lists.content_list import ContentList
 from src.models.social.follow import Follow
-from src.models.social.repost import Repost
-from src.models.social.save import Save
+from src.models.social.repost import Repost, RepostType
+from src.models.social.save import Save, SaveType
 from src.models.digitalContents.digital_content import DigitalContent
 from src.models.digitalContents.digital_content_route import DigitalContentRoute
 from src.models.users.associated_wallet import AssociatedWallet
@@ -29,6 +31,12 @@ from src.queries.get_skipped_transactions import (
     get_indexing_error,
     set_indexing_error,
 )
+from src.queries.get_related_authors_minhash import reverted_follow_blocks_key
+from src.queries.get_user_aggregates import remove_changed_followee_follow_counts
+from src.queries.materialized_feed import (
+    is_materialized_feed_enabled,
+    reverted_feed_blocks_key,
+)
 from src.queries.skipped_transactions import add_network_level_skipped_transaction
 from src.tasks.celery_app import celery
 from src.tasks.content_lists import content_list_state_update
@@ -39,7 +47,20 @@ from src.tasks.user_library import user_library_state_update
 from src.tasks.user_replica_set import user_replica_set_state_update
 from src.tasks.users import user_event_types_lookup, user_state_update
 from src.utils import helpers, multihash
+from src.utils.block_write_buffer import buffered_block_writes
+from src.utils.cache_invalidation import (
+    CONTENT_LIST_CACHE_TAG,
+    DIGITAL_CONTENT_CACHE_TAG,
+    USER_CACHE_TAG,
+    get_changed_entity_cache_tags,
+    get_changed_entity_ids,
+)
 from src.utils.constants import CONTRACT_NAMES_ON_CHAIN, CONTRACT_TYPES
+from src.utils.event_log_decoder import (
+    EventLogDecoder,
+    get_contract_events,
+    get_event_log_decoder,
+)
 from src.utils.index_blocks_performance import (
     record_add_indexed_block_to_db_ms,
     record_fetch_ipfs_metadata_ms,
@@ -55,6 +76,7 @@ from src.utils.prometheus_metric import (
     save_duration_metric,
 )
 from src.utils.redis_cache import (
+    invalidate_cache_tags,
     remove_cached_content_list_ids,
     remove_cached_digital_content_ids,
     remove_cached_user_ids,
@@ -65,7 +87,9 @@ from src.utils.redis_constants import (
     most_recent_indexed_block_hash_redis_key,
     most_recent_indexed_block_redis_key,
 )
+from src.utils.reverted_blocks import add_reverted_block
 from src.utils.session_manager import SessionManager
+from src.utils.web3_provider import get_web3_batch_client
 
 USER_FACTORY = CONTRACT_TYPES.USER_FACTORY.value
 DIGITAL_CONTENT_FACTORY = CONTRACT_TYPES.DIGITAL_CONTENT_FACTORY.value
@@ -98,8 +122,24 @@ TX_TYPE_TO_HANDLER_MAP = {
     USER_REPLICA_SET_MANAGER: user_replica_set_state_update,
 }
 
+# Entity type of the ids returned by handlers changing a single entity type
+CONTRACT_TYPE_TO_ENTITY_TYPE = {
+    USER_FACTORY: USER_CACHE_TAG,
+    USER_REPLICA_SET_MANAGER: USER_CACHE_TAG,
+    DIGITAL_CONTENT_FACTORY: DIGITAL_CONTENT_CACHE_TAG,
+    CONTENT_LIST_FACTORY: CONTENT_LIST_CACHE_TAG,
+}
+
 BLOCKS_PER_DAY = (24 * 60 * 60) / 5
 
+# Max number of ancestor blocks requested at once while looking for the intersection
+INTERSECTION_BLOCK_BATCH_SIZE = 50
+
+MAX_REVERT_BLOCKS = 10000
+
+# Shared across index_blocks runs, created once prefetching is enabled
+index_blocks_prefetch_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -222,33 +262,19 @@ def update_latest_block_redis():
     )
 
 
-def fetch_tx_receipt(transaction):
-    web3 = update_task.web3
-    tx_hash = web3.toHex(transaction["hash"])
-    receipt = web3.eth.get_transaction_receipt(tx_hash)
-    response = {}
-    response["tx_receipt"] = receipt
-    response["tx_hash"] = tx_hash
-    return response
-
-
 def fetch_tx_receipts(self, block):
     block_hash = self.web3.toHex(block.hash)
     block_number = block.number
     block_transactions = block.transactions
     block_tx_with_receipts = {}
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_to_tx_receipt = {
-            executor.submit(fetch_tx_receipt, tx): tx for tx in block_transactions
-        }
-        for future in concurrent.futures.as_completed(future_to_tx_receipt):
-            tx = future_to_tx_receipt[future]
-            try:
-                tx_receipt_info = future.result()
-                tx_hash = tx_receipt_info["tx_hash"]
-                block_tx_with_receipts[tx_hash] = tx_receipt_info["tx_receipt"]
-            except Exception as exc:
-                logger.error(f"index.py | fetch_tx_receipts {tx} generated {exc}")
+    try:
+        tx_receipts = get_web3_batch_client().get_block_receipts(block)
+        for tx_receipt in tx_receipts:
+            if tx_receipt:
+                tx_hash = self.web3.toHex(tx_receipt["transactionHash"])
+                block_tx_with_receipts[tx_hash] = tx_receipt
+    except Exception as exc:
+        logger.error(f"index.py | fetch_tx_receipts {block_number} generated {exc}")
     num_processed_txs = len(block_tx_with_receipts.keys())
     num_submitted_txs = len(block_transactions)
     if num_processed_txs != num_submitted_txs:
@@ -282,9 +308,12 @@ def fetch_cid_metadata(
     with db.scoped_session() as session:
         for tx_receipt in user_factory_txs:
             txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-            user_events_tx = getattr(
-                user_contract.events, user_event_types_lookup["update_multihash"]
-            )().processReceipt(tx_receipt)
+            user_events_tx = get_contract_events(
+                update_task,
+                user_contract,
+                user_event_types_lookup["update_multihash"],
+                tx_receipt,
+            )
             for entry in user_events_tx:
                 event_args = entry["args"]
                 cid = helpers.multihash_digest_to_cid(event_args._multihashDigest)
@@ -299,9 +328,9 @@ def fetch_cid_metadata(
                 digital_content_event_types_lookup["new_digital_content"],
                 digital_content_event_types_lookup["update_digital_content"],
             ]:
-                digital_content_events_tx = getattr(
-                    digital_content_contract.events, event_type
-                )().processReceipt(tx_receipt)
+                digital_content_events_tx = get_contract_events(
+                    update_task, digital_content_contract, event_type, tx_receipt
+                )
                 for entry in digital_content_events_tx:
                     event_args = entry["args"]
                     digital_content_metadata_digest = event_args._multihashDigest.hex()
@@ -365,6 +394,178 @@ def fetch_cid_metadata(
     return cid_metadata
 
 
+def get_index_blocks_prefetch_depth(shared_config):
+    """Number of blocks past the current one whose receipts and CID metadata are
+    fetched in the background during index_blocks. 0 disables prefetching."""
+    prefetch_depth = shared_config["discprov"].get("index_blocks_prefetch_depth")
+    return max(int(prefetch_depth or 0), 0)
+
+
+def get_index_blocks_prefetch_executor(prefetch_depth):
+    # pylint: disable=W0603
+    global index_blocks_prefetch_executor
+    if not index_blocks_prefetch_executor:
+        index_blocks_prefetch_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=prefetch_depth, thread_name_prefix="index_blocks_prefetch"
+        )
+    return index_blocks_prefetch_executor
+
+
+def prefetch_block(self, db, block):
+    """Fetch tx receipts and CID metadata for a block ahead of indexing it.
+
+    This runs while earlier blocks in the batch are still uncommitted, so replica sets
+    of users created in those blocks are not visible yet. fetch_cid_metadata already
+    falls back to all content nodes in that case, and metadata is content addressed,
+    so the result does not depend on block order.
+
+    CID metadata failures are not raised here - index_blocks refetches the metadata
+    inline so skipped transactions are handled exactly as without prefetching.
+    """
+    web3 = update_task.web3
+    tx_receipt_dict = fetch_tx_receipts(self, block)
+
+    user_factory_txs = []
+    digital_content_factory_txs = []
+    contract_addresses = get_contract_addresses()
+    for tx in block.transactions:
+        tx_receipt = tx_receipt_dict[web3.toHex(tx["hash"])]
+        if tx["to"] == contract_addresses[USER_FACTORY]:
+            user_factory_txs.append(tx_receipt)
+        elif tx["to"] == contract_addresses[DIGITAL_CONTENT_FACTORY]:
+            digital_content_factory_txs.append(tx_receipt)
+
+    cid_metadata = None
+    try:
+        cid_metadata = fetch_cid_metadata(
+            db, user_factory_txs, digital_content_factory_txs
+        )
+    except Exception as e:
+        logger.warning(
+            f"index.py | prefetch_block | Failed to prefetch CID metadata for block={block.number} {e}"
+        )
+
+    return {"tx_receipt_dict": tx_receipt_dict, "cid_metadata": cid_metadata}
+
+
+def schedule_block_prefetches(
+    self, db, blocks_list, block_index, prefetch_depth, prefetch_futures
+):
+    """Submit prefetches for blocks_list[block_index] and the next prefetch_depth
+    blocks to be indexed. blocks_list is ordered newest first."""
+    if prefetch_depth <= 0:
+        return
+    executor = get_index_blocks_prefetch_executor(prefetch_depth)
+    last_index = max(block_index - prefetch_depth, 0)
+    for i in range(block_index, last_index - 1, -1):
+        block = blocks_list[i]
+        if block.number not in prefetch_futures:
+            prefetch_futures[block.number] = executor.submit(
+                prefetch_block, self, db, block
+            )
+
+
+def fetch_parent_block(block, prefetched_blocks, lowest_prefetch_block_number):
+    """Returns the parent of block.
+
+    When the parent has not been fetched yet, the next INTERSECTION_BLOCK_BATCH_SIZE
+    ancestors down to lowest_prefetch_block_number are fetched by number in one batch
+    request and kept in prefetched_blocks (block hash -> block). If the chain was
+    reorganized in between, the parent is fetched by hash instead.
+    """
+    web3 = update_task.web3
+    parent_hash = web3.toHex(block.parentHash)
+    if parent_hash not in prefetched_blocks:
+        start_number = block.number - 1
+        stop_number = max(
+            start_number - INTERSECTION_BLOCK_BATCH_SIZE,
+            lowest_prefetch_block_number - 1,
+        )
+        block_numbers = list(range(start_number, stop_number, -1))
+        if block_numbers:
+            for ancestor in get_web3_batch_client().get_blocks(block_numbers):
+                if ancestor:
+                    prefetched_blocks[web3.toHex(ancestor.hash)] = ancestor
+
+    parent_block = prefetched_blocks.pop(parent_hash, None)
+    if not parent_block:
+        parent_block = web3.eth.get_block(parent_hash, True)
+    return parent_block
+
+
+def get_indexed_block_hash_from_redis(redis):
+    indexed_block_hash = redis.get(most_recent_indexed_block_hash_redis_key)
+    return indexed_block_hash.decode() if indexed_block_hash else None
+
+
+def is_block_hash_indexed(session, block_hash, prefetched_blocks, indexed_block_hashes):
+    """Returns whether block_hash is present in the blocks table.
+
+    The first lookup of an unchecked hash also checks the hashes and parent hashes of
+    all prefetched ancestors in the same query, so walking back to the intersection
+    costs one query per ancestor batch instead of two per block.
+    indexed_block_hashes caches block hash -> present across lookups.
+    """
+    if block_hash not in indexed_block_hashes:
+        web3 = update_task.web3
+        candidate_hashes = {block_hash}
+        for block in prefetched_blocks.values():
+            candidate_hashes.add(web3.toHex(block.hash))
+            candidate_hashes.add(web3.toHex(block.parentHash))
+        candidate_hashes.difference_update(indexed_block_hashes.keys())
+
+        present_hashes = {
+            present_hash
+            for (present_hash,) in session.query(Block.blockhash)
+            .filter(Block.blockhash.in_(candidate_hashes))
+            .all()
+        }
+        for candidate_hash in candidate_hashes:
+            indexed_block_hashes[candidate_hash] = candidate_hash in present_hashes
+
+    return indexed_block_hashes[block_hash]
+
+
+def get_revert_blocks(session, db_current_block, intersect_block_hash):
+    """Returns the blocks to revert, from db_current_block back to (but excluding)
+    intersect_block_hash, following blocks.parenthash in a single recursive query.
+
+    Stops early if a parent is missing from the blocks table. The traversal depth
+    is capped one past the revert limit so revert_blocks can reject it.
+    """
+    revert_blocks_cte = (
+        session.query(Block.blockhash, Block.parenthash, literal(1).label("depth"))
+        .filter(Block.blockhash == db_current_block.blockhash)
+        .cte(name="revert_blocks", recursive=True)
+    )
+    parent_block = aliased(Block)
+    revert_blocks_cte = revert_blocks_cte.union_all(
+        session.query(
+            parent_block.blockhash,
+            parent_block.parenthash,
+            revert_blocks_cte.c.depth + 1,
+        ).filter(
+            parent_block.blockhash == revert_blocks_cte.c.parenthash,
+            revert_blocks_cte.c.blockhash != intersect_block_hash,
+            revert_blocks_cte.c.depth <= MAX_REVERT_BLOCKS,
+        )
+    )
+    revert_blocks_list = (
+        session.query(Block)
+        .join(revert_blocks_cte, Block.blockhash == revert_blocks_cte.c.blockhash)
+        .filter(Block.blockhash != intersect_block_hash)
+        .order_by(revert_blocks_cte.c.depth)
+        .all()
+    )
+
+    if revert_blocks_list and revert_blocks_list[-1].parenthash != intersect_block_hash:
+        logger.info(
+            f"index.py | update_task | Special case exit traverse block parenthash - "
+            f"{revert_blocks_list[-1].parenthash}"
+        )
+    return revert_blocks_list
+
+
 # During each indexing iteration, check if the address for UserReplicaSetManager
 # has been set in the L2 contract registry - if so, update the global contract_addresses object
 # This change is to ensure no indexing restart is necessary when UserReplicaSetManager is
@@ -476,12 +677,7 @@ def process_state_changes(
         "number", "hash", "timestamp"
     )(block)
 
-    changed_entity_ids_map = {
-        USER_FACTORY: [],
-        DIGITAL_CONTENT_FACTORY: [],
-        CONTENT_LIST_FACTORY: [],
-        USER_REPLICA_SET_MANAGER: [],
-    }
+    changed_entity_ids = get_changed_entity_ids()
 
     for tx_type, bulk_processor in TX_TYPE_TO_HANDLER_MAP.items():
 
@@ -497,36 +693,118 @@ def process_state_changes(
             cid_metadata,
         ]
 
-        (
-            total_changes_for_tx_type,
-            changed_entity_ids,
-        ) = bulk_processor(*tx_processing_args)
-
-        if tx_type in changed_entity_ids_map.keys():
-            changed_entity_ids_map[tx_type] = changed_entity_ids
+        # Rows invalidated and added by the handler are written set-based once it
+        # returns, so the next handler can read them
+        with buffered_block_writes(session):
+            (
+                total_changes_for_tx_type,
+                changed_ids,
+            ) = bulk_processor(*tx_processing_args)
+
+        # Social feature and user library handlers return their changed ids by
+        # entity type
+        if tx_type in CONTRACT_TYPE_TO_ENTITY_TYPE:
+            entity_type = CONTRACT_TYPE_TO_ENTITY_TYPE[tx_type]
+            changed_entity_ids[entity_type].update(changed_ids)
+            # Owners of changed digitalContents and contentLists have changed
+            # digital_content, content_list and album counts
+            if tx_type in (DIGITAL_CONTENT_FACTORY, CONTENT_LIST_FACTORY):
+                changed_entity_ids[USER_CACHE_TAG].update(
+                    get_owner_ids(session, tx_type, changed_ids)
+                )
+        elif tx_type in [SOCIAL_FEATURE_FACTORY, USER_LIBRARY_FACTORY]:
+            for entity_type, entity_ids in changed_ids.items():
+                changed_entity_ids[entity_type].update(entity_ids)
 
         logger.info(
             f"index.py | {bulk_processor.__name__} completed"
             f" {tx_type}_state_changed={total_changes_for_tx_type > 0} for block={block_number}"
         )
 
-    return changed_entity_ids_map
+    return changed_entity_ids
+
 
+def get_owner_ids(session, tx_type, entity_ids) -> Set[int]:
+    """Returns the owners of the digitalContents or contentLists changed by tx_type"""
+    if not entity_ids:
+        return set()
+    if tx_type == DIGITAL_CONTENT_FACTORY:
+        owner_id_column, id_column, is_current_column = (
+            DigitalContent.owner_id,
+            DigitalContent.digital_content_id,
+            DigitalContent.is_current,
+        )
+    else:
+        owner_id_column, id_column, is_current_column = (
+            ContentList.content_list_owner_id,
+            ContentList.content_list_id,
+            ContentList.is_current,
+        )
+    owner_ids = (
+        session.query(owner_id_column)
+        .filter(is_current_column == True, id_column.in_(list(entity_ids)))
+        .distinct()
+        .all()
+    )
+    return {owner_id for (owner_id,) in owner_ids}
 
-def remove_updated_entities_from_cache(redis, changed_entity_type_to_updated_ids_map):
-    CONTRACT_TYPE_TO_CLEAR_CACHE_HANDLERS = {
-        USER_FACTORY: remove_cached_user_ids,
-        USER_REPLICA_SET_MANAGER: remove_cached_user_ids,
-        DIGITAL_CONTENT_FACTORY: remove_cached_digital_content_ids,
-        CONTENT_LIST_FACTORY: remove_cached_content_list_ids,
+
+def add_reverted_entity_ids(
+    changed_entity_ids,
+    saves,
+    reposts,
+    follows,
+    content_lists,
+    digital_contents,
+    users,
+):
+    """Adds the entities whose current rows are changed by reverting the given
+    rows to changed_entity_ids"""
+    for save in saves:
+        if save.save_type == SaveType.digital_content:
+            changed_entity_ids[DIGITAL_CONTENT_CACHE_TAG].add(save.save_item_id)
+        else:
+            changed_entity_ids[CONTENT_LIST_CACHE_TAG].add(save.save_item_id)
+        changed_entity_ids[USER_CACHE_TAG].add(save.user_id)
+    for repost in reposts:
+        if repost.repost_type == RepostType.digital_content:
+            changed_entity_ids[DIGITAL_CONTENT_CACHE_TAG].add(repost.repost_item_id)
+        else:
+            changed_entity_ids[CONTENT_LIST_CACHE_TAG].add(repost.repost_item_id)
+        changed_entity_ids[USER_CACHE_TAG].add(repost.user_id)
+    for follow in follows:
+        changed_entity_ids[USER_CACHE_TAG].add(follow.follower_user_id)
+        changed_entity_ids[USER_CACHE_TAG].add(follow.followee_user_id)
+    changed_entity_ids[CONTENT_LIST_CACHE_TAG].update(
+        content_list.content_list_id for content_list in content_lists
+    )
+    changed_entity_ids[DIGITAL_CONTENT_CACHE_TAG].update(
+        digital_content.digital_content_id for digital_content in digital_contents
+    )
+    # digital_content, content_list and album counts
+    changed_entity_ids[USER_CACHE_TAG].update(
+        content_list.content_list_owner_id for content_list in content_lists
+    )
+    changed_entity_ids[USER_CACHE_TAG].update(
+        digital_content.owner_id for digital_content in digital_contents
+    )
+    changed_entity_ids[USER_CACHE_TAG].update(user.user_id for user in users)
+
+
+def remove_updated_entities_from_cache(redis, changed_entity_ids, block_number=None):
+    ENTITY_TYPE_TO_CLEAR_CACHE_HANDLERS = {
+        USER_CACHE_TAG: remove_cached_user_ids,
+        DIGITAL_CONTENT_CACHE_TAG: remove_cached_digital_content_ids,
+        CONTENT_LIST_CACHE_TAG: remove_cached_content_list_ids,
     }
-    for (
-        contract_type,
-        clear_cache_handler,
-    ) in CONTRACT_TYPE_TO_CLEAR_CACHE_HANDLERS.items():
-        changed_entity_ids = changed_entity_type_to_updated_ids_map[contract_type]
-        if changed_entity_ids:
-            clear_cache_handler(redis, changed_entity_ids)
+    for entity_type, clear_cache_handler in ENTITY_TYPE_TO_CLEAR_CACHE_HANDLERS.items():
+        if changed_entity_ids[entity_type]:
+            clear_cache_handler(redis, changed_entity_ids[entity_type])
+
+    # Remove the cached responses containing changed entities
+    cache_tags = get_changed_entity_cache_tags(changed_entity_ids)
+    if cache_tags:
+        invalidate_cache_tags(redis, block_number, cache_tags)
 
 
 def create_and_raise_indexing_error(err, redis):
@@ -554,225 +832,290 @@ def index_blocks(self, db, blocks_list):
     num_blocks = len(blocks_list)
     block_order_range = range(len(blocks_list) - 1, -1, -1)
     latest_block_timestamp = None
-    changed_entity_ids_map = {}
+    changed_entity_ids = {}
     metric = PrometheusMetric(PrometheusMetricNames.INDEX_BLOCKS_DURATION_SECONDS)
-    for i in block_order_range:
-        start_time = time.time()
-        metric.reset_timer()
-        update_ursm_address(self)
-        block = blocks_list[i]
-        block_index = num_blocks - i
-        block_number, block_hash, latest_block_timestamp = itemgetter(
-            "number", "hash", "timestamp"
-        )(block)
-        logger.info(
-            f"index.py | index_blocks | {self.request.id} | block {block.number} - {block_index}/{num_blocks}"
-        )
-        challenge_bus: ChallengeEventBus = update_task.challenge_event_bus
+    prefetch_depth = get_index_blocks_prefetch_depth(shared_config)
+    PrometheusMetric(PrometheusMetricNames.INDEX_BLOCKS_PREFETCH_DEPTH_LATEST).save(
+        prefetch_depth
+    )
+    # block number -> future resolving to the prefetched receipts and CID metadata
+    prefetch_futures: Dict[int, concurrent.futures.Future] = {}
+    try:
+        for i in block_order_range:
+            start_time = time.time()
+            metric.reset_timer()
+            update_ursm_address(self)
+            block = blocks_list[i]
+            block_index = num_blocks - i
+            block_number, block_hash, latest_block_timestamp = itemgetter(
+                "number", "hash", "timestamp"
+            )(block)
+            logger.info(
+                f"index.py | index_blocks | {self.request.id} | block {block.number} - {block_index}/{num_blocks}"
+            )
+            challenge_bus: ChallengeEventBus = update_task.challenge_event_bus
 
-        with db.scoped_session() as session, challenge_bus.use_scoped_dispatch_queue():
-            skip_tx_hash = get_tx_hash_to_skip(session, redis)
-            skip_whole_block = skip_tx_hash == "commit"  # db tx failed at commit level
-            if skip_whole_block:
-                logger.info(
-                    f"index.py | Skipping all txs in block {block.hash} {block.number}"
-                )
-                save_skipped_tx(session, redis)
-                add_indexed_block_to_db(session, block)
-            else:
-                txs_grouped_by_type = {
-                    USER_FACTORY: [],
-                    DIGITAL_CONTENT_FACTORY: [],
-                    SOCIAL_FEATURE_FACTORY: [],
-                    CONTENT_LIST_FACTORY: [],
-                    USER_LIBRARY_FACTORY: [],
-                    USER_REPLICA_SET_MANAGER: [],
-                }
-                try:
-                    """
-                    Fetch transaction receipts
-                    """
-                    fetch_tx_receipts_start_time = time.time()
-                    tx_receipt_dict = fetch_tx_receipts(self, block)
-                    metric.save_time(
-                        {"scope": "fetch_tx_receipts"},
-                        start_time=fetch_tx_receipts_start_time,
-                    )
+            # Keep receipts and metadata for the upcoming blocks in flight while
+            # this block's state changes are processed and committed
+            schedule_block_prefetches(
+                self, db, blocks_list, i, prefetch_depth, prefetch_futures
+            )
+
+            with db.scoped_session() as session, challenge_bus.use_scoped_dispatch_queue():
+                skip_tx_hash = get_tx_hash_to_skip(session, redis)
+                skip_whole_block = (
+                    skip_tx_hash == "commit"
+                )  # db tx failed at commit level
+                if skip_whole_block:
                     logger.info(
-                        f"index.py | index_blocks - fetch_tx_receipts in {time.time() - fetch_tx_receipts_start_time}s"
+                        f"index.py | Skipping all txs in block {block.hash} {block.number}"
                     )
+                    save_skipped_tx(session, redis)
+                    add_indexed_block_to_db(session, block)
+                else:
+                    txs_grouped_by_type = {
+                        USER_FACTORY: [],
+                        DIGITAL_CONTENT_FACTORY: [],
+                        SOCIAL_FEATURE_FACTORY: [],
+                        CONTENT_LIST_FACTORY: [],
+                        USER_LIBRARY_FACTORY: [],
+                        USER_REPLICA_SET_MANAGER: [],
+                    }
+                    try:
+                        """
+                        Fetch transaction receipts
+                        """
+                        fetch_tx_receipts_start_time = time.time()
+                        prefetch_future = prefetch_futures.pop(block_number, None)
+                        prefetched_block = (
+                            prefetch_future.result() if prefetch_future else None
+                        )
+                        tx_receipt_dict = (
+                            prefetched_block["tx_receipt_dict"]
+                            if prefetched_block
+                            else fetch_tx_receipts(self, block)
+                        )
+                        metric.save_time(
+                            {"scope": "fetch_tx_receipts"},
+                            start_time=fetch_tx_receipts_start_time,
+                        )
+                        logger.info(
+                            f"index.py | index_blocks - fetch_tx_receipts in {time.time() - fetch_tx_receipts_start_time}s"
+                        )
 
-                    """
-                    Parse transaction receipts
-                    """
-                    parse_tx_receipts_start_time = time.time()
+                        """
+                        Parse transaction receipts
+                        """
+                        parse_tx_receipts_start_time = time.time()
 
-                    sorted_txs = sort_block_transactions(
-                        block, indexing_transaction_index_sort_order_start_block
-                    )
+                        sorted_txs = sort_block_transactions(
+                            block, indexing_transaction_index_sort_order_start_block
+                        )
 
-                    # Parse tx events in each block
-                    for tx in sorted_txs:
-                        tx_hash = web3.toHex(tx["hash"])
-                        tx_target_contract_address = (
-                            tx["to"] if tx["to"] else zero_address
+                        # Parse tx events in each block
+                        for tx in sorted_txs:
+                            tx_hash = web3.toHex(tx["hash"])
+                            tx_target_contract_address = (
+                                tx["to"] if tx["to"] else zero_address
+                            )
+                            tx_receipt = tx_receipt_dict[tx_hash]
+                            should_skip_tx = (
+                                tx_target_contract_address == zero_address
+                            ) or (skip_tx_hash is not None and skip_tx_hash == tx_hash)
+
+                            if should_skip_tx:
+                                logger.info(
+                                    f"index.py | Skipping tx {tx_hash} targeting {tx_target_contract_address}"
+                                )
+                                save_skipped_tx(session, redis)
+                                continue
+                            else:
+                                contract_type = get_contract_type_for_tx(
+                                    txs_grouped_by_type, tx, tx_receipt
+                                )
+                                if contract_type:
+                                    txs_grouped_by_type[contract_type].append(
+                                        tx_receipt
+                                    )
+                        metric.save_time(
+                            {"scope": "parse_tx_receipts"},
+                            start_time=parse_tx_receipts_start_time,
+                        )
+                        logger.info(
+                            f"index.py | index_blocks - parse_tx_receipts in {time.time() - parse_tx_receipts_start_time}s"
                         )
-                        tx_receipt = tx_receipt_dict[tx_hash]
-                        should_skip_tx = (
-                            tx_target_contract_address == zero_address
-                        ) or (skip_tx_hash is not None and skip_tx_hash == tx_hash)
-
-                        if should_skip_tx:
-                            logger.info(
-                                f"index.py | Skipping tx {tx_hash} targeting {tx_target_contract_address}"
+
+                        """
+                        Decode event logs
+                        """
+                        decode_event_logs_start_time = time.time()
+                        # Decode each log of the block once, state updates read the
+                        # decoded events instead of decoding receipts per event type
+                        event_log_decoder = get_event_log_decoder(update_task)
+                        if event_log_decoder:
+                            event_log_decoder.decode_receipts(
+                                tx_receipt
+                                for tx_receipts in txs_grouped_by_type.values()
+                                for tx_receipt in tx_receipts
                             )
-                            save_skipped_tx(session, redis)
-                            continue
+                        metric.save_time(
+                            {"scope": "decode_event_logs"},
+                            start_time=decode_event_logs_start_time,
+                        )
+                        logger.info(
+                            f"index.py | index_blocks - decode_event_logs in {time.time() - decode_event_logs_start_time}s"
+                        )
+
+                        """
+                        Fetch JSON metadata
+                        """
+                        fetch_ipfs_metadata_start_time = time.time()
+                        # pre-fetch cids asynchronously to not have it block in user_state_update
+                        # and digital_content_state_update
+                        if (
+                            prefetched_block
+                            and prefetched_block["cid_metadata"] is not None
+                        ):
+                            cid_metadata = prefetched_block["cid_metadata"]
                         else:
-                            contract_type = get_contract_type_for_tx(
-                                txs_grouped_by_type, tx, tx_receipt
+                            cid_metadata = fetch_cid_metadata(
+                                db,
+                                txs_grouped_by_type[USER_FACTORY],
+                                txs_grouped_by_type[DIGITAL_CONTENT_FACTORY],
                             )
-                            if contract_type:
-                                txs_grouped_by_type[contract_type].append(tx_receipt)
-                    metric.save_time(
-                        {"scope": "parse_tx_receipts"},
-                        start_time=parse_tx_receipts_start_time,
-                    )
-                    logger.info(
-                        f"index.py | index_blocks - parse_tx_receipts in {time.time() - parse_tx_receipts_start_time}s"
-                    )
+                        logger.info(
+                            f"index.py | index_blocks - fetch_ipfs_metadata in {time.time() - fetch_ipfs_metadata_start_time}s"
+                        )
+                        # Record the time this took in redis
+                        duration_ms = round(
+                            (time.time() - fetch_ipfs_metadata_start_time) * 1000
+                        )
+                        record_fetch_ipfs_metadata_ms(redis, duration_ms)
+                        metric.save_time(
+                            {"scope": "fetch_ipfs_metadata"},
+                            start_time=fetch_ipfs_metadata_start_time,
+                        )
+                        logger.info(
+                            f"index.py | index_blocks - fetch_ipfs_metadata in {duration_ms}ms"
+                        )
 
-                    """
-                    Fetch JSON metadata
-                    """
-                    fetch_ipfs_metadata_start_time = time.time()
-                    # pre-fetch cids asynchronously to not have it block in user_state_update
-                    # and digital_content_state_update
-                    cid_metadata = fetch_cid_metadata(
-                        db,
-                        txs_grouped_by_type[USER_FACTORY],
-                        txs_grouped_by_type[DIGITAL_CONTENT_FACTORY],
-                    )
-                    logger.info(
-                        f"index.py | index_blocks - fetch_ipfs_metadata in {time.time() - fetch_ipfs_metadata_start_time}s"
-                    )
-                    # Record the time this took in redis
-                    duration_ms = round(
-                        (time.time() - fetch_ipfs_metadata_start_time) * 1000
-                    )
-                    record_fetch_ipfs_metadata_ms(redis, duration_ms)
-                    metric.save_time(
-                        {"scope": "fetch_ipfs_metadata"},
-                        start_time=fetch_ipfs_metadata_start_time,
-                    )
-                    logger.info(
-                        f"index.py | index_blocks - fetch_ipfs_metadata in {duration_ms}ms"
-                    )
+                        """
+                        Add block to db
+                        """
+                        add_indexed_block_to_db_start_time = time.time()
+                        add_indexed_block_to_db(session, block)
+                        # Record the time this took in redis
+                        duration_ms = round(
+                            (time.time() - add_indexed_block_to_db_start_time) * 1000
+                        )
+                        record_add_indexed_block_to_db_ms(redis, duration_ms)
+                        metric.save_time(
+                            {"scope": "add_indexed_block_to_db"},
+                            start_time=add_indexed_block_to_db_start_time,
+                        )
+                        logger.info(
+                            f"index.py | index_blocks - add_indexed_block_to_db in {duration_ms}ms"
+                        )
 
-                    """
-                    Add block to db
-                    """
-                    add_indexed_block_to_db_start_time = time.time()
-                    add_indexed_block_to_db(session, block)
-                    # Record the time this took in redis
-                    duration_ms = round(
-                        (time.time() - add_indexed_block_to_db_start_time) * 1000
-                    )
-                    record_add_indexed_block_to_db_ms(redis, duration_ms)
-                    metric.save_time(
-                        {"scope": "add_indexed_block_to_db"},
-                        start_time=add_indexed_block_to_db_start_time,
-                    )
-                    logger.info(
-                        f"index.py | index_blocks - add_indexed_block_to_db in {duration_ms}ms"
-                    )
+                        """
+                        Add state changes in block to db (users, digitalContents, etc.)
+                        """
+                        process_state_changes_start_time = time.time()
+                        # bulk process operations once all tx's for block have been parsed
+                        # and get changed entity IDs for cache clearing
+                        # after session commit
+                        changed_entity_ids = process_state_changes(
+                            self,
+                            session,
+                            cid_metadata,
+                            txs_grouped_by_type,
+                            block,
+                        )
+                        metric.save_time(
+                            {"scope": "process_state_changes"},
+                            start_time=process_state_changes_start_time,
+                        )
+                        logger.info(
+                            f"index.py | index_blocks - process_state_changes in {time.time() - process_state_changes_start_time}s"
+                        )
 
-                    """
-                    Add state changes in block to db (users, digitalContents, etc.)
-                    """
-                    process_state_changes_start_time = time.time()
-                    # bulk process operations once all tx's for block have been parsed
-                    # and get changed entity IDs for cache clearing
-                    # after session commit
-                    changed_entity_ids_map = process_state_changes(
-                        self,
-                        session,
-                        cid_metadata,
-                        txs_grouped_by_type,
-                        block,
-                    )
+                    except Exception as e:
+
+                        blockhash = update_task.web3.toHex(block_hash)
+                        indexing_error = IndexingError(
+                            "prefetch-cids", block_number, blockhash, None, str(e)
+                        )
+                        create_and_raise_indexing_error(indexing_error, redis)
+
+                try:
+                    commit_start_time = time.time()
+                    session.commit()
                     metric.save_time(
-                        {"scope": "process_state_changes"},
-                        start_time=process_state_changes_start_time,
+                        {"scope": "commit_time"}, start_time=commit_start_time
                     )
                     logger.info(
-                        f"index.py | index_blocks - process_state_changes in {time.time() - process_state_changes_start_time}s"
+                        f"index.py | session committed to db for block={block_number} in {time.time() - commit_start_time}s"
                     )
-
                 except Exception as e:
-
+                    # Use 'commit' as the tx hash here.
+                    # We're at a point where the whole block can't be added to the database, so
+                    # we should skip it in favor of making progress
                     blockhash = update_task.web3.toHex(block_hash)
                     indexing_error = IndexingError(
-                        "prefetch-cids", block_number, blockhash, None, str(e)
+                        "session.commit", block_number, blockhash, "commit", str(e)
                     )
                     create_and_raise_indexing_error(indexing_error, redis)
-
-            try:
-                commit_start_time = time.time()
-                session.commit()
-                metric.save_time({"scope": "commit_time"}, start_time=commit_start_time)
-                logger.info(
-                    f"index.py | session committed to db for block={block_number} in {time.time() - commit_start_time}s"
-                )
-            except Exception as e:
-                # Use 'commit' as the tx hash here.
-                # We're at a point where the whole block can't be added to the database, so
-                # we should skip it in favor of making progress
-                blockhash = update_task.web3.toHex(block_hash)
-                indexing_error = IndexingError(
-                    "session.commit", block_number, blockhash, "commit", str(e)
-                )
-                create_and_raise_indexing_error(indexing_error, redis)
-            try:
-                # Check the last block's timestamp for updating the trending challenge
-                [should_update, date] = should_trending_challenge_update(
-                    session, latest_block_timestamp
-                )
-                if should_update:
-                    celery.send_task(
-                        "calculate_trending_challenges", kwargs={"date": date}
+                try:
+                    # Check the last block's timestamp for updating the trending challenge
+                    [should_update, date] = should_trending_challenge_update(
+                        session, latest_block_timestamp
                     )
-            except Exception as e:
-                # Do not throw error, as this should not stop indexing
-                logger.error(
-                    f"index.py | Error in calling update trending challenge {e}",
-                    exc_info=True,
-                )
-            if skip_tx_hash:
-                clear_indexing_error(redis)
+                    if should_update:
+                        celery.send_task(
+                            "calculate_trending_challenges", kwargs={"date": date}
+                        )
+                except Exception as e:
+                    # Do not throw error, as this should not stop indexing
+                    logger.error(
+                        f"index.py | Error in calling update trending challenge {e}",
+                        exc_info=True,
+                    )
+                if skip_tx_hash:
+                    clear_indexing_error(redis)
 
-        if changed_entity_ids_map:
-            remove_updated_entities_from_cache(redis, changed_entity_ids_map)
+            if changed_entity_ids:
+                remove_updated_entities_from_cache(
+                    redis, changed_entity_ids, block_number
+                )
+                if changed_entity_ids[USER_CACHE_TAG]:
+                    with db.scoped_session() as session:
+                        remove_changed_followee_follow_counts(
+                            session, redis, changed_entity_ids[USER_CACHE_TAG]
+                        )
 
-        logger.info(
-            f"index.py | redis cache clean operations complete for block=${block_number}"
-        )
+            logger.info(
+                f"index.py | redis cache clean operations complete for block=${block_number}"
+            )
 
-        add_indexed_block_to_redis(block, redis)
-        logger.info(
-            f"index.py | update most recently processed block complete for block=${block_number}"
-        )
+            add_indexed_block_to_redis(block, redis)
+            logger.info(
+                f"index.py | update most recently processed block complete for block=${block_number}"
+            )
 
-        # Record the time this took in redis
-        metric.save_time({"scope": "full"})
-        duration_ms = round(time.time() - start_time * 1000)
-        record_index_blocks_ms(redis, duration_ms)
+            # Record the time this took in redis
+            metric.save_time({"scope": "full"})
+            duration_ms = round(time.time() - start_time * 1000)
+            record_index_blocks_ms(redis, duration_ms)
 
-        # Sweep records older than 30 days every day
-        if block_number % BLOCKS_PER_DAY == 0:
-            sweep_old_index_blocks_ms(redis, 30)
-            sweep_old_fetch_ipfs_metadata_ms(redis, 30)
-            sweep_old_add_indexed_block_to_db_ms(redis, 30)
+            # Sweep records older than 30 days every day
+            if block_number % BLOCKS_PER_DAY == 0:
+                sweep_old_index_blocks_ms(redis, 30)
+                sweep_old_fetch_ipfs_metadata_ms(redis, 30)
+                sweep_old_add_indexed_block_to_db_ms(redis, 30)
+    finally:
+        # Drop prefetches for blocks that were not indexed in this run
+        for prefetch_future in prefetch_futures.values():
+            prefetch_future.cancel()
 
     if num_blocks > 0:
         logger.info(f"index.py | index_blocks | Indexed {num_blocks} blocks")
@@ -787,7 +1130,7 @@ def revert_blocks(self, db, revert_blocks_list):
 
     logger.info(f"index.py | {self.request.id} | num_revert_blocks:{num_revert_blocks}")
 
-    if num_revert_blocks > 10000:
+    if num_revert_blocks > MAX_REVERT_BLOCKS:
         raise Exception("Unexpected revert, >10,0000 blocks")
 
     if num_revert_blocks > 500:
@@ -806,6 +1149,12 @@ def revert_blocks(self, db, revert_blocks_list):
         rebuild_content_list_index = False
         rebuild_digital_content_index = False
         rebuild_user_index = False
+        # Users whose reverted activity may have been fanned out to feeds
+        reverted_feed_user_ids = set()
+        # Followees whose related landlords may reflect reverted follows
+        reverted_followee_user_ids = set()
+        # Entities whose cached responses contain reverted rows
+        changed_entity_ids = get_changed_entity_ids()
 
         for revert_block in revert_blocks_list:
             # Cache relevant information about current block
@@ -1039,7 +1388,63 @@ def revert_blocks(self, db, revert_blocks_list):
             )
             rebuild_digital_content_index = rebuild_digital_content_index or bool(revert_digital_content_entries)
             rebuild_user_index = rebuild_user_index or bool(revert_user_entries)
-    # TODO - if we enable revert, need to set the most_recent_indexed_block_redis_key key in redis
+            reverted_followee_user_ids.update(
+                [follow.followee_user_id for follow in revert_follow_entries]
+            )
+            add_reverted_entity_ids(
+                changed_entity_ids,
+                revert_save_entries,
+                revert_repost_entries,
+                revert_follow_entries,
+                revert_content_list_entries,
+                revert_digital_content_entries,
+                revert_user_entries,
+            )
+            reverted_feed_user_ids.update(
+                [repost.user_id for repost in revert_repost_entries]
+                + [follow.follower_user_id for follow in revert_follow_entries]
+                + [
+                    content_list.content_list_owner_id
+                    for content_list in revert_content_list_entries
+                ]
+                + [
+                    digital_content.owner_id
+                    for digital_content in revert_digital_content_entries
+                ]
+            )
+
+    # The parent of the last reverted block is now current, keep the cached
+    # indexed block in sync so update_task does not treat a reverted tip as indexed
+    last_reverted_block = revert_blocks_list[-1]
+    parent_hash = last_reverted_block.parenthash
+    if parent_hash == default_padded_start_hash:
+        parent_hash = default_config_start_hash
+    redis = update_task.redis
+    redis.set(most_recent_indexed_block_hash_redis_key, parent_hash)
+    if last_reverted_block.number:
+        redis.set(most_recent_indexed_block_redis_key, last_reverted_block.number - 1)
+    # Responses cached from the reverted rows would be served until they expire
+    remove_updated_entities_from_cache(
+        redis, changed_entity_ids, last_reverted_block.number
+    )
+    if changed_entity_ids[USER_CACHE_TAG]:
+        with db.scoped_session() as session:
+            remove_changed_followee_follow_counts(
+                session, redis, changed_entity_ids[USER_CACHE_TAG]
+            )
+    if is_materialized_feed_enabled():
+        add_reverted_block(
+            redis,
+            reverted_feed_blocks_key,
+            last_reverted_block.number,
+            reverted_feed_user_ids,
+        )
+    add_reverted_block(
+        redis,
+        reverted_follow_blocks_key,
+        last_reverted_block.number,
+        reverted_followee_user_ids,
+    )
 
 
 def revert_user_events(session, revert_user_events_entries, revert_block_number):
@@ -1114,6 +1519,17 @@ def update_task(self):
     update_task.social_feature_contract = social_feature_contract
     update_task.user_library_contract = user_library_contract
     update_task.user_replica_set_manager_contract = user_replica_set_manager_contract
+    update_task.event_log_decoder = EventLogDecoder(
+        web3,
+        [
+            digital_content_contract,
+            user_contract,
+            content_list_contract,
+            social_feature_contract,
+            user_library_contract,
+            user_replica_set_manager_contract,
+        ],
+    )
 
     # Update redis cache for health check queries
     update_latest_block_redis()
@@ -1146,63 +1562,75 @@ def update_task(self):
             revert_blocks_list = []
 
             with db.scoped_session() as session:
-                block_intersection_found = False
+                db_current_block_query = (
+                    session.query(Block).filter(Block.is_current == True).all()
+                )
+                assert (
+                    len(db_current_block_query) == 1
+                ), "Expected SINGLE row marked as current"
+                db_current_block = db_current_block_query[0]
+
                 intersect_block_hash = web3.toHex(latest_block.hash)
 
+                # The last committed block is cached in redis, so being up to date
+                # costs a single lookup instead of a walk back through the chain
+                block_intersection_found = (
+                    get_indexed_block_hash_from_redis(redis) == intersect_block_hash
+                    and db_current_block.blockhash == intersect_block_hash
+                )
+
+                # Ancestors of latest_block are batch fetched by number down to the
+                # current indexed block while walking back to the intersection
+                lowest_prefetch_block_number = db_current_block.number or 0
+                prefetched_blocks: Dict[str, Any] = {}
+                # block hash -> whether it is present in the blocks table
+                indexed_block_hashes: Dict[str, bool] = {}
+
                 # First, we capture the block hash at which the current tail
                 # and our indexed data intersect
                 while not block_intersection_found:
                     current_hash = web3.toHex(latest_block.hash)
                     parent_hash = web3.toHex(latest_block.parentHash)
 
-                    latest_block_db_query = session.query(Block).filter(
-                        Block.blockhash == current_hash
-                        and Block.parenthash == parent_hash
-                        and Block.is_current == True
-                    )
-
                     # Exit loop if we are up to date
-                    if latest_block_db_query.count() > 0:
+                    if is_block_hash_indexed(
+                        session, current_hash, prefetched_blocks, indexed_block_hashes
+                    ):
                         block_intersection_found = True
                         intersect_block_hash = current_hash
                         continue
 
                     index_blocks_list.append(latest_block)
 
-                    parent_block_query = session.query(Block).filter(
-                        Block.blockhash == parent_hash
-                    )
-
-                    # Intersection is considered found if current block parenthash is
-                    # present in Blocks table
-                    block_intersection_found = parent_block_query.count() > 0
-
                     num_blocks = len(index_blocks_list)
                     if num_blocks % 50 == 0:
                         logger.info(
                             f"index.py | update_task | Populating index_blocks_list, current length == {num_blocks}"
                         )
 
+                    # Intersection is considered found if current block parenthash is
+                    # present in Blocks table
+                    #
                     # Special case for initial block hash value of 0x0 and 0x0000....
-                    reached_initial_block = parent_hash == default_padded_start_hash
-                    if reached_initial_block:
+                    if parent_hash == default_padded_start_hash:
                         block_intersection_found = True
                         intersect_block_hash = default_config_start_hash
+                    elif is_block_hash_indexed(
+                        session, parent_hash, prefetched_blocks, indexed_block_hashes
+                    ):
+                        block_intersection_found = True
+                        intersect_block_hash = parent_hash
                     else:
-                        latest_block = web3.eth.get_block(parent_hash, True)
+                        latest_block = fetch_parent_block(
+                            latest_block,
+                            prefetched_blocks,
+                            lowest_prefetch_block_number,
+                        )
                         intersect_block_hash = web3.toHex(latest_block.hash)
 
                 # Determine whether current indexed data (is_current == True) matches the
                 # intersection block hash
                 # Important when determining whether undo operations are necessary
-                base_query = session.query(Block)
-                base_query = base_query.filter(Block.is_current == True)
-                db_block_query = base_query.all()
-
-                assert len(db_block_query) == 1, "Expected SINGLE row marked as current"
-                db_current_block = db_block_query[0]
-
-                # Check current block
                 undo_operations_required = (
                     db_current_block.blockhash != intersect_block_hash
                 )
@@ -1213,30 +1641,16 @@ def update_task(self):
                                 Intersect_blockhash : {intersect_block_hash}.\
                                 DB current blockhash {db_current_block.blockhash}"
                     )
+                    # Add blocks to 'block remove' list from the current database block
+                    # back to the valid intersect block
+                    revert_blocks_list = get_revert_blocks(
+                        session, db_current_block, intersect_block_hash
+                    )
                 else:
                     logger.info(
                         f"index.py | update_task | Intersect_blockhash : {intersect_block_hash}"
                     )
 
-                # Assign traverse block to current database block
-                traverse_block = db_current_block
-
-                # Add blocks to 'block remove' list from here as we traverse to the
-                # valid intersect block
-                while traverse_block.blockhash != intersect_block_hash:
-                    revert_blocks_list.append(traverse_block)
-                    parent_query = session.query(Block).filter(
-                        Block.blockhash == traverse_block.parenthash
-                    )
-
-                    if parent_query.count() == 0:
-                        logger.info(
-                            f"index.py | update_task | Special case exit traverse block parenthash - "
-                            f"{traverse_block.parenthash}"
-                        )
-                        break
-                    traverse_block = parent_query[0]
-
                 # Ensure revert blocks list is available after session scope
                 session.expunge_all()
 
@@ -0,0 +1,376 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Set, Tuple
+
+from redis import Redis
+from sqlalchemy.orm.session import Session
+from src.models.content_lists.content_list import ContentList
+from src.models.digitalContents.digital_content import DigitalContent
+from src.models.indexing.block import Block
+from src.models.social.follow import Follow
+from src.models.social.repost import Repost, RepostType
+from src.queries.get_feed import (
+    digitalContentDedupeMaxMinutes,
+    get_same_action_digital_content_ids,
+)
+from src.queries.get_unpopulated_digital_contents import (
+    get_unpopulated_digital_contents,
+)
+from src.queries.materialized_feed import (
+    CONTENT_LIST_FEED_ITEM,
+    DIGITAL_CONTENT_FEED_ITEM,
+    add_feed_items,
+    datetime_to_score,
+    delete_feeds,
+    get_feed_member,
+    get_followers_by_user_id,
+    get_high_follower_user_ids,
+    is_materialized_feed_enabled,
+    remove_feed_items,
+    reverted_feed_blocks_key,
+)
+from src.tasks.aggregates import init_task_and_acquire_lock
+from src.tasks.celery_app import celery
+from src.utils import helpers
+from src.utils.prometheus_metric import save_duration_metric
+from src.utils.reverted_blocks import clear_reverted_blocks, get_reverted_blocks
+from src.utils.session_manager import SessionManager
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_checkpoint,
+    save_indexed_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+FEEDS_CHECKPOINT_NAME = "materialized_feeds"
+INDEX_FEEDS_LOCK = "index_feeds_lock"
+# Blocks to fan out per run, so that a node catching up makes progress
+max_blocks_per_run = 1000
+
+
+def get_fan_out_followers(session, user_ids: Set[int]) -> Dict[int, List[int]]:
+    """Returns the followers of the users of user_ids whose activity is fanned out"""
+    high_follower_user_ids = get_high_follower_user_ids(session, user_ids)
+    return get_followers_by_user_id(
+        session,
+        [user_id for user_id in user_ids if user_id not in high_follower_user_ids],
+    )
+
+
+def get_following_user_ids(
+    session, follower_user_ids: List[int], followee_user_ids: Set[int]
+) -> Set[int]:
+    """Returns the users of follower_user_ids following any of followee_user_ids"""
+    if not follower_user_ids or not followee_user_ids:
+        return set()
+    rows = (
+        session.query(Follow.follower_user_id)
+        .filter(
+            Follow.is_current == True,
+            Follow.is_delete == False,
+            Follow.follower_user_id.in_(follower_user_ids),
+            Follow.followee_user_id.in_(list(followee_user_ids)),
+        )
+        .distinct()
+    )
+    return {follower_user_id for (follower_user_id,) in rows}
+
+
+def get_feed_item_user_ids(session, item_type: str, item_id: int) -> Set[int]:
+    """Returns the users whose activity adds an item to the feeds of their
+    followers, which are its owner and its current reposters"""
+    if item_type == DIGITAL_CONTENT_FEED_ITEM:
+        owner_ids = session.query(DigitalContent.owner_id).filter(
+            DigitalContent.is_current == True,
+            DigitalContent.digital_content_id == item_id,
+        )
+        repost_types = [RepostType.digital_content]
+    else:
+        owner_ids = session.query(ContentList.content_list_owner_id).filter(
+            ContentList.is_current == True,
+            ContentList.content_list_id == item_id,
+        )
+        repost_types = [RepostType.contentList, RepostType.album]
+    reposter_ids = session.query(Repost.user_id).filter(
+        Repost.is_current == True,
+        Repost.is_delete == False,
+        Repost.repost_item_id == item_id,
+        Repost.repost_type.in_(repost_types),
+    )
+    return {user_id for (user_id,) in owner_ids.union(reposter_ids)}
+
+
+def remove_unreposted_feed_items(
+    session, redis, follower_user_ids: List[int], items: Set[Tuple[str, int]]
+):
+    """Removes unreposted items from the feeds of follower_user_ids, except for
+    the followers of users still creating or reposting them"""
+    for item_type, item_id in items:
+        kept_user_ids = get_following_user_ids(
+            session,
+            follower_user_ids,
+            get_feed_item_user_ids(session, item_type, item_id),
+        )
+        remove_feed_items(
+            redis,
+            [user_id for user_id in follower_user_ids if user_id not in kept_user_ids],
+            [get_feed_member(item_type, item_id)],
+        )
+
+
+def fan_out_reverts(session, redis, reverted_user_ids: Set[int]):
+    # Feeds of users whose follows were reverted and of the followers of users
+    # whose digitalContents, contentLists or reposts were reverted are rebuilt
+    # on read
+    followers = get_fan_out_followers(session, reverted_user_ids)
+    feed_user_ids = set(reverted_user_ids)
+    for follower_user_ids in followers.values():
+        feed_user_ids.update(follower_user_ids)
+    delete_feeds(redis, feed_user_ids)
+    return len(feed_user_ids)
+
+
+def fan_out_follows(session, redis, prev_block, current_block):
+    # Feeds of users who followed or unfollowed anyone are rebuilt on read
+    follower_user_ids = {
+        follower_user_id
+        for (follower_user_id,) in session.query(Follow.follower_user_id).filter(
+            Follow.is_current == True,
+            Follow.blocknumber > prev_block,
+            Follow.blocknumber <= current_block,
+        )
+    }
+    delete_feeds(redis, follower_user_ids)
+    return len(follower_user_ids)
+
+
+def get_same_action_digital_content_ids_by_owner(
+    session, digitalContents: List[Dict]
+) -> Set[int]:
+    """Returns the ids of digitalContents created in the same action as a contentList
+    of their owner, which feeds show in place of the digitalContents"""
+    if not digitalContents:
+        return set()
+    owner_ids = {digital_content["owner_id"] for digital_content in digitalContents}
+    created_at = [digital_content["created_at"] for digital_content in digitalContents]
+    content_lists = session.query(ContentList).filter(
+        ContentList.is_current == True,
+        ContentList.is_delete == False,
+        ContentList.is_private == False,
+        ContentList.content_list_owner_id.in_(owner_ids),
+        ContentList.created_at >= min(created_at),
+        ContentList.created_at
+        <= max(created_at) + timedelta(minutes=digitalContentDedupeMaxMinutes),
+    )
+    digital_contents_dict = {
+        digital_content["digital_content_id"]: digital_content
+        for digital_content in digitalContents
+    }
+    digital_content_ids = set()
+    for content_list in content_lists:
+        digital_content_ids.update(
+            get_same_action_digital_content_ids(
+                content_list.content_list_owner_id,
+                content_list.created_at,
+                content_list.content_list_contents,
+                digital_contents_dict,
+            )
+        )
+    return digital_content_ids
+
+
+def fan_out_digital_contents(session, redis, prev_block, current_block):
+    digitalContents = helpers.query_result_to_list(
+        session.query(DigitalContent).filter(
+            DigitalContent.is_current == True,
+            DigitalContent.is_delete == False,
+            DigitalContent.is_unlisted == False,
+            DigitalContent.stem_of == None,
+            DigitalContent.blocknumber > prev_block,
+            DigitalContent.blocknumber <= current_block,
+        )
+    )
+    same_action_digital_content_ids = get_same_action_digital_content_ids_by_owner(
+        session, digitalContents
+    )
+    items_by_owner_id: Dict[int, Dict[str, float]] = defaultdict(dict)
+    for digital_content in digitalContents:
+        if digital_content["digital_content_id"] in same_action_digital_content_ids:
+            continue
+        member = get_feed_member(
+            DIGITAL_CONTENT_FEED_ITEM, digital_content["digital_content_id"]
+        )
+        items_by_owner_id[digital_content["owner_id"]][member] = datetime_to_score(
+            digital_content["created_at"]
+        )
+
+    num_feeds = 0
+    followers = get_fan_out_followers(session, set(items_by_owner_id))
+    for owner_id, follower_user_ids in followers.items():
+        num_feeds += add_feed_items(
+            redis, follower_user_ids, items_by_owner_id[owner_id]
+        )
+    return num_feeds
+
+
+def fan_out_content_lists(session, redis, prev_block, current_block):
+    content_lists = (
+        session.query(ContentList)
+        .filter(
+            ContentList.is_current == True,
+            ContentList.is_delete == False,
+            ContentList.is_private == False,
+            ContentList.blocknumber > prev_block,
+            ContentList.blocknumber <= current_block,
+        )
+        .all()
+    )
+    digital_content_ids = {
+        digital_content["digital_content"]
+        for content_list in content_lists
+        for digital_content in content_list.content_list_contents["digital_content_ids"]
+    }
+    digital_contents_dict = {
+        digital_content["digital_content_id"]: digital_content
+        for digital_content in get_unpopulated_digital_contents(
+            session, digital_content_ids
+        )
+    }
+
+    num_feeds = 0
+    followers = get_fan_out_followers(
+        session, {content_list.content_list_owner_id for content_list in content_lists}
+    )
+    for content_list in content_lists:
+        follower_user_ids = followers.get(content_list.content_list_owner_id)
+        if not follower_user_ids:
+            continue
+        member = get_feed_member(CONTENT_LIST_FEED_ITEM, content_list.content_list_id)
+        num_feeds += add_feed_items(
+            redis,
+            follower_user_ids,
+            {member: datetime_to_score(content_list.created_at)},
+        )
+        # The contentList replaces the digitalContents created in the same action
+        same_action_digital_content_ids = get_same_action_digital_content_ids(
+            content_list.content_list_owner_id,
+            content_list.created_at,
+            content_list.content_list_contents,
+            digital_contents_dict,
+        )
+        remove_feed_items(
+            redis,
+            follower_user_ids,
+            [
+                get_feed_member(DIGITAL_CONTENT_FEED_ITEM, digital_content_id)
+                for digital_content_id in same_action_digital_content_ids
+            ],
+        )
+    return num_feeds
+
+
+def fan_out_reposts(session, redis, prev_block, current_block):
+    reposts = session.query(Repost).filter(
+        Repost.is_current == True,
+        Repost.blocknumber > prev_block,
+        Repost.blocknumber <= current_block,
+    )
+    items_by_user_id: Dict[int, Dict[str, float]] = defaultdict(dict)
+    unreposted_items_by_user_id: Dict[int, Set[Tuple[str, int]]] = defaultdict(set)
+    for repost in reposts:
+        item_type = (
+            DIGITAL_CONTENT_FEED_ITEM
+            if repost.repost_type == RepostType.digital_content
+            else CONTENT_LIST_FEED_ITEM
+        )
+        if repost.is_delete:
+            unreposted_items_by_user_id[repost.user_id].add(
+                (item_type, repost.repost_item_id)
+            )
+            continue
+        items_by_user_id[repost.user_id][
+            get_feed_member(item_type, repost.repost_item_id)
+        ] = datetime_to_score(repost.created_at)
+
+    num_feeds = 0
+    followers = get_fan_out_followers(
+        session, set(items_by_user_id) | set(unreposted_items_by_user_id)
+    )
+    for user_id, follower_user_ids in followers.items():
+        if user_id in unreposted_items_by_user_id:
+            remove_unreposted_feed_items(
+                session,
+                redis,
+                follower_user_ids,
+                unreposted_items_by_user_id[user_id],
+            )
+        if user_id in items_by_user_id:
+            # Feeds keep the creation or oldest repost of items they already have
+            num_feeds += add_feed_items(
+                redis, follower_user_ids, items_by_user_id[user_id], keep_oldest=True
+            )
+    return num_feeds
+
+
+def index_feeds_from_blocks(session: Session, redis: Redis):
+    if not is_materialized_feed_enabled():
+        return
+    latest_block = session.query(Block.number).filter(Block.is_current == True).scalar()
+    if latest_block is None:
+        return
+    prev_block = get_last_indexed_checkpoint(session, FEEDS_CHECKPOINT_NAME)
+    num_reverts, reverted_block, reverted_user_ids = get_reverted_blocks(
+        redis, reverted_feed_blocks_key
+    )
+    if not prev_block:
+        # Feeds are built with the activity up to their first read
+        save_indexed_checkpoint(session, FEEDS_CHECKPOINT_NAME, latest_block)
+        clear_reverted_blocks(redis, reverted_feed_blocks_key, num_reverts)
+        return
+
+    checkpoint = prev_block
+    num_rebuilt_feeds = 0
+    if reverted_block is not None and reverted_block <= prev_block:
+        # Blocks indexed again after the revert are fanned out again
+        num_rebuilt_feeds += fan_out_reverts(session, redis, reverted_user_ids)
+        prev_block = reverted_block - 1
+        logger.info(
+            f"index_feeds.py | index_feeds_from_blocks | Rewound to block {prev_block} after a revert, "
+            f"{num_rebuilt_feeds} feeds to rebuild"
+        )
+    current_block = max(min(latest_block, prev_block + max_blocks_per_run), prev_block)
+
+    if current_block > prev_block:
+        num_rebuilt_feeds += fan_out_follows(session, redis, prev_block, current_block)
+        num_updated_feeds = fan_out_digital_contents(
+            session, redis, prev_block, current_block
+        )
+        num_updated_feeds += fan_out_content_lists(
+            session, redis, prev_block, current_block
+        )
+        num_updated_feeds += fan_out_reposts(session, redis, prev_block, current_block)
+        logger.info(
+            f"index_feeds.py | index_feeds_from_blocks | Fanned out blocks {prev_block + 1}-{current_block}, "
+            f"{num_updated_feeds} feed updates, {num_rebuilt_feeds} feeds to rebuild"
+        )
+    if current_block != checkpoint:
+        save_indexed_checkpoint(session, FEEDS_CHECKPOINT_NAME, current_block)
+    clear_reverted_blocks(redis, reverted_feed_blocks_key, num_reverts)
+
+
+@celery.task(name="index_feeds", bind=True)
+@save_duration_metric(metric_group="celery_task")
+def index_feeds(self):
+    db: SessionManager = index_feeds.db
+    redis: Redis = index_feeds.redis
+    init_task_and_acquire_lock(
+        logger,
+        db,
+        redis,
+        None,
+        index_feeds_from_blocks,
+        60 * 10,
+        None,
+        INDEX_FEEDS_LOCK,
+    )
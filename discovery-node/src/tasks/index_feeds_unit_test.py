@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock, patch
+
+from src.queries.materialized_feed import read_feed, reverted_feed_blocks_key, save_feed
+from src.tasks import index_feeds
+from src.tasks.index_feeds import index_feeds_from_blocks, remove_unreposted_feed_items
+from src.utils.reverted_blocks import add_reverted_block, get_reverted_blocks
+
+
+def test_remove_unreposted_feed_items(redis_mock):
+    """Tests that unreposted items stay in the feeds of followers of their other reposters"""
+    for user_id in [1, 2]:
+        save_feed(redis_mock, user_id, {"digital_content:1": 5, "content_list:2": 4})
+
+    # Follower 2 follows another reposter of the digital_content
+    with patch.object(
+        index_feeds, "get_feed_item_user_ids", return_value={3}
+    ), patch.object(index_feeds, "get_following_user_ids", return_value={2}):
+        remove_unreposted_feed_items(None, redis_mock, [1, 2], {("digital_content", 1)})
+
+    assert read_feed(redis_mock, 1, 0, 10) == [("content_list:2", 4)]
+    assert read_feed(redis_mock, 2, 0, 10) == [
+        ("digital_content:1", 5),
+        ("content_list:2", 4),
+    ]
+
+
+def test_index_feeds_from_blocks_rewinds_reverts(redis_mock):
+    """Tests that reverted feeds are dropped and fanned out again from the revert"""
+    session = MagicMock()
+    session.query.return_value.filter.return_value.scalar.return_value = 120
+    add_reverted_block(redis_mock, reverted_feed_blocks_key, 90, [7])
+    with patch.object(
+        index_feeds, "is_materialized_feed_enabled", return_value=True
+    ), patch.object(
+        index_feeds, "get_last_indexed_checkpoint", return_value=100
+    ), patch.object(
+        index_feeds, "save_indexed_checkpoint"
+    ) as save_indexed_checkpoint, patch.object(
+        index_feeds, "fan_out_reverts", return_value=1
+    ) as fan_out_reverts, patch.object(
+        index_feeds, "fan_out_follows", return_value=0
+    ) as fan_out_follows, patch.object(
+        index_feeds, "fan_out_digital_contents", return_value=0
+    ), patch.object(
+        index_feeds, "fan_out_content_lists", return_value=0
+    ), patch.object(
+        index_feeds, "fan_out_reposts", return_value=0
+    ):
+        index_feeds_from_blocks(session, redis_mock)
+
+    fan_out_reverts.assert_called_once_with(session, redis_mock, {7})
+    fan_out_follows.assert_called_once_with(session, redis_mock, 89, 120)
+    save_indexed_checkpoint.assert_called_once_with(
+        session, index_feeds.FEEDS_CHECKPOINT_NAME, 120
+    )
+    assert get_reverted_blocks(redis_mock, reverted_feed_blocks_key) == (0, None, set())
@@ -1,8 +1,12 @@
 import logging
 import time
+from datetime import datetime, timedelta
 from typing import List
 
 from sqlalchemy import desc, func
+from src.models.social.hourly_digital_content_play_counts import (
+    HourlyDigitalContentPlayCount,
+)
 from src.models.social.hourly_play_counts import HourlyPlayCount
 from src.models.social.play import Play
 from src.tasks.celery_app import celery
@@ -23,6 +27,26 @@ UPSERT_HOURLY_PLAY_COUNTS_QUERY = """
     DO UPDATE SET play_count = hourly_play_counts.play_count + EXCLUDED.play_count;
     """
 
+HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_TABLE_NAME = "hourly_digital_content_play_counts"
+
+# Buckets older than the longest trending window (year) are no longer read
+HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_RETENTION = timedelta(weeks=53)
+
+UPSERT_HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_QUERY = """
+    INSERT INTO hourly_digital_content_play_counts
+        (digital_content_id, hourly_timestamp, play_count)
+    SELECT
+        play_item_id,
+        date_trunc('hour', created_at),
+        count(id)
+    FROM plays
+    WHERE id > :prev_id_checkpoint AND id <= :new_id_checkpoint
+    GROUP BY play_item_id, date_trunc('hour', created_at)
+    ON CONFLICT (digital_content_id, hourly_timestamp)
+    DO UPDATE SET play_count =
+        hourly_digital_content_play_counts.play_count + EXCLUDED.play_count;
+    """
+
 
 def _index_hourly_play_counts(session):
     # get checkpoints
@@ -67,6 +91,40 @@ def _index_hourly_play_counts(session):
     save_indexed_checkpoint(session, HOURLY_PLAY_COUNTS_TABLE_NAME, new_id_checkpoint)
 
 
+def _index_hourly_digital_content_play_counts(session):
+    """Adds the plays since the last checkpoint to the per digital_content hourly
+    buckets that windowed trending listen counts are summed from"""
+    prev_id_checkpoint = get_last_indexed_checkpoint(
+        session, HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_TABLE_NAME
+    )
+
+    new_id_checkpoint = (session.query(func.max(Play.id))).scalar()
+
+    if not new_id_checkpoint or new_id_checkpoint == prev_id_checkpoint:
+        logger.info(
+            "index_hourly_play_counts.py | Skip digital_content update because there are no new plays"
+        )
+        return
+
+    # aggregate and upsert the new plays in a single statement
+    session.execute(
+        UPSERT_HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_QUERY,
+        {
+            "prev_id_checkpoint": prev_id_checkpoint,
+            "new_id_checkpoint": new_id_checkpoint,
+        },
+    )
+
+    session.query(HourlyDigitalContentPlayCount).filter(
+        HourlyDigitalContentPlayCount.hourly_timestamp
+        < datetime.now() - HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_RETENTION
+    ).delete(synchronize_session=False)
+
+    save_indexed_checkpoint(
+        session, HOURLY_DIGITAL_CONTENT_PLAY_COUNTS_TABLE_NAME, new_id_checkpoint
+    )
+
+
 # ####### CELERY TASKS ####### #
 @celery.task(name="index_hourly_play_counts", bind=True)
 @save_duration_metric(metric_group="celery_task")
@@ -92,6 +150,7 @@ def index_hourly_play_counts(self):
 
             with db.scoped_session() as session:
                 _index_hourly_play_counts(session)
+                _index_hourly_digital_content_play_counts(session)
 
             logger.info(
                 f"index_hourly_play_counts.py | Finished updating \
@@ -1,5 +1,6 @@
 import logging
 
+from redis import Redis
 from src.queries.get_related_landlords_minhash import update_related_landlord_minhash
 from src.tasks.celery_app import celery
 from src.utils.prometheus_metric import save_duration_metric
@@ -8,10 +9,10 @@ from src.utils.session_manager import SessionManager
 logger = logging.getLogger(__name__)
 
 
-def process_related_landlords(db: SessionManager):
+def process_related_landlords(db: SessionManager, redis: Redis):
     with db.scoped_session() as session:
         logger.info("index_related_landlords.py | starting")
-        update_related_landlord_minhash(session)
+        update_related_landlord_minhash(session, redis)
         logger.info("index_related_landlords.py | done")
 
 
@@ -25,7 +26,7 @@ def index_related_landlords(self):
     try:
         have_lock = update_lock.acquire(blocking=False)
         if have_lock:
-            process_related_landlords(db)
+            process_related_landlords(db, redis)
         else:
             logger.info("index_related_landlords.py | Failed to acquire lock")
     except Exception as e:
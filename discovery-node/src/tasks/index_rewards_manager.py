@@ -1,8 +1,7 @@
-import concurrent.futures
 import datetime
 import logging
 import time
-from typing import Callable, List, Optional, TypedDict
+from typing import List, Optional, TypedDict
 
 import base58
 from redis import Redis
@@ -13,30 +12,22 @@ from src.models.rewards.reward_manager import RewardManagerTransaction
 from src.models.rewards.user_challenge import UserChallenge
 from src.models.users.user import User
 from src.queries.get_balances import enqueue_immediate_balance_refresh
-from src.solana.constants import (
-    FETCH_TX_SIGNATURES_BATCH_SIZE,
-    TX_SIGNATURES_MAX_BATCHES,
-    TX_SIGNATURES_RESIZE_LENGTH,
-)
 from src.solana.solana_client_manager import SolanaClientManager
 from src.solana.solana_parser import (
     InstructionFormat,
     SolanaInstructionType,
     parse_instruction_data,
 )
+from src.solana.solana_signature_crawler import SignatureCrawlHandler
 from src.solana.solana_transaction_types import (
+    ConfirmedTransaction,
     ResultMeta,
     TransactionInfoResult,
     TransactionMessage,
     TransactionMessageInstruction,
 )
-from src.tasks.celery_app import celery
-from src.utils.cache_solana_program import (
-    cache_latest_sol_db_tx,
-    fetch_and_cache_latest_program_tx_redis,
-)
+from src.utils.cache_solana_program import cache_latest_sol_db_tx
 from src.utils.config import shared_config
-from src.utils.prometheus_metric import save_duration_metric
 from src.utils.redis_constants import (
     latest_sol_rewards_manager_db_tx_key,
     latest_sol_rewards_manager_program_tx_key,
@@ -173,15 +164,21 @@ def get_valid_instruction(
 def fetch_and_parse_sol_rewards_transfer_instruction(
     solana_client_manager: SolanaClientManager, tx_sig: str
 ) -> RewardManagerTransactionInfo:
-    """Fetches metadata for rewards transfer transactions and parses data
+    """Fetches metadata for rewards transfer transactions and parses data"""
+    tx_info = solana_client_manager.get_sol_tx_info(tx_sig)
+    return parse_sol_rewards_transfer_instruction(tx_info, tx_sig)
+
+
+def parse_sol_rewards_transfer_instruction(
+    tx_info: ConfirmedTransaction, tx_sig: str
+) -> RewardManagerTransactionInfo:
+    """Parses data of rewards transfer transactions
 
-    Fetches the transaction metadata from solana using the tx signature
-    Checks the metadata for a transfer instruction
+    Checks the transaction metadata for a transfer instruction
     Decodes and parses the transfer instruction metadata
     Validates the metadata fields
     """
     try:
-        tx_info = solana_client_manager.get_sol_tx_info(tx_sig)
         result: TransactionInfoResult = tx_info["result"]
         # Create transaction metadata
         tx_metadata: RewardManagerTransactionInfo = {
@@ -356,226 +353,50 @@ def get_tx_in_db(session: Session, tx_sig: str) -> bool:
     return exists
 
 
-def get_transaction_signatures(
-    solana_client_manager: SolanaClientManager,
-    db: SessionManager,
-    program: str,
-    get_latest_slot: Callable[[Session], int],
-    check_tx_exists: Callable[[Session, str], bool],
-    min_slot=None,
-) -> List[List[str]]:
-    """Fetches next batch of transaction signature offset from the previous latest processed slot
+class RewardsManagerHandler(SignatureCrawlHandler):
+    """Indexes challenge disbursements from the transactions of the reward manager program"""
 
-    Fetches the latest processed slot for the rewards manager program
-    Iterates backwards from the current tx until an intersection is found with the latest processed slot
-    Returns the next set of transaction signature from the current offset slot to process
-    """
-    # List of signatures that will be populated as we traverse recent operations
-    transaction_signatures = []
-
-    last_tx_signature = None
+    label = "index_rewards_manager"
+    program = REWARDS_MANAGER_PROGRAM
+    program_tx_key = latest_sol_rewards_manager_program_tx_key
+    db_tx_key = latest_sol_rewards_manager_db_tx_key
+    slot_key = latest_sol_rewards_manager_slot_key
+    min_slot = MIN_SLOT
 
-    # Loop exit condition
-    intersection_found = False
+    def __init__(self, db: SessionManager, redis: Redis):
+        self.db = db
+        self.redis = redis
 
-    # Query for solana transactions until an intersection is found
-    with db.scoped_session() as session:
-        latest_processed_slot = get_latest_slot(session)
-        while not intersection_found:
-            transactions_history = solana_client_manager.get_signatures_for_address(
-                program, before=last_tx_signature, limit=FETCH_TX_SIGNATURES_BATCH_SIZE
+    def is_enabled(self):
+        if not is_valid_rewards_manager_program:
+            logger.error(
+                "index_rewards_manager.py | no valid reward manager program passed"
             )
+            return False
+        if not REWARDS_MANAGER_ACCOUNT:
+            logger.error("index_rewards_manager.py | reward manager account missing")
+            return False
+        return True
 
-            transactions_array = transactions_history["result"]
-            if not transactions_array:
-                intersection_found = True
-                logger.info(
-                    f"index_rewards_manager.py | No transactions found before {last_tx_signature}"
-                )
-            else:
-                # Current batch of transactions
-                transaction_signature_batch = []
-                for tx_info in transactions_array:
-                    tx_sig = tx_info["signature"]
-                    tx_slot = tx_info["slot"]
-                    logger.info(
-                        f"index_rewards_manager.py | Processing tx={tx_sig} | slot={tx_slot}"
-                    )
-                    if tx_info["slot"] > latest_processed_slot:
-                        transaction_signature_batch.append(tx_sig)
-                    elif tx_info["slot"] <= latest_processed_slot and (
-                        min_slot is None or tx_info["slot"] > min_slot
-                    ):
-                        # Check the tx signature for any txs in the latest batch,
-                        # and if not present in DB, add to processing
-                        logger.info(
-                            f"index_rewards_manager.py | Latest slot re-traversal\
-                            slot={tx_slot}, sig={tx_sig},\
-                            latest_processed_slot(db)={latest_processed_slot}"
-                        )
-                        exists = check_tx_exists(session, tx_sig)
-                        if exists:
-                            intersection_found = True
-                            break
-                        # Ensure this transaction is still processed
-                        transaction_signature_batch.append(tx_sig)
-
-                # Restart processing at the end of this transaction signature batch
-                last_tx = transactions_array[-1]
-                last_tx_signature = last_tx["signature"]
-
-                # Append batch of processed signatures
-                if transaction_signature_batch:
-                    transaction_signatures.append(transaction_signature_batch)
-
-                # Ensure processing does not grow unbounded
-                if len(transaction_signatures) > TX_SIGNATURES_MAX_BATCHES:
-                    # Only take the oldest transaction from the transaction_signatures array
-                    # transaction_signatures is sorted from newest to oldest
-                    transaction_signatures = transaction_signatures[
-                        -TX_SIGNATURES_RESIZE_LENGTH:
-                    ]
-
-    # Reverse batches aggregated so oldest transactions are processed first
-    transaction_signatures.reverse()
-    return transaction_signatures
-
-
-def process_transaction_signatures(
-    solana_client_manager: SolanaClientManager,
-    db: SessionManager,
-    redis: Redis,
-    transaction_signatures: List[List[str]],
-):
-    """Concurrently processes the transactions to update the DB state for reward transfer instructions"""
-    last_tx_sig: Optional[str] = None
-    last_tx: Optional[RewardManagerTransactionInfo] = None
-    if transaction_signatures and transaction_signatures[-1]:
-        last_tx_sig = transaction_signatures[-1][0]
-
-    for tx_sig_batch in transaction_signatures:
-        logger.info(f"index_rewards_manager.py | processing {tx_sig_batch}")
-        batch_start_time = time.time()
-
-        transfer_instructions: List[RewardManagerTransactionInfo] = []
-        # Process each batch in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            parse_sol_tx_futures = {
-                executor.submit(
-                    fetch_and_parse_sol_rewards_transfer_instruction,
-                    solana_client_manager,
-                    tx_sig,
-                ): tx_sig
-                for tx_sig in tx_sig_batch
-            }
-            for future in concurrent.futures.as_completed(parse_sol_tx_futures):
-                try:
-                    # No return value expected here so we just ensure all futures are resolved
-                    parsed_solana_transfer_instruction = future.result()
-                    if parsed_solana_transfer_instruction is not None:
-                        transfer_instructions.append(parsed_solana_transfer_instruction)
-                        if (
-                            last_tx_sig
-                            and last_tx_sig
-                            == parsed_solana_transfer_instruction["tx_sig"]
-                        ):
-                            last_tx = parsed_solana_transfer_instruction
-                except Exception as exc:
-                    logger.error(f"index_rewards_manager.py | {exc}")
-                    raise exc
-        with db.scoped_session() as session:
-            process_batch_sol_reward_manager_txs(session, transfer_instructions, redis)
-        batch_end_time = time.time()
-        batch_duration = batch_end_time - batch_start_time
-        logger.info(
-            f"index_rewards_manager.py | processed batch {len(tx_sig_batch)} txs in {batch_duration}s"
-        )
-
-    if last_tx:
-        cache_latest_sol_rewards_manager_db_tx(
-            redis,
-            {
-                "signature": last_tx["tx_sig"],
-                "slot": last_tx["slot"],
-                "timestamp": last_tx["timestamp"],
-            },
-        )
-    return last_tx
-
+    def get_latest_slot(self, session):
+        return get_latest_reward_disbursment_slot(session)
 
-def process_solana_rewards_manager(
-    solana_client_manager: SolanaClientManager, db: SessionManager, redis: Redis
-):
-    """Fetches the next set of reward manager transactions and updates the DB with Challenge Disbursements"""
-    if not is_valid_rewards_manager_program:
-        logger.error(
-            "index_rewards_manager.py | no valid reward manager program passed"
-        )
-        return
-    if not REWARDS_MANAGER_ACCOUNT:
-        logger.error("index_rewards_manager.py | reward manager account missing")
-        return
+    def is_tx_in_db(self, session, tx_sig):
+        return get_tx_in_db(session, tx_sig)
 
-    # Get the latests slot available globally before fetching txs to keep digital_content of indexing progress
-    try:
-        latest_global_slot = solana_client_manager.get_slot()
-    except:
-        logger.error("index_rewards_manager.py | Failed to get slot")
-
-    # List of signatures that will be populated as we traverse recent operations
-    transaction_signatures = get_transaction_signatures(
-        solana_client_manager,
-        db,
-        REWARDS_MANAGER_PROGRAM,
-        get_latest_reward_disbursment_slot,
-        get_tx_in_db,
-        MIN_SLOT,
-    )
-    logger.info(f"index_rewards_manager.py | {transaction_signatures}")
-
-    last_tx = process_transaction_signatures(
-        solana_client_manager, db, redis, transaction_signatures
-    )
-    if last_tx:
-        redis.set(latest_sol_rewards_manager_slot_key, last_tx["slot"])
-    elif latest_global_slot is not None:
-        redis.set(latest_sol_rewards_manager_slot_key, latest_global_slot)
-
-
-# ####### CELERY TASKS ####### #
-@celery.task(name="index_rewards_manager", bind=True)
-@save_duration_metric(metric_group="celery_task")
-def index_rewards_manager(self):
-    redis = index_rewards_manager.redis
-    solana_client_manager = index_rewards_manager.solana_client_manager
-    db = index_rewards_manager.db
-
-    # Define lock acquired boolean
-    have_lock = False
-    # Max duration of lock is 4hrs or 14400 seconds
-    update_lock = redis.lock("solana_rewards_manager_lock", timeout=14400)
-
-    try:
-        # Cache latest tx outside of lock
-        fetch_and_cache_latest_program_tx_redis(
-            solana_client_manager,
-            redis,
-            REWARDS_MANAGER_PROGRAM,
-            latest_sol_rewards_manager_program_tx_key,
-        )
-
-        # Attempt to acquire lock - do not block if unable to acquire
-        have_lock = update_lock.acquire(blocking=False)
-        if have_lock:
-            logger.info("index_rewards_manager.py | Acquired lock")
-            process_solana_rewards_manager(solana_client_manager, db, redis)
-        else:
-            logger.info("index_rewards_manager.py | Failed to acquire lock")
-    except Exception as e:
-        logger.error(
-            "index_rewards_manager.py | Fatal error in main loop", exc_info=True
+    def process_batch(self, tx_sig_batch_records, fetched_txs):
+        """Updates the DB state for the reward transfer instructions of a batch"""
+        logger.info(f"index_rewards_manager.py | processing {len(fetched_txs)} txs")
+        batch_start_time = time.time()
+        transfer_instructions: List[RewardManagerTransactionInfo] = [
+            parse_sol_rewards_transfer_instruction(tx_info, tx_sig)
+            for tx_sig, tx_info, _ in fetched_txs
+        ]
+        with self.db.scoped_session() as session:
+            process_batch_sol_reward_manager_txs(
+                session, transfer_instructions, self.redis
+            )
+        batch_duration = time.time() - batch_start_time
+        logger.info(
+            f"index_rewards_manager.py | processed batch {len(fetched_txs)} txs in {batch_duration}s"
         )
-        raise e
-    finally:
-        if have_lock:
-            update_lock.release()
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from src.tasks.index_solana_plays import PlayColumns, format_copy_value
+
+
+def test_play_columns_copy_buffer():
+    assert format_copy_value(None) == "\\N"
+    assert format_copy_value("a\\b\tc\nd") == "a\\\\b\\tc\\nd"
+
+    created_at = datetime(2022, 1, 1, 12, 30)
+    plays = PlayColumns()
+    plays.append(1, 10, created_at, created_at, "src", None, None, "US", 5, "sig1")
+    plays.append(None, 11, created_at, created_at, None, None, None, None, 6, "sig2")
+    assert len(plays) == 2
+    assert plays.to_copy_buffer().read().splitlines() == [
+        "1\t10\t2022-01-01 12:30:00\t2022-01-01 12:30:00\tsrc\t\\N\t\\N\tUS\t5\tsig1",
+        "\\N\t11\t2022-01-01 12:30:00\t2022-01-01 12:30:00\t\\N\t\\N\t\\N\t\\N\t6\tsig2",
+    ]
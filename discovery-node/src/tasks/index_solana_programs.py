@@ -0,0 +1,74 @@
+import logging
+from typing import List
+
+from src.challenges.challenge_event_bus import ChallengeEventBus
+from src.solana.solana_signature_crawler import (
+    SignatureCrawlHandler,
+    SolanaSignatureCrawler,
+)
+from src.tasks.celery_app import celery
+from src.tasks.index_rewards_manager import RewardsManagerHandler
+from src.tasks.index_solana_plays import SolanaPlaysHandler
+from src.tasks.index_spl_token import SplTokenHandler
+from src.tasks.index_user_bank import UserBankHandler
+from src.utils.prometheus_metric import save_duration_metric
+
+logger = logging.getLogger(__name__)
+
+index_solana_programs_lock = "solana_programs_lock"
+
+
+def get_solana_program_handlers(
+    db, redis, solana_client_manager, challenge_bus: ChallengeEventBus
+) -> List[SignatureCrawlHandler]:
+    handlers: List[SignatureCrawlHandler] = [
+        SolanaPlaysHandler(db, redis, challenge_bus),
+        UserBankHandler(db, redis, challenge_bus),
+        RewardsManagerHandler(db, redis),
+        SplTokenHandler(db, solana_client_manager, redis),
+    ]
+    return [handler for handler in handlers if handler.is_enabled()]
+
+
+@celery.task(name="index_solana_programs", bind=True)
+@save_duration_metric(metric_group="celery_task")
+def index_solana_programs(self):
+    # Cache custom task class properties
+    # Details regarding custom task context can be found in wiki
+    # Custom Task definition can be found in src/app.py
+    redis = index_solana_programs.redis
+    db = index_solana_programs.db
+    solana_client_manager = index_solana_programs.solana_client_manager
+    challenge_bus: ChallengeEventBus = index_solana_programs.challenge_event_bus
+    crawler = SolanaSignatureCrawler(
+        solana_client_manager,
+        db,
+        redis,
+        get_solana_program_handlers(db, redis, solana_client_manager, challenge_bus),
+    )
+    # Define lock acquired boolean
+    have_lock = False
+    # Define redis lock object
+    # Max duration of lock is 4hrs or 14400 seconds
+    update_lock = redis.lock(index_solana_programs_lock, timeout=14400)
+
+    try:
+        # Attempt to acquire lock - do not block if unable to acquire
+        have_lock = update_lock.acquire(blocking=False)
+        if have_lock:
+            logger.info("index_solana_programs.py | Acquired lock")
+            with challenge_bus.use_scoped_dispatch_queue():
+                crawler.crawl()
+        else:
+            logger.info("index_solana_programs.py | Failed to acquire lock")
+            # Ensures a lock held for a long time (usually during catchup scenarios)
+            # does not prevent a refresh of the latest known transactions
+            crawler.cache_latest_program_txs()
+    except Exception as e:
+        logger.error(
+            "index_solana_programs.py | Fatal error in main loop", exc_info=True
+        )
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
@@ -0,0 +1,74 @@
+import src.tasks.index
+from src.tasks.index import get_index_blocks_prefetch_depth, schedule_block_prefetches
+
+
+class TestBlock:
+    def __init__(self, number):
+        self.number = number
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        block = args[-1]
+        self.submitted.append(block.number)
+        return block.number
+
+
+def test_get_index_blocks_prefetch_depth():
+    assert get_index_blocks_prefetch_depth({"discprov": {}}) == 0
+    assert (
+        get_index_blocks_prefetch_depth(
+            {"discprov": {"index_blocks_prefetch_depth": ""}}
+        )
+        == 0
+    )
+    assert (
+        get_index_blocks_prefetch_depth(
+            {"discprov": {"index_blocks_prefetch_depth": "4"}}
+        )
+        == 4
+    )
+
+
+def test_schedule_block_prefetches(monkeypatch):
+    """Tests that prefetches are submitted in indexing order without duplicates"""
+    executor = FakeExecutor()
+    monkeypatch.setattr(
+        src.tasks.index,
+        "get_index_blocks_prefetch_executor",
+        lambda prefetch_depth: executor,
+    )
+
+    # blocks_list is ordered newest first, indexing starts from the end
+    blocks_list = [TestBlock(number) for number in [105, 104, 103, 102, 101, 100]]
+    prefetch_futures = {}
+
+    schedule_block_prefetches(None, None, blocks_list, 5, 2, prefetch_futures)
+    assert executor.submitted == [100, 101, 102]
+
+    prefetch_futures.pop(100)
+    schedule_block_prefetches(None, None, blocks_list, 4, 2, prefetch_futures)
+    assert executor.submitted == [100, 101, 102, 103]
+
+    # Near the tip only the remaining blocks are prefetched
+    schedule_block_prefetches(None, None, blocks_list, 1, 2, prefetch_futures)
+    assert executor.submitted == [100, 101, 102, 103, 104, 105]
+    assert sorted(prefetch_futures.keys()) == [101, 102, 103, 104, 105]
+
+
+def test_schedule_block_prefetches_disabled(monkeypatch):
+    executor = FakeExecutor()
+    monkeypatch.setattr(
+        src.tasks.index,
+        "get_index_blocks_prefetch_executor",
+        lambda prefetch_depth: executor,
+    )
+    blocks_list = [TestBlock(number) for number in [101, 100]]
+    prefetch_futures = {}
+
+    schedule_block_prefetches(None, None, blocks_list, 1, 0, prefetch_futures)
+    assert not executor.submitted
+    assert not prefetch_futures
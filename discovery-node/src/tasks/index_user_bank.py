@@ -1,4 +1,3 @@
-import concurrent.futures
 import datetime
 import logging
 import re
@@ -16,18 +15,13 @@ from src.models.users.user import User
 from src.models.users.user_bank import UserBankAccount, UserBankTx
 from src.models.users.user_tip import UserTip
 from src.queries.get_balances import enqueue_immediate_balance_refresh
-from src.solana.constants import (
-    FETCH_TX_SIGNATURES_BATCH_SIZE,
-    TX_SIGNATURES_MAX_BATCHES,
-    TX_SIGNATURES_RESIZE_LENGTH,
-)
-from src.solana.solana_client_manager import SolanaClientManager
 from src.solana.solana_helpers import SPL_TOKEN_ID_PK, get_address_pair
 from src.solana.solana_parser import (
     InstructionFormat,
     SolanaInstructionType,
     parse_instruction_data,
 )
+from src.solana.solana_signature_crawler import SignatureCrawlHandler
 from src.solana.solana_transaction_types import (
     ConfirmedTransaction,
     ResultMeta,
@@ -35,13 +29,8 @@ from src.solana.solana_transaction_types import (
     TransactionMessage,
     TransactionMessageInstruction,
 )
-from src.tasks.celery_app import celery
-from src.utils.cache_solana_program import (
-    cache_latest_sol_db_tx,
-    fetch_and_cache_latest_program_tx_redis,
-)
+from src.utils.cache_solana_program import cache_latest_sol_db_tx
 from src.utils.config import shared_config
-from src.utils.prometheus_metric import save_duration_metric
 from src.utils.redis_constants import (
     latest_sol_user_bank_db_tx_key,
     latest_sol_user_bank_program_tx_key,
@@ -366,12 +355,11 @@ def process_user_bank_tx_details(
 
 def parse_user_bank_transaction(
     session: Session,
-    solana_client_manager: SolanaClientManager,
+    tx_info: ConfirmedTransaction,
     tx_sig,
     redis,
     challenge_event_bus: ChallengeEventBus,
 ):
-    tx_info = solana_client_manager.get_sol_tx_info(tx_sig)
     tx_slot = tx_info["result"]["slot"]
     timestamp = tx_info["result"]["blockTime"]
     parsed_timestamp = datetime.datetime.utcfromtimestamp(timestamp)
@@ -385,195 +373,50 @@ def parse_user_bank_transaction(
         session, redis, tx_info, tx_sig, parsed_timestamp, challenge_event_bus
     )
     session.add(UserBankTx(signature=tx_sig, slot=tx_slot, created_at=parsed_timestamp))
-    return (tx_info["result"], tx_sig)
-
 
-def process_user_bank_txs():
-    solana_client_manager: SolanaClientManager = index_user_bank.solana_client_manager
-    challenge_bus: ChallengeEventBus = index_user_bank.challenge_event_bus
-    db = index_user_bank.db
-    redis = index_user_bank.redis
-    logger.info("index_user_bank.py | Acquired lock")
 
-    # Exit if required configs are not found
-    if not WDGC_MINT_PUBKEY or not USER_BANK_KEY:
-        logger.error(
-            f"index_user_bank.py | Missing required configuration"
-            f"WDGC_PROGRAM_PUBKEY: {WDGC_MINT_PUBKEY} USER_BANK_KEY: {USER_BANK_KEY}- exiting."
-        )
-        return
+class UserBankHandler(SignatureCrawlHandler):
+    """Indexes user bank accounts and transfers from the transactions of the user bank program"""
 
-    # List of signatures that will be populated as we traverse recent operations
-    transaction_signatures = []
+    label = "index_user_bank"
+    program = USER_BANK_ADDRESS
+    program_tx_key = latest_sol_user_bank_program_tx_key
+    db_tx_key = latest_sol_user_bank_db_tx_key
+    slot_key = latest_sol_user_bank_slot_key
+    min_slot = MIN_SLOT
 
-    last_tx_signature = None
+    def __init__(self, db, redis: Redis, challenge_bus: ChallengeEventBus):
+        self.db = db
+        self.redis = redis
+        self.challenge_bus = challenge_bus
 
-    # Loop exit condition
-    intersection_found = False
-
-    # Get the latests slot available globally before fetching txs to keep digital_content of indexing progress
-    try:
-        latest_global_slot = solana_client_manager.get_slot()
-    except:
-        logger.error("index_user_bank.py | Failed to get block height")
+    def is_enabled(self):
+        # Exit if required configs are not found
+        if not WDGC_MINT_PUBKEY or not USER_BANK_KEY:
+            logger.error(
+                f"index_user_bank.py | Missing required configuration"
+                f"WDGC_PROGRAM_PUBKEY: {WDGC_MINT_PUBKEY} USER_BANK_KEY: {USER_BANK_KEY}- exiting."
+            )
+            return False
+        return True
 
-    # Query for solana transactions until an intersection is found
-    with db.scoped_session() as session:
+    def get_latest_slot(self, session):
         latest_processed_slot = get_highest_user_bank_tx_slot(session)
         logger.info(f"index_user_bank.py | high tx = {latest_processed_slot}")
-        while not intersection_found:
-            transactions_history = solana_client_manager.get_signatures_for_address(
-                USER_BANK_ADDRESS,
-                before=last_tx_signature,
-                limit=FETCH_TX_SIGNATURES_BATCH_SIZE,
-            )
-            transactions_array = transactions_history["result"]
-            if not transactions_array:
-                intersection_found = True
-                logger.info(
-                    f"index_user_bank.py | No transactions found before {last_tx_signature}"
-                )
-            else:
-                # Current batch of transactions
-                transaction_signature_batch = []
-                for tx_info in transactions_array:
-                    tx_sig = tx_info["signature"]
-                    tx_slot = tx_info["slot"]
-                    logger.info(
-                        f"index_user_bank.py | Processing tx={tx_sig} | slot={tx_slot}"
-                    )
-                    if tx_info["slot"] > latest_processed_slot:
-                        transaction_signature_batch.append(tx_sig)
-                    elif (
-                        tx_info["slot"] <= latest_processed_slot
-                        and tx_info["slot"] > MIN_SLOT
-                    ):
-                        # Check the tx signature for any txs in the latest batch,
-                        # and if not present in DB, add to processing
-                        logger.info(
-                            f"index_user_bank.py | Latest slot re-traversal\
-                            slot={tx_slot}, sig={tx_sig},\
-                            latest_processed_slot(db)={latest_processed_slot}"
-                        )
-                        exists = get_tx_in_db(session, tx_sig)
-                        if exists:
-                            intersection_found = True
-                            break
-                        # Ensure this transaction is still processed
-                        transaction_signature_batch.append(tx_sig)
-
-                # Restart processing at the end of this transaction signature batch
-                last_tx = transactions_array[-1]
-                last_tx_signature = last_tx["signature"]
-
-                # Append batch of processed signatures
-                if transaction_signature_batch:
-                    transaction_signatures.append(transaction_signature_batch)
-
-                # Ensure processing does not grow unbounded
-                if len(transaction_signatures) > TX_SIGNATURES_MAX_BATCHES:
-                    prev_len = len(transaction_signatures)
-                    # Only take the oldest transaction from the transaction_signatures array
-                    # transaction_signatures is sorted from newest to oldest
-                    transaction_signatures = transaction_signatures[
-                        -TX_SIGNATURES_RESIZE_LENGTH:
-                    ]
-                    logger.info(
-                        f"index_user_bank.py | sliced tx_sigs from {prev_len} to {len(transaction_signatures)} entries"
-                    )
+        return latest_processed_slot
 
-    # Reverse batches aggregated so oldest transactions are processed first
-    transaction_signatures.reverse()
+    def is_tx_in_db(self, session, tx_sig):
+        return get_tx_in_db(session, tx_sig)
 
-    last_tx_sig: Optional[str] = None
-    last_tx = None
-    if transaction_signatures and transaction_signatures[-1]:
-        last_tx_sig = transaction_signatures[-1][0]
-
-    num_txs_processed = 0
-    for tx_sig_batch in transaction_signatures:
-        logger.info(f"index_user_bank.py | processing {tx_sig_batch}")
+    def process_batch(self, tx_sig_batch_records, fetched_txs):
+        logger.info(f"index_user_bank.py | processing {len(fetched_txs)} txs")
         batch_start_time = time.time()
-        # Process each batch in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            with db.scoped_session() as session:
-                parse_sol_tx_futures = {
-                    executor.submit(
-                        parse_user_bank_transaction,
-                        session,
-                        solana_client_manager,
-                        tx_sig,
-                        redis,
-                        challenge_bus,
-                    ): tx_sig
-                    for tx_sig in tx_sig_batch
-                }
-                for future in concurrent.futures.as_completed(parse_sol_tx_futures):
-                    try:
-                        # No return value expected here so we just ensure all futures are resolved
-                        tx_info, tx_sig = future.result()
-                        if tx_info and last_tx_sig and last_tx_sig == tx_sig:
-                            last_tx = tx_info
-
-                        num_txs_processed += 1
-                    except Exception as exc:
-                        logger.error(f"index_user_bank.py | error {exc}", exc_info=True)
-                        raise
-
-        batch_end_time = time.time()
-        batch_duration = batch_end_time - batch_start_time
+        with self.db.scoped_session() as session:
+            for tx_sig, tx_info, _ in fetched_txs:
+                parse_user_bank_transaction(
+                    session, tx_info, tx_sig, self.redis, self.challenge_bus
+                )
+        batch_duration = time.time() - batch_start_time
         logger.info(
-            f"index_user_bank.py | processed batch {len(tx_sig_batch)} txs in {batch_duration}s"
-        )
-
-    if last_tx and last_tx_sig:
-        cache_latest_sol_user_bank_db_tx(
-            redis,
-            {
-                "signature": last_tx_sig,
-                "slot": last_tx["slot"],
-                "timestamp": last_tx["blockTime"],
-            },
-        )
-    if last_tx:
-        redis.set(latest_sol_user_bank_slot_key, last_tx["slot"])
-    elif latest_global_slot is not None:
-        redis.set(latest_sol_user_bank_slot_key, latest_global_slot)
-
-
-# ####### CELERY TASKS ####### #
-@celery.task(name="index_user_bank", bind=True)
-@save_duration_metric(metric_group="celery_task")
-def index_user_bank(self):
-    # Cache custom task class properties
-    # Details regarding custom task context can be found in wiki
-    # Custom Task definition can be found in src/__init__.py
-    redis = index_user_bank.redis
-    # Define lock acquired boolean
-    have_lock = False
-    # Define redis lock object
-    update_lock = redis.lock("user_bank_lock", timeout=10 * 60)
-
-    try:
-        # Cache latest tx outside of lock
-        fetch_and_cache_latest_program_tx_redis(
-            index_user_bank.solana_client_manager,
-            redis,
-            USER_BANK_ADDRESS,
-            latest_sol_user_bank_program_tx_key,
+            f"index_user_bank.py | processed batch {len(fetched_txs)} txs in {batch_duration}s"
         )
-        # Attempt to acquire lock - do not block if unable to acquire
-        have_lock = update_lock.acquire(blocking=False)
-        if have_lock:
-            challenge_bus: ChallengeEventBus = index_user_bank.challenge_event_bus
-            with challenge_bus.use_scoped_dispatch_queue():
-                process_user_bank_txs()
-        else:
-            logger.info("index_user_bank.py | Failed to acquire lock")
-
-    except Exception as e:
-        logger.error("index_user_bank.py | Fatal error in main loop", exc_info=True)
-        raise e
-    finally:
-        if have_lock:
-            update_lock.release()
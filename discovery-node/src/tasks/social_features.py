@@ -9,6 +9,14 @@ from src.database_task import DatabaseTask
 from src.models.content_lists.content_list import ContentList
 from src.models.social.follow import Follow
 from src.models.social.repost import Repost, RepostType
+from src.utils.block_write_buffer import add_record, invalidate_record
+from src.utils.cache_invalidation import (
+    CONTENT_LIST_CACHE_TAG,
+    DIGITAL_CONTENT_CACHE_TAG,
+    USER_CACHE_TAG,
+    get_changed_entity_ids,
+)
+from src.utils.event_log_decoder import get_contract_events
 from src.utils.indexing_errors import IndexingError
 
 logger = logging.getLogger(__name__)
@@ -23,12 +31,12 @@ def social_feature_state_update(
     block_timestamp,
     block_hash,
     _ipfs_metadata,  # prefix unused args with underscore to prevent pylint
-) -> Tuple[int, Set]:
-    """Return Tuple containing int representing number of social feature related state changes in this transaction and empty Set (to align with other _state_update function signatures)"""
-    empty_set: Set[int] = set()
+) -> Tuple[int, Dict[str, Set[int]]]:
+    """Return Tuple containing int representing number of social feature related state changes in this transaction and Dict of entity type to the ids of reposted digitalContents and contentLists, reposting users and followed and following users"""
+    changed_entity_ids = get_changed_entity_ids()
     num_total_changes = 0
     if not social_feature_factory_txs:
-        return num_total_changes, empty_set
+        return num_total_changes, changed_entity_ids
 
     challenge_bus = update_task.challenge_event_bus
     block_datetime = datetime.utcfromtimestamp(block_timestamp)
@@ -115,35 +123,51 @@ def social_feature_state_update(
 
     for repost_user_id, repost_digital_content_ids in digital_content_repost_state_changes.items():
         for repost_digital_content_id in repost_digital_content_ids:
-            invalidate_old_repost(
-                session, repost_user_id, repost_digital_content_id, RepostType.digital_content
+            invalidate_record(
+                session,
+                Repost,
+                user_id=repost_user_id,
+                repost_item_id=repost_digital_content_id,
+                repost_type=RepostType.digital_content,
             )
             repost = repost_digital_content_ids[repost_digital_content_id]
-            session.add(repost)
+            add_record(session, repost)
             dispatch_challenge_repost(challenge_bus, repost, block_number)
         num_total_changes += len(repost_digital_content_ids)
+        changed_entity_ids[DIGITAL_CONTENT_CACHE_TAG].update(repost_digital_content_ids)
+        changed_entity_ids[USER_CACHE_TAG].add(repost_user_id)
 
     for repost_user_id, repost_content_list_ids in content_list_repost_state_changes.items():
         for repost_content_list_id in repost_content_list_ids:
-            invalidate_old_repost(
+            invalidate_record(
                 session,
-                repost_user_id,
-                repost_content_list_id,
-                repost_content_list_ids[repost_content_list_id].repost_type,
+                Repost,
+                user_id=repost_user_id,
+                repost_item_id=repost_content_list_id,
+                repost_type=repost_content_list_ids[repost_content_list_id].repost_type,
             )
             repost = repost_content_list_ids[repost_content_list_id]
-            session.add(repost)
+            add_record(session, repost)
             dispatch_challenge_repost(challenge_bus, repost, block_number)
         num_total_changes += len(repost_content_list_ids)
+        changed_entity_ids[CONTENT_LIST_CACHE_TAG].update(repost_content_list_ids)
+        changed_entity_ids[USER_CACHE_TAG].add(repost_user_id)
 
     for follower_user_id, followee_user_ids in follow_state_changes.items():
         for followee_user_id in followee_user_ids:
-            invalidate_old_follow(session, follower_user_id, followee_user_id)
+            invalidate_record(
+                session,
+                Follow,
+                follower_user_id=follower_user_id,
+                followee_user_id=followee_user_id,
+            )
             follow = followee_user_ids[followee_user_id]
-            session.add(follow)
+            add_record(session, follow)
             dispatch_challenge_follow(challenge_bus, follow, block_number)
         num_total_changes += len(followee_user_ids)
-    return num_total_changes, empty_set
+        changed_entity_ids[USER_CACHE_TAG].add(follower_user_id)
+        changed_entity_ids[USER_CACHE_TAG].update(followee_user_ids)
+    return num_total_changes, changed_entity_ids
 
 
 # ####### HELPERS ####### #
@@ -157,37 +181,6 @@ def dispatch_challenge_follow(bus: ChallengeEventBus, follow, block_number):
     bus.dispatch(ChallengeEvent.follow, block_number, follow.follower_user_id)
 
 
-def invalidate_old_repost(session, repost_user_id, repost_item_id, repost_type):
-    # update existing db entry to is_current = False
-    num_invalidated_repost_entries = (
-        session.query(Repost)
-        .filter(
-            Repost.user_id == repost_user_id,
-            Repost.repost_item_id == repost_item_id,
-            Repost.repost_type == repost_type,
-            Repost.is_current == True,
-        )
-        .update({"is_current": False})
-    )
-    # TODO - after on-chain storage is implemented, assert num_invalidated_repost_entries > 0
-    return num_invalidated_repost_entries
-
-
-def invalidate_old_follow(session, follower_user_id, followee_user_id):
-    # update existing db entry to is_current = False
-    num_invalidated_follow_entries = (
-        session.query(Follow)
-        .filter(
-            Follow.follower_user_id == follower_user_id,
-            Follow.followee_user_id == followee_user_id,
-            Follow.is_current == True,
-        )
-        .update({"is_current": False})
-    )
-    # TODO - after on-chain storage is implemented, assert num_invalidated_follow_entries > 0
-    return num_invalidated_follow_entries
-
-
 def add_digital_content_repost(
     self,
     social_feature_factory_contract,
@@ -199,10 +192,8 @@ def add_digital_content_repost(
     digital_content_repost_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_digital_content_repost_events = (
-        social_feature_factory_contract.events.DigitalContentRepostAdded().processReceipt(
-            tx_receipt
-        )
+    new_digital_content_repost_events = get_contract_events(
+        update_task, social_feature_factory_contract, "DigitalContentRepostAdded", tx_receipt
     )
     for event in new_digital_content_repost_events:
         event_args = event["args"]
@@ -244,10 +235,8 @@ def delete_digital_content_repost(
     digital_content_repost_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_repost_events = (
-        social_feature_factory_contract.events.DigitalContentRepostDeleted().processReceipt(
-            tx_receipt
-        )
+    new_repost_events = get_contract_events(
+        update_task, social_feature_factory_contract, "DigitalContentRepostDeleted", tx_receipt
     )
     for event in new_repost_events:
         event_args = event["args"]
@@ -287,10 +276,8 @@ def add_content_list_repost(
     content_list_repost_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_content_list_repost_events = (
-        social_feature_factory_contract.events.ContentListRepostAdded().processReceipt(
-            tx_receipt
-        )
+    new_content_list_repost_events = get_contract_events(
+        update_task, social_feature_factory_contract, "ContentListRepostAdded", tx_receipt
     )
     for event in new_content_list_repost_events:
         event_args = event["args"]
@@ -348,10 +335,8 @@ def delete_content_list_repost(
     content_list_repost_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_content_list_repost_events = (
-        social_feature_factory_contract.events.ContentListRepostDeleted().processReceipt(
-            tx_receipt
-        )
+    new_content_list_repost_events = get_contract_events(
+        update_task, social_feature_factory_contract, "ContentListRepostDeleted", tx_receipt
     )
     for event in new_content_list_repost_events:
         event_args = event["args"]
@@ -409,10 +394,8 @@ def add_follow(
     follow_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_follow_events = (
-        social_feature_factory_contract.events.UserFollowAdded().processReceipt(
-            tx_receipt
-        )
+    new_follow_events = get_contract_events(
+        update_task, social_feature_factory_contract, "UserFollowAdded", tx_receipt
     )
 
     for entry in new_follow_events:
@@ -452,10 +435,8 @@ def delete_follow(
     follow_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_follow_events = (
-        social_feature_factory_contract.events.UserFollowDeleted().processReceipt(
-            tx_receipt
-        )
+    new_follow_events = get_contract_events(
+        update_task, social_feature_factory_contract, "UserFollowDeleted", tx_receipt
     )
 
     for entry in new_follow_events:
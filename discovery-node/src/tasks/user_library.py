@@ -8,6 +8,14 @@ from src.challenges.challenge_event_bus import ChallengeEventBus
 from src.database_task import DatabaseTask
 from src.models.content_lists.content_list import ContentList
 from src.models.social.save import Save, SaveType
+from src.utils.block_write_buffer import add_record, invalidate_record
+from src.utils.cache_invalidation import (
+    CONTENT_LIST_CACHE_TAG,
+    DIGITAL_CONTENT_CACHE_TAG,
+    USER_CACHE_TAG,
+    get_changed_entity_ids,
+)
+from src.utils.event_log_decoder import get_contract_events
 from src.utils.indexing_errors import IndexingError
 
 logger = logging.getLogger(__name__)
@@ -22,12 +30,12 @@ def user_library_state_update(
     block_timestamp,
     block_hash,
     _ipfs_metadata,  # prefix unused args with underscore to prevent pylint
-) -> Tuple[int, Set]:
-    """Return Tuple containing int representing number of User Library model state changes found in transaction and empty Set (to align with fn signature of other _state_update functions."""
-    empty_set: Set[int] = set()
+) -> Tuple[int, Dict[str, Set[int]]]:
+    """Return Tuple containing int representing number of User Library model state changes found in transaction and Dict of entity type to the ids of saved digitalContents and contentLists and saving users."""
+    changed_entity_ids = get_changed_entity_ids()
     num_total_changes = 0
     if not user_library_factory_txs:
-        return num_total_changes, empty_set
+        return num_total_changes, changed_entity_ids
 
     challenge_bus = update_task.challenge_event_bus
     block_datetime = datetime.utcfromtimestamp(block_timestamp)
@@ -90,26 +98,37 @@ def user_library_state_update(
 
     for user_id, digital_content_ids in digital_content_save_state_changes.items():
         for digital_content_id in digital_content_ids:
-            invalidate_old_save(session, user_id, digital_content_id, SaveType.digital_content)
+            invalidate_record(
+                session,
+                Save,
+                user_id=user_id,
+                save_item_id=digital_content_id,
+                save_type=SaveType.digital_content,
+            )
             save = digital_content_ids[digital_content_id]
-            session.add(save)
+            add_record(session, save)
             dispatch_favorite(challenge_bus, save, block_number)
         num_total_changes += len(digital_content_ids)
+        changed_entity_ids[DIGITAL_CONTENT_CACHE_TAG].update(digital_content_ids)
+        changed_entity_ids[USER_CACHE_TAG].add(user_id)
 
     for user_id, content_list_ids in content_list_save_state_changes.items():
         for content_list_id in content_list_ids:
-            invalidate_old_save(
+            invalidate_record(
                 session,
-                user_id,
-                content_list_id,
-                content_list_ids[content_list_id].save_type,
+                Save,
+                user_id=user_id,
+                save_item_id=content_list_id,
+                save_type=content_list_ids[content_list_id].save_type,
             )
             save = content_list_ids[content_list_id]
-            session.add(save)
+            add_record(session, save)
             dispatch_favorite(challenge_bus, save, block_number)
         num_total_changes += len(content_list_ids)
+        changed_entity_ids[CONTENT_LIST_CACHE_TAG].update(content_list_ids)
+        changed_entity_ids[USER_CACHE_TAG].add(user_id)
 
-    return num_total_changes, empty_set
+    return num_total_changes, changed_entity_ids
 
 
 # ####### HELPERS ####### #
@@ -119,20 +138,6 @@ def dispatch_favorite(bus: ChallengeEventBus, save, block_number):
     bus.dispatch(ChallengeEvent.favorite, block_number, save.user_id)
 
 
-def invalidate_old_save(session, user_id, content_list_id, save_type):
-    num_invalidated_save_entries = (
-        session.query(Save)
-        .filter(
-            Save.user_id == user_id,
-            Save.save_item_id == content_list_id,
-            Save.save_type == save_type,
-            Save.is_current == True,
-        )
-        .update({"is_current": False})
-    )
-    return num_invalidated_save_entries
-
-
 def add_digital_content_save(
     self,
     user_library_contract,
@@ -144,10 +149,8 @@ def add_digital_content_save(
     digital_content_state_changes: Dict[int, Dict[int, Save]],
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_add_digital_content_events = (
-        update_task.user_library_contract.events.DigitalContentSaveAdded().processReceipt(
-            tx_receipt
-        )
+    new_add_digital_content_events = get_contract_events(
+        update_task, update_task.user_library_contract, "DigitalContentSaveAdded", tx_receipt
     )
 
     for event in new_add_digital_content_events:
@@ -188,10 +191,8 @@ def add_content_list_save(
     content_list_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_add_content_list_events = (
-        update_task.user_library_contract.events.ContentListSaveAdded().processReceipt(
-            tx_receipt
-        )
+    new_add_content_list_events = get_contract_events(
+        update_task, update_task.user_library_contract, "ContentListSaveAdded", tx_receipt
     )
 
     for event in new_add_content_list_events:
@@ -245,10 +246,8 @@ def delete_digital_content_save(
     digital_content_state_changes: Dict[int, Dict[int, Save]],
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_delete_digital_content_events = (
-        update_task.user_library_contract.events.DigitalContentSaveDeleted().processReceipt(
-            tx_receipt
-        )
+    new_delete_digital_content_events = get_contract_events(
+        update_task, update_task.user_library_contract, "DigitalContentSaveDeleted", tx_receipt
     )
     for event in new_delete_digital_content_events:
         event_args = event["args"]
@@ -288,10 +287,8 @@ def delete_content_list_save(
     content_list_state_changes: Dict[int, Dict[int, Save]],
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_add_content_list_events = (
-        update_task.user_library_contract.events.ContentListSaveDeleted().processReceipt(
-            tx_receipt
-        )
+    new_add_content_list_events = get_contract_events(
+        update_task, update_task.user_library_contract, "ContentListSaveDeleted", tx_receipt
     )
 
     for event in new_add_content_list_events:
@@ -8,12 +8,14 @@ from src.database_task import DatabaseTask
 from src.models.indexing.ursm_content_node import UrsmContentNode
 from src.models.users.user import User
 from src.queries.skipped_transactions import add_node_level_skipped_transaction
-from src.tasks.users import invalidate_old_user, lookup_user_record
+from src.tasks.users import lookup_user_record
 from src.utils import helpers
+from src.utils.block_write_buffer import add_record, invalidate_record
 from src.utils.eth_contracts_helpers import (
     content_node_service_type,
     sp_factory_registry_key,
 )
+from src.utils.event_log_decoder import get_contract_events
 from src.utils.indexing_errors import EntityMissingRequiredFieldError, IndexingError
 from src.utils.model_nullable_validator import all_required_fields_present
 from src.utils.redis_cache import get_json_cached_key, get_sp_id_key
@@ -179,8 +181,8 @@ def user_replica_set_state_update(
         logger.info(
             f"index.py | user_replica_set.py | Replica Set Processing Adding {value_obj['user']}"
         )
-        invalidate_old_user(session, user_id)
-        session.add(value_obj["user"])
+        invalidate_record(session, User, user_id=user_id)
+        add_record(session, value_obj["user"])
 
     for content_node_id, value_obj in cnode_events_lookup.items():
         logger.info(
@@ -193,9 +195,12 @@ def user_replica_set_state_update(
 
 
 def get_user_replica_set_mgr_tx(update_task, event_type, tx_receipt):
-    return getattr(
-        update_task.user_replica_set_manager_contract.events, event_type
-    )().processReceipt(tx_receipt)
+    return get_contract_events(
+        update_task,
+        update_task.user_replica_set_manager_contract,
+        event_type,
+        tx_receipt,
+    )
 
 
 # Reconstruct endpoint string from primary and secondary IDs
@@ -18,6 +18,8 @@ from src.models.users.user_events import UserEvent
 from src.queries.get_balances import enqueue_immediate_balance_refresh
 from src.queries.skipped_transactions import add_node_level_skipped_transaction
 from src.utils import helpers
+from src.utils.block_write_buffer import add_record, invalidate_record
+from src.utils.event_log_decoder import get_contract_events
 from src.utils.indexing_errors import EntityMissingRequiredFieldError, IndexingError
 from src.utils.model_nullable_validator import all_required_fields_present
 from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
@@ -78,6 +80,11 @@ def user_state_update(
 
             # num_total_changes += processedEntries
 
+    # Load every user in the block in one query rather than one query per user
+    existing_user_records = helpers.get_current_records_by_id(
+        session, User, User.user_id, user_transactions_lookup.keys()
+    )
+
     # Process each user in parallel
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
         process_user_txs_futures = {}
@@ -98,6 +105,7 @@ def user_state_update(
                     ipfs_metadata,
                     user_ids,
                     skipped_tx_count,
+                    existing_user_records,
                 )
             ] = user_id
         for future in concurrent.futures.as_completed(process_user_txs_futures):
@@ -115,9 +123,9 @@ def user_state_update(
     for user_id, value_obj in user_events_lookup.items():
         logger.info(f"index.py | users.py | Adding {value_obj['user']}")
         if value_obj["events"]:
-            invalidate_old_user(session, user_id)
+            invalidate_record(session, User, user_id=user_id)
             challenge_bus.dispatch(ChallengeEvent.profile_update, block_number, user_id)
-            session.add(value_obj["user"])
+            add_record(session, value_obj["user"])
 
     if num_total_changes:
         metric.save_time({"scope": "full"})
@@ -140,6 +148,7 @@ def process_user_txs_serial(
     ipfs_metadata,
     user_ids,
     skipped_tx_count,
+    existing_user_records=None,
 ):
     metric = PrometheusMetric(PrometheusMetricNames.USER_STATE_UPDATE_DURATION_SECONDS)
     processed_entries = 0
@@ -162,6 +171,7 @@ def process_user_txs_serial(
                     block_number,
                     block_timestamp,
                     txhash,
+                    existing_user_records,
                 )
 
             # parse user event to add metadata to record
@@ -223,30 +233,41 @@ def process_user_txs_serial(
 
 
 def get_user_events_tx(update_task, event_type, tx_receipt):
-    return getattr(update_task.user_contract.events, event_type)().processReceipt(
-        tx_receipt
+    return get_contract_events(
+        update_task, update_task.user_contract, event_type, tx_receipt
     )
 
 
 def lookup_user_record(
-    update_task, session, entry, block_number, block_timestamp, txhash
+    update_task,
+    session,
+    entry,
+    block_number,
+    block_timestamp,
+    txhash,
+    existing_user_records=None,
 ):
     event_blockhash = update_task.web3.toHex(entry.blockHash)
     user_id = helpers.get_tx_arg(entry, "_userId")
 
-    # Check if the userId is in the db
-    user_record = (
-        session.query(User)
-        .filter(User.user_id == user_id, User.is_current == True)
-        .first()
-    )
-
-    if user_record:
-        # expunge the result from sqlalchemy so we can modify it without UPDATE statements being made
-        # https://stackoverflow.com/questions/28871406/how-to-clone-a-sqlalchemy-db-object-with-new-primary-key
-        session.expunge(user_record)
-        make_transient(user_record)
+    if existing_user_records is not None and user_id in existing_user_records:
+        # Preloaded records are already expunged, each one is handed out once
+        user_record = existing_user_records.pop(user_id)
     else:
+        # Check if the userId is in the db
+        user_record = (
+            session.query(User)
+            .filter(User.user_id == user_id, User.is_current == True)
+            .first()
+        )
+
+        if user_record:
+            # expunge the result from sqlalchemy so we can modify it without UPDATE statements being made
+            # https://stackoverflow.com/questions/28871406/how-to-clone-a-sqlalchemy-db-object-with-new-primary-key
+            session.expunge(user_record)
+            make_transient(user_record)
+
+    if not user_record:
         user_record = User(
             is_current=True,
             user_id=user_id,
@@ -261,13 +282,6 @@ def lookup_user_record(
     return user_record
 
 
-def invalidate_old_user(session, user_id):
-    # Update existing record in db to is_current = False
-    session.query(User).filter(User.user_id == user_id, User.is_current == True).update(
-        {"is_current": False}
-    )
-
-
 def parse_user_event(
     self,
     update_task: DatabaseTask,
@@ -1,5 +1,5 @@
 from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy
-from src.trending_strategies.EJ57D_trending_digital_contents_strategy import z
+from src.trending_strategies.EJ57D_trending_digital_contents_strategy import z, z_scores
 from src.trending_strategies.trending_type_and_version import (
     TrendingType,
     TrendingVersion,
@@ -13,5 +13,8 @@ class TrendingContentListsStrategyBDNxn(BaseTrendingStrategy):
     def get_digital_content_score(self, time_range, contentList):
         return z(time_range, contentList)
 
+    def get_digital_content_scores(self, time_range, columns):
+        return z_scores(time_range, columns)
+
     def get_score_params(self):
         return {"zq": 1000, "xf": True, "pt": 0, "mt": 3}
@@ -2,9 +2,13 @@ import logging
 import time
 from datetime import datetime
 
+import numpy as np
 from dateutil.parser import parse
 from sqlalchemy.sql import text
-from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy
+from src.trending_strategies.base_trending_strategy import (
+    BaseTrendingStrategy,
+    get_age_days,
+)
 from src.trending_strategies.trending_type_and_version import (
     TrendingType,
     TrendingVersion,
@@ -49,6 +53,24 @@ def z(time, digital_content):
     return {"score": H * Q, **digital_content}
 
 
+def z_scores(time, columns):
+    """Vectorized z over score columns, returns the score array"""
+    # pylint: disable=W,C,R
+    E = columns["listens"]
+    e = columns["windowed_repost_count"]
+    t = columns["repost_count"]
+    x = columns["windowed_save_count"]
+    A = columns["save_count"]
+    o = columns["created_at"]
+    l = columns["owner_follower_count"]
+    j = columns["karma"]
+    H = (N * E + F * e + O * x + R * t + i * A) * j
+    L = T[time]
+    k = get_age_days(o)
+    Q = np.where(k > L, np.maximum((1.0 / q), np.power(q, (1 - k / L))), 1)
+    return np.where(l < y, 0, H * Q)
+
+
 class TrendingDigitalContentsStrategyEJ57D(BaseTrendingStrategy):
     def __init__(self):
         super().__init__(TrendingType.DIGITAL_CONTENTS, TrendingVersion.EJ57D, True)
@@ -1,7 +1,11 @@
 from datetime import datetime
 
+import numpy as np
 from dateutil.parser import parse
-from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy
+from src.trending_strategies.base_trending_strategy import (
+    BaseTrendingStrategy,
+    get_age_days,
+)
 from src.trending_strategies.trending_type_and_version import (
     TrendingType,
     TrendingVersion,
@@ -51,6 +55,29 @@ class UndergroundTrendingDigitalContentsStrategyEJ57D(BaseTrendingStrategy):
             rq = xy((1.0 / u), (uk(u, (1 - ul / te))))
         return {"score": vb * rq, **digital_content}
 
+    def get_digital_content_scores(self, time_range, columns):
+        # pylint: disable=W,C,R
+        mn = columns["listens"]
+        c = columns["windowed_repost_count"]
+        x = columns["repost_count"]
+        v = columns["windowed_save_count"]
+        ut = columns["save_count"]
+        ll = columns["created_at"]
+        bq = columns["owner_follower_count"]
+        ty = columns["owner_verified"]
+        kz = columns["karma"]
+        oj = np.where(ty, qq, 1)
+        zu = np.where(
+            bq >= nb,
+            np.maximum(np.power(oi, 1 - ((1 / nb) * (bq - nb) + 1)), 1 / oi),
+            1,
+        )
+        vb = (b * mn + qw * c + hg * v + ie * x + pn * ut + zu * bq) * kz * zu * oj
+        te = 7
+        ul = get_age_days(ll)
+        rq = np.where(ul > te, np.maximum((1.0 / u), np.power(u, (1 - ul / te))), 1)
+        return np.where(bq < 3, 0, vb * rq)
+
     def get_score_params(self):
         return {
             "S": 1500,
@@ -1,10 +1,42 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional
 
+import numpy as np
 from src.trending_strategies.trending_type_and_version import (
     TrendingType,
     TrendingVersion,
 )
 
+# Fields of a scorable digital_content that are passed to batch scoring as columns
+SCORE_COLUMN_NAMES = (
+    "listens",
+    "windowed_repost_count",
+    "repost_count",
+    "windowed_save_count",
+    "save_count",
+    "created_at",
+    "owner_follower_count",
+    "owner_verified",
+    "karma",
+)
+
+
+def get_score_columns(digital_contents: List[Dict]) -> Dict[str, np.ndarray]:
+    """Returns an array per score field present in digital_contents"""
+    return {
+        name: np.array([digital_content[name] for digital_content in digital_contents])
+        for name in SCORE_COLUMN_NAMES
+        if name in digital_contents[0]
+    }
+
+
+def get_age_days(created_at: np.ndarray) -> np.ndarray:
+    """Returns the whole days since each isoformat created_at, like
+    (datetime.now() - parse(created_at)).days"""
+    created_at = created_at.astype("datetime64[us]")
+    return (np.datetime64(datetime.now()) - created_at) // np.timedelta64(1, "D")
+
 
 class BaseTrendingStrategy(ABC):
     def __init__(
@@ -18,6 +50,50 @@ class BaseTrendingStrategy(ABC):
     def get_digital_content_score(self, time_range: str, digital_content):
         pass
 
+    def get_digital_content_scores(
+        self, time_range: str, columns: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Batch version of get_digital_content_score over score columns.
+
+        Strategies override this with a vectorized implementation, by default each
+        row is scored with get_digital_content_score.
+        """
+        rows = zip(*(column.tolist() for column in columns.values()))
+        return np.array(
+            [
+                self.get_digital_content_score(time_range, dict(zip(columns, row)))[
+                    "score"
+                ]
+                for row in rows
+            ],
+            dtype=float,
+        )
+
+    def rank_digital_contents(
+        self,
+        time_range: str,
+        digital_contents: List[Dict],
+        limit: Optional[int] = None,
+        id_field: Optional[str] = None,
+    ) -> List[Dict]:
+        """Scores digital_contents in one batch and returns them with their score,
+        highest first. Ties keep their order, or are ranked by descending id_field."""
+        if not digital_contents:
+            return []
+        scores = self.get_digital_content_scores(
+            time_range, get_score_columns(digital_contents)
+        )
+        if id_field:
+            ids = np.array(
+                [digital_content[id_field] for digital_content in digital_contents]
+            )
+            order = np.lexsort((-ids, -scores))
+        else:
+            order = np.argsort(-scores, kind="stable")
+        order = order[:limit].tolist()
+        scores = scores.tolist()
+        return [{"score": scores[i], **digital_contents[i]} for i in order]
+
     @abstractmethod
     def get_score_params(self):
         pass
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from src.trending_strategies.base_trending_strategy import get_score_columns
+from src.trending_strategies.BDNxn_trending_content_lists_strategy import (
+    TrendingContentListsStrategyBDNxn,
+)
+from src.trending_strategies.EJ57D_trending_content_lists_strategy import (
+    TrendingContentListsStrategyEJ57D,
+)
+from src.trending_strategies.EJ57D_underground_trending_digital_contents_strategy import (
+    UndergroundTrendingDigitalContentsStrategyEJ57D,
+)
+
+NUM_DIGITAL_CONTENTS = 1000
+
+
+def make_scorable_digital_contents(num_digital_contents=NUM_DIGITAL_CONTENTS, seed=0):
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    return [
+        {
+            "digital_content_id": digital_content_id,
+            "listens": int(rng.integers(0, 100000)),
+            "windowed_repost_count": int(rng.integers(0, 100)),
+            "repost_count": int(rng.integers(0, 1000)),
+            "windowed_save_count": int(rng.integers(0, 100)),
+            "save_count": int(rng.integers(0, 1000)),
+            "created_at": (
+                now - timedelta(hours=float(rng.integers(0, 24 * 800)))
+            ).isoformat(timespec="seconds"),
+            "owner_follower_count": int(rng.integers(0, 2000)),
+            "owner_verified": bool(rng.integers(0, 2)),
+            "karma": int(rng.integers(1, 50)),
+        }
+        for digital_content_id in range(num_digital_contents)
+    ]
+
+
+def test_vectorized_scores_match_row_scores():
+    """Tests that each strategy's batch scores are identical to its row scores"""
+    digital_contents = make_scorable_digital_contents()
+    columns = get_score_columns(digital_contents)
+    for strategy, time_ranges in [
+        (UndergroundTrendingDigitalContentsStrategyEJ57D(), ["week"]),
+        (TrendingContentListsStrategyEJ57D(), ["week", "month", "year"]),
+        (TrendingContentListsStrategyBDNxn(), ["day", "week", "allTime"]),
+    ]:
+        for time_range in time_ranges:
+            row_scores = [
+                strategy.get_digital_content_score(time_range, digital_content)["score"]
+                for digital_content in digital_contents
+            ]
+            scores = strategy.get_digital_content_scores(time_range, columns)
+            assert scores.tolist() == row_scores
+
+
+def test_rank_digital_contents():
+    """Tests that ranking matches sorting the row scores"""
+    digital_contents = make_scorable_digital_contents()
+    strategy = UndergroundTrendingDigitalContentsStrategyEJ57D()
+    row_scored = sorted(
+        [
+            strategy.get_digital_content_score("week", digital_content)
+            for digital_content in digital_contents
+        ],
+        key=lambda k: k["score"],
+        reverse=True,
+    )
+
+    assert strategy.rank_digital_contents("week", digital_contents, 100) == (
+        row_scored[:100]
+    )
+    assert strategy.rank_digital_contents(
+        "week", digital_contents, id_field="digital_content_id"
+    ) == sorted(
+        row_scored, key=lambda k: (k["score"], k["digital_content_id"]), reverse=True
+    )
+    assert strategy.rank_digital_contents("week", []) == []
@@ -0,0 +1,137 @@
+"""
+Set-based writes of the versioned entity rows produced while indexing a block
+
+State update handlers mark the current row of every changed entity as no longer
+current and add its new version. Done per entity, that is one UPDATE and one
+INSERT round trip per changed row. While a BlockWriteBuffer is active for a
+session, those writes are collected instead and flushed as a single UPDATE per
+table and key shape, followed by multi-row INSERTs of the new rows.
+"""
+
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect, tuple_
+
+logger = logging.getLogger(__name__)
+
+block_write_buffer_session_key = "block_write_buffer"
+
+# Max number of rows per INSERT statement
+INSERT_PAGE_SIZE = 1000
+
+
+def invalidate_records(session, model, key_names: Tuple[str, ...], keys) -> int:
+    """Sets is_current = False on the current rows of model matching keys, a
+    collection of tuples of values for the key_names columns"""
+    keys = list(keys)
+    if not keys:
+        return 0
+    columns = [getattr(model, key_name) for key_name in key_names]
+    if len(columns) == 1:
+        key_filter = columns[0].in_([key[0] for key in keys])
+    else:
+        key_filter = tuple_(*columns).in_(keys)
+    return (
+        session.query(model)
+        .filter(model.is_current == True, key_filter)
+        .update({"is_current": False}, synchronize_session=False)
+    )
+
+
+def insert_records(session, model, records: List) -> None:
+    """Inserts records in multi-row INSERT statements, bypassing the ORM unit of work.
+
+    Only attributes set on a record are inserted, so unset columns get their
+    server defaults like they do on an ORM flush.
+    """
+    mapper = inspect(model)
+    table = mapper.local_table
+    rows_by_columns: Dict[Tuple[str, ...], List[Dict]] = defaultdict(list)
+    for record in records:
+        record_state = inspect(record).dict
+        row = {
+            column_property.columns[0].key: record_state[column_property.key]
+            for column_property in mapper.column_attrs
+            if column_property.key in record_state
+        }
+        rows_by_columns[tuple(sorted(row))].append(row)
+
+    for rows in rows_by_columns.values():
+        for i in range(0, len(rows), INSERT_PAGE_SIZE):
+            session.execute(table.insert().values(rows[i : i + INSERT_PAGE_SIZE]))
+
+
+class BlockWriteBuffer:
+    """Collects row invalidations and new rows until flush"""
+
+    def __init__(self):
+        # model -> key column names -> key values
+        self._invalidations: Dict[
+            type, Dict[Tuple[str, ...], Set[Tuple]]
+        ] = defaultdict(lambda: defaultdict(set))
+        self._records: Dict[type, List] = defaultdict(list)
+
+    def invalidate(self, model, **key):
+        key_names = tuple(sorted(key))
+        self._invalidations[model][key_names].add(
+            tuple(key[key_name] for key_name in key_names)
+        )
+
+    def add(self, record):
+        self._records[type(record)].append(record)
+
+    def flush(self, session):
+        # Write pending ORM changes first so they keep their order relative to these
+        session.flush()
+        for model, keys_by_names in self._invalidations.items():
+            for key_names, keys in keys_by_names.items():
+                invalidate_records(session, model, key_names, keys)
+        for model, records in self._records.items():
+            insert_records(session, model, records)
+            logger.info(
+                f"block_write_buffer.py | Inserted {len(records)} {model.__tablename__} rows"
+            )
+        self._invalidations.clear()
+        self._records.clear()
+
+
+def get_block_write_buffer(session) -> Optional[BlockWriteBuffer]:
+    return session.info.get(block_write_buffer_session_key)
+
+
+@contextmanager
+def buffered_block_writes(session):
+    """Buffers the invalidate_record and add_record calls made on session and
+    flushes them on exit"""
+    block_write_buffer = BlockWriteBuffer()
+    session.info[block_write_buffer_session_key] = block_write_buffer
+    try:
+        yield block_write_buffer
+        block_write_buffer.flush(session)
+    finally:
+        session.info.pop(block_write_buffer_session_key, None)
+
+
+def invalidate_record(session, model, **key):
+    """Marks the current row of model with the given key columns as not current,
+    immediately unless a BlockWriteBuffer is active"""
+    block_write_buffer = get_block_write_buffer(session)
+    if block_write_buffer is not None:
+        block_write_buffer.invalidate(model, **key)
+    else:
+        key_names = tuple(sorted(key))
+        invalidate_records(
+            session, model, key_names, [tuple(key[name] for name in key_names)]
+        )
+
+
+def add_record(session, record):
+    """Adds a new row, immediately unless a BlockWriteBuffer is active"""
+    block_write_buffer = get_block_write_buffer(session)
+    if block_write_buffer is not None:
+        block_write_buffer.add(record)
+    else:
+        session.add(record)
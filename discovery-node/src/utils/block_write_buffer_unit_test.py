@@ -0,0 +1,82 @@
+from sqlalchemy import Boolean, Column, Integer, String, create_engine, event, text
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+from src.utils.block_write_buffer import (
+    add_record,
+    buffered_block_writes,
+    invalidate_record,
+)
+
+Base = declarative_base()
+
+
+class Follow(Base):
+    __tablename__ = "follows"
+
+    id = Column(Integer, primary_key=True)
+    follower_user_id = Column(Integer, nullable=False)
+    followee_user_id = Column(Integer, nullable=False)
+    is_current = Column(Boolean, nullable=False)
+    is_delete = Column(Boolean, nullable=False)
+    txhash = Column(String, nullable=False, server_default=text("''"))
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return sessionmaker(bind=engine)(), statements
+
+
+def make_follow(follower_user_id, followee_user_id, is_delete=False):
+    return Follow(
+        follower_user_id=follower_user_id,
+        followee_user_id=followee_user_id,
+        is_current=True,
+        is_delete=is_delete,
+    )
+
+
+def test_buffered_block_writes():
+    """Tests that buffered writes are flushed as one UPDATE and one INSERT"""
+    session, statements = make_session()
+    session.add_all([make_follow(1, 2), make_follow(1, 3), make_follow(2, 3)])
+    session.commit()
+    statements.clear()
+
+    with buffered_block_writes(session):
+        for followee_user_id in [2, 3]:
+            invalidate_record(
+                session, Follow, follower_user_id=1, followee_user_id=followee_user_id
+            )
+            add_record(session, make_follow(1, followee_user_id, is_delete=True))
+        assert not statements
+
+    assert [statement.split()[0] for statement in statements] == ["UPDATE", "INSERT"]
+
+    current_follows = session.query(Follow).filter(Follow.is_current == True).all()
+    assert sorted(
+        (follow.follower_user_id, follow.followee_user_id, follow.is_delete)
+        for follow in current_follows
+    ) == [(1, 2, True), (1, 3, True), (2, 3, False)]
+    # Unset columns get their server defaults
+    assert {follow.txhash for follow in current_follows} == {""}
+
+
+def test_unbuffered_writes():
+    """Tests that writes outside of buffered_block_writes happen right away"""
+    session, _ = make_session()
+    session.add(make_follow(1, 2))
+    session.commit()
+
+    invalidate_record(session, Follow, follower_user_id=1, followee_user_id=2)
+    add_record(session, make_follow(1, 2, is_delete=True))
+
+    follows = session.query(Follow).filter(Follow.is_current == True).all()
+    assert len(follows) == 1
+    assert follows[0].is_delete
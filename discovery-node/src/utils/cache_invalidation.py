@@ -0,0 +1,198 @@
+"""
+Invalidation feed for cached API responses
+
+Cached responses of entity endpoints are tagged with the users, digital_contents
+and content_lists they contain. When the indexer changes entities in a block it
+deletes the responses tagged with them from redis and publishes the deleted keys
+with the block number on CACHE_INVALIDATION_CHANNEL, so that every web process
+drops them from its local response cache as well. Entity responses can then be
+cached for minutes rather than seconds.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from src.utils.helpers import decode_string_id
+from src.utils.local_response_cache import LocalResponseCache, local_response_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+# Incremented on every invalidation, see get_cache_invalidation_sequence
+cache_invalidation_sequence_key = "cache_invalidation:sequence"
+# Seconds to cache a response that was computed while entities were invalidated
+invalidated_response_ttl_sec = 5
+# Seconds to cache entity responses that are tagged for invalidation
+entity_response_ttl_sec = 5 * 60
+
+USER_CACHE_TAG = "user"
+DIGITAL_CONTENT_CACHE_TAG = "digital_content"
+CONTENT_LIST_CACHE_TAG = "content_list"
+
+subscriber_poll_timeout_sec = 1
+subscriber_reconnect_sec = 5
+
+
+def get_cache_tag(entity_type: str, entity_id: int) -> str:
+    return f"{entity_type}:{entity_id}"
+
+
+def get_cache_tags(entity_type: str, entity_ids: Iterable[int]) -> Set[str]:
+    return {get_cache_tag(entity_type, entity_id) for entity_id in entity_ids}
+
+
+def get_cache_tag_key(tag: str) -> str:
+    return f"cache_tag:{tag}"
+
+
+def get_changed_entity_ids() -> Dict[str, Set[int]]:
+    """Returns an empty map of entity type (a cache tag prefix) to changed entity ids"""
+    return {
+        USER_CACHE_TAG: set(),
+        DIGITAL_CONTENT_CACHE_TAG: set(),
+        CONTENT_LIST_CACHE_TAG: set(),
+    }
+
+
+def get_changed_entity_cache_tags(changed_entity_ids: Dict[str, Set[int]]) -> List[str]:
+    """Returns the sorted cache tags of the entities in changed_entity_ids"""
+    tags: Set[str] = set()
+    for entity_type, entity_ids in changed_entity_ids.items():
+        tags.update(get_cache_tags(entity_type, entity_ids))
+    return sorted(tags)
+
+
+def _add_entity_tag(tags: Set[str], entity_type: str, entity_id: Any):
+    if isinstance(entity_id, str):
+        entity_id = decode_string_id(entity_id)
+    if isinstance(entity_id, int):
+        tags.add(get_cache_tag(entity_type, entity_id))
+
+
+def _add_item_tags(tags: Set[str], entity_type: str, item: Any):
+    if not isinstance(item, dict):
+        return
+    _add_entity_tag(tags, entity_type, item.get("id"))
+    user = item.get("user")
+    if isinstance(user, dict):
+        _add_entity_tag(tags, USER_CACHE_TAG, user.get("id"))
+    for digital_content in item.get("digitalContents") or []:
+        _add_item_tags(tags, DIGITAL_CONTENT_CACHE_TAG, digital_content)
+
+
+def get_response_cache_tags(entity_type: str) -> Callable[[Any], List[str]]:
+    """Returns a function listing the cache tags of a response with entity_type
+    entities as data, which are the entities, their users and digital_contents"""
+
+    def get_tags(response):
+        data = response.get("data") if isinstance(response, dict) else None
+        items = data if isinstance(data, list) else [data]
+        tags: Set[str] = set()
+        for item in items:
+            _add_item_tags(tags, entity_type, item)
+        return sorted(tags)
+
+    return get_tags
+
+
+def get_cache_invalidation_sequence(redis) -> Optional[bytes]:
+    """
+    Returns the current invalidation sequence. A response computed while the
+    sequence changed may predate the invalidation of its entities, and is cached
+    for invalidated_response_ttl_sec only.
+    """
+    return redis.get(cache_invalidation_sequence_key)
+
+
+def tag_cached_response(redis, key: str, tags: List[str], ttl_sec: int):
+    """Records key as a cached response containing the entities of tags"""
+    pipe = redis.pipeline()
+    for tag in tags:
+        tag_key = get_cache_tag_key(tag)
+        pipe.sadd(tag_key, key)
+        pipe.expire(tag_key, ttl_sec)
+    pipe.execute()
+
+
+def publish_cache_invalidation(
+    redis, block_number: Optional[int], tags: List[str], keys: List[str]
+):
+    message = {"block_number": block_number, "tags": tags, "keys": keys}
+    redis.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(message))
+
+
+class CacheInvalidationSubscriber:
+    """Drops the keys published on CACHE_INVALIDATION_CHANNEL from a local
+    response cache, from a daemon thread of the current process"""
+
+    def __init__(self, redis, local_cache: LocalResponseCache):
+        self.redis = redis
+        self.local_cache = local_cache
+        self.is_subscribed = False
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.is_subscribed = False
+            thread = threading.Thread(
+                target=self._run, name="cache-invalidation-subscriber", daemon=True
+            )
+            thread.start()
+
+    def handle_message(self, message):
+        if not message or message.get("type") != "message":
+            return
+        try:
+            invalidation = json.loads(message["data"])
+        except (TypeError, ValueError) as e:
+            logger.warning(
+                f"cache_invalidation.py | Discarding invalid cache invalidation: {e}"
+            )
+            return
+        for key in invalidation.get("keys", []):
+            self.local_cache.delete(key)
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                # Invalidations published while unsubscribed were missed
+                self.local_cache.clear()
+                self.is_subscribed = True
+                while True:
+                    self.handle_message(
+                        pubsub.get_message(timeout=subscriber_poll_timeout_sec)
+                    )
+            except Exception as e:
+                self.is_subscribed = False
+                logger.error(
+                    f"cache_invalidation.py | Cache invalidation subscriber failed: {e}"
+                )
+                self.local_cache.clear()
+                time.sleep(subscriber_reconnect_sec)
+
+
+cache_invalidation_subscriber: Optional[CacheInvalidationSubscriber] = None
+
+
+def get_cache_invalidation_subscriber(redis) -> CacheInvalidationSubscriber:
+    """Returns the subscriber of the current process, started on first use"""
+    global cache_invalidation_subscriber
+    if cache_invalidation_subscriber is None:
+        cache_invalidation_subscriber = CacheInvalidationSubscriber(
+            redis, local_response_cache
+        )
+    cache_invalidation_subscriber.start()
+    return cache_invalidation_subscriber
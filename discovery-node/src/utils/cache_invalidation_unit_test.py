@@ -0,0 +1,72 @@
+import json
+
+from src.utils.cache_invalidation import (
+    CONTENT_LIST_CACHE_TAG,
+    DIGITAL_CONTENT_CACHE_TAG,
+    USER_CACHE_TAG,
+    CacheInvalidationSubscriber,
+    get_changed_entity_cache_tags,
+    get_changed_entity_ids,
+    get_response_cache_tags,
+)
+from src.utils.helpers import encode_int_id
+from src.utils.local_response_cache import LocalResponseCache
+
+
+def test_get_response_cache_tags():
+    """Test that responses are tagged with their entities, users and digital_contents"""
+    content_list = {
+        "id": encode_int_id(1),
+        "user": {"id": encode_int_id(2)},
+        "digitalContents": [
+            {"id": encode_int_id(3), "user": {"id": encode_int_id(4)}},
+            {"id": encode_int_id(5), "user": {"id": encode_int_id(2)}},
+        ],
+    }
+    get_tags = get_response_cache_tags(CONTENT_LIST_CACHE_TAG)
+    assert get_tags({"data": [content_list]}) == [
+        "content_list:1",
+        "digital_content:3",
+        "digital_content:5",
+        "user:2",
+        "user:4",
+    ]
+    assert get_response_cache_tags(DIGITAL_CONTENT_CACHE_TAG)({"data": {"id": 6}}) == [
+        "digital_content:6"
+    ]
+    assert get_tags({"data": []}) == []
+    assert get_tags("not a response") == []
+
+
+def test_get_changed_entity_cache_tags():
+    """Test that changed entity ids are tagged by their entity type"""
+    changed_entity_ids = get_changed_entity_ids()
+    assert get_changed_entity_cache_tags(changed_entity_ids) == []
+
+    changed_entity_ids[USER_CACHE_TAG].update([2, 1])
+    changed_entity_ids[DIGITAL_CONTENT_CACHE_TAG].add(1)
+    changed_entity_ids[CONTENT_LIST_CACHE_TAG].add(3)
+    assert get_changed_entity_cache_tags(changed_entity_ids) == [
+        "content_list:3",
+        "digital_content:1",
+        "user:1",
+        "user:2",
+    ]
+
+
+def test_cache_invalidation_subscriber_drops_local_keys():
+    local_cache = LocalResponseCache()
+    subscriber = CacheInvalidationSubscriber(None, local_cache)
+    for key in ["a", "b"]:
+        local_cache.set(key, {"key": key}, 10, 60)
+
+    subscriber.handle_message(
+        {
+            "type": "message",
+            "data": json.dumps({"block_number": 1, "tags": [], "keys": ["a", "c"]}),
+        }
+    )
+    subscriber.handle_message({"type": "message", "data": "not json"})
+    subscriber.handle_message(None)
+    assert local_cache.get("a") is None
+    assert local_cache.get("b") == {"key": "b"}
@@ -0,0 +1,113 @@
+import logging
+import time
+from typing import Dict, Iterable, Set
+
+from src.utils.redis_cache import get_all_json_cached_key, set_json_cached_key
+
+logger = logging.getLogger(__name__)
+
+# Max number of CIDs kept in the cache, least recently used CIDs are evicted first
+CID_METADATA_CACHE_MAX_ENTRIES = 200000
+# How long a CID that could not be fetched from any content node is skipped for
+MISSING_CID_TTL_SECONDS = 30
+
+cid_metadata_lru_redis_key = "cid_metadata:lru"
+
+
+def get_cid_metadata_cache_key(cid_type, cid):
+    return f"cid_metadata:{cid_type}:{cid}"
+
+
+def get_missing_cid_cache_key(cid):
+    return f"cid_metadata:missing:{cid}"
+
+
+class CIDMetadataCache:
+    """
+    Redis backed LRU cache of formatted CID metadata.
+
+    CIDs are content addressed so cached metadata never goes stale, the cache is
+    only bounded by size. A sorted set of CID cache key -> last access time tracks
+    recency for eviction. CIDs that no content node could serve are remembered for
+    MISSING_CID_TTL_SECONDS so repeated attempts do not fan out to every node.
+    """
+
+    def __init__(self, redis, max_entries=CID_METADATA_CACHE_MAX_ENTRIES):
+        self._redis = redis
+        self._max_entries = max_entries
+
+    def get_many(self, cids: Iterable[str], cid_type: Dict[str, str]):
+        """Returns a dict of cid -> metadata for cached CIDs"""
+        cids = list(cids)
+        if not cids:
+            return {}
+        keys = [get_cid_metadata_cache_key(cid_type[cid], cid) for cid in cids]
+        try:
+            cached_values = get_all_json_cached_key(self._redis, keys)
+            cid_metadata = {
+                cid: metadata
+                for cid, metadata in zip(cids, cached_values)
+                if metadata is not None
+            }
+            if cid_metadata:
+                now = time.time()
+                self._redis.zadd(
+                    cid_metadata_lru_redis_key,
+                    {
+                        get_cid_metadata_cache_key(cid_type[cid], cid): now
+                        for cid in cid_metadata
+                    },
+                )
+            return cid_metadata
+        except Exception as e:
+            logger.error(f"cid_metadata_cache.py | Unable to read cached CIDs {e}")
+            return {}
+
+    def set_many(self, cid_metadata: Dict[str, Dict], cid_type: Dict[str, str]):
+        if not cid_metadata:
+            return
+        try:
+            now = time.time()
+            keys = {}
+            pipe = self._redis.pipeline()
+            for cid, metadata in cid_metadata.items():
+                key = get_cid_metadata_cache_key(cid_type[cid], cid)
+                set_json_cached_key(pipe, key, metadata)
+                keys[key] = now
+            pipe.zadd(cid_metadata_lru_redis_key, keys)
+            pipe.execute()
+            self._evict()
+        except Exception as e:
+            logger.error(f"cid_metadata_cache.py | Unable to cache CIDs {e}")
+
+    def _evict(self):
+        num_evicted = self._redis.zcard(cid_metadata_lru_redis_key) - self._max_entries
+        if num_evicted <= 0:
+            return
+        pipe = self._redis.pipeline()
+        pipe.zrange(cid_metadata_lru_redis_key, 0, num_evicted - 1)
+        pipe.zremrangebyrank(cid_metadata_lru_redis_key, 0, num_evicted - 1)
+        evicted_keys, _ = pipe.execute()
+        if evicted_keys:
+            self._redis.delete(*evicted_keys)
+
+    def get_missing(self, cids: Iterable[str]) -> Set[str]:
+        """Returns the CIDs that recently could not be fetched"""
+        cids = list(cids)
+        if not cids:
+            return set()
+        try:
+            missing = self._redis.mget([get_missing_cid_cache_key(cid) for cid in cids])
+            return {cid for cid, is_missing in zip(cids, missing) if is_missing}
+        except Exception as e:
+            logger.error(f"cid_metadata_cache.py | Unable to read missing CIDs {e}")
+            return set()
+
+    def set_missing(self, cids: Iterable[str]):
+        try:
+            pipe = self._redis.pipeline()
+            for cid in cids:
+                pipe.set(get_missing_cid_cache_key(cid), 1, MISSING_CID_TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"cid_metadata_cache.py | Unable to cache missing CIDs {e}")
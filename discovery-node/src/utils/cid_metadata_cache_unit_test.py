@@ -0,0 +1,103 @@
+from unittest.mock import patch
+
+from src.utils.cid_metadata_cache import CIDMetadataCache
+from src.utils.cid_metadata_client import (
+    ENDPOINT_MAX_CONSECUTIVE_FAILURES,
+    CIDMetadataClient,
+)
+
+CID_TYPE = {"cid1": "digital_content", "cid2": "user", "cid3": "user"}
+
+
+def test_cid_metadata_cache(redis_mock):
+    """Tests that cached metadata is returned and keyed by cid type"""
+    cache = CIDMetadataCache(redis_mock)
+    cache.set_many({"cid1": {"title": "a"}, "cid2": {"name": "b"}}, CID_TYPE)
+
+    assert cache.get_many(["cid1", "cid2", "cid3"], CID_TYPE) == {
+        "cid1": {"title": "a"},
+        "cid2": {"name": "b"},
+    }
+    assert cache.get_many(["cid1"], {"cid1": "user"}) == {}
+
+
+def test_cid_metadata_cache_evicts_least_recently_used(redis_mock):
+    cache = CIDMetadataCache(redis_mock, max_entries=2)
+    with patch("src.utils.cid_metadata_cache.time.time", return_value=1):
+        cache.set_many({"cid1": {"title": "a"}, "cid2": {"name": "b"}}, CID_TYPE)
+    with patch("src.utils.cid_metadata_cache.time.time", return_value=2):
+        # Reading cid1 makes cid2 the least recently used entry
+        cache.get_many(["cid1"], CID_TYPE)
+    with patch("src.utils.cid_metadata_cache.time.time", return_value=3):
+        cache.set_many({"cid3": {"name": "c"}}, CID_TYPE)
+
+    assert cache.get_many(["cid1", "cid2", "cid3"], CID_TYPE).keys() == {
+        "cid1",
+        "cid3",
+    }
+
+
+def test_cid_metadata_cache_missing(redis_mock):
+    cache = CIDMetadataCache(redis_mock)
+    cache.set_missing(["cid1"])
+
+    assert cache.get_missing(["cid1", "cid2"]) == {"cid1"}
+
+
+def test_fetch_metadata_uses_cache(redis_mock):
+    """Tests that cached and recently missing CIDs are not requested"""
+    client = CIDMetadataClient({}, redis=redis_mock)
+    client._cache.set_many({"cid1": {"title": "a"}}, CID_TYPE)
+    client._cache.set_missing(["cid2"])
+
+    with patch.object(client, "_get_metadata_async") as get_metadata_async:
+        cid_metadata = client.fetch_metadata_from_gateway_endpoints(
+            {}.keys(),
+            {("cid1", "txhash1"), ("cid2", "txhash2")},
+            {"cid1": 1, "cid2": 1},
+            {},
+            CID_TYPE,
+            should_fetch_from_replica_set=False,
+        )
+
+    assert cid_metadata == {"cid1": {"title": "a"}}
+    get_metadata_async.assert_not_called()
+
+
+def test_fetch_metadata_marks_only_not_found_cids_missing(redis_mock):
+    """Tests that CIDs every endpoint does not have are cached as missing, and
+    CIDs whose requests failed are not"""
+    client = CIDMetadataClient({}, redis=redis_mock)
+    client._cnode_endpoints = ["https://a"]
+
+    async def get_metadata_async(async_session, cid, gateway_endpoint):
+        # cid2 fails, as on a timeout
+        return (cid, None) if cid == "cid3" else None
+
+    with patch.object(client, "_get_metadata_async", get_metadata_async):
+        cid_metadata = client.fetch_metadata_from_gateway_endpoints(
+            {}.keys(),
+            {("cid2", "txhash2"), ("cid3", "txhash3")},
+            {"cid2": 1, "cid3": 1},
+            {},
+            CID_TYPE,
+            should_fetch_from_replica_set=False,
+        )
+
+    assert cid_metadata == {}
+    assert client._cache.get_missing(["cid2", "cid3"]) == {"cid3"}
+
+
+def test_rank_gateway_endpoints():
+    """Tests that fast endpoints are tried first and failing endpoints are skipped"""
+    client = CIDMetadataClient({})
+    client._get_endpoint_health("https://slow").record_success(1.5)
+    client._get_endpoint_health("https://fast").record_success(0.01)
+    for _ in range(ENDPOINT_MAX_CONSECUTIVE_FAILURES):
+        client._get_endpoint_health("https://down").record_failure()
+
+    assert client._rank_gateway_endpoints(
+        ["https://down", "https://slow", "https://fast"]
+    ) == ["https://fast", "https://slow"]
+    # Failing endpoints are still used when nothing else is available
+    assert client._rank_gateway_endpoints(["https://down"]) == ["https://down"]
@@ -1,18 +1,107 @@
 # pylint: disable=C0302
 import asyncio
 import logging
-from typing import Dict, KeysView, Set, Tuple
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, KeysView, Optional, Set, Tuple
 from urllib.parse import urlparse
 
 import aiohttp
 from src.tasks.metadata import digital_content_metadata_format, user_metadata_format
+from src.utils.cid_metadata_cache import CIDMetadataCache
 from src.utils.eth_contracts_helpers import fetch_all_registered_content_nodes
+from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
 
 logger = logging.getLogger(__name__)
 
 GET_METADATA_TIMEOUT_SECONDS = 2
 GET_METADATA_ALL_GATEWAY_TIMEOUT_SECONDS = 5
 
+# Bounds for per endpoint timeouts adapted from observed latencies
+MIN_GET_METADATA_TIMEOUT_SECONDS = 0.5
+GET_METADATA_TIMEOUT_P95_MULTIPLIER = 3
+# Shortest wait on an endpoint before hedging the request to the next endpoint
+MIN_HEDGE_DELAY_SECONDS = 0.05
+
+# Max open connections across all gateway endpoints in the shared session
+GATEWAY_CONNECTION_POOL_SIZE = 100
+# Max in flight gateway requests, queued requests do not count against their timeout
+MAX_CONCURRENT_GATEWAY_REQUESTS = 50
+# Weight of the latest request in an endpoint's moving averages
+ENDPOINT_HEALTH_DECAY = 0.2
+# Endpoints failing this many times in a row are skipped for ENDPOINT_COOLDOWN_SECONDS
+ENDPOINT_MAX_CONSECUTIVE_FAILURES = 3
+ENDPOINT_COOLDOWN_SECONDS = 60
+# Number of recent latencies kept per endpoint for percentiles
+ENDPOINT_LATENCY_WINDOW_SIZE = 100
+ENDPOINT_MIN_LATENCY_SAMPLES = 5
+
+
+class GatewayEndpointHealth:
+    """Moving averages and recent latencies of a gateway endpoint"""
+
+    def __init__(self):
+        # Optimistic prior so unseen endpoints are tried early
+        self.latency_seconds = GET_METADATA_TIMEOUT_SECONDS / 4
+        self.success_rate = 1.0
+        self.consecutive_failures = 0
+        self.last_failure_time = 0.0
+        self.latencies: deque = deque(maxlen=ENDPOINT_LATENCY_WINDOW_SIZE)
+
+    def record_success(self, latency_seconds):
+        self.latencies.append(latency_seconds)
+        self.latency_seconds += ENDPOINT_HEALTH_DECAY * (
+            latency_seconds - self.latency_seconds
+        )
+        self.success_rate += ENDPOINT_HEALTH_DECAY * (1 - self.success_rate)
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.latency_seconds += ENDPOINT_HEALTH_DECAY * (
+            GET_METADATA_TIMEOUT_SECONDS - self.latency_seconds
+        )
+        self.success_rate -= ENDPOINT_HEALTH_DECAY * self.success_rate
+        self.consecutive_failures += 1
+        self.last_failure_time = time.time()
+
+    def is_cooling_down(self):
+        return (
+            self.consecutive_failures >= ENDPOINT_MAX_CONSECUTIVE_FAILURES
+            and time.time() - self.last_failure_time < ENDPOINT_COOLDOWN_SECONDS
+        )
+
+    @property
+    def score(self):
+        """Expected seconds per successful response, lower is better"""
+        return self.latency_seconds / max(self.success_rate, 0.01)
+
+    def get_latency_percentile(self, percentile) -> Optional[float]:
+        if len(self.latencies) < ENDPOINT_MIN_LATENCY_SAMPLES:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(int(len(latencies) * percentile), len(latencies) - 1)]
+
+    def get_timeout(self):
+        p95 = self.get_latency_percentile(0.95)
+        if p95 is None:
+            return GET_METADATA_TIMEOUT_SECONDS
+        return min(
+            max(
+                p95 * GET_METADATA_TIMEOUT_P95_MULTIPLIER,
+                MIN_GET_METADATA_TIMEOUT_SECONDS,
+            ),
+            GET_METADATA_TIMEOUT_SECONDS,
+        )
+
+    def get_hedge_delay(self):
+        """How long to wait on this endpoint before also trying the next one"""
+        p95 = self.get_latency_percentile(0.95)
+        if p95 is None:
+            return GET_METADATA_TIMEOUT_SECONDS / 4
+        return min(max(p95, MIN_HEDGE_DELAY_SECONDS), self.get_timeout())
+
 
 class CIDMetadataClient:
     """Helper class for Coliving Discovery Node + CID Metadata interaction"""
@@ -29,6 +118,17 @@ class CIDMetadataClient:
         # it might fail to find content and throw an error. To prevent race conditions between
         # indexing starting and this getting populated, run this on init in the instance
         # in the celery worker
+        self._cache = CIDMetadataCache(redis) if redis else None
+        self._endpoint_health: Dict[str, GatewayEndpointHealth] = {}
+
+        # Requests run on a long lived event loop in a background thread so the
+        # aiohttp session and its connection pool are reused across calls
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_pid: Optional[int] = None
+        self._loop_lock = threading.Lock()
+        self._async_session: Optional[aiohttp.ClientSession] = None
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+
         if eth_web3 and shared_config and redis and eth_abi_values:
             self._cnode_endpoints = list(
                 fetch_all_registered_content_nodes(
@@ -51,6 +151,57 @@ class CIDMetadataClient:
             )
             self._cnode_endpoints = cnode_endpoints
 
+    def _get_loop(self):
+        with self._loop_lock:
+            # Event loop threads do not survive a fork, start a new one per process
+            if self._loop is None or self._loop_pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._loop_pid = os.getpid()
+                self._async_session = None
+                self._request_semaphore = None
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="cid_metadata_client",
+                    daemon=True,
+                ).start()
+            return self._loop
+
+    def _run_on_loop(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+
+    def _get_async_session(self):
+        # Only called from the background loop, so no locking is needed
+        if self._async_session is None or self._async_session.closed:
+            self._async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=GATEWAY_CONNECTION_POOL_SIZE)
+            )
+        return self._async_session
+
+    def _get_request_semaphore(self):
+        # Created on the background loop, which the semaphore binds to
+        if self._request_semaphore is None:
+            self._request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_GATEWAY_REQUESTS)
+        return self._request_semaphore
+
+    def _get_endpoint_health(self, gateway_endpoint):
+        if gateway_endpoint not in self._endpoint_health:
+            self._endpoint_health[gateway_endpoint] = GatewayEndpointHealth()
+        return self._endpoint_health[gateway_endpoint]
+
+    def _rank_gateway_endpoints(self, gateway_endpoints):
+        """Orders endpoints by health score, dropping endpoints that keep failing
+        unless no other endpoint is left"""
+        ranked_endpoints = sorted(
+            gateway_endpoints,
+            key=lambda endpoint: self._get_endpoint_health(endpoint).score,
+        )
+        healthy_endpoints = [
+            endpoint
+            for endpoint in ranked_endpoints
+            if not self._get_endpoint_health(endpoint).is_cooling_down()
+        ]
+        return healthy_endpoints or ranked_endpoints
+
     def _get_metadata_from_json(self, default_metadata_fields, resp_json):
         metadata = {}
         for parameter, value in default_metadata_fields.items():
@@ -69,12 +220,32 @@ class CIDMetadataClient:
                     f"CIDMetadataClient | Invalid URL from provided gateway addr - {url}"
                 )
 
-            async with async_session.get(
-                url, timeout=GET_METADATA_TIMEOUT_SECONDS
-            ) as resp:
-                if resp.status == 200:
-                    json_resp = await resp.json(content_type=None)
-                    return (multihash, json_resp)
+            endpoint_health = self._get_endpoint_health(gateway_endpoint)
+            async with self._get_request_semaphore():
+                metric = PrometheusMetric(
+                    PrometheusMetricNames.CID_METADATA_GATEWAY_REQUEST_DURATION_SECONDS
+                )
+                try:
+                    async with async_session.get(
+                        url, timeout=endpoint_health.get_timeout()
+                    ) as resp:
+                        # Missing content is not an endpoint failure, server errors are
+                        if resp.status >= 500:
+                            endpoint_health.record_failure()
+                        else:
+                            endpoint_health.record_success(metric.elapsed())
+                        metric.save_time(
+                            {"endpoint": gateway_endpoint, "success": resp.status < 500}
+                        )
+                        if resp.status == 200:
+                            json_resp = await resp.json(content_type=None)
+                            return (multihash, json_resp)
+                        if resp.status == 404:
+                            return (multihash, None)
+                except (asyncio.TimeoutError, aiohttp.ClientError):
+                    endpoint_health.record_failure()
+                    metric.save_time({"endpoint": gateway_endpoint, "success": False})
+                    raise
         except asyncio.TimeoutError:
             logger.info(
                 f"CIDMetadataClient | _get_metadata_async TimeoutError fetching gateway address - {url}"
@@ -83,6 +254,55 @@ class CIDMetadataClient:
         except Exception as e:
             logger.info(f"CIDMetadataClient | _get_metadata_async Exception - {str(e)}")
             return None
+        return None
+
+    async def _fetch_metadata_hedged(
+        self, async_session, cid, gateway_endpoints, metadata_format
+    ):
+        """Requests cid from the best ranked endpoint first and only hedges to the
+        next endpoint once pending requests fail or run past the p95 latency of the
+        last endpoint tried. Returns (cid, formatted metadata), (cid, None) if every
+        endpoint answered that it does not have cid, or None."""
+        remaining_endpoints = list(gateway_endpoints)
+        pending: Set[asyncio.Future] = set()
+        num_not_found = 0
+        try:
+            while remaining_endpoints or pending:
+                hedge_delay = None
+                if remaining_endpoints:
+                    gateway_endpoint = remaining_endpoints.pop(0)
+                    pending.add(
+                        asyncio.ensure_future(
+                            self._get_metadata_async(
+                                async_session, cid, gateway_endpoint
+                            )
+                        )
+                    )
+                    hedge_delay = self._get_endpoint_health(
+                        gateway_endpoint
+                    ).get_hedge_delay()
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    future_result = future.result()
+                    if not future_result:
+                        continue
+                    if future_result[1] is None:
+                        num_not_found += 1
+                        continue
+                    formatted_json = self._get_metadata_from_json(
+                        metadata_format, future_result[1]
+                    )
+                    if formatted_json != metadata_format:
+                        return (cid, formatted_json)
+            if num_not_found == len(gateway_endpoints):
+                return (cid, None)
+            return None
+        finally:
+            for future in pending:
+                future.cancel()  # cancel other pending requests
 
     def _get_gateway_endpoints(
         self,
@@ -116,79 +336,97 @@ class CIDMetadataClient:
         should_fetch_from_replica_set -- boolean for if fetch should be from replica set only
         """
 
-        cid_metadata = {}
-
-        async with aiohttp.ClientSession() as async_session:
-            futures = []
-            cid_futures_map: Dict[str, set] = {}
-
-            for cid, _ in cids_txhash_set:
-                if cid in fetched_cids:
-                    continue  # already fetched
-                user_id = cid_to_user_id[cid]
-
-                gateway_endpoints = self._get_gateway_endpoints(
-                    should_fetch_from_replica_set, user_id, user_to_replica_set
-                )
-                if not gateway_endpoints:
-                    continue  # skip if user replica set is empty
-
-                for gateway_endpoint in gateway_endpoints:
-                    future = asyncio.ensure_future(
-                        self._get_metadata_async(async_session, cid, gateway_endpoint)
+        unfetched_cids = {cid for cid, _ in cids_txhash_set if cid not in fetched_cids}
+        cached_cid_metadata = {}
+        if self._cache:
+            cached_cid_metadata = self._cache.get_many(unfetched_cids, cid_type)
+            unfetched_cids -= cached_cid_metadata.keys()
+            # Skip CIDs that no content node had on a recent attempt
+            unfetched_cids -= self._cache.get_missing(unfetched_cids)
+        cid_metadata = dict(cached_cid_metadata)
+        # CIDs that every endpoint answered it does not have, unlike CIDs whose
+        # requests timed out or failed
+        not_found_cids = set()
+
+        async_session = self._get_async_session()
+        futures = []
+
+        for cid in unfetched_cids:
+            user_id = cid_to_user_id[cid]
+
+            gateway_endpoints = self._get_gateway_endpoints(
+                should_fetch_from_replica_set, user_id, user_to_replica_set
+            )
+            if not gateway_endpoints:
+                continue  # skip if user replica set is empty
+
+            # TODO add contentList type
+            metadata_format = (
+                digital_content_metadata_format
+                if cid_type[cid] == "digital_content"
+                else user_metadata_format
+            )
+            futures.append(
+                asyncio.ensure_future(
+                    self._fetch_metadata_hedged(
+                        async_session,
+                        cid,
+                        self._rank_gateway_endpoints(gateway_endpoints),
+                        metadata_format,
                     )
-                    if cid not in cid_futures_map:
-                        cid_futures_map[cid] = set()
-                    cid_futures_map[cid].add(future)
-                    futures.append(future)
+                )
+            )
 
-            try:
+        try:
+            if len(fetched_cids) + len(cid_metadata) != len(cids_txhash_set):
                 for future in asyncio.as_completed(
                     futures, timeout=GET_METADATA_ALL_GATEWAY_TIMEOUT_SECONDS
                 ):
-                    try:
-                        future_result = await future
-                    except asyncio.CancelledError:
-                        pass  # swallow canceled requests
-
+                    future_result = await future
                     if not future_result:
                         continue
 
-                    cid, metadata_json = future_result
-
-                    # TODO add contentList type
-                    metadata_format = (
-                        digital_content_metadata_format
-                        if cid_type[cid] == "digital_content"
-                        else user_metadata_format
-                    )
-
-                    formatted_json = self._get_metadata_from_json(
-                        metadata_format, metadata_json
-                    )
-
-                    if formatted_json != metadata_format:
-                        cid_metadata[cid] = formatted_json
-
-                        if len(fetched_cids) + len(cid_metadata) == len(
-                            cids_txhash_set
-                        ):
-                            break  # fetched all metadata
-
-                        for other_future in cid_futures_map[cid]:
-                            if other_future == future:
-                                continue
-                            other_future.cancel()  # cancel other pending requests
+                    cid, formatted_json = future_result
+                    if formatted_json is None:
+                        not_found_cids.add(cid)
+                        continue
+                    cid_metadata[cid] = formatted_json
 
-            except asyncio.TimeoutError:
-                logger.info(
-                    "CIDMetadataClient | fetch_metadata_from_gateway_endpoints TimeoutError"
+                    if len(fetched_cids) + len(cid_metadata) == len(cids_txhash_set):
+                        break  # fetched all metadata
+        except asyncio.TimeoutError:
+            logger.info(
+                "CIDMetadataClient | fetch_metadata_from_gateway_endpoints TimeoutError"
+            )
+        except Exception as e:
+            logger.info("CIDMetadataClient | Error in fetch cid metadata")
+            raise e
+        finally:
+            # The session outlives this call, so stop requests that are still running
+            for future in futures:
+                future.cancel()
+            if self._cache:
+                self._cache.set_many(
+                    {
+                        cid: metadata
+                        for cid, metadata in cid_metadata.items()
+                        if cid not in cached_cid_metadata
+                    },
+                    cid_type,
                 )
-            except Exception as e:
-                logger.info("CIDMetadataClient | Error in fetch cid metadata")
-                raise e
+                if not should_fetch_from_replica_set and not_found_cids:
+                    self._cache.set_missing(not_found_cids)
         return cid_metadata
 
+    async def _fetch_metadata_on_loop(self, *args, **kwargs) -> Dict[str, Dict]:
+        # The shared session belongs to the background loop, so callers running
+        # their own event loop wait on it instead of requesting directly
+        return await asyncio.wrap_future(
+            self._run_on_loop(
+                self._fetch_metadata_from_gateway_endpoints(*args, **kwargs)
+            )
+        )
+
     # Used in DATA indexing
     def fetch_metadata_from_gateway_endpoints(
         self,
@@ -199,7 +437,7 @@ class CIDMetadataClient:
         cid_type: Dict[str, str],
         should_fetch_from_replica_set: bool = True,
     ):
-        return asyncio.run(
+        return self._run_on_loop(
             self._fetch_metadata_from_gateway_endpoints(
                 fetched_cids,
                 cids_txhash_set,
@@ -208,7 +446,7 @@ class CIDMetadataClient:
                 cid_type,
                 should_fetch_from_replica_set,
             )
-        )
+        ).result()
 
     # Used in SOL indexing
     async def async_fetch_metadata_from_gateway_endpoints(
@@ -224,7 +462,7 @@ class CIDMetadataClient:
         try:
 
             cid_metadata.update(
-                await self._fetch_metadata_from_gateway_endpoints(
+                await self._fetch_metadata_on_loop(
                     cid_metadata.keys(),
                     cids_txhash_set,
                     cid_to_user_id,
@@ -240,7 +478,7 @@ class CIDMetadataClient:
         # second attempt - fetch missing CIDs from other cnodes
         if len(cid_metadata) != len(cids_txhash_set):
             cid_metadata.update(
-                await self._fetch_metadata_from_gateway_endpoints(
+                await self._fetch_metadata_on_loop(
                     cid_metadata.keys(),
                     cids_txhash_set,
                     cid_to_user_id,
@@ -0,0 +1,88 @@
+import asyncio
+
+from src.tasks.metadata import user_metadata_format
+from src.utils.cid_metadata_client import (
+    GET_METADATA_TIMEOUT_SECONDS,
+    MIN_GET_METADATA_TIMEOUT_SECONDS,
+    CIDMetadataClient,
+    GatewayEndpointHealth,
+)
+
+
+def make_client(endpoint_latencies):
+    """Returns a client whose gateway requests take the given seconds per endpoint"""
+    client = CIDMetadataClient({})
+    requested_endpoints = []
+
+    async def get_metadata_async(async_session, cid, gateway_endpoint):
+        requested_endpoints.append(gateway_endpoint)
+        await asyncio.sleep(endpoint_latencies[gateway_endpoint])
+        return (cid, {"name": gateway_endpoint})
+
+    client._get_metadata_async = get_metadata_async
+    for endpoint in endpoint_latencies:
+        for _ in range(10):
+            client._get_endpoint_health(endpoint).record_success(0.05)
+    return client, requested_endpoints
+
+
+def test_fetch_metadata_hedged_primary():
+    """Tests that secondaries are not requested when the primary responds in time"""
+    client, requested_endpoints = make_client({"https://a": 0.01, "https://b": 0.01})
+    result = asyncio.run(
+        client._fetch_metadata_hedged(
+            None, "cid", ["https://a", "https://b"], user_metadata_format
+        )
+    )
+
+    assert result[1]["name"] == "https://a"
+    assert requested_endpoints == ["https://a"]
+
+
+def test_fetch_metadata_hedged_slow_primary():
+    """Tests that a slow primary is hedged to the next endpoint after its p95"""
+    client, requested_endpoints = make_client({"https://a": 1, "https://b": 0.01})
+    result = asyncio.run(
+        client._fetch_metadata_hedged(
+            None, "cid", ["https://a", "https://b"], user_metadata_format
+        )
+    )
+
+    assert result[1]["name"] == "https://b"
+    assert requested_endpoints == ["https://a", "https://b"]
+
+
+def test_fetch_metadata_hedged_not_found():
+    """Tests that cid is only reported not found once every endpoint answered"""
+    client = CIDMetadataClient({})
+
+    async def get_metadata_async(async_session, cid, gateway_endpoint):
+        # https://b fails, as on a timeout
+        return (cid, None) if gateway_endpoint == "https://a" else None
+
+    client._get_metadata_async = get_metadata_async
+    assert asyncio.run(
+        client._fetch_metadata_hedged(None, "cid", ["https://a"], user_metadata_format)
+    ) == ("cid", None)
+    assert (
+        asyncio.run(
+            client._fetch_metadata_hedged(
+                None, "cid", ["https://a", "https://b"], user_metadata_format
+            )
+        )
+        is None
+    )
+
+
+def test_gateway_endpoint_health_adaptive_timeout():
+    endpoint_health = GatewayEndpointHealth()
+    assert endpoint_health.get_timeout() == GET_METADATA_TIMEOUT_SECONDS
+
+    for _ in range(20):
+        endpoint_health.record_success(0.01)
+    assert endpoint_health.get_timeout() == MIN_GET_METADATA_TIMEOUT_SECONDS
+
+    for _ in range(20):
+        endpoint_health.record_success(0.3)
+    assert endpoint_health.get_timeout() == 0.3 * 3
+    assert endpoint_health.get_hedge_delay() == 0.3
@@ -0,0 +1,107 @@
+"""
+Decodes the event logs of indexed transactions once per receipt
+
+ContractEvent.processReceipt decodes every log of a receipt against a single
+event ABI, so each handler asking for one event type re-decodes (and warns
+about) every log in the receipt. EventLogDecoder looks up each log's topic0 in a
+table of the event ABIs of all indexed contracts and decodes it once against the
+matching ABI, keeping the decoded events of recent receipts for all handlers.
+"""
+
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eth_utils import event_abi_to_log_topic
+from web3._utils.events import get_event_data
+from web3.exceptions import InvalidEventABI, LogTopicError, MismatchedABI
+
+logger = logging.getLogger(__name__)
+
+# Number of receipts whose decoded events are kept, covers prefetched blocks
+DECODED_RECEIPTS_CACHE_SIZE = 5000
+
+# topic0 and index of the event ABI among the ABIs sharing that topic0
+EventKey = Tuple[bytes, int]
+
+
+class EventLogDecoder:
+    """Decodes receipt logs against the events of a set of web3 contracts"""
+
+    def __init__(self, web3, contracts: Iterable):
+        self._codec = web3.codec
+        self._event_abis: Dict[bytes, List[Dict]] = defaultdict(list)
+        self._event_keys: Dict[Tuple[str, str], EventKey] = {}
+        for contract in contracts:
+            for abi in contract.abi:
+                if abi.get("type") != "event" or abi.get("anonymous"):
+                    continue
+                topic = event_abi_to_log_topic(abi)
+                event_abis = self._event_abis[topic]
+                if abi not in event_abis:
+                    event_abis.append(abi)
+                self._event_keys[(contract.address, abi["name"])] = (
+                    topic,
+                    event_abis.index(abi),
+                )
+
+        self._decoded_receipts: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode_receipt(self, tx_receipt) -> Dict[EventKey, Tuple]:
+        tx_hash = bytes(tx_receipt["transactionHash"])
+        with self._lock:
+            decoded_events = self._decoded_receipts.get(tx_hash)
+        if decoded_events is not None:
+            return decoded_events
+
+        events: Dict[EventKey, List] = defaultdict(list)
+        for log in tx_receipt["logs"]:
+            if not log["topics"]:
+                continue
+            topic = bytes(log["topics"][0])
+            for i, event_abi in enumerate(self._event_abis.get(topic, [])):
+                try:
+                    events[(topic, i)].append(
+                        get_event_data(self._codec, event_abi, log)
+                    )
+                except (MismatchedABI, LogTopicError, InvalidEventABI, TypeError) as e:
+                    logger.warning(
+                        f"event_log_decoder.py | Discarding log {log['logIndex']} of tx {tx_hash.hex()} for {event_abi['name']}: {e}"
+                    )
+        decoded_events = {key: tuple(key_events) for key, key_events in events.items()}
+
+        with self._lock:
+            self._decoded_receipts[tx_hash] = decoded_events
+            while len(self._decoded_receipts) > DECODED_RECEIPTS_CACHE_SIZE:
+                self._decoded_receipts.popitem(last=False)
+        return decoded_events
+
+    def decode_receipts(self, tx_receipts: Iterable):
+        for tx_receipt in tx_receipts:
+            self.decode_receipt(tx_receipt)
+
+    def get_events(self, contract, event_name, tx_receipt) -> Optional[Tuple]:
+        """Returns the event_name events of contract in tx_receipt, or None if the
+        event is not in the decoder's table"""
+        event_key = self._event_keys.get((contract.address, event_name))
+        if event_key is None:
+            return None
+        return self.decode_receipt(tx_receipt).get(event_key, ())
+
+
+def get_event_log_decoder(task) -> Optional[EventLogDecoder]:
+    event_log_decoder = getattr(task, "event_log_decoder", None)
+    return event_log_decoder if isinstance(event_log_decoder, EventLogDecoder) else None
+
+
+def get_contract_events(task, contract, event_name, tx_receipt):
+    """Equivalent of contract.events.<event_name>().processReceipt(tx_receipt),
+    served from the task's EventLogDecoder when it has one"""
+    event_log_decoder = get_event_log_decoder(task)
+    if event_log_decoder:
+        events = event_log_decoder.get_events(contract, event_name, tx_receipt)
+        if events is not None:
+            return events
+    return getattr(contract.events, event_name)().processReceipt(tx_receipt)
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from eth_abi import encode_abi
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from src.utils import event_log_decoder
+from src.utils.event_log_decoder import EventLogDecoder
+from web3 import Web3
+
+follow_added_abi = {
+    "anonymous": False,
+    "inputs": [
+        {"indexed": False, "name": "_followerUserId", "type": "uint256"},
+        {"indexed": False, "name": "_followeeUserId", "type": "uint256"},
+    ],
+    "name": "UserFollowAdded",
+    "type": "event",
+}
+follow_deleted_abi = {**follow_added_abi, "name": "UserFollowDeleted"}
+save_added_abi = {
+    "anonymous": False,
+    "inputs": [
+        {"indexed": False, "name": "_userId", "type": "uint256"},
+        {"indexed": False, "name": "_digitalContentId", "type": "uint256"},
+    ],
+    "name": "DigitalContentSaveAdded",
+    "type": "event",
+}
+
+social_feature_address = "0x" + "11" * 20
+user_library_address = "0x" + "22" * 20
+
+
+def make_log(log_index, event_abi, address, args):
+    return {
+        "address": Web3.toChecksumAddress(address),
+        "blockHash": HexBytes("0x" + "00" * 32),
+        "blockNumber": 1,
+        "data": HexBytes(encode_abi(["uint256", "uint256"], args)),
+        "logIndex": log_index,
+        "topics": [HexBytes(event_abi_to_log_topic(event_abi))],
+        "transactionHash": HexBytes("0x" + "ab" * 32),
+        "transactionIndex": 0,
+    }
+
+
+def make_contracts():
+    web3 = Web3()
+    social_feature_contract = web3.eth.contract(
+        address=Web3.toChecksumAddress(social_feature_address),
+        abi=[follow_added_abi, follow_deleted_abi],
+    )
+    user_library_contract = web3.eth.contract(
+        address=Web3.toChecksumAddress(user_library_address),
+        abi=[save_added_abi],
+    )
+    return web3, social_feature_contract, user_library_contract
+
+
+tx_receipt = {
+    "transactionHash": HexBytes("0x" + "ab" * 32),
+    "logs": [
+        make_log(0, follow_added_abi, social_feature_address, [1, 2]),
+        make_log(1, save_added_abi, user_library_address, [1, 3]),
+        make_log(2, follow_added_abi, social_feature_address, [1, 4]),
+        make_log(3, follow_deleted_abi, social_feature_address, [1, 5]),
+    ],
+}
+
+
+def test_event_log_decoder_matches_process_receipt():
+    """Tests that decoded events match the events processReceipt returns"""
+    web3, social_feature_contract, user_library_contract = make_contracts()
+    decoder = EventLogDecoder(web3, [social_feature_contract, user_library_contract])
+
+    for contract, event_name in [
+        (social_feature_contract, "UserFollowAdded"),
+        (social_feature_contract, "UserFollowDeleted"),
+        (user_library_contract, "DigitalContentSaveAdded"),
+    ]:
+        expected_events = getattr(contract.events, event_name)().processReceipt(
+            tx_receipt
+        )
+        assert decoder.get_events(contract, event_name, tx_receipt) == expected_events
+
+    assert [
+        event["args"]["_followeeUserId"]
+        for event in decoder.get_events(
+            social_feature_contract, "UserFollowAdded", tx_receipt
+        )
+    ] == [2, 4]
+    assert decoder.get_events(social_feature_contract, "Unknown", tx_receipt) is None
+
+
+def test_event_log_decoder_decodes_each_log_once():
+    web3, social_feature_contract, user_library_contract = make_contracts()
+    decoder = EventLogDecoder(web3, [social_feature_contract, user_library_contract])
+
+    with mock.patch.object(
+        event_log_decoder, "get_event_data", wraps=event_log_decoder.get_event_data
+    ) as get_event_data:
+        decoder.decode_receipts([tx_receipt])
+        for event_name in ["UserFollowAdded", "UserFollowDeleted"]:
+            decoder.get_events(social_feature_contract, event_name, tx_receipt)
+        decoder.get_events(user_library_contract, "DigitalContentSaveAdded", tx_receipt)
+
+    assert get_event_data.call_count == len(tx_receipt["logs"])
@@ -0,0 +1,30 @@
+"""
+JSON encoding for API responses
+
+FastJSONEncoder is a drop in JSONEncoder (for Flask's json_encoder or a `cls`
+argument) that encodes with orjson when it is installed. orjson writes
+non-ASCII characters as UTF-8 rather than escaping them.
+"""
+
+from json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONEncoder(JSONEncoder):
+    """Encodes with orjson when it is installed. Indented output and values orjson
+    cannot encode use JSONEncoder."""
+
+    def encode(self, o):
+        if orjson is None or self.indent is not None:
+            return super().encode(o)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(o, default=self.default, option=option).decode()
+        except orjson.JSONEncodeError:
+            return super().encode(o)
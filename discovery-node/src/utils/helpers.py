@@ -15,6 +15,7 @@ from flask import g, request
 from hashids import Hashids
 from jsonformatter import JsonFormatter
 from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient
 from src import exceptions
 
 from . import multihash
@@ -38,9 +39,13 @@ def get_openresty_public_key():
         return None
 
 
+def get_redis_dump_filename(key):
+    return f"{key}_dump"
+
+
 def redis_restore(redis, key):
     logger = logging.getLogger(__name__)
-    filename = f"{key}_dump"
+    filename = get_redis_dump_filename(key)
     try:
         with open(filename, "rb") as f:
             dumped = f.read()
@@ -85,7 +90,7 @@ def redis_dump(redis, key):
     logger = logging.getLogger(__name__)
     try:
         dumped = redis.dump(key)
-        filename = f"{key}_dump"
+        filename = get_redis_dump_filename(key)
         with open(filename, "wb") as f:
             f.write(dumped)
             logger.debug(f"successfully performed redis dump for key: {key}")
@@ -212,6 +217,27 @@ def tuple_to_model_dictionary(t, model):
     return dict(zip(keys, t))
 
 
+def get_current_records_by_id(session, model, id_column, ids):
+    """Loads the current records for the given ids in a single query.
+
+    Returns a dict of id -> record, with None for ids that have no current record.
+    Records are expunged from the session so they can be modified into new
+    records without UPDATE statements being made.
+    """
+    ids = {record_id for record_id in ids if record_id is not None}
+    records = dict.fromkeys(ids)
+    if not ids:
+        return records
+
+    for record in (
+        session.query(model).filter(id_column.in_(ids), model.is_current == True).all()
+    ):
+        session.expunge(record)
+        make_transient(record)
+        records[getattr(record, id_column.key)] = record
+    return records
+
+
 log_format = {
     "levelno": "levelno",
     "level": "levelname",
@@ -0,0 +1,62 @@
+"""
+Per-process LRU tier in front of the redis response cache
+
+Entries are the deserialized cached responses and expire when their redis key
+does, so every worker serves the same response for a key. The tier is bounded
+by the serialized size of its entries rather than their count.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+LOCAL_RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class LocalResponseCache:
+    def __init__(self, max_bytes: int = LOCAL_RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        # key -> (value, size in bytes, expiry timestamp)
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, _, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, size: int, ttl_sec: float):
+        if ttl_sec <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size, time.time() + ttl_sec)
+            self.num_bytes += size
+            while self.num_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.num_bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.num_bytes -= entry[1]
+
+
+local_response_cache = LocalResponseCache()
@@ -0,0 +1,31 @@
+from time import sleep
+
+from src.utils.local_response_cache import LocalResponseCache
+
+
+def test_local_response_cache_byte_budget():
+    """Test that least recently used entries are evicted to stay within budget"""
+    local_cache = LocalResponseCache(max_bytes=100)
+    local_cache.set("a", "a", 40, 60)
+    local_cache.set("b", "b", 40, 60)
+    assert local_cache.get("a") == "a"
+
+    local_cache.set("c", "c", 40, 60)
+    assert local_cache.get("b") is None
+    assert local_cache.get("a") == "a"
+    assert local_cache.get("c") == "c"
+    assert local_cache.num_bytes == 80
+
+    # Entries larger than the budget are not kept
+    local_cache.set("d", "d", 101, 60)
+    assert local_cache.get("d") is None
+    assert local_cache.num_bytes == 80
+
+
+def test_local_response_cache_expiry():
+    local_cache = LocalResponseCache()
+    local_cache.set("a", "a", 1, 0.1)
+    assert local_cache.get("a") == "a"
+    sleep(0.1)
+    assert local_cache.get("a") is None
+    assert local_cache.num_bytes == 0
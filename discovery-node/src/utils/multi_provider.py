@@ -1,8 +1,36 @@
+import json
 import random
+from typing import Any, List, Tuple
 
+from web3._utils.request import make_post_request
 from web3.providers import BaseProvider, HTTPProvider
 
 
+def make_batch_request(provider: HTTPProvider, calls: List[Tuple[str, Any]]):
+    """
+    Sends a list of (method, params) calls to an HTTP provider as a single
+    JSON-RPC batch request. Responses are returned in the same order as calls.
+    """
+    batch = [
+        {"jsonrpc": "2.0", "method": method, "params": params or [], "id": i}
+        for i, (method, params) in enumerate(calls)
+    ]
+    raw_response = make_post_request(
+        provider.endpoint_uri,
+        json.dumps(batch).encode("utf-8"),
+        **dict(provider.get_request_kwargs()),
+    )
+    responses = json.loads(raw_response)
+    # Nodes that reject batches respond with a single error object
+    if not isinstance(responses, list):
+        raise Exception(f"Batch request failed with {responses}")
+    if len(responses) != len(batch):
+        raise Exception(
+            f"Batch request expected {len(batch)} responses, received {len(responses)}"
+        )
+    return sorted(responses, key=lambda response: response["id"])
+
+
 class MultiProvider(BaseProvider):
     """
     Implements a custom web3 provider
@@ -21,6 +49,14 @@ class MultiProvider(BaseProvider):
                 continue
         raise Exception("All requests failed")
 
+    def make_batch_request(self, calls):
+        for provider in random.sample(self.providers, k=len(self.providers)):
+            try:
+                return make_batch_request(provider, calls)
+            except Exception:
+                continue
+        raise Exception("All batch requests failed")
+
     def isConnected(self):
         return any(provider.isConnected() for provider in self.providers)
 
@@ -3,7 +3,7 @@ from functools import wraps
 from time import time
 from typing import Callable, Dict
 
-from prometheus_client import Gauge, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 logger = logging.getLogger(__name__)
 
@@ -98,13 +98,23 @@ class PrometheusMetricNames:
     CELERY_TASK_ACTIVE_DURATION_SECONDS = "celery_task_active_duration_seconds"
     CELERY_TASK_DURATION_SECONDS = "celery_task_duration_seconds"
     CELERY_TASK_LAST_DURATION_SECONDS = "celery_task_last_duration_seconds"
+    CID_METADATA_GATEWAY_REQUEST_DURATION_SECONDS = (
+        "cid_metadata_gateway_request_duration_seconds"
+    )
+    FLASK_ROUTE_CACHE_REQUESTS_TOTAL = "flask_route_cache_requests_total"
     FLASK_ROUTE_DURATION_SECONDS = "flask_route_duration_seconds"
     HEALTH_CHECK_BLOCK_DIFFERENCE_LATEST = "health_check_block_difference_latest"
     HEALTH_CHECK_INDEXED_BLOCK_NUM_LATEST = "health_check_indexed_block_num_latest"
     INDEX_BLOCKS_DURATION_SECONDS = "index_blocks_duration_seconds"
+    INDEX_BLOCKS_PREFETCH_DEPTH_LATEST = "index_blocks_prefetch_depth_latest"
     INDEX_METRICS_DURATION_SECONDS = "index_metrics_duration_seconds"
+    INDEX_SOLANA_PLAYS_BATCH_DURATION_SECONDS = (
+        "index_solana_plays_batch_duration_seconds"
+    )
     INDEX_TRENDING_DURATION_SECONDS = "index_trending_duration_seconds"
-    DIGITAL_CONTENT_STATE_UPDATE_DURATION_SECONDS = "digital_content_state_update_duration_seconds"
+    DIGITAL_CONTENT_STATE_UPDATE_DURATION_SECONDS = (
+        "digital_content_state_update_duration_seconds"
+    )
     UPDATE_AGGREGATE_TABLE_DURATION_SECONDS = "update_aggregate_table_duration_seconds"
     UPDATE_DIGITAL_CONTENT_IS_AVAILABLE_DURATION_SECONDS = (
         "update_digital_content_is_available_duration_seconds"
@@ -125,6 +135,8 @@ Metric Types:
     * When looking at the raw /prometheus_metrics endpoint for
       `coliving_dn_update_aggregate_table_latency_seconds_bucket`, you can see how a
       single metric explodes into multiple statistical helpers.
+* Prometheus Counters: Counters only go up and are used to count events, like cache
+  hits. Their names end in `_total`.
 
 Labels:
 
@@ -163,6 +175,22 @@ PrometheusRegistry = {
             "success",
         ),
     ),
+    PrometheusMetricNames.CID_METADATA_GATEWAY_REQUEST_DURATION_SECONDS: Histogram(
+        f"{METRIC_PREFIX}_{PrometheusMetricNames.CID_METADATA_GATEWAY_REQUEST_DURATION_SECONDS}",
+        "Latencies of CID metadata requests to each content node gateway",
+        (
+            "endpoint",
+            "success",
+        ),
+    ),
+    PrometheusMetricNames.FLASK_ROUTE_CACHE_REQUESTS_TOTAL: Counter(
+        f"{METRIC_PREFIX}_{PrometheusMetricNames.FLASK_ROUTE_CACHE_REQUESTS_TOTAL}",
+        "Response cache lookups for flask routes by result",
+        (
+            "route",
+            "result",
+        ),
+    ),
     PrometheusMetricNames.FLASK_ROUTE_DURATION_SECONDS: Histogram(
         f"{METRIC_PREFIX}_{PrometheusMetricNames.FLASK_ROUTE_DURATION_SECONDS}",
         "Runtimes for flask routes",
@@ -184,11 +212,20 @@ PrometheusRegistry = {
         "Runtimes for src.task.index:index_blocks()",
         ("scope",),
     ),
+    PrometheusMetricNames.INDEX_BLOCKS_PREFETCH_DEPTH_LATEST: Gauge(
+        f"{METRIC_PREFIX}_{PrometheusMetricNames.INDEX_BLOCKS_PREFETCH_DEPTH_LATEST}",
+        "Number of upcoming blocks prefetched by src.task.index:index_blocks()",
+    ),
     PrometheusMetricNames.INDEX_METRICS_DURATION_SECONDS: Histogram(
         f"{METRIC_PREFIX}_{PrometheusMetricNames.INDEX_METRICS_DURATION_SECONDS}",
         "Runtimes for src.task.index_metrics:celery.task()",
         ("task_name",),
     ),
+    PrometheusMetricNames.INDEX_SOLANA_PLAYS_BATCH_DURATION_SECONDS: Histogram(
+        f"{METRIC_PREFIX}_{PrometheusMetricNames.INDEX_SOLANA_PLAYS_BATCH_DURATION_SECONDS}",
+        "Runtimes of the transaction fetches, parsing and writes of src.task.index_solana_plays:parse_sol_tx_batch()",
+        ("scope",),
+    ),
     PrometheusMetricNames.INDEX_TRENDING_DURATION_SECONDS: Histogram(
         f"{METRIC_PREFIX}_{PrometheusMetricNames.INDEX_TRENDING_DURATION_SECONDS}",
         "Runtimes for src.task.index_trending:index_trending()",
@@ -254,6 +291,8 @@ class PrometheusMetric:
             this_metric.observe(value)
         elif isinstance(this_metric, Gauge):
             this_metric.set(value)
+        elif isinstance(this_metric, Counter):
+            this_metric.inc(value)
 
     @classmethod
     def register_collector(cls, name, collector_func):
@@ -1,11 +1,28 @@
 import functools
-import json
 import logging
-from typing import Any, List  # pylint: disable=C0302
+import time
+from typing import Any, Dict, List, Tuple  # pylint: disable=C0302
 
 from flask.globals import request
+from redis.exceptions import WatchError
 from src.utils import redis_connection
+from src.utils.cache_invalidation import (
+    cache_invalidation_sequence_key,
+    get_cache_invalidation_sequence,
+    get_cache_invalidation_subscriber,
+    get_cache_tag_key,
+    invalidated_response_ttl_sec,
+    publish_cache_invalidation,
+    tag_cached_response,
+)
+from src.utils.local_response_cache import local_response_cache
+from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
 from src.utils.query_params import stringify_query_params
+from src.utils.redis_codec import (
+    decode_cache_value,
+    decode_cache_value_or_json,
+    encode_cache_value,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +32,14 @@ logger = logging.getLogger(__name__)
 internal_api_cache_prefix = "INTERNAL_API"
 cache_prefix = "API_V1_ROUTE"
 default_ttl_sec = 60
+# Seconds a response is kept past its ttl, to be served while one worker recomputes it.
+# Only hot keys, that workers contended for, keep a stale copy
+default_stale_ttl_sec = 5 * 60
+# Seconds a worker may spend recomputing a key before another worker may take over
+cache_lease_ttl_sec = 30
+# Seconds a worker waits for another worker to cache a key it is computing
+cache_lease_wait_sec = 5
+cache_lease_poll_interval_sec = 0.05
 
 
 def extract_key(path, arg_items, cache_prefix_override=None):
@@ -26,27 +51,75 @@ def extract_key(path, arg_items, cache_prefix_override=None):
     return key
 
 
+def get_stale_key(key):
+    return f"{key}:stale"
+
+
+def get_lease_key(key):
+    return f"{key}:lease"
+
+
+def get_hot_key(key):
+    return f"{key}:hot"
+
+
+def mark_hot_cache_key(redis, key, ttl_sec):
+    """Marks key as contended, so that the next response cached keeps a stale copy"""
+    redis.set(get_hot_key(key), 1, ex=ttl_sec)
+
+
+def is_hot_cache_key(redis, key) -> bool:
+    return bool(redis.exists(get_hot_key(key)))
+
+
+def acquire_cache_lease(redis, key) -> bool:
+    """Takes the lease to compute key, so that a single worker recomputes it"""
+    return bool(redis.set(get_lease_key(key), 1, nx=True, ex=cache_lease_ttl_sec))
+
+
+def release_cache_lease(redis, key):
+    redis.delete(get_lease_key(key))
+
+
+def wait_for_json_cached_key(redis, key) -> Any:
+    """Waits for the worker holding the lease on key to cache it"""
+    deadline = time.time() + cache_lease_wait_sec
+    while time.time() < deadline:
+        time.sleep(cache_lease_poll_interval_sec)
+        cached_value = get_json_cached_key(redis, key)
+        if cached_value:
+            return cached_value
+        # The lease holder finished without caching a value
+        if not redis.exists(get_lease_key(key)):
+            break
+    return None
+
+
 def use_redis_cache(key, ttl_sec, work_func):
     """Attempts to return value by key, otherwise caches and returns `work_func`"""
     redis = redis_connection.get_redis()
     cached_value = get_json_cached_key(redis, key)
     if cached_value:
         return cached_value
-    to_cache = work_func()
-    set_json_cached_key(redis, key, to_cache, ttl_sec)
+    have_lease = acquire_cache_lease(redis, key)
+    if not have_lease:
+        cached_value = wait_for_json_cached_key(redis, key)
+        if cached_value:
+            return cached_value
+    try:
+        to_cache = work_func()
+        set_json_cached_key(redis, key, to_cache, ttl_sec)
+    finally:
+        if have_lease:
+            release_cache_lease(redis, key)
     return to_cache
 
 
-def get_json_cached_key(redis, key: str) -> Any:
-    """
-    Gets a JSON serialized value from the cache.
-    """
-    cached_value = redis.get(key)
+def deserialize_json_cached_value(redis, key: str, cached_value) -> Any:
     if cached_value:
         logger.debug(f"Redis Cache - hit {key}")
         try:
-            deserialized = json.loads(cached_value)
-            return deserialized
+            return decode_cache_value_or_json(cached_value)
         except Exception as e:
             logger.warning(f"Unable to deserialize json cached response: {e}")
             # In the case we are unable to deserialize, delete the key so that
@@ -57,9 +130,31 @@ def get_json_cached_key(redis, key: str) -> Any:
     return None
 
 
+def get_json_cached_key(redis, key: str) -> Any:
+    """
+    Gets a value encoded with the cache codec from the cache.
+    """
+    return deserialize_json_cached_value(redis, key, redis.get(key))
+
+
+def get_json_cached_key_with_ttl(redis, key: str) -> Tuple[Any, int, float]:
+    """
+    Gets a value encoded with the cache codec from the cache along with its
+    serialized size and remaining ttl in seconds.
+    """
+    pipe = redis.pipeline()
+    pipe.get(key)
+    pipe.pttl(key)
+    cached_value, ttl_ms = pipe.execute()
+    deserialized = deserialize_json_cached_value(redis, key, cached_value)
+    if deserialized is None:
+        return None, 0, 0
+    return deserialized, len(cached_value), ttl_ms / 1000
+
+
 def get_all_json_cached_key(redis, keys: List[str]) -> List[Any]:
     """
-    Gets all the JSON serialized values from the cache for provided keys.
+    Gets all the values encoded with the cache codec from the cache for provided keys.
     Returns an ordered list mapped from the provided keys.
     If any value is not de-serializable, `None` is returned in place.
     """
@@ -70,8 +165,7 @@ def get_all_json_cached_key(redis, keys: List[str]) -> List[Any]:
         key = keys[i]
         if val:
             try:
-                deserialized = json.loads(val)
-                results.append(deserialized)
+                results.append(decode_cache_value_or_json(val))
             except Exception as e:
                 logger.warning(f"Unable to deserialize json cached response: {e}")
                 # In the case we are unable to deserialize, delete the key so that
@@ -83,13 +177,98 @@ def get_all_json_cached_key(redis, keys: List[str]) -> List[Any]:
     return results
 
 
+def get_all_cached_keys(redis, keys: List[str]) -> List[Any]:
+    """
+    Gets the values of the provided keys encoded with the cache codec.
+    Returns an ordered list mapped from the provided keys, with `None` in place of
+    missing values and values written in another format.
+    """
+    cached_values = redis.mget(keys)
+    results = []
+    for key, val in zip(keys, cached_values):
+        try:
+            results.append(decode_cache_value(val))
+        except Exception as e:
+            logger.warning(f"Unable to decode cached value: {e}")
+            redis.delete(key)
+            results.append(None)
+    return results
+
+
+def set_cached_keys(redis, objs_by_key: Dict[str, Any], ttl=None):
+    """
+    Sets objs in the cache encoded with the cache codec, in a single round trip.
+    """
+    pipe = redis.pipeline()
+    for key, obj in objs_by_key.items():
+        pipe.set(key, encode_cache_value(obj), ttl)
+    pipe.execute()
+
+
 def set_json_cached_key(redis, key, obj, ttl=None):
     """
-    Sets an obj int the cache via JSON serialization.
+    Sets an obj in the cache encoded with the cache codec.
+    """
+    redis.set(key, encode_cache_value(obj), ttl)
+
+
+def set_json_cached_response(redis, key, obj, ttl_sec, stale_ttl_sec):
+    """
+    Sets a response in the cache for ttl_sec, and a stale copy that is served for
+    stale_ttl_sec more while the response is recomputed.
     """
-    # Default converts datetime and other unparseables to str.
-    serialized = json.dumps(obj, default=str)
-    redis.set(key, serialized, ttl)
+    serialized = encode_cache_value(obj)
+    pipe = redis.pipeline()
+    _set_serialized_response(pipe, key, serialized, ttl_sec, stale_ttl_sec)
+    pipe.execute()
+
+
+def set_tagged_json_cached_response(
+    redis, key, obj, ttl_sec, stale_ttl_sec, invalidation_sequence
+):
+    """
+    Sets a response tagged with tag_cached_response like set_json_cached_response.
+    The response is only cached for invalidated_response_ttl_sec if the
+    invalidation sequence moved from invalidation_sequence, read before the
+    response was computed, up to when it is set. The key must be tagged first,
+    so that invalidations after the sequence moved find it.
+    """
+    serialized = encode_cache_value(obj)
+    try:
+        with redis.pipeline() as pipe:
+            pipe.watch(cache_invalidation_sequence_key)
+            if get_cache_invalidation_sequence(pipe) == invalidation_sequence:
+                pipe.multi()
+                _set_serialized_response(pipe, key, serialized, ttl_sec, stale_ttl_sec)
+                pipe.execute()
+                return
+    except WatchError:
+        pass
+    pipe = redis.pipeline()
+    _set_serialized_response(
+        pipe,
+        key,
+        serialized,
+        min(ttl_sec, invalidated_response_ttl_sec),
+        stale_ttl_sec,
+    )
+    pipe.execute()
+
+
+def _set_serialized_response(pipe, key, serialized, ttl_sec, stale_ttl_sec):
+    pipe.set(key, serialized, ttl_sec)
+    if stale_ttl_sec:
+        pipe.set(get_stale_key(key), serialized, ttl_sec + stale_ttl_sec)
+
+
+def get_request_route():
+    return request.url_rule.rule if request.url_rule else request.path
+
+
+def record_cache_result(route, result):
+    PrometheusMetric(PrometheusMetricNames.FLASK_ROUTE_CACHE_REQUESTS_TOTAL).save(
+        1, {"route": route, "result": result}
+    )
 
 
 def cache(**kwargs):
@@ -105,6 +284,17 @@ def cache(**kwargs):
         cache_prefix_override: optional,the prefix for the cache key to use
             currently the cache decorator function has a default prefix for public API routes
             this param allows us to override the prefix for the internal API routes and avoid confusion
+        stale_ttl_sec: optional,number The time in seconds past ttl_sec that the
+            response is served while a single worker recomputes it
+        tags: optional,func Returns the cache tags of a response, the entities it
+            contains. Tagged responses are removed when the indexer changes one of
+            those entities, see src/utils/cache_invalidation.py
+
+    Responses are cached in redis and in a per-process tier in front of it. When
+    a response is missing, only the worker holding the key's lease recomputes it.
+    Other workers serve the stale copy if there is one, or wait for the lease
+    holder to cache the response. Stale copies are only kept for hot keys, that
+    other workers waited on, so the cache of rarely requested keys is not doubled.
 
     Usage Notes:
         If the wrapped function returns a tuple, the transform function will not
@@ -130,6 +320,10 @@ def cache(**kwargs):
     cache_prefix_override = (
         kwargs["cache_prefix_override"] if "cache_prefix_override" in kwargs else None
     )
+    stale_ttl_sec = (
+        kwargs["stale_ttl_sec"] if "stale_ttl_sec" in kwargs else default_stale_ttl_sec
+    )
+    get_tags = kwargs["tags"] if "tags" in kwargs else None
     redis = redis_connection.get_redis()
 
     def outer_wrap(func):
@@ -139,22 +333,87 @@ def cache(**kwargs):
                 "user_id" in request.args and request.args["user_id"] is not None
             )
             key = extract_key(request.path, request.args.items(), cache_prefix_override)
+
+            def cached_response(cached_resp):
+                if transform is not None:
+                    return transform(cached_resp)
+                return cached_resp, 200
+
+            def set_cached_response(resp):
+                resp_stale_ttl_sec = (
+                    stale_ttl_sec
+                    if stale_ttl_sec and is_hot_cache_key(redis, key)
+                    else 0
+                )
+                if not get_tags:
+                    set_json_cached_response(
+                        redis, key, resp, ttl_sec, resp_stale_ttl_sec
+                    )
+                    return
+                tag_cached_response(
+                    redis, key, get_tags(resp), ttl_sec + resp_stale_ttl_sec
+                )
+                set_tagged_json_cached_response(
+                    redis,
+                    key,
+                    resp,
+                    ttl_sec,
+                    resp_stale_ttl_sec,
+                    invalidation_sequence,
+                )
+
+            have_lease = False
+            invalidation_sequence = None
             if not has_user_id:
-                cached_resp = get_json_cached_key(redis, key)
+                route = get_request_route()
+                # Tagged responses are only kept locally while invalidations are received
+                use_local_cache = (
+                    not get_tags
+                    or get_cache_invalidation_subscriber(redis).is_subscribed
+                )
+                cached_resp = local_response_cache.get(key) if use_local_cache else None
                 if cached_resp:
-                    if transform is not None:
-                        return transform(cached_resp)
-                    return cached_resp, 200
+                    record_cache_result(route, "local_hit")
+                    return cached_response(cached_resp)
 
-            response = func(*args, **kwargs)
-
-            if len(response) == 2:
-                resp, status_code = response
-                if status_code < 400:
-                    set_json_cached_key(redis, key, resp, ttl_sec)
-                return resp, status_code
-            set_json_cached_key(redis, key, response, ttl_sec)
-            return transform(response)
+                cached_resp, size, key_ttl_sec = get_json_cached_key_with_ttl(
+                    redis, key
+                )
+                if cached_resp:
+                    if use_local_cache:
+                        local_response_cache.set(key, cached_resp, size, key_ttl_sec)
+                    record_cache_result(route, "hit")
+                    return cached_response(cached_resp)
+
+                have_lease = acquire_cache_lease(redis, key)
+                if not have_lease:
+                    if stale_ttl_sec:
+                        mark_hot_cache_key(redis, key, ttl_sec + stale_ttl_sec)
+                    cached_resp = get_json_cached_key(redis, get_stale_key(key))
+                    if cached_resp:
+                        record_cache_result(route, "stale")
+                        return cached_response(cached_resp)
+                    cached_resp = wait_for_json_cached_key(redis, key)
+                    if cached_resp:
+                        record_cache_result(route, "single_flight_wait")
+                        return cached_response(cached_resp)
+                record_cache_result(route, "miss")
+
+            if get_tags:
+                invalidation_sequence = get_cache_invalidation_sequence(redis)
+            try:
+                response = func(*args, **kwargs)
+
+                if len(response) == 2:
+                    resp, status_code = response
+                    if status_code < 400:
+                        set_cached_response(resp)
+                    return resp, status_code
+                set_cached_response(response)
+                return transform(response)
+            finally:
+                if have_lease:
+                    release_cache_lease(redis, key)
 
         return inner_wrap
 
@@ -165,6 +424,14 @@ def get_user_id_cache_key(id):
     return f"user:id:{id}"
 
 
+def get_user_aggregate_cache_key(id):
+    return f"user:aggregate:{id}"
+
+
+def get_user_followee_follows_cache_key(id):
+    return f"user:followee_follows:{id}"
+
+
 def get_digital_content_id_cache_key(id):
     return f"digital_content:id:{id}"
 
@@ -179,7 +446,15 @@ def get_sp_id_key(id):
 
 def remove_cached_user_ids(redis, user_ids):
     try:
-        user_keys = list(map(get_user_id_cache_key, user_ids))
+        user_keys = [
+            key
+            for user_id in user_ids
+            for key in (
+                get_user_id_cache_key(user_id),
+                get_user_aggregate_cache_key(user_id),
+                get_user_followee_follows_cache_key(user_id),
+            )
+        ]
         redis.delete(*user_keys)
     except Exception as e:
         logger.error("Unable to remove cached users: %s", e, exc_info=True)
@@ -201,6 +476,35 @@ def remove_cached_content_list_ids(redis, content_list_ids):
         logger.error("Unable to remove cached contentLists: %s", e, exc_info=True)
 
 
+def invalidate_cache_tags(redis, block_number, tags: List[str]):
+    """
+    Removes the cached responses tagged with tags, including their stale copies,
+    and publishes the removed keys for the local response caches
+    """
+    try:
+        tag_keys = [get_cache_tag_key(tag) for tag in tags]
+        pipe = redis.pipeline()
+        # Incremented before the tags are read, so that responses set after the
+        # increment are cached briefly and responses set before it are found
+        pipe.incr(cache_invalidation_sequence_key)
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        _, *tagged_keys = pipe.execute()
+
+        keys = sorted({key.decode() for members in tagged_keys for key in members})
+        pipe = redis.pipeline()
+        if keys:
+            pipe.delete(*keys, *map(get_stale_key, keys))
+        # Keys tagged since they were read stay tagged for the next invalidation
+        for tag_key, members in zip(tag_keys, tagged_keys):
+            if members:
+                pipe.srem(tag_key, *members)
+        pipe.execute()
+        publish_cache_invalidation(redis, block_number, tags, keys)
+    except Exception as e:
+        logger.error("Unable to invalidate cached responses: %s", e, exc_info=True)
+
+
 def get_trending_cache_key(request_items, request_path):
     request_items.pop("limit", None)
     request_items.pop("offset", None)
@@ -1,16 +1,36 @@
 import json
 from datetime import datetime
+from threading import Timer
 from time import sleep
 from unittest.mock import patch
 
 import flask
-from dateutil import parser
+from src.utils import redis_cache
+from src.utils.cache_invalidation import (
+    CACHE_INVALIDATION_CHANNEL,
+    DIGITAL_CONTENT_CACHE_TAG,
+    CacheInvalidationSubscriber,
+    get_cache_invalidation_sequence,
+    get_cache_tag_key,
+    get_response_cache_tags,
+    invalidated_response_ttl_sec,
+)
+from src.utils.helpers import encode_int_id
+from src.utils.local_response_cache import local_response_cache
 from src.utils.redis_cache import (
+    acquire_cache_lease,
     cache,
+    extract_key,
     get_all_json_cached_key,
     get_json_cached_key,
+    get_stale_key,
+    invalidate_cache_tags,
+    release_cache_lease,
     set_json_cached_key,
+    set_json_cached_response,
+    set_tagged_json_cached_response,
 )
+from src.utils.redis_codec import PAYLOAD_MARKER, decode_cache_value
 
 
 def test_json_cache_single_key(redis_mock):
@@ -50,7 +70,19 @@ def test_json_cache_date_value(redis_mock):
     date = datetime(2016, 2, 18, 9, 50, 20)
     set_json_cached_key(redis_mock, "key", {"date": date})
     result = get_json_cached_key(redis_mock, "key")
-    assert parser.parse(result["date"]) == date
+    assert result["date"] == date
+
+
+def test_json_cache_encoding(redis_mock):
+    """Test that values are cached with the cache codec, and plain JSON values still read"""
+    set_json_cached_key(redis_mock, "key1", {"name": "joe"})
+    assert redis_mock.get("key1").startswith(PAYLOAD_MARKER)
+    redis_mock.set("key2", json.dumps({"name": "thor"}))
+    assert get_json_cached_key(redis_mock, "key2") == {"name": "thor"}
+    assert get_all_json_cached_key(redis_mock, ["key1", "key2"]) == [
+        {"name": "joe"},
+        {"name": "thor"},
+    ]
 
 
 def test_cache_decorator(redis_mock):
@@ -76,7 +108,7 @@ def test_cache_decorator(redis_mock):
             assert res[1] == 200
 
             cached_resp = redis_mock.get(mock_key_1)
-            deserialized = json.loads(cached_resp)
+            deserialized = decode_cache_value(cached_resp)
             assert deserialized == {"name": "joe"}
 
             # This should call the function and return the cached response
@@ -102,7 +134,7 @@ def test_cache_decorator(redis_mock):
             assert res == {"music": "coliving"}
 
             cached_resp = redis_mock.get(mock_key_1)
-            deserialized = json.loads(cached_resp)
+            deserialized = decode_cache_value(cached_resp)
             assert deserialized == "coliving"
 
             # This should call the function and return the cached response
@@ -116,3 +148,155 @@ def test_cache_decorator(redis_mock):
             assert cached_resp is None
 
     get_mock_cache()  # pylint: disable=no-value-for-parameter
+
+
+def make_counted_cached_func(ttl_sec=60):
+    calls = []
+
+    @cache(ttl_sec=ttl_sec)
+    def mock_func():
+        calls.append(1)
+        return {"name": "fresh"}, 200
+
+    return mock_func, calls
+
+
+def test_cache_decorator_local_tier(redis_mock):
+    """Test that redis hits are kept in the per-process tier until they expire"""
+    local_response_cache.clear()
+    app = flask.Flask(__name__)
+    with app.test_request_context("/local"):
+        mock_func, calls = make_counted_cached_func()
+        key = extract_key("/local", [])
+
+        assert mock_func() == ({"name": "fresh"}, 200)
+        assert local_response_cache.get(key) is None
+
+        # A redis hit populates the local tier, which then serves the response
+        assert mock_func() == ({"name": "fresh"}, 200)
+        redis_mock.delete(key)
+        assert mock_func() == ({"name": "fresh"}, 200)
+        assert len(calls) == 1
+
+
+def test_cache_decorator_serves_stale_during_recompute(redis_mock):
+    """Test that a stale response is served while another worker recomputes it"""
+    local_response_cache.clear()
+    app = flask.Flask(__name__)
+    with app.test_request_context("/stale"):
+        mock_func, calls = make_counted_cached_func()
+        key = extract_key("/stale", [])
+        set_json_cached_response(redis_mock, key, {"name": "stale"}, 60, 60)
+        redis_mock.delete(key)
+
+        assert acquire_cache_lease(redis_mock, key)
+        assert mock_func() == ({"name": "stale"}, 200)
+        assert not calls
+
+        # Once the lease is released, the next request recomputes the response
+        release_cache_lease(redis_mock, key)
+        assert mock_func() == ({"name": "fresh"}, 200)
+        assert len(calls) == 1
+        assert get_json_cached_key(redis_mock, get_stale_key(key)) == {"name": "fresh"}
+
+
+def test_cache_decorator_stale_copy_of_hot_keys(redis_mock):
+    """Test that only keys other workers waited on keep a stale copy"""
+    local_response_cache.clear()
+    app = flask.Flask(__name__)
+    with app.test_request_context("/cold"):
+        mock_func, _ = make_counted_cached_func()
+        key = extract_key("/cold", [])
+        assert mock_func() == ({"name": "fresh"}, 200)
+        assert redis_mock.get(key) is not None
+        assert redis_mock.get(get_stale_key(key)) is None
+
+
+def test_cache_decorator_single_flight(redis_mock):
+    """Test that a missing response is awaited while another worker computes it"""
+    local_response_cache.clear()
+    app = flask.Flask(__name__)
+    with app.test_request_context("/single-flight"):
+        mock_func, calls = make_counted_cached_func()
+        key = extract_key("/single-flight", [])
+
+        assert acquire_cache_lease(redis_mock, key)
+        Timer(
+            0.2, set_json_cached_key, (redis_mock, key, {"name": "computed"}, 60)
+        ).start()
+        assert mock_func() == ({"name": "computed"}, 200)
+        assert not calls
+
+        # The response is computed if the lease holder ends without caching it
+        redis_mock.delete(key)
+        local_response_cache.clear()
+        Timer(0.2, release_cache_lease, (redis_mock, key)).start()
+        assert acquire_cache_lease(redis_mock, key) is False
+        assert mock_func() == ({"name": "fresh"}, 200)
+        assert len(calls) == 1
+
+
+def test_cache_decorator_tagged_invalidation(redis_mock):
+    """Test that tagged responses are removed when their entities are invalidated"""
+    local_response_cache.clear()
+    subscriber = CacheInvalidationSubscriber(redis_mock, local_response_cache)
+    calls = []
+
+    @cache(ttl_sec=300, tags=get_response_cache_tags(DIGITAL_CONTENT_CACHE_TAG))
+    def mock_func():
+        calls.append(1)
+        if len(calls) == 2:
+            # Entities invalidated while the response is computed
+            invalidate_cache_tags(redis_mock, 2, ["user:3"])
+        data = {"id": encode_int_id(5), "user": {"id": encode_int_id(2)}}
+        return {"data": data}, 200
+
+    app = flask.Flask(__name__)
+    with app.test_request_context("/digital_contents/5"), patch.object(
+        redis_cache, "get_cache_invalidation_subscriber", return_value=subscriber
+    ):
+        key = extract_key("/digital_contents/5", [])
+        mock_func()
+        assert redis_mock.smembers(get_cache_tag_key("digital_content:5")) == {
+            key.encode()
+        }
+        assert 0 < redis_mock.ttl(key) <= 300
+
+        pubsub = redis_mock.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+        pubsub.get_message(timeout=1)  # subscribe confirmation
+        invalidate_cache_tags(redis_mock, 1, ["user:2"])
+        assert redis_mock.get(key) is None
+        assert redis_mock.get(get_stale_key(key)) is None
+        message = pubsub.get_message(timeout=1)
+        assert json.loads(message["data"]) == {
+            "block_number": 1,
+            "tags": ["user:2"],
+            "keys": [key],
+        }
+
+        # A response computed across an invalidation is cached briefly
+        mock_func()
+        assert len(calls) == 2
+        assert 0 < redis_mock.ttl(key) <= invalidated_response_ttl_sec
+        mock_func()
+        assert len(calls) == 2
+
+
+def test_set_tagged_json_cached_response(redis_mock):
+    """Test that tagged responses set after an invalidation are cached briefly"""
+    key = "API_V1_ROUTE:/digital_contents/5:"
+    sequence = get_cache_invalidation_sequence(redis_mock)
+    set_tagged_json_cached_response(redis_mock, key, {"id": 5}, 300, 0, sequence)
+    assert 0 < redis_mock.ttl(key) <= 300
+    redis_mock.delete(key)
+
+    # Invalidated between tagging and setting the response
+    redis_cache.tag_cached_response(redis_mock, key, ["digital_content:5"], 300)
+    invalidate_cache_tags(redis_mock, 1, ["digital_content:6"])
+    set_tagged_json_cached_response(redis_mock, key, {"id": 5}, 300, 0, sequence)
+    assert 0 < redis_mock.ttl(key) <= invalidated_response_ttl_sec
+
+    # Invalidated once set, the tagged response is found
+    invalidate_cache_tags(redis_mock, 2, ["digital_content:5"])
+    assert redis_mock.get(key) is None
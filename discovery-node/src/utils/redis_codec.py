@@ -0,0 +1,190 @@
+"""
+Codecs for the values of redis cached entities
+
+Payloads start with a header holding the payload version and the codec that
+encoded them. Values written before the header, by another codec, or for
+another version are read as cache misses, so a format change only costs a
+refetch. Datetimes round trip as datetimes, so readers no longer parse them.
+
+msgpack is the default codec, selected with `cache_codec` in the redis config.
+The json codec, on orjson when it is installed, is kept for values that need to
+be readable in redis.
+"""
+
+import functools
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Union
+
+from src.utils.config import shared_config
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Never starts a JSON document, so unversioned JSON values are not mistaken for payloads
+PAYLOAD_MARKER = b"\x00"
+# Bump when the shape of cached values changes to ignore the values cached before
+PAYLOAD_VERSION = 2
+
+MSGPACK_DATETIME_EXT = 1
+MSGPACK_DATE_EXT = 2
+
+# Keys of a dict or indexes of a list leading to a value in a JSON document
+JSONPath = List[Union[str, int]]
+
+
+def to_json_key(key) -> str:
+    """Returns the key a dict key is written as in JSON"""
+    return key if isinstance(key, str) else json.dumps(key)
+
+
+def tag_dates(obj, path: JSONPath, datetimes: List[JSONPath], dates: List[JSONPath]):
+    """
+    Returns obj with datetimes and dates written as ISO strings, and appends
+    their paths to datetimes and dates
+    """
+    if isinstance(obj, dict):
+        tagged_dict = {}
+        for key, value in obj.items():
+            json_key = to_json_key(key)
+            tagged_dict[json_key] = tag_dates(
+                value, path + [json_key], datetimes, dates
+            )
+        return tagged_dict
+    if isinstance(obj, (list, tuple)):
+        return [
+            tag_dates(value, path + [i], datetimes, dates)
+            for i, value in enumerate(obj)
+        ]
+    if isinstance(obj, datetime):
+        datetimes.append(path)
+        return obj.isoformat()
+    if isinstance(obj, date):
+        dates.append(path)
+        return obj.isoformat()
+    return obj
+
+
+def untag_value(obj, path: JSONPath, parse):
+    """Returns obj with the ISO string at path parsed with parse"""
+    if not path:
+        return parse(obj)
+    container = obj
+    for key in path[:-1]:
+        container = container[key]
+    container[path[-1]] = parse(container[path[-1]])
+    return obj
+
+
+class JSONCodec:
+    """
+    Writes the value with datetimes and dates as ISO strings, next to the paths
+    of those strings, so reading parses just those paths rather than hooking
+    every decoded object
+    """
+
+    codec_id = b"j"
+
+    def dumps(self, obj) -> bytes:
+        datetimes: List[JSONPath] = []
+        dates: List[JSONPath] = []
+        document: Dict[str, Any] = {"value": tag_dates(obj, [], datetimes, dates)}
+        if datetimes:
+            document["datetimes"] = datetimes
+        if dates:
+            document["dates"] = dates
+        if orjson is not None:
+            return orjson.dumps(document, default=str)
+        return json.dumps(document, default=str, separators=(",", ":")).encode()
+
+    def loads(self, payload: bytes) -> Any:
+        document = orjson.loads(payload) if orjson is not None else json.loads(payload)
+        value = document["value"]
+        for path in document.get("datetimes", ()):
+            value = untag_value(value, path, datetime.fromisoformat)
+        for path in document.get("dates", ()):
+            value = untag_value(value, path, date.fromisoformat)
+        return value
+
+
+class MsgpackCodec:
+    codec_id = b"m"
+
+    @staticmethod
+    def _default(o):
+        if isinstance(o, datetime):
+            return msgpack.ExtType(MSGPACK_DATETIME_EXT, o.isoformat().encode())
+        if isinstance(o, date):
+            return msgpack.ExtType(MSGPACK_DATE_EXT, o.isoformat().encode())
+        return str(o)
+
+    @staticmethod
+    def _ext_hook(code, data):
+        if code == MSGPACK_DATETIME_EXT:
+            return datetime.fromisoformat(data.decode())
+        if code == MSGPACK_DATE_EXT:
+            return date.fromisoformat(data.decode())
+        return msgpack.ExtType(code, data)
+
+    def dumps(self, obj) -> bytes:
+        return msgpack.packb(obj, default=self._default, use_bin_type=True)
+
+    def loads(self, payload: bytes) -> Any:
+        return msgpack.unpackb(
+            payload, ext_hook=self._ext_hook, raw=False, strict_map_key=False
+        )
+
+
+codecs: Dict[str, Any] = {"json": JSONCodec()}
+if msgpack is not None:
+    codecs["msgpack"] = MsgpackCodec()
+codecs_by_id = {codec.codec_id: codec for codec in codecs.values()}
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache_codec(name: Optional[str] = None):
+    if name is None:
+        name = shared_config["redis"].get("cache_codec", "msgpack")
+    codec = codecs.get(name)
+    if codec is None:
+        logger.warning(
+            f"redis_codec.py | Cache codec {name} is unavailable, using json"
+        )
+        codec = codecs["json"]
+    return codec
+
+
+def encode_cache_value(obj, codec=None) -> bytes:
+    codec = codec or get_cache_codec()
+    header = PAYLOAD_MARKER + bytes([PAYLOAD_VERSION]) + codec.codec_id
+    return header + codec.dumps(obj)
+
+
+def decode_cache_value(payload: bytes) -> Any:
+    """Returns the decoded value, or None if payload is not a current payload"""
+    if not payload or payload[:2] != PAYLOAD_MARKER + bytes([PAYLOAD_VERSION]):
+        return None
+    codec = codecs_by_id.get(payload[2:3])
+    if codec is None:
+        return None
+    return codec.loads(payload[3:])
+
+
+def decode_cache_value_or_json(payload: bytes) -> Any:
+    """
+    Decodes payload like decode_cache_value, reading values cached as plain JSON
+    before the codec as JSON until they expire
+    """
+    if payload[:1] != PAYLOAD_MARKER:
+        return json.loads(payload)
+    return decode_cache_value(payload)
@@ -0,0 +1,82 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from src.utils import redis_codec
+from src.utils.fast_json import FastJSONEncoder
+from src.utils.redis_cache import get_all_cached_keys, set_cached_keys
+from src.utils.redis_codec import (
+    PAYLOAD_MARKER,
+    codecs,
+    decode_cache_value,
+    encode_cache_value,
+)
+
+user = {
+    "user_id": 1,
+    "handle": "joe",
+    "name": "Jöe",
+    "is_verified": False,
+    "bio": None,
+    "created_at": datetime(2021, 3, 4, 5, 6, 7, 123456),
+    "updated_at": datetime(2021, 3, 4, 5, 6, 8),
+    "birthday": date(2000, 1, 2),
+    "playlist_library": {"contents": [{"type": "folder", "contents": []}]},
+    "events": [{"at": datetime(2021, 3, 5), "on": [date(2021, 3, 6)]}],
+}
+
+
+def test_codecs_round_trip():
+    """Test that every available codec decodes its values with datetimes intact"""
+    for codec in codecs.values():
+        assert decode_cache_value(encode_cache_value(user, codec)) == user
+        assert decode_cache_value(encode_cache_value([user, None], codec)) == [
+            user,
+            None,
+        ]
+        assert decode_cache_value(encode_cache_value(user["created_at"], codec)) == (
+            user["created_at"]
+        )
+    assert decode_cache_value(encode_cache_value({"balance": Decimal("1.5")})) == {
+        "balance": "1.5"
+    }
+
+
+def test_decode_ignores_other_payloads():
+    """Test that unversioned, other version and unknown codec payloads are misses"""
+    payload = encode_cache_value(user)
+    assert decode_cache_value(None) is None
+    assert decode_cache_value(json.dumps({"user_id": 1}).encode()) is None
+    assert (
+        decode_cache_value(
+            PAYLOAD_MARKER + bytes([redis_codec.PAYLOAD_VERSION + 1]) + payload[2:]
+        )
+        is None
+    )
+    assert decode_cache_value(payload[:2] + b"?" + payload[3:]) is None
+
+
+def test_cached_keys(redis_mock):
+    """Test that values may be set and fetched in bulk from the redis cache"""
+    other_user = {**user, "user_id": 2, "handle": "jane"}
+    set_cached_keys(redis_mock, {"user:1": user, "user:2": other_user}, 60)
+    redis_mock.set("user:3", json.dumps({"user_id": 3}))
+
+    assert get_all_cached_keys(
+        redis_mock, ["user:2", "user:1", "user:3", "user:4"]
+    ) == [
+        other_user,
+        user,
+        None,
+        None,
+    ]
+    assert 0 < redis_mock.ttl("user:1") <= 60
+
+
+def test_fast_json_encoder_matches_json_encoder():
+    """Test that FastJSONEncoder output decodes to the JSONEncoder output"""
+    response = {"data": [user], "sorted": {"b": 1, "a": 2}}
+    for kwargs in [{}, {"sort_keys": True}, {"indent": 4}]:
+        assert json.loads(
+            json.dumps(response, cls=FastJSONEncoder, default=str, **kwargs)
+        ) == json.loads(json.dumps(response, default=str, **kwargs))
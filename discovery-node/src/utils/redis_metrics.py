@@ -1,6 +1,7 @@
 import functools
 import json
 import logging  # pylint: disable=C0302
+import os
 from datetime import datetime, timedelta
 
 import redis
@@ -25,15 +26,24 @@ from src.models.metrics.aggregate_monthly_unique_users_metrics import (
     AggregateMonthlyUniqueUsersMetric,
 )
 from src.utils.config import shared_config
-from src.utils.helpers import get_ip, redis_get_or_restore, redis_set_and_dump
+from src.utils.helpers import (
+    get_ip,
+    get_redis_dump_filename,
+    redis_dump,
+    redis_get_or_restore,
+    redis_restore,
+    redis_set_and_dump,
+)
 from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
 from src.utils.query_params import app_name_param, stringify_query_params
+from src.utils.redis_metrics_buffer import RedisMetricsBuffer
 from werkzeug.wrappers.response import Response as wResponse
 
 logger = logging.getLogger(__name__)
 
 REDIS_URL = shared_config["redis"]["url"]
 REDIS = redis.Redis.from_url(url=REDIS_URL)
+metrics_buffer = RedisMetricsBuffer(REDIS)
 
 # interval in minutes for pulling metrics from other nodes
 METRICS_INTERVAL = 5
@@ -43,6 +53,11 @@ SYNCHRONIZE_METRICS_INTERVAL = 60
 # Redis Key Convention:
 # API_METRICS:routes:<date>:<hour>
 # API_METRICS:application:<date>:<hour>
+# personal_route_metrics:<date>:<hour>:<minute>, hash of ip to request count
+# personal_app_metrics:<date>:<hour>:<minute>, hash of app name to request count
+# summed_unique_daily_metrics:<yyyy-mm-dd>, HyperLogLog of ips
+# summed_unique_monthly_metrics:<yyyy-mm>, HyperLogLog of ips merged from the
+# daily HyperLogLogs by merge_summed_unique_metrics
 
 metrics_prefix = "API_METRICS"
 metrics_routes = "routes"
@@ -69,6 +84,25 @@ datetime_format = "%Y/%m/%d:%H"
 datetime_format_secondary = "%Y/%m/%d:%H:%M"
 day_format = datetime_format_secondary.split(":", maxsplit=1)[0]
 
+# Minutes of personal metrics kept, which is as far back as they can be read
+personal_metrics_ttl_min = METRICS_INTERVAL * 2
+summed_unique_daily_metrics_ttl_sec = 2 * 24 * 60 * 60
+summed_unique_monthly_metrics_ttl_sec = 62 * 24 * 60 * 60
+# Summed unique keys are dumped to files named after them, so have no slashes
+summed_unique_day_format = "%Y-%m-%d"
+summed_unique_month_format = "%Y-%m"
+
+
+def is_metrics_buffer_enabled():
+    return shared_config["discprov"].getboolean("metrics_buffer_enabled", fallback=True)
+
+
+def get_metrics_buffer() -> RedisMetricsBuffer:
+    """Returns the metrics buffer of the current process, flushing from a
+    background thread once started"""
+    metrics_buffer.start()
+    return metrics_buffer
+
 
 def get_rounded_date_time():
     return datetime.utcnow().replace(minute=0, second=0, microsecond=0)
@@ -425,20 +459,37 @@ def merge_app_metrics(metrics, end_time, db):
     merge_metrics(metrics, end_time, "app", db)
 
 
+def get_personal_metrics_key(metric_type, timestamp):
+    return f"{metric_type}:{timestamp}"
+
+
 def get_redis_metrics(redis_handle, start_time, metric_type):
-    redis_metrics_str = redis_get_or_restore(redis_handle, metric_type)
-    metrics = json.loads(redis_metrics_str) if redis_metrics_str else {}
-    if not metrics:
-        return {}
+    """
+    Returns the request counts of each ip, for route metrics, or app name, for
+    app metrics, in the minutes after start_time that are still kept
+    """
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    oldest = now - timedelta(minutes=personal_metrics_ttl_min)
+    minute = max(start_time.replace(second=0, microsecond=0), oldest)
+    if minute <= start_time:
+        minute += timedelta(minutes=1)
+
+    pipe = redis_handle.pipeline(transaction=False)
+    while minute <= now:
+        pipe.hgetall(
+            get_personal_metrics_key(
+                metric_type, minute.strftime(datetime_format_secondary)
+            )
+        )
+        minute += timedelta(minutes=1)
 
     # if route metrics, value and count would be an IP and the number of requests from it
     # otherwise, value and count would be an app and the number of requests from it
     result = {}
-    for datetime_str, value_counts in metrics.items():
-        datetime_obj = datetime.strptime(datetime_str, datetime_format_secondary)
-        if datetime_obj > start_time:
-            for value, count in value_counts.items():
-                result[value] = result[value] + count if value in result else count
+    for value_counts in pipe.execute():
+        for value, count in value_counts.items():
+            value = value.decode("utf-8")
+            result[value] = result.get(value, 0) + int(count)
 
     return result
 
@@ -451,41 +502,64 @@ def get_redis_app_metrics(start_time):
     return get_redis_metrics(REDIS, start_time, personal_app_metrics)
 
 
-def get_summed_unique_metrics(start_time):
-    day = start_time.strftime(day_format)
-    month = f"{day[:7]}/01"
+def get_summed_unique_daily_key(day_time):
+    day = day_time.strftime(summed_unique_day_format)
+    return f"{summed_unique_daily_metrics}:{day}"
 
-    summed_unique_daily_metrics_str = redis_get_or_restore(
-        REDIS, summed_unique_daily_metrics
-    )
-    summed_unique_daily_metrics_obj = (
-        json.loads(summed_unique_daily_metrics_str)
-        if summed_unique_daily_metrics_str
-        else {}
-    )
-    summed_unique_daily_count = (
-        len(summed_unique_daily_metrics_obj[day])
-        if day in summed_unique_daily_metrics_obj
-        else 0
-    )
 
-    summed_unique_monthly_metrics_str = redis_get_or_restore(
-        REDIS, summed_unique_monthly_metrics
-    )
-    summed_unique_monthly_metrics_obj = (
-        json.loads(summed_unique_monthly_metrics_str)
-        if summed_unique_monthly_metrics_str
-        else {}
-    )
-    summed_unique_monthly_count = (
-        len(summed_unique_monthly_metrics_obj[month])
-        if month in summed_unique_monthly_metrics_obj
-        else 0
-    )
+def get_summed_unique_monthly_key(day_time):
+    month = day_time.strftime(summed_unique_month_format)
+    return f"{summed_unique_monthly_metrics}:{month}"
+
+
+def restore_summed_unique_metrics(redis_handle, daily_key, monthly_key):
+    """Restores the keys missing from redis from their last dump, if any"""
+    for key, ttl_sec in [
+        (daily_key, summed_unique_daily_metrics_ttl_sec),
+        (monthly_key, summed_unique_monthly_metrics_ttl_sec),
+    ]:
+        if redis_handle.exists(key) or not os.path.exists(get_redis_dump_filename(key)):
+            continue
+        redis_restore(redis_handle, key)
+        # Restored keys do not expire
+        redis_handle.expire(key, ttl_sec)
+
+
+def get_summed_unique_metrics(start_time, redis_handle=REDIS):
+    daily_key = get_summed_unique_daily_key(start_time)
+    monthly_key = get_summed_unique_monthly_key(start_time)
+    restore_summed_unique_metrics(redis_handle, daily_key, monthly_key)
+
+    # The day is counted along with the month, as it is merged into the month
+    # periodically
+    pipe = redis_handle.pipeline(transaction=False)
+    pipe.pfcount(daily_key)
+    pipe.pfcount(monthly_key, daily_key)
+    summed_unique_daily_count, summed_unique_monthly_count = pipe.execute()
 
     return {"daily": summed_unique_daily_count, "monthly": summed_unique_monthly_count}
 
 
+def merge_summed_unique_metrics(now, redis_handle=REDIS):
+    """
+    Merges the unique ips of today and yesterday into the unique ips of their
+    months, and dumps the merged metrics so that they can be restored if redis
+    loses them. Called periodically rather than on each request.
+    """
+    keys = []
+    for day_time in [now - timedelta(days=1), now]:
+        daily_key = get_summed_unique_daily_key(day_time)
+        monthly_key = get_summed_unique_monthly_key(day_time)
+        restore_summed_unique_metrics(redis_handle, daily_key, monthly_key)
+        redis_handle.pfmerge(monthly_key, monthly_key, daily_key)
+        redis_handle.expire(monthly_key, summed_unique_monthly_metrics_ttl_sec)
+        keys.extend([daily_key, monthly_key])
+
+    for key in keys:
+        if redis_handle.exists(key):
+            redis_dump(redis_handle, key)
+
+
 def get_aggregate_metrics_info():
     info_str = redis_get_or_restore(REDIS, metrics_visited_nodes)
     return json.loads(info_str) if info_str else {}
@@ -530,103 +604,32 @@ def extract_route_key():
     return (route_key, route)
 
 
-def update_personal_metrics(key, old_timestamp, timestamp, value, metric_type):
-    values_str = redis_get_or_restore(REDIS, key)
-    values = json.loads(values_str) if values_str else {}
-    if timestamp in values:
-        values[timestamp][value] = (
-            values[timestamp][value] + 1 if value in values[timestamp] else 1
-        )
-    else:
-        values[timestamp] = {value: 1}
-
-    # clean up and update cached metrics
-    updated_metrics = {
-        timestamp: metrics
-        for timestamp, metrics in values.items()
-        if timestamp > old_timestamp
-    }
-    if updated_metrics:
-        redis_set_and_dump(REDIS, key, json.dumps(updated_metrics))
-    logger.debug(f"updated cached personal {metric_type} metrics")
-
-
-def update_summed_unique_metrics(now, ip):
-    thirty_one_days_ago = now - timedelta(days=31)
-    thirty_one_days_ago_str = thirty_one_days_ago.strftime(day_format)
-    yesterday = now - timedelta(days=1)
-    yesterday_str = yesterday.strftime(day_format)
-    today_str = now.strftime(day_format)
-    this_month_str = f"{today_str[:7]}/01"
+def update_personal_metrics(pipe, key, timestamp, value):
+    """Counts a request of value, an ip or app name, in the minute of timestamp"""
+    minute_key = get_personal_metrics_key(key, timestamp)
+    pipe.hincrby(minute_key, value, 1)
+    # Kept a minute past the oldest minute that is read
+    pipe.expire(minute_key, (personal_metrics_ttl_min + 1) * 60)
 
-    summed_unique_daily_metrics_str = redis_get_or_restore(
-        REDIS, summed_unique_daily_metrics
-    )
-    summed_unique_daily_metrics_obj = (
-        json.loads(summed_unique_daily_metrics_str)
-        if summed_unique_daily_metrics_str
-        else {}
-    )
-    if today_str not in summed_unique_daily_metrics_obj:
-        summed_unique_daily_metrics_obj[today_str] = [ip]
-    elif ip not in summed_unique_daily_metrics_obj[today_str]:
-        summed_unique_daily_metrics_obj[today_str] = summed_unique_daily_metrics_obj[
-            today_str
-        ] + [ip]
-    summed_unique_daily_metrics_obj = {
-        timestamp: ips
-        for timestamp, ips in summed_unique_daily_metrics_obj.items()
-        if timestamp >= yesterday_str
-    }
-    redis_set_and_dump(
-        REDIS, summed_unique_daily_metrics, json.dumps(summed_unique_daily_metrics_obj)
-    )
 
-    summed_unique_monthly_metrics_str = redis_get_or_restore(
-        REDIS, summed_unique_monthly_metrics
-    )
-    summed_unique_monthly_metrics_obj = (
-        json.loads(summed_unique_monthly_metrics_str)
-        if summed_unique_monthly_metrics_str
-        else {}
-    )
-    if this_month_str not in summed_unique_monthly_metrics_obj:
-        summed_unique_monthly_metrics_obj[this_month_str] = [ip]
-    elif ip not in summed_unique_monthly_metrics_obj[this_month_str]:
-        summed_unique_monthly_metrics_obj[
-            this_month_str
-        ] = summed_unique_monthly_metrics_obj[this_month_str] + [ip]
-    summed_unique_monthly_metrics_obj = {
-        timestamp: ips
-        for timestamp, ips in summed_unique_monthly_metrics_obj.items()
-        if timestamp >= thirty_one_days_ago_str
-    }
-    redis_set_and_dump(
-        REDIS,
-        summed_unique_monthly_metrics,
-        json.dumps(summed_unique_monthly_metrics_obj),
-    )
+def update_summed_unique_metrics(pipe, now, ip):
+    daily_key = get_summed_unique_daily_key(now)
+    pipe.pfadd(daily_key, ip)
+    pipe.expire(daily_key, summed_unique_daily_metrics_ttl_sec)
 
 
-def record_aggregate_metrics():
+def record_aggregate_metrics(pipe):
     now = datetime.utcnow()
     timestamp = now.strftime(datetime_format_secondary)
-    old_timestamp = (now - timedelta(minutes=METRICS_INTERVAL * 2)).strftime(
-        datetime_format_secondary
-    )
     ip = get_request_ip(request)
 
-    update_summed_unique_metrics(now, ip)
+    update_summed_unique_metrics(pipe, now, ip)
 
-    update_personal_metrics(
-        personal_route_metrics, old_timestamp, timestamp, ip, "route"
-    )
+    update_personal_metrics(pipe, personal_route_metrics, timestamp, ip)
 
     application_name = request.args.get(app_name_param, type=str, default=None)
     if application_name:
-        update_personal_metrics(
-            personal_app_metrics, old_timestamp, timestamp, application_name, "app"
-        )
+        update_personal_metrics(pipe, personal_app_metrics, timestamp, application_name)
 
 
 # Metrics decorator.
@@ -644,13 +647,21 @@ def record_metrics(func):
         try:
             application_key, application_name = extract_app_name_key()
             route_key, route = extract_route_key()
-            REDIS.hincrby(route_key, route, 1)
+            # Metrics are buffered and flushed to redis off the request path,
+            # or recorded in one round trip
+            buffered = is_metrics_buffer_enabled()
+            pipe = (
+                get_metrics_buffer() if buffered else REDIS.pipeline(transaction=False)
+            )
+            pipe.hincrby(route_key, route, 1)
             if application_name:
-                REDIS.hincrby(application_key, application_name, 1)
+                pipe.hincrby(application_key, application_name, 1)
 
-            record_aggregate_metrics()
+            record_aggregate_metrics(pipe)
+            if not buffered:
+                pipe.execute()
         except Exception as e:
-            logger.error("Error while recording metrics: %s", e.message)
+            logger.error("Error while recording metrics: %s", e)
 
         metric = PrometheusMetric(PrometheusMetricNames.FLASK_ROUTE_DURATION_SECONDS)
 
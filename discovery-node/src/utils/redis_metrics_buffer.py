@@ -0,0 +1,124 @@
+"""
+Buffer of redis metric updates
+
+Request metrics are recorded into an in-process buffer rather than sent to
+redis on the request path. Recording appends to a deque, which needs no lock,
+and a daemon thread of each process aggregates the buffered updates and
+flushes them to redis in one pipeline every flush_interval_sec. The buffer
+has the hincrby, pfadd and expire methods of a redis pipeline, so metrics can
+be recorded into either.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+HINCRBY = "hincrby"
+PFADD = "pfadd"
+EXPIRE = "expire"
+
+flush_interval_sec = 1
+# Updates buffered while redis is unavailable, past which the oldest are dropped
+max_buffered_updates = 100000
+
+
+class RedisMetricsBuffer:
+    """Redis metric updates of the current process, flushed from a daemon thread"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._updates: deque = deque(maxlen=max_buffered_updates)
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def hincrby(self, key: str, field: str, amount: int = 1):
+        self._updates.append((HINCRBY, key, field, amount))
+
+    def pfadd(self, key: str, *values: str):
+        for value in values:
+            self._updates.append((PFADD, key, value, None))
+
+    def expire(self, key: str, ttl_sec: int):
+        self._updates.append((EXPIRE, key, None, ttl_sec))
+
+    def __len__(self):
+        return len(self._updates)
+
+    def start(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            # Updates of the parent process are flushed by the parent
+            self._updates.clear()
+            thread = threading.Thread(
+                target=self._run, name="redis-metrics-buffer", daemon=True
+            )
+            thread.start()
+            atexit.register(self.flush)
+
+    def _drain(self):
+        counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        members: Dict[str, Set[str]] = defaultdict(set)
+        ttls: Dict[str, int] = {}
+        while True:
+            try:
+                op, key, field, amount = self._updates.popleft()
+            except IndexError:
+                break
+            if op == HINCRBY:
+                counts[(key, field)] += amount
+            elif op == PFADD:
+                members[key].add(field)
+            else:
+                ttls[key] = amount
+        return counts, members, ttls
+
+    def flush(self):
+        """Writes the buffered updates to redis in one pipeline
+
+        Returns:
+            Number of redis commands sent
+        """
+        counts, members, ttls = self._drain()
+        pipe = self.redis.pipeline(transaction=False)
+        for (key, field), amount in counts.items():
+            pipe.hincrby(key, field, amount)
+        for key, values in members.items():
+            pipe.pfadd(key, *values)
+        for key, ttl_sec in ttls.items():
+            pipe.expire(key, ttl_sec)
+        num_commands = len(counts) + len(members) + len(ttls)
+        if not num_commands:
+            return 0
+        try:
+            pipe.execute()
+        except Exception as e:
+            # Buffered again in aggregate, to be flushed once redis is back
+            for (key, field), amount in counts.items():
+                self.hincrby(key, field, amount)
+            for key, values in members.items():
+                self.pfadd(key, *values)
+            for key, ttl_sec in ttls.items():
+                self.expire(key, ttl_sec)
+            raise e
+        return num_commands
+
+    def _run(self):
+        while True:
+            time.sleep(flush_interval_sec)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(
+                    f"redis_metrics_buffer.py | Failed to flush metrics to redis: {e}"
+                )
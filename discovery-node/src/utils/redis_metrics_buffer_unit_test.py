@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+from src.utils.redis_metrics import (
+    datetime_format_secondary,
+    get_redis_metrics,
+    get_summed_unique_metrics,
+    personal_route_metrics,
+    update_personal_metrics,
+    update_summed_unique_metrics,
+)
+from src.utils.redis_metrics_buffer import RedisMetricsBuffer
+
+
+def test_flush_aggregates_updates(redis_mock):
+    buffer = RedisMetricsBuffer(redis_mock)
+    for _ in range(3):
+        buffer.hincrby("API_METRICS:routes:1.2.3.4:2022/01/01:10", "/v1/users", 1)
+    buffer.hincrby("API_METRICS:routes:1.2.3.4:2022/01/01:10", "/v1/digital_contents")
+    buffer.pfadd("unique", "1.2.3.4")
+    buffer.pfadd("unique", "1.2.3.4", "5.6.7.8")
+    buffer.expire("unique", 60)
+
+    # One command per field, key and ttl
+    assert buffer.flush() == 4
+    assert len(buffer) == 0
+    assert redis_mock.hgetall("API_METRICS:routes:1.2.3.4:2022/01/01:10") == {
+        b"/v1/users": b"3",
+        b"/v1/digital_contents": b"1",
+    }
+    assert redis_mock.pfcount("unique") == 2
+    assert 0 < redis_mock.ttl("unique") <= 60
+    assert buffer.flush() == 0
+
+
+def test_flush_failure_keeps_updates(redis_mock, monkeypatch):
+    buffer = RedisMetricsBuffer(redis_mock)
+    buffer.hincrby("key", "field", 2)
+    buffer.hincrby("key", "field", 3)
+
+    def execute(self):
+        raise Exception("redis unavailable")
+
+    with monkeypatch.context() as m:
+        m.setattr(type(redis_mock.pipeline()), "execute", execute)
+        with pytest.raises(Exception, match="redis unavailable"):
+            buffer.flush()
+    assert len(buffer) == 1
+
+    buffer.flush()
+    assert redis_mock.hget("key", "field") == b"5"
+
+
+def test_buffered_aggregate_metrics(redis_mock):
+    now = datetime.utcnow()
+    buffer = RedisMetricsBuffer(redis_mock)
+    timestamp = now.strftime(datetime_format_secondary)
+    for ip in ["1.2.3.4", "1.2.3.4", "5.6.7.8"]:
+        update_personal_metrics(buffer, personal_route_metrics, timestamp, ip)
+        update_summed_unique_metrics(buffer, now, ip)
+    buffer.flush()
+
+    start_time = now - timedelta(minutes=1)
+    assert get_redis_metrics(redis_mock, start_time, personal_route_metrics) == {
+        "1.2.3.4": 2,
+        "5.6.7.8": 1,
+    }
+    assert get_summed_unique_metrics(now, redis_mock) == {"daily": 2, "monthly": 2}
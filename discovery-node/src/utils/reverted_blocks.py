@@ -0,0 +1,39 @@
+"""
+Reverted block logs
+
+Tasks that follow indexed blocks from a checkpoint of their own, such as the
+materialized feeds and the related landlords, have to undo the activity of
+reverted blocks and process the blocks indexed in their place. revert_blocks
+appends each revert to the log of such a task with the users it affects, and
+the task clears the reverts it read once it has processed them.
+"""
+
+import json
+from typing import Iterable, Optional, Set, Tuple
+
+
+def add_reverted_block(redis, log_key: str, block_number: int, user_ids: Iterable[int]):
+    """Records that block_number was reverted along with activity of user_ids"""
+    revert = {"block_number": block_number, "user_ids": sorted(set(user_ids))}
+    redis.rpush(log_key, json.dumps(revert))
+
+
+def get_reverted_blocks(redis, log_key: str) -> Tuple[int, Optional[int], Set[int]]:
+    """
+    Returns the reverts recorded in log_key
+
+    Returns:
+        Tuple of the number of reverts, the lowest reverted block number or
+        None without reverts, and the users of the reverted activity
+    """
+    reverts = [json.loads(revert) for revert in redis.lrange(log_key, 0, -1)]
+    block_numbers = [revert["block_number"] for revert in reverts]
+    user_ids = {user_id for revert in reverts for user_id in revert["user_ids"]}
+    return len(reverts), min(block_numbers, default=None), user_ids
+
+
+def clear_reverted_blocks(redis, log_key: str, num_reverts: int):
+    """Clears the first num_reverts reverts of log_key, keeping those recorded
+    since they were read"""
+    if num_reverts:
+        redis.ltrim(log_key, num_reverts, -1)
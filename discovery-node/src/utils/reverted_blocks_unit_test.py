@@ -0,0 +1,20 @@
+from src.utils.reverted_blocks import (
+    add_reverted_block,
+    clear_reverted_blocks,
+    get_reverted_blocks,
+)
+
+log_key = "test:reverts"
+
+
+def test_reverted_blocks(redis_mock):
+    """Tests that reverts recorded after being read are kept when clearing"""
+    assert get_reverted_blocks(redis_mock, log_key) == (0, None, set())
+    add_reverted_block(redis_mock, log_key, 10, [1, 2])
+    add_reverted_block(redis_mock, log_key, 9, {2, 3})
+    num_reverts, reverted_block, user_ids = get_reverted_blocks(redis_mock, log_key)
+    assert (num_reverts, reverted_block, user_ids) == (2, 9, {1, 2, 3})
+
+    add_reverted_block(redis_mock, log_key, 9, [4])
+    clear_reverted_blocks(redis_mock, log_key, num_reverts)
+    assert get_reverted_blocks(redis_mock, log_key) == (1, 9, {4})
@@ -1,12 +1,16 @@
-import json
 from datetime import datetime, timedelta
 
-from src.utils.helpers import redis_set_and_dump
 from src.utils.redis_metrics import (
     datetime_format_secondary,
     get_redis_metrics,
+    get_summed_unique_daily_key,
+    get_summed_unique_metrics,
+    get_summed_unique_monthly_key,
+    merge_summed_unique_metrics,
     personal_app_metrics,
     personal_route_metrics,
+    update_personal_metrics,
+    update_summed_unique_metrics,
 )
 
 now = datetime.utcnow()
@@ -17,6 +21,15 @@ start_time = int((now - timedelta(minutes=3)).timestamp())
 start_time_obj = datetime.fromtimestamp(start_time)
 
 
+def record_personal_metrics(redis, key, metrics):
+    pipe = redis.pipeline()
+    for timestamp, value_counts in metrics.items():
+        for value, count in value_counts.items():
+            for _ in range(count):
+                update_personal_metrics(pipe, key, timestamp, value)
+    pipe.execute()
+
+
 def test_get_cached_route_metrics(redis_mock):
     metrics = {
         old_time.strftime(datetime_format_secondary): {"some-ip": 1, "other-ip": 2},
@@ -30,7 +43,7 @@ def test_get_cached_route_metrics(redis_mock):
             "another-ip": 3,
         },
     }
-    redis_set_and_dump(redis_mock, personal_route_metrics, json.dumps(metrics))
+    record_personal_metrics(redis_mock, personal_route_metrics, metrics)
 
     result = get_redis_metrics(redis_mock, start_time_obj, personal_route_metrics)
 
@@ -54,7 +67,7 @@ def test_get_cached_app_metrics(redis_mock):
             "another-app": 3,
         },
     }
-    redis_set_and_dump(redis_mock, personal_app_metrics, json.dumps(metrics))
+    record_personal_metrics(redis_mock, personal_app_metrics, metrics)
 
     result = get_redis_metrics(redis_mock, start_time_obj, personal_app_metrics)
 
@@ -63,3 +76,60 @@ def test_get_cached_app_metrics(redis_mock):
     assert result["some-other-app"] == 2
     assert result["top-app"] == 1
     assert result["some-app"] == 2
+
+
+def test_summed_unique_metrics(redis_mock):
+    today = datetime(2022, 3, 2, 12)
+    yesterday = today - timedelta(days=1)
+
+    pipe = redis_mock.pipeline()
+    for ip in ["1.1.1.1", "2.2.2.2", "1.1.1.1"]:
+        update_summed_unique_metrics(pipe, yesterday, ip)
+    for ip in ["2.2.2.2", "3.3.3.3"]:
+        update_summed_unique_metrics(pipe, today, ip)
+    pipe.execute()
+
+    # The day is counted in the month before it is merged
+    assert get_summed_unique_metrics(today, redis_mock) == {"daily": 2, "monthly": 2}
+    merge_summed_unique_metrics(today, redis_mock)
+    assert get_summed_unique_metrics(today, redis_mock) == {"daily": 2, "monthly": 3}
+    assert get_summed_unique_metrics(yesterday, redis_mock) == {
+        "daily": 2,
+        "monthly": 3,
+    }
+
+
+def test_summed_unique_metrics_dump_and_restore(redis_mock, monkeypatch, tmp_path):
+    """Tests that merged summed unique metrics are dumped to files and restored
+    from them once redis loses them"""
+    monkeypatch.chdir(tmp_path)
+    # DUMP and RESTORE are not supported by the redis mock, which keeps the
+    # elements of HyperLogLogs
+    monkeypatch.setattr(
+        redis_mock, "dump", lambda key: b"\n".join(sorted(redis_mock.smembers(key)))
+    )
+    monkeypatch.setattr(
+        redis_mock,
+        "restore",
+        lambda key, ttl, value: redis_mock.pfadd(key, *value.split(b"\n")),
+    )
+    today = datetime(2022, 3, 2, 12)
+
+    # Nothing is restored without dumps
+    assert get_summed_unique_metrics(today, redis_mock) == {"daily": 0, "monthly": 0}
+
+    pipe = redis_mock.pipeline()
+    for ip in ["1.1.1.1", "2.2.2.2"]:
+        update_summed_unique_metrics(pipe, today, ip)
+    pipe.execute()
+    merge_summed_unique_metrics(today, redis_mock)
+    daily_key = get_summed_unique_daily_key(today)
+    monthly_key = get_summed_unique_monthly_key(today)
+    assert "/" not in daily_key + monthly_key
+    assert (tmp_path / f"{daily_key}_dump").exists()
+    assert (tmp_path / f"{monthly_key}_dump").exists()
+
+    redis_mock.delete(daily_key, monthly_key)
+    assert get_summed_unique_metrics(today, redis_mock) == {"daily": 2, "monthly": 2}
+    assert redis_mock.ttl(daily_key) > 0
+    assert redis_mock.ttl(monthly_key) > 0
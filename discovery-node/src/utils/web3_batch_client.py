@@ -0,0 +1,221 @@
+"""
+Batched JSON-RPC reads for blocks, transaction receipts and contract calls
+
+Indexing a block needs one receipt per transaction and walking back to the
+last indexed block needs one block per height. Sending those as JSON-RPC batches
+keeps the number of round trips to the node independent of the block size.
+Contract reads, like the token balances of many wallets, are batched the same
+way as eth_call requests.
+"""
+
+import logging
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+from hexbytes import HexBytes
+from src.utils.multi_provider import make_batch_request
+from web3 import Web3
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.contracts import prepare_transaction
+from web3._utils.method_formatters import block_formatter, receipt_formatter
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.datastructures import AttributeDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+
+# JSON-RPC error code returned by nodes that do not implement a method
+METHOD_NOT_FOUND_ERROR_CODE = -32601
+
+
+class Web3BatchRequestError(Exception):
+    """Exception raised when a call in a JSON-RPC batch returns an error
+
+    Attributes:
+        method -- JSON-RPC method of the failed call
+        params -- params of the failed call
+        error -- error object from the JSON-RPC response
+    """
+
+    def __init__(self, method, params, error):
+        super().__init__(f"{method}({params}) failed with {error}")
+        self.method = method
+        self.params = params
+        self.error = error
+
+
+def to_hex_identifier(identifier: Union[int, str, bytes]):
+    if isinstance(identifier, int):
+        return hex(identifier)
+    if isinstance(identifier, str):
+        return Web3.toHex(hexstr=identifier)
+    return Web3.toHex(identifier)
+
+
+def format_result(formatter: Callable, result):
+    if result is None:
+        return None
+    return AttributeDict.recursive(formatter(result))
+
+
+def decode_contract_function_output(contract_function, result):
+    """Decodes the eth_call result of a contract function as its call() would"""
+    output_types = get_abi_output_types(contract_function.abi)
+    output_data = map_abi_data(
+        BASE_RETURN_NORMALIZERS,
+        output_types,
+        contract_function.web3.codec.decode_abi(output_types, HexBytes(result)),
+    )
+    return output_data[0] if len(output_data) == 1 else output_data
+
+
+class Web3BatchClient:
+    """Sends JSON-RPC batch requests through a web3 HTTPProvider or MultiProvider"""
+
+    def __init__(self, provider, batch_size: int = DEFAULT_BATCH_SIZE):
+        self._provider = provider
+        self._batch_size = batch_size
+        # Unknown until the first eth_getBlockReceipts call
+        self._supports_block_receipts: Optional[bool] = None
+
+    def make_batch_request(self, calls: List[Tuple[str, Any]]):
+        """Returns the raw JSON-RPC responses for calls, in order"""
+        responses = []
+        for i in range(0, len(calls), self._batch_size):
+            batch = calls[i : i + self._batch_size]
+            if hasattr(self._provider, "make_batch_request"):
+                responses.extend(self._provider.make_batch_request(batch))
+            else:
+                responses.extend(make_batch_request(self._provider, batch))
+        return responses
+
+    def get_results(self, calls: List[Tuple[str, Any]], formatter: Callable):
+        responses = self.make_batch_request(calls)
+        results = []
+        for (method, params), response in zip(calls, responses):
+            if "error" in response:
+                raise Web3BatchRequestError(method, params, response["error"])
+            results.append(format_result(formatter, response.get("result")))
+        return results
+
+    def get_blocks(
+        self,
+        block_identifiers: List[Union[int, str, bytes]],
+        full_transactions: bool = True,
+    ):
+        """Fetches blocks by number or hash. Missing blocks are returned as None."""
+        calls = [
+            (
+                "eth_getBlockByNumber"
+                if isinstance(identifier, int)
+                else "eth_getBlockByHash",
+                [to_hex_identifier(identifier), full_transactions],
+            )
+            for identifier in block_identifiers
+        ]
+        return self.get_results(calls, block_formatter)
+
+    def get_transaction_receipts(self, tx_hashes: List[Union[str, bytes]]):
+        calls = [
+            ("eth_getTransactionReceipt", [to_hex_identifier(tx_hash)])
+            for tx_hash in tx_hashes
+        ]
+        return self.get_results(calls, receipt_formatter)
+
+    def call_contract_functions(
+        self,
+        contract_functions: List,
+        block_identifier: Union[int, str] = "latest",
+        return_exceptions: bool = False,
+    ):
+        """
+        Calls contract functions, as built by contract.functions.myMethod(*args),
+        with eth_call at the same block. Returns the decoded outputs in order,
+        as contract_function.call() would.
+
+        With return_exceptions, a call that returns an error or an undecodable
+        output has its exception returned in place of its output rather than
+        raised. Errors sending the batches are raised either way.
+        """
+        calls = [
+            (
+                "eth_call",
+                [
+                    prepare_transaction(
+                        contract_function.address,
+                        contract_function.web3,
+                        fn_identifier=contract_function.function_identifier,
+                        contract_abi=contract_function.contract_abi,
+                        fn_abi=contract_function.abi,
+                        transaction={},
+                        fn_args=contract_function.args,
+                        fn_kwargs=contract_function.kwargs,
+                    ),
+                    to_hex_identifier(block_identifier)
+                    if isinstance(block_identifier, int)
+                    else block_identifier,
+                ],
+            )
+            for contract_function in contract_functions
+        ]
+        responses = self.make_batch_request(calls)
+        outputs = []
+        for contract_function, (method, params), response in zip(
+            contract_functions, calls, responses
+        ):
+            try:
+                if "error" in response:
+                    raise Web3BatchRequestError(method, params, response["error"])
+                outputs.append(
+                    decode_contract_function_output(
+                        contract_function, response.get("result")
+                    )
+                )
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                outputs.append(e)
+        return outputs
+
+    def get_block_receipts(self, block):
+        """
+        Fetches all receipts for a block, using eth_getBlockReceipts when the node
+        supports it and a batch of eth_getTransactionReceipt calls otherwise.
+        """
+        if block.transactions and self._supports_block_receipts is not False:
+            try:
+                block_receipts = self._get_block_receipts(block)
+                self._supports_block_receipts = True
+                return block_receipts
+            except Web3BatchRequestError as e:
+                if e.error.get("code") == METHOD_NOT_FOUND_ERROR_CODE:
+                    logger.info(
+                        "web3_batch_client.py | eth_getBlockReceipts not supported, using eth_getTransactionReceipt"
+                    )
+                    self._supports_block_receipts = False
+                else:
+                    logger.warning(
+                        f"web3_batch_client.py | eth_getBlockReceipts failed for block={block.number} {e}"
+                    )
+
+        return self.get_transaction_receipts(
+            [
+                tx if isinstance(tx, (bytes, str)) else tx["hash"]
+                for tx in block.transactions
+            ]
+        )
+
+    def _get_block_receipts(self, block):
+        calls = [("eth_getBlockReceipts", [to_hex_identifier(block.hash)])]
+        response = self.make_batch_request(calls)[0]
+        if "error" in response:
+            raise Web3BatchRequestError(*calls[0], response["error"])
+        receipts = response.get("result") or []
+        if len(receipts) != len(block.transactions):
+            raise Web3BatchRequestError(
+                *calls[0],
+                {
+                    "message": f"expected {len(block.transactions)} receipts, received {len(receipts)}"
+                },
+            )
+        return [format_result(receipt_formatter, receipt) for receipt in receipts]
@@ -0,0 +1,227 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from src.utils.multi_provider import MultiProvider
+from src.utils.web3_batch_client import Web3BatchClient, Web3BatchRequestError
+from web3 import HTTPProvider, Web3
+
+BLOCK_HASH = "0x" + "11" * 32
+PARENT_HASH = "0x" + "22" * 32
+TX_HASHES = ["0x" + f"{i:02x}" * 32 for i in range(1, 4)]
+BALANCE_OF_ABI = [
+    {
+        "constant": True,
+        "inputs": [{"name": "account", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+
+
+def make_receipt(tx_hash, index):
+    return {
+        "blockHash": BLOCK_HASH,
+        "blockNumber": "0x10",
+        "transactionHash": tx_hash,
+        "transactionIndex": hex(index),
+        "cumulativeGasUsed": "0x5208",
+        "gasUsed": "0x5208",
+        "status": "0x1",
+        "contractAddress": None,
+        "logs": [],
+        "logsBloom": "0x" + "00" * 256,
+        "from": "0x" + "aa" * 20,
+        "to": "0x" + "bb" * 20,
+    }
+
+
+RECEIPTS = {tx_hash: make_receipt(tx_hash, i) for i, tx_hash in enumerate(TX_HASHES)}
+BLOCKS = {
+    16: {
+        "hash": BLOCK_HASH,
+        "parentHash": PARENT_HASH,
+        "number": "0x10",
+        "timestamp": "0x5f5e100",
+        "transactions": [
+            {"hash": tx_hash, "to": "0x" + "bb" * 20} for tx_hash in TX_HASHES
+        ],
+    },
+    15: {
+        "hash": PARENT_HASH,
+        "parentHash": "0x" + "33" * 32,
+        "number": "0xf",
+        "timestamp": "0x5f5e0fb",
+        "transactions": [],
+    },
+}
+
+
+# eth_calls to this contract return an error
+REVERTING_CONTRACT = "0x" + "dd" * 20
+
+
+class StandInRPCServer:
+    """Minimal JSON-RPC node that answers batch requests"""
+
+    def __init__(self, supports_block_receipts):
+        self.supports_block_receipts = supports_block_receipts
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests.append(body)
+                response = [server.handle_call(call) for call in body]
+                data = json.dumps(response).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def handle_call(self, call):
+        method, params = call["method"], call["params"]
+        response = {"jsonrpc": "2.0", "id": call["id"]}
+        if method == "eth_getTransactionReceipt":
+            response["result"] = RECEIPTS.get(params[0])
+        elif method == "eth_getBlockReceipts" and self.supports_block_receipts:
+            response["result"] = [RECEIPTS[tx_hash] for tx_hash in TX_HASHES]
+        elif method == "eth_getBlockByNumber":
+            response["result"] = BLOCKS.get(int(params[0], 16))
+        elif method == "eth_call" and params[0]["to"].lower() == REVERTING_CONTRACT:
+            response["error"] = {"code": 3, "message": "execution reverted"}
+        elif method == "eth_call":
+            # Echoes the last argument, so balanceOf(account) returns the account
+            response["result"] = "0x" + params[0]["data"][-64:]
+        elif method == "eth_getBlockByHash":
+            matches = [b for b in BLOCKS.values() if b["hash"] == params[0]]
+            response["result"] = matches[0] if matches else None
+        else:
+            response["error"] = {"code": -32601, "message": "method not found"}
+        return response
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+@pytest.fixture()
+def rpc_server():
+    server = StandInRPCServer(supports_block_receipts=False)
+    yield server
+    server.close()
+
+
+def test_get_transaction_receipts_batches(rpc_server):
+    """Tests that receipts are fetched in batches and returned in order"""
+    client = Web3BatchClient(HTTPProvider(rpc_server.url), batch_size=2)
+    receipts = client.get_transaction_receipts(TX_HASHES)
+
+    assert [receipt.transactionHash.hex() for receipt in receipts] == TX_HASHES
+    assert [receipt.transactionIndex for receipt in receipts] == [0, 1, 2]
+    assert receipts[0].status == 1
+    # 3 calls with a batch size of 2 take 2 round trips
+    assert [len(request) for request in rpc_server.requests] == [2, 1]
+
+
+def test_get_blocks(rpc_server):
+    client = Web3BatchClient(HTTPProvider(rpc_server.url))
+    blocks = client.get_blocks([16, 15, PARENT_HASH, 99])
+
+    assert blocks[0].number == 16
+    assert blocks[0].hash.hex() == BLOCK_HASH
+    assert len(blocks[0].transactions) == 3
+    assert blocks[1].number == 15
+    assert blocks[2].number == 15
+    assert blocks[3] is None
+    assert len(rpc_server.requests) == 1
+
+
+def test_get_block_receipts_falls_back(rpc_server):
+    """Tests that unsupported eth_getBlockReceipts falls back to per tx receipts"""
+    client = Web3BatchClient(HTTPProvider(rpc_server.url))
+    block = client.get_blocks([16])[0]
+
+    receipts = client.get_block_receipts(block)
+    assert [receipt.transactionHash.hex() for receipt in receipts] == TX_HASHES
+    methods = [call["method"] for request in rpc_server.requests for call in request]
+    assert "eth_getBlockReceipts" in methods
+
+    # Support is remembered, so the next block goes straight to tx receipts
+    rpc_server.requests.clear()
+    client.get_block_receipts(block)
+    methods = [call["method"] for request in rpc_server.requests for call in request]
+    assert methods == ["eth_getTransactionReceipt"] * 3
+
+
+def test_get_block_receipts():
+    server = StandInRPCServer(supports_block_receipts=True)
+    try:
+        client = Web3BatchClient(MultiProvider(server.url))
+        block = client.get_blocks([16])[0]
+        receipts = client.get_block_receipts(block)
+
+        assert [receipt.transactionHash.hex() for receipt in receipts] == TX_HASHES
+        assert [call["method"] for call in server.requests[-1]] == [
+            "eth_getBlockReceipts"
+        ]
+    finally:
+        server.close()
+
+
+def test_batch_request_error(rpc_server):
+    client = Web3BatchClient(HTTPProvider(rpc_server.url))
+    with pytest.raises(Web3BatchRequestError):
+        client.get_results([("eth_unknownMethod", [])], lambda result: result)
+
+
+def test_call_contract_functions(rpc_server):
+    web3 = Web3(HTTPProvider(rpc_server.url))
+    token = web3.eth.contract(
+        address=Web3.toChecksumAddress("0x" + "cc" * 20), abi=BALANCE_OF_ABI
+    )
+    accounts = [Web3.toChecksumAddress(f"0x{i:040x}") for i in range(1, 4)]
+    client = Web3BatchClient(web3.provider, batch_size=2)
+
+    balances = client.call_contract_functions(
+        [token.functions.balanceOf(account) for account in accounts], 16
+    )
+    assert balances == [1, 2, 3]
+    # All calls read the same block, 3 calls with a batch size of 2 take 2 round trips
+    calls = [call for request in rpc_server.requests for call in request]
+    assert [call["params"][1] for call in calls] == ["0x10"] * 3
+    assert [len(request) for request in rpc_server.requests] == [2, 1]
+
+
+def test_call_contract_functions_return_exceptions(rpc_server):
+    web3 = Web3(HTTPProvider(rpc_server.url))
+    token, reverting_token = [
+        web3.eth.contract(address=Web3.toChecksumAddress(address), abi=BALANCE_OF_ABI)
+        for address in ("0x" + "cc" * 20, REVERTING_CONTRACT)
+    ]
+    account = Web3.toChecksumAddress(f"0x{1:040x}")
+    client = Web3BatchClient(web3.provider)
+    contract_functions = [
+        token.functions.balanceOf(account),
+        reverting_token.functions.balanceOf(account),
+    ]
+
+    with pytest.raises(Web3BatchRequestError):
+        client.call_contract_functions(contract_functions)
+    balance, error = client.call_contract_functions(
+        contract_functions, return_exceptions=True
+    )
+    assert balance == 1
+    assert isinstance(error, Web3BatchRequestError)
+    assert error.error["message"] == "execution reverted"
@@ -7,6 +7,7 @@ from typing import Optional
 from src.utils import helpers
 from src.utils.config import shared_config
 from src.utils.multi_provider import MultiProvider
+from src.utils.web3_batch_client import Web3BatchClient
 from web3 import HTTPProvider, Web3
 
 web3: Optional[Web3] = None
@@ -32,3 +33,15 @@ def get_eth_web3():
         eth_web3 = Web3(MultiProvider(shared_config["web3"]["eth_provider_url"]))
         return eth_web3
     return eth_web3
+
+
+web3_batch_client: Optional[Web3BatchClient] = None
+
+
+def get_web3_batch_client():
+    # pylint: disable=W0603
+    global web3_batch_client
+    if not web3_batch_client:
+        web3_batch_client = Web3BatchClient(get_web3().provider)
+        return web3_batch_client
+    return web3_batch_client